@@ -3,13 +3,17 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 from datetime import timedelta
-from extensions import db, bcrypt
+from extensions import bcrypt
+from db_config import init_database
+from sharding import init_sharding
+from json_codec import CodecJSONProvider
 
 # Load environment variables
 load_dotenv()
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -23,6 +27,16 @@ default_db_path = f'sqlite:///{os.path.join(instance_path, "database.db")}'
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', default_db_path)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool for threaded workers and SQLite maintenance (see db_config.py)
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+app.config['DB_MAINTENANCE_INTERVAL'] = int(os.getenv('DB_MAINTENANCE_INTERVAL', 3600))
+app.config['DB_WRITE_QUEUE'] = os.getenv('DB_WRITE_QUEUE', 'false').lower() == 'true'
+
+# Per-user shard databases for materials, 0 keeps everything in one file (see sharding.py)
+app.config['DB_SHARDS'] = int(os.getenv('DB_SHARDS', 0))
+app.config['DB_SHARD_DIR'] = os.getenv('DB_SHARD_DIR')
+
 # Session configuration (24 hour timeout)
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 app.config['SESSION_COOKIE_HTTPONLY'] = True
@@ -30,7 +44,8 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 
 # Initialize extensions with app
-db.init_app(app)
+init_database(app)
+init_sharding(app)
 bcrypt.init_app(app)
 
 # CORS configuration for frontend (localhost:5173)
@@ -38,7 +53,7 @@ CORS(app,
      origins=['http://localhost:5173'],
      supports_credentials=True,
      allow_headers=['Content-Type', 'Authorization'],
-     methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+     methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
 
 # Import models (must be after db initialization)
 import models
@@ -48,11 +63,18 @@ from routes.auth import auth_bp
 from routes.generate import generate_bp
 from routes.materials import materials_bp
 from routes.export import export_bp
+from routes.bulk import bulk_bp, resume_ingestions
+from routes.search import search_bp
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(generate_bp)
 app.register_blueprint(materials_bp)
 app.register_blueprint(export_bp)
+app.register_blueprint(bulk_bp)
+app.register_blueprint(search_bp)
+
+# Bulk ingestions interrupted by a restart continue in the background
+resume_ingestions(app)
 
 # Test route
 @app.route('/api/health', methods=['GET'])
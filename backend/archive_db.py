@@ -0,0 +1,38 @@
+"""
+Cold archive script
+Moves materials that haven't been opened or changed for a number of months
+into the archived_materials table, in batches. Archived materials stay in
+the listing and are restored automatically when opened.
+"""
+import argparse
+from app import app
+from sharding import shard_indexes, use_shard
+from services.cold_storage import archive_materials, restore_materials, DEFAULT_ARCHIVE_MONTHS, DEFAULT_BATCH_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive or restore unused materials')
+    parser.add_argument('--months', type=int, default=DEFAULT_ARCHIVE_MONTHS,
+                        help=f'archive materials unused for this many months (default {DEFAULT_ARCHIVE_MONTHS})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'materials per transaction (default {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--limit', type=int, help='maximum number of materials of each type')
+    parser.add_argument('--restore', action='store_true', help='restore all archived materials instead')
+    parser.add_argument('--user', type=int, help='with --restore, only restore this user ID')
+    args = parser.parse_args()
+
+    with app.app_context():
+        # Each shard database has its own archive
+        for shard in [None, *shard_indexes(app)]:
+            with use_shard(shard):
+                name = 'main database' if shard is None else f'shard {shard}'
+                if args.restore:
+                    restored = restore_materials(batch_size=args.batch_size, user_id=args.user)
+                    print(f"{name}: restored {restored} materials.")
+                    continue
+
+                archived = archive_materials(months=args.months, batch_size=args.batch_size, limit=args.limit)
+                print(f"{name}: archived {archived['test']} tests and {archived['study_material']} study materials "
+                      f"unused for {args.months} months.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Database backup script
+Takes online snapshots of the database (and shard databases) without
+stopping the app, verifies backups and restores them.
+Restoring replaces the database files, stop the app first.
+"""
+import argparse
+import os
+from datetime import datetime
+from app import app, instance_path
+from extensions import db
+from sharding import shard_indexes, shard_path
+from services.backup import (
+    BackupError, DEFAULT_STEP_PAGES, DEFAULT_STEP_PAUSE,
+    full_backup, incremental_backup, restore_backup, verify_backup
+)
+
+def database_files():
+    """Database name in the backup -> file, the main database first"""
+    with app.app_context():
+        files = [db.engine.url.database, *(shard_path(app, index) for index in shard_indexes(app))]
+    return {os.path.basename(path): path for path in files if os.path.exists(path)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Back up, verify and restore the database')
+    parser.add_argument('--output', default=os.path.join(instance_path, 'backups'),
+                        help='backup root directory (default instance/backups)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='add changed pages to the incremental backup set instead of a new full backup')
+    parser.add_argument('--step-pages', type=int, default=DEFAULT_STEP_PAGES, help='pages copied per step')
+    parser.add_argument('--step-pause', type=float, default=DEFAULT_STEP_PAUSE, help='seconds between steps')
+    parser.add_argument('--verify', metavar='DIR', help='restore every snapshot of a backup into a temporary '
+                                                         'directory and check it')
+    parser.add_argument('--restore', metavar='DIR', help='replace the databases with a backup (stop the app first)')
+    parser.add_argument('--snapshot', type=int, help='with --restore, snapshot index of an incremental backup')
+    args = parser.parse_args()
+
+    try:
+        if args.verify:
+            for name, snapshots in verify_backup(args.verify).items():
+                print(f"  {name}: {snapshots} snapshots verified")
+            return
+
+        files = database_files()
+
+        if args.restore:
+            for name, path in files.items():
+                entry = restore_backup(args.restore, name, path, snapshot=args.snapshot)
+                print(f"  {name}: restored snapshot of {entry['created_at']}")
+            return
+
+        if args.incremental:
+            directory = os.path.join(args.output, 'incremental')
+            backup = incremental_backup
+        else:
+            directory = os.path.join(args.output, datetime.utcnow().strftime('%Y%m%d-%H%M%S'))
+            backup = full_backup
+
+        for name, path in files.items():
+            entry = backup(path, directory, name, step_pages=args.step_pages, step_pause=args.step_pause)
+            changed = entry.get('changed_pages', entry['pages'])
+            print(f"  {name}: {changed} of {entry['pages']} pages in {entry['seconds']} s -> {entry['file']}")
+        print(f"Backup written to {directory}")
+
+    except BackupError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Benchmarks package
+Standalone micro-benchmarks, run as: python -m benchmarks.<name>
+"""
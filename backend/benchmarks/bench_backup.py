@@ -0,0 +1,112 @@
+"""
+Backup Benchmark
+Save latency of a writer thread while the database is copied with a plain
+file copy (not a consistent snapshot), VACUUM INTO, the backup API in one
+step and the paced backup API of services/backup.py, plus the size of an
+incremental snapshot after the writes
+
+Run: python -m benchmarks.bench_backup
+"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import Flask
+from sqlalchemy import insert
+
+from db_config import init_database
+from extensions import db
+from models import User, StudyMaterial
+from routes.generate import save_study_material_to_database
+from services.backup import incremental_backup, snapshot_database
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['DB_MAINTENANCE_INTERVAL'] = 0
+    init_database(app)
+    return app
+
+def seed(user_id, num_materials, rng):
+    words = 'šūna kodols enerģija process sistēma vēsture valsts klimats augsne ūdens'.split()
+    db.session.execute(insert(StudyMaterial), [
+        {'user_id': user_id, 'title': f'Materiāls {i}',
+         'content': '{"summary": "%s", "terms": []}' % ' '.join(rng.choice(words) for _ in range(600))}
+        for i in range(num_materials)
+    ])
+    db.session.commit()
+
+def _writer(app, user_id, stop, latencies):
+    material = {'summary': '<p>Jauns materiāls</p>', 'terms': [{'name': 'Termins', 'definition': 'Definīcija'}]}
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            save_study_material_to_database(user_id, 'Jauns', material)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.002)
+        db.session.remove()
+
+def _vacuum_into(source, target):
+    connection = sqlite3.connect(source)
+    connection.execute('VACUUM INTO ?', (target,))
+    connection.close()
+
+def _backup_one_step(source, target):
+    snapshot_database(source, target, step_pages=-1, step_pause=0)
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+def measure(app, user_id, path, name, copy):
+    stop, latencies = threading.Event(), []
+    writer = threading.Thread(target=_writer, args=(app, user_id, stop, latencies))
+    writer.start()
+    time.sleep(0.2)
+
+    start = time.perf_counter()
+    copy()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    writer.join()
+
+    print(f"  {name:<22} {elapsed:>7.2f} s {len(latencies):>6} saves {_percentile(latencies, 0.5):>7.2f} ms "
+          f"{_percentile(latencies, 0.99):>8.2f} ms {max(latencies) * 1000:>8.2f} ms")
+
+def run(num_materials=20000):
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        app = make_app(path)
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@test.lv', password_hash='-')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            seed(user_id, num_materials, rng)
+
+        print(f"{os.path.getsize(path) / 1024 / 1024:.0f} MB database, a writer saves a study material every 2 ms")
+        print(f"  {'copy':<22} {'time':>9} {'writes':>12} {'p50':>10} {'p99':>11} {'max':>11}")
+        target = lambda name: os.path.join(directory, name)
+        measure(app, user_id, path, 'file copy (torn)', lambda: shutil.copyfile(path, target('copy.db')))
+        measure(app, user_id, path, 'VACUUM INTO', lambda: _vacuum_into(path, target('vacuum.db')))
+        measure(app, user_id, path, 'backup API, 1 step', lambda: _backup_one_step(path, target('one_step.db')))
+        measure(app, user_id, path, 'backup API, paced', lambda: snapshot_database(path, target('paced.db')))
+
+        backups = target('backups')
+        incremental_backup(path, backups, 'bench.db', step_pause=0)
+        measure(app, user_id, path, 'incremental, paced', lambda: incremental_backup(path, backups, 'bench.db'))
+        base, delta = (os.path.getsize(os.path.join(backups, name)) for name in ('bench.db.base', 'bench.db.delta-0001'))
+        print(f"  incremental snapshot: {delta / 1024:.0f} KB delta next to a {base / 1024 / 1024:.0f} MB base")
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,130 @@
+"""
+Concurrency Benchmark
+Runs concurrent test saves and material reads from worker threads against
+a SQLite file with the default engine settings, with db_config (WAL,
+synchronous=NORMAL, busy_timeout, pool sized for the workers) and with
+db_config plus the single-writer commit queue
+
+Run: python -m benchmarks.bench_concurrency
+"""
+import os
+import tempfile
+import threading
+import time
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.payloads import make_test_payload
+from db_config import init_database
+from extensions import db
+from models import User
+from routes.generate import save_test_to_database
+from services.material_listing import list_page, serialize_page
+from services.material_tree import load_test_tree
+from services.parser import clean_test_data
+from services.write_coordinator import EXTENSION_KEY
+
+def make_app(path, tuned, write_queue=False):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['DB_MAINTENANCE_INTERVAL'] = 0
+    app.config['DB_WRITE_QUEUE'] = write_queue
+    if tuned:
+        init_database(app)
+    else:
+        db.init_app(app)
+    return app
+
+def _worker(app, user_id, test_data, iterations, barrier, results):
+    saves, reads, errors = [], [], 0
+
+    with app.app_context():
+        barrier.wait()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            try:
+                test_id = save_test_to_database(user_id, 'Benchmark', test_data)
+                saves.append(time.perf_counter() - start)
+            except OperationalError:
+                db.session.rollback()
+                errors += 1
+                continue
+
+            start = time.perf_counter()
+            rows, _ = list_page(user_id)
+            serialize_page(rows)
+            load_test_tree(test_id, user_id)
+            db.session.commit()
+            reads.append(time.perf_counter() - start)
+        db.session.remove()
+
+    results.append((saves, reads, errors))
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+def run_config(tuned, write_queue, threads, iterations, test_data):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'), tuned, write_queue)
+
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@test.lv', password_hash='-')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        barrier = threading.Barrier(threads)
+        results = []
+        workers = [
+            threading.Thread(target=_worker, args=(app, user_id, test_data, iterations, barrier, results))
+            for _ in range(threads)
+        ]
+
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        coordinator = app.extensions.get(EXTENSION_KEY)
+        batches = None
+        if coordinator:
+            coordinator.stop()
+            batches = coordinator.batches
+
+        with app.app_context():
+            db.engine.dispose()
+
+    saves = [value for result in results for value in result[0]]
+    reads = [value for result in results for value in result[1]]
+    errors = sum(result[2] for result in results)
+    return {
+        'throughput': len(saves) / elapsed,
+        'save_p50': _percentile(saves, 0.5),
+        'save_p99': _percentile(saves, 0.99),
+        'read_p50': _percentile(reads, 0.5),
+        'read_p99': _percentile(reads, 0.99),
+        'errors': errors,
+        'batches': batches
+    }
+
+def run(threads=8, iterations=40, num_questions=20):
+    test_data = clean_test_data(make_test_payload(num_questions))
+
+    print(f"{threads} threads x {iterations} saves of a {num_questions}-question test, each followed by reads")
+    for name, tuned, write_queue in (('default engine', False, False),
+                                     ('db_config', True, False),
+                                     ('write queue', True, True)):
+        stats = run_config(tuned, write_queue, threads, iterations, test_data)
+        extra = f", {stats['batches']} commits" if write_queue else ''
+        print(f"  {name:<15} {stats['throughput']:7.1f} saves/s, "
+              f"save p50 {stats['save_p50']:7.2f} ms, p99 {stats['save_p99']:8.2f} ms, "
+              f"read p50 {stats['read_p50']:6.2f} ms, p99 {stats['read_p99']:7.2f} ms, "
+              f"{stats['errors']} lock errors{extra}")
+
+if __name__ == '__main__':
+    run()
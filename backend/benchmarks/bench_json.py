@@ -0,0 +1,33 @@
+"""
+JSON Codec Benchmark
+Compares installed JSON backends on a large study material and a 50-question test
+
+Run: python -m benchmarks.bench_json
+"""
+import timeit
+
+from benchmarks.payloads import make_test_payload, make_study_material_payload
+from json_codec import available_codecs
+from services.parser import clean_test_data
+
+def run(number=500):
+    study_material = make_study_material_payload()
+    test = {'success': True, 'type': 'test', 'id': 1, 'title': 'Tests', **clean_test_data(make_test_payload(50))}
+
+    for codec in available_codecs():
+        content = codec.dumps(study_material)
+        test_body = codec.dumps(test)
+
+        results = {
+            'decode study material': timeit.timeit(lambda: codec.loads(content), number=number),
+            'encode study material': timeit.timeit(lambda: codec.dumps_bytes(study_material), number=number),
+            'encode 50-question test': timeit.timeit(lambda: codec.dumps_bytes(test), number=number),
+            'decode 50-question test': timeit.timeit(lambda: codec.loads(test_body), number=number),
+        }
+
+        print(f"{codec.name} (study material {len(content) // 1024} KB, test {len(test_body) // 1024} KB)")
+        for label, seconds in results.items():
+            print(f"  {label:24s} {seconds / number * 1e6:8.1f} µs/op")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,161 @@
+"""
+Listing Benchmark
+Times GET /api/materials for a user with 1k and 10k materials with the
+previous full listing built from lazy-loaded relationships and with
+keyset pages from the first and from the last part of the list
+
+Run: python -m benchmarks.bench_listing
+"""
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event, insert
+from sqlalchemy.orm import undefer
+
+from benchmarks.payloads import make_study_material_payload
+from extensions import db
+from json_codec import dumps
+from models import User, Test, StudyMaterial, Assignment, Question, QuestionType
+from services.material_listing import list_page, serialize_page
+from services.material_preview import listing_columns
+
+ASSIGNMENTS_PER_TEST = 3
+QUESTIONS_PER_ASSIGNMENT = 4
+
+def list_materials_lazy(user_id):
+    """Previous listing: counts read from each test's lazy-loaded relationships"""
+    materials = []
+
+    for test in Test.query.filter_by(user_id=user_id).order_by(Test.created_at.desc()).all():
+        materials.append({
+            'id': test.id,
+            'type': 'test',
+            'title': test.title,
+            'created_at': test.created_at.isoformat(),
+            'assignments_count': len(test.assignments),
+            'total_questions': sum(len(a.questions) for a in test.assignments)
+        })
+
+    study_materials = StudyMaterial.query.options(undefer(StudyMaterial.content)) \
+        .filter_by(user_id=user_id).order_by(StudyMaterial.created_at.desc()).all()
+    for material in study_materials:
+        materials.append({
+            'id': material.id,
+            'type': 'study_material',
+            'title': material.title,
+            'created_at': material.created_at.isoformat(),
+            'terms_count': len(material.content_data.get('terms', []))
+        })
+
+    materials.sort(key=lambda x: x['created_at'], reverse=True)
+    return materials
+
+def first_page(user_id):
+    """First page of the keyset listing"""
+    rows, _ = list_page(user_id)
+    return serialize_page(rows)
+
+def deep_page(user_id, cursor):
+    """Keyset page that starts after the given cursor"""
+    rows, _ = list_page(user_id, cursor=cursor)
+    return serialize_page(rows)
+
+def last_cursor(user_id):
+    """Cursor of a page near the end of the list, reached by following next_cursor"""
+    cursor = None
+    while True:
+        rows, next_cursor = list_page(user_id, limit=100, cursor=cursor)
+        if next_cursor is None:
+            return cursor
+        cursor = next_cursor
+
+def seed(user_id, num_materials):
+    """Insert num_materials materials, half tests with trees and half study materials"""
+    start = datetime(2024, 1, 1)
+    num_tests = num_materials // 2
+    content_data = make_study_material_payload(num_terms=20, summary_paragraphs=3)
+    content = dumps(content_data)
+    columns = listing_columns(content_data)
+
+    test_ids = db.session.scalars(
+        insert(Test).returning(Test.id, sort_by_parameter_order=True),
+        [
+            {'user_id': user_id, 'title': f'Tests {i}', 'created_at': start + timedelta(minutes=2 * i)}
+            for i in range(num_tests)
+        ]
+    ).all()
+
+    assignment_ids = db.session.scalars(
+        insert(Assignment).returning(Assignment.id, sort_by_parameter_order=True),
+        [
+            {'test_id': test_id, 'title': f'{n + 1}. uzdevums', 'description': '', 'max_points': 10,
+             'order_number': n + 1}
+            for test_id in test_ids for n in range(ASSIGNMENTS_PER_TEST)
+        ]
+    ).all()
+
+    db.session.execute(insert(Question), [
+        {'assignment_id': assignment_id, 'question_text': 'Jautājums?', 'question_type': QuestionType.short_answer,
+         'correct_answer': 'Atbilde', 'points': 2, 'order_number': n + 1}
+        for assignment_id in assignment_ids for n in range(QUESTIONS_PER_ASSIGNMENT)
+    ])
+
+    db.session.execute(insert(StudyMaterial), [
+        dict(columns, user_id=user_id, title=f'Materiāls {i}', content=content,
+             created_at=start + timedelta(minutes=2 * i + 1))
+        for i in range(num_materials - num_tests)
+    ])
+
+    db.session.commit()
+
+def _time(listing, number):
+    """Median latency in ms, number of SQL statements and JSON size in KB of one listing"""
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    timings = []
+    for _ in range(number):
+        statements.clear()
+        event.listen(db.engine, 'before_cursor_execute', count)
+        start = time.perf_counter()
+        materials = listing()
+        timings.append(time.perf_counter() - start)
+        event.remove(db.engine, 'before_cursor_execute', count)
+        db.session.expunge_all()
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, len(statements), len(dumps(materials)) / 1024
+
+def run(sizes=(1000, 10000), number=5):
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(directory, "bench.db")}'
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+
+            print(f"Material listing, median of {number} runs (SQLite file)")
+            for size in sizes:
+                user = User(email=f'bench{size}@test.lv', password_hash='-')
+                db.session.add(user)
+                db.session.commit()
+                user_id = user.id
+                seed(user_id, size)
+                cursor = last_cursor(user_id)
+
+                for name, listing in (('full, lazy relationships', lambda: list_materials_lazy(user_id)),
+                                      ('first page', lambda: first_page(user_id)),
+                                      ('last page', lambda: deep_page(user_id, cursor))):
+                    ms, queries, kb = _time(listing, number)
+                    print(f"  {size:>6} materials, {name:<24}: {ms:9.2f} ms, {queries:>6} queries, {kb:8.1f} KB")
+
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    run()
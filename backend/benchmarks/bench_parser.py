@@ -0,0 +1,29 @@
+"""
+Parser Benchmark
+Times validation and cleaning of a 50-question test response
+
+Run: python -m benchmarks.bench_parser
+"""
+import copy
+import timeit
+
+from benchmarks.payloads import make_test_payload
+from services.parser import validate_test_response, clean_test_data, validate_and_clean_test
+
+def _time(function, payload, number):
+    """Time function on a fresh copy of the payload per run, in µs/run"""
+    copies = [copy.deepcopy(payload) for _ in range(number)]
+    return timeit.timeit(lambda: function(copies.pop()), number=number) / number * 1e6
+
+def run(num_questions=50, number=2000):
+    payload = make_test_payload(num_questions)
+
+    print(f"{num_questions} questions, {number} runs")
+    print(f"  validate only:             {_time(validate_test_response, payload, number):8.1f} µs/run")
+    print(f"  clean only:                {_time(clean_test_data, payload, number):8.1f} µs/run")
+    print(f"  two-pass validate + clean: "
+          f"{_time(lambda data: clean_test_data(validate_test_response(data)), payload, number):8.1f} µs/run")
+    print(f"  single-pass compiled:      {_time(validate_and_clean_test, payload, number):8.1f} µs/run")
+
+if __name__ == '__main__':
+    run()
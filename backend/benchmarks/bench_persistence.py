@@ -0,0 +1,94 @@
+"""
+Persistence Benchmark
+Times saving a generated 50-question test to a SQLite file with the
+per-row flush writer and with the bulk tree writer
+
+Run: python -m benchmarks.bench_persistence
+"""
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from benchmarks.payloads import make_test_payload
+from extensions import db
+from models import User, Test, Assignment, Question, QuestionOption, QuestionType
+from routes.generate import save_test_to_database
+from services.parser import clean_test_data
+
+def save_test_per_row(user_id, title, test_data):
+    """Previous writer: flush after every assignment and question to get its ID"""
+    test = Test(user_id=user_id, title=title)
+    db.session.add(test)
+    db.session.flush()
+
+    for assignment_data in test_data['assignments']:
+        assignment = Assignment(
+            test_id=test.id,
+            title=assignment_data['title'],
+            description=assignment_data['description'],
+            max_points=assignment_data['max_points'],
+            order_number=assignment_data['order_number']
+        )
+        db.session.add(assignment)
+        db.session.flush()
+
+        for question_data in assignment_data['questions']:
+            question = Question(
+                assignment_id=assignment.id,
+                question_text=question_data['question_text'],
+                question_type=QuestionType[question_data['question_type']],
+                correct_answer=question_data['correct_answer'],
+                points=question_data['points'],
+                order_number=question_data['order_number']
+            )
+            db.session.add(question)
+            db.session.flush()
+
+            for i, option_data in enumerate(question_data['options']):
+                db.session.add(QuestionOption(
+                    question_id=question.id,
+                    option_text=option_data['option_text'],
+                    is_correct=option_data['is_correct'],
+                    order_number=i + 1
+                ))
+
+    db.session.commit()
+    return test.id
+
+def _time(writer, user_id, test_data, number):
+    """Median write latency in ms"""
+    timings = []
+    for _ in range(number):
+        start = time.perf_counter()
+        writer(user_id, 'Benchmark', test_data)
+        timings.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+def run(num_questions=50, number=50):
+    test_data = clean_test_data(make_test_payload(num_questions))
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(directory, "bench.db")}'
+        db.init_app(app)
+
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@test.lv', password_hash='-')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+            print(f"{num_questions} questions, median of {number} saves (SQLite file)")
+            print(f"  per-row flush:  {_time(save_test_per_row, user_id, test_data, number):7.2f} ms")
+            print(f"  bulk writer:    {_time(save_test_to_database, user_id, test_data, number):7.2f} ms")
+
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,152 @@
+"""
+Search Benchmark
+Times full-text search and title autocomplete for a user with 100k questions
+against the FTS5 index, next to a LIKE scan of the same text
+
+Run: python -m benchmarks.bench_search
+"""
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import insert, or_, text
+
+from db_config import init_database
+from extensions import db
+from models import User, Test, Assignment, Question, QuestionType
+from services.search_index import SEARCH_TABLE, build_match_query, search, suggest
+
+QUESTIONS_PER_ASSIGNMENT = 10
+ASSIGNMENTS_PER_TEST = 5
+
+VOCABULARY_SIZE = 20000
+ZIPF_EXPONENT = 1.07  # Word frequencies of natural language text follow Zipf's law
+SYLLABLES = ('ka', 'ra', 'mi', 'lo', 'šū', 'na', 'te', 'vē', 'du', 'ko', 'si', 'ļa', 'pe', 'zī', 'gu', 'ņe',
+             'bo', 'tā', 'ri', 'me', 'sa', 'ču', 'li', 'ža')
+
+def make_vocabulary(rng):
+    """Distinct pseudo-words, most frequent first, and their cumulative Zipf weights"""
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    words = sorted(words)
+    rng.shuffle(words)
+
+    total, cum_weights = 0.0, []
+    for rank in range(1, VOCABULARY_SIZE + 1):
+        total += 1 / rank ** ZIPF_EXPONENT
+        cum_weights.append(total)
+    return words, cum_weights
+
+def make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['DB_MAINTENANCE_INTERVAL'] = 0
+    init_database(app)
+    return app
+
+def _sentence(rng, vocabulary, length):
+    words, cum_weights = vocabulary
+    return ' '.join(rng.choices(words, cum_weights=cum_weights, k=length)).capitalize() + '?'
+
+def seed(user_id, num_questions, rng, vocabulary):
+    """Insert tests with num_questions questions in total, indexed by the search triggers"""
+    per_test = QUESTIONS_PER_ASSIGNMENT * ASSIGNMENTS_PER_TEST
+    num_tests = num_questions // per_test
+    created_at = datetime(2025, 1, 1)
+
+    db.session.execute(insert(Test), [
+        {'id': test_id, 'user_id': user_id, 'title': _sentence(rng, vocabulary, 3)[:-1], 'created_at': created_at}
+        for test_id in range(1, num_tests + 1)
+    ])
+    db.session.execute(insert(Assignment), [
+        {'id': (test_id - 1) * ASSIGNMENTS_PER_TEST + a + 1, 'test_id': test_id,
+         'title': f'{a + 1}. uzdevums', 'order_number': a + 1}
+        for test_id in range(1, num_tests + 1) for a in range(ASSIGNMENTS_PER_TEST)
+    ])
+    db.session.execute(insert(Question), [
+        {'assignment_id': assignment_id, 'question_text': _sentence(rng, vocabulary, rng.randint(8, 20)),
+         'question_type': QuestionType.short_answer, 'correct_answer': '-', 'order_number': q + 1}
+        for assignment_id in range(1, num_tests * ASSIGNMENTS_PER_TEST + 1)
+        for q in range(QUESTIONS_PER_ASSIGNMENT)
+    ])
+    db.session.commit()
+
+def like_scan(user_id, words):
+    """Search without the index: every word as a LIKE pattern over titles and question texts"""
+    question_filter = [Question.question_text.like(f'%{word}%') for word in words]
+    title_filter = [Test.title.like(f'%{word}%') for word in words]
+    rows = (
+        db.session.query(Test.id).distinct()
+        .join(Assignment, Assignment.test_id == Test.id)
+        .join(Question, Question.assignment_id == Assignment.id)
+        .filter(Test.user_id == user_id, or_(*question_filter, *title_filter))
+        .limit(20).all()
+    )
+    return rows
+
+def _hits(user_id, query):
+    """Number of index rows matching a query"""
+    return db.session.execute(
+        text(f'SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match AND user_id = :user_id'),
+        {'match': build_match_query(query), 'user_id': user_id}
+    ).scalar()
+
+def _time(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+def run(num_questions=100_000, repeat=50):
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    words = vocabulary[0]
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(os.path.join(directory, 'bench.db'))
+
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@test.lv', password_hash='-')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+            start = time.perf_counter()
+            seed(user_id, num_questions, rng, vocabulary)
+            print(f"Seeded {num_questions} questions with index triggers in {time.perf_counter() - start:.1f} s")
+
+            cases = (
+                ('top-10 word', words[9]),
+                ('top-100 word', words[99]),
+                ('top-1000 word', words[999]),
+                ('rare word', words[9999]),
+                ('two words', f'{words[99]} {words[299]}'),
+                ('prefix 3 chars', words[199][:3]),
+                ('prefix 5 chars', words[199][:5]),
+                ('no match', 'kvantu'),
+            )
+            print(f"  {'query':<16} {'hits':>6} {'FTS p50':>9} {'FTS p95':>9} {'LIKE p50':>10}")
+            for name, query in cases:
+                hits = _hits(user_id, query)
+                p50, p95 = _time(lambda: search(user_id, query), repeat)
+                like_p50, _ = _time(lambda: like_scan(user_id, query.split()), max(3, repeat // 10))
+                print(f"  {name:<16} {hits:>6} {p50:>6.2f} ms {p95:>6.2f} ms {like_p50:>7.1f} ms")
+
+            prefix = words[199][:3]
+            p50, p95 = _time(lambda: suggest(user_id, prefix), repeat)
+            print(f"  {'suggest':<16} {len(suggest(user_id, prefix)):>6} {p50:>6.2f} ms {p95:>6.2f} ms")
+
+            db.session.remove()
+            db.engine.dispose()
+
+if __name__ == '__main__':
+    run()
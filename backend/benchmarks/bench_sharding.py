@@ -0,0 +1,86 @@
+"""
+Sharding Benchmark
+Measures test saves per second of worker processes, each writing for its
+own user, with all users in one SQLite file and spread over 2 and 4 shard
+database files. With synchronous=FULL every commit waits for fsync while
+holding the write lock, which is where separate files help most.
+
+Run: python -m benchmarks.bench_sharding
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from benchmarks.payloads import make_test_payload
+from db_config import init_database
+from extensions import db
+from models import User
+from routes.generate import save_test_to_database
+from services.parser import clean_test_data
+from sharding import init_sharding, rebalance, use_shard
+
+def make_app(directory, shards, synchronous='NORMAL'):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(directory, "main.db")}'
+    app.config['DB_MAINTENANCE_INTERVAL'] = 0
+    app.config['DB_SHARDS'] = shards
+    app.config['DB_SHARD_DIR'] = directory
+    app.config['SQLITE_PRAGMAS'] = {'synchronous': synchronous}
+    init_database(app)
+    init_sharding(app)
+    return app
+
+def _worker(directory, shards, synchronous, user_id, test_data, iterations, barrier, results):
+    app = make_app(directory, shards, synchronous)
+    with app.app_context():
+        shard = db.session.get(User, user_id).shard
+        with use_shard(shard):
+            barrier.wait()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                save_test_to_database(user_id, 'Benchmark', test_data)
+            results.put(time.perf_counter() - start)
+
+def run_config(shards, synchronous, processes, iterations, test_data):
+    with tempfile.TemporaryDirectory() as directory:
+        app = make_app(directory, shards, synchronous)
+        with app.app_context():
+            db.create_all()
+            db.session.add_all([User(email=f'bench{i}@test.lv', password_hash='-') for i in range(processes)])
+            db.session.commit()
+            user_ids = [user.id for user in User.query.order_by(User.id)]
+            rebalance(app)
+            db.engine.dispose()
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [context.Process(target=_worker, args=(directory, shards, synchronous, user_id, test_data,
+                                                         iterations, barrier, results))
+                   for user_id in user_ids]
+        for worker in workers:
+            worker.start()
+
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        durations = [results.get() for _ in workers]
+
+    saves = processes * iterations
+    name = 'one file' if shards == 0 else f'{shards} shards'
+    print(f"  {synchronous:<7} {name:<10} {saves / elapsed:>9.0f} saves/s {max(durations):>8.2f} s slowest worker")
+
+def run(processes=8, iterations=100):
+    test_data = clean_test_data(make_test_payload(num_questions=20, num_assignments=2))
+    print(f"{processes} processes x {iterations} test saves (20 questions each), {os.cpu_count()} CPUs")
+    for synchronous in ('NORMAL', 'FULL'):
+        for shards in (0, 2, 4):
+            run_config(shards, synchronous, processes, iterations, test_data)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,155 @@
+"""
+Storage Benchmark
+Compares database size and read latency of study material contents and long
+answers stored as plain text, deflate-compressed without a dictionary and
+compressed with the shared preset dictionary (CompressedText)
+
+Run: python -m benchmarks.bench_storage
+"""
+import os
+import random
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.orm import undefer
+
+from db_config import init_database
+from extensions import db
+from json_codec import dumps
+from models import User, StudyMaterial
+from services.material_tree import load_test_tree
+from services.material_preview import listing_columns
+from services.search_index import drop_search_index
+from services.text_compression import COMPRESSION_LEVEL, MIN_COMPRESSED_SIZE, WINDOW_BITS, compress_text
+
+WORDS = (
+    'šūna kodols membrāna fotosintēze hlorofils elpošana enerģija olbaltumviela ferments gēns hromosoma '
+    'evolūcija populācija ekosistēma organisms baktērija vīruss imunitāte asinsrite sirds plaušas nervu '
+    'sistēma smadzenes hormoni vielmaiņa ūdens skābeklis ogleklis augsne klimats atmosfēra vēsture valsts '
+    'process rezultātā tāpēc jo tomēr savukārt piemēram galvenais nozīme īpašība funkcija cēlonis sekas '
+    'un ir kas tiek var vai ar par no uz kā arī to tas šī šis kuras kurā lai nav ļoti daudz mazāk vairāk'
+).split()
+
+QUESTIONS_PER_TEST = 20
+
+def _text(rng, num_words):
+    return ' '.join(rng.choice(WORDS) for _ in range(num_words)).capitalize() + '.'
+
+def make_content(rng):
+    """Study material content of about 5 KB with varied wording"""
+    return {
+        'summary': ''.join(f'<p>{_text(rng, 60)}</p>' for _ in range(4)),
+        'terms': [{'name': _text(rng, 2)[:-1], 'definition': _text(rng, 15)} for _ in range(12)]
+    }
+
+def _deflate(value):
+    """compress_text without the preset dictionary"""
+    data = value.encode('utf-8')
+    if len(data) < MIN_COMPRESSED_SIZE:
+        return value
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, WINDOW_BITS)
+    compressed = compressor.compress(data) + compressor.flush()
+    return bytes([0]) + compressed if len(compressed) + 1 < len(data) else value
+
+def seed(user_id, contents, answers, encode):
+    """Insert study materials and tests with long answers, stored values encoded by encode"""
+    created_at = datetime(2025, 1, 1)
+    db.session.execute(
+        text('INSERT INTO study_materials (id, user_id, title, content, terms_count, summary_preview, '
+             'created_at, version, updated_at) VALUES (:id, :user_id, :title, :content, :terms_count, '
+             ':summary_preview, :created_at, 1, :created_at)'),
+        [dict(listing_columns(content_data), id=i + 1, user_id=user_id, title=f'Materiāls {i}',
+              content=encode(dumps(content_data)), created_at=created_at)
+         for i, content_data in enumerate(contents)]
+    )
+
+    num_tests = len(answers) // QUESTIONS_PER_TEST
+    db.session.execute(
+        text('INSERT INTO tests (id, user_id, title, created_at, version, updated_at) '
+             'VALUES (:id, :user_id, :title, :created_at, 1, :created_at)'),
+        [{'id': i + 1, 'user_id': user_id, 'title': f'Tests {i}', 'created_at': created_at} for i in range(num_tests)]
+    )
+    db.session.execute(
+        text("INSERT INTO assignments (id, test_id, title, order_number) VALUES (:id, :id, '1. uzdevums', 1)"),
+        [{'id': i + 1} for i in range(num_tests)]
+    )
+    db.session.execute(
+        text("INSERT INTO questions (assignment_id, question_text, question_type, correct_answer, points, order_number) "
+             "VALUES (:assignment_id, 'Apraksti procesu.', 'long_answer', :answer, 5, :order_number)"),
+        [{'assignment_id': i // QUESTIONS_PER_TEST + 1, 'answer': encode(answer),
+          'order_number': i % QUESTIONS_PER_TEST + 1} for i, answer in enumerate(answers)]
+    )
+    db.session.commit()
+
+def _column_bytes(table, column):
+    return db.session.execute(text(f'SELECT sum(length(CAST({column} AS BLOB))) FROM {table}')).scalar()
+
+def _time(fn, ids):
+    samples = []
+    for item_id in ids:
+        start = time.perf_counter()
+        fn(item_id)
+        samples.append(time.perf_counter() - start)
+        db.session.expunge_all()
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+def run_variant(name, encode, contents, answers, reads, rng):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+        app.config['DB_MAINTENANCE_INTERVAL'] = 0
+        init_database(app)
+
+        with app.app_context():
+            db.create_all()
+            # The search index holds the same text in every variant, compare only the material tables
+            with db.engine.begin() as connection:
+                drop_search_index(connection)
+            user = User(email='bench@test.lv', password_hash='-')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+            seed(user_id, contents, answers, encode)
+            content_kb = _column_bytes('study_materials', 'content') / 1024
+            answer_kb = _column_bytes('questions', 'correct_answer') / 1024
+            with db.engine.connect() as connection:
+                connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+            file_kb = os.path.getsize(path) / 1024
+
+            material_ids = rng.sample(range(1, len(contents) + 1), reads)
+            test_ids = rng.sample(range(1, len(answers) // QUESTIONS_PER_TEST + 1), reads)
+
+            def read_material(material_id):
+                material = db.session.get(StudyMaterial, material_id, options=[undefer(StudyMaterial.content)])
+                return material.content_data
+
+            material_ms = _time(read_material, material_ids)
+            tree_ms = _time(lambda test_id: load_test_tree(test_id, user_id), test_ids)
+
+            db.session.remove()
+            db.engine.dispose()
+
+    print(f"  {name:<16} {content_kb:>9.0f} KB {answer_kb:>9.0f} KB {file_kb:>9.0f} KB "
+          f"{material_ms:>8.3f} ms {tree_ms:>8.3f} ms")
+
+def run(num_materials=2000, num_answers=20000, reads=500):
+    rng = random.Random(7)
+    contents = [make_content(rng) for _ in range(num_materials)]
+    answers = [_text(rng, rng.randint(40, 120)) for _ in range(num_answers)]
+
+    print(f"{num_materials} study materials, {num_answers} long answers, {reads} reads")
+    print(f"  {'storage':<16} {'contents':>12} {'answers':>12} {'DB file':>12} {'material':>11} {'test tree':>11}")
+    for name, encode in (('plain text', lambda value: value),
+                         ('deflate', _deflate),
+                         ('deflate + dict', compress_text)):
+        run_variant(name, encode, contents, answers, reads, random.Random(11))
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,39 @@
+"""
+Benchmark Payloads
+Builds realistic Claude responses of a given size
+"""
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.claude_api_mock import MockClaudeAPIClient
+
+def make_test_payload(num_questions=50, num_assignments=5):
+    """Build a raw test response with num_questions spread over assignments"""
+    questions = MockClaudeAPIClient()._generate_mock_questions(num_questions, 'medium')
+    per_assignment = -(-num_questions // num_assignments)
+
+    return {
+        'assignments': [
+            {
+                'title': f'{i + 1}. uzdevums',
+                'description': 'Uzdevuma apraksts ar pietiekami garu tekstu, lai atgādinātu īstu atbildi.',
+                'max_points': 20,
+                'questions': copy.deepcopy(questions[i * per_assignment:(i + 1) * per_assignment])
+            }
+            for i in range(num_assignments)
+        ]
+    }
+
+def make_study_material_payload(num_terms=200, summary_paragraphs=20):
+    """Build a large study material response"""
+    paragraph = 'Šis ir kopsavilkuma teksts par mācību tēmu ar vairākiem teikumiem un jēdzieniem. ' * 8
+    return {
+        'summary': '\n\n'.join(paragraph for _ in range(summary_paragraphs)),
+        'terms': [
+            {'name': f'Termins {i}', 'definition': f'Definīcija terminam {i}, kas izskaidro jēdzienu kontekstā.'}
+            for i in range(num_terms)
+        ]
+    }
@@ -0,0 +1,172 @@
+"""
+Database Engine Configuration
+SQLite connection pragmas, connection pool sizing and periodic maintenance
+"""
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from extensions import db
+from services.write_coordinator import init_write_coordinator
+
+# Applied to every new SQLite connection, in this order
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,          # ms to wait for a lock instead of failing with "database is locked"
+    'auto_vacuum': 'INCREMENTAL',  # Takes effect only for new database files or after VACUUM
+    'journal_mode': 'WAL',         # Readers don't block the writer and the writer doesn't block readers
+    'synchronous': 'NORMAL',       # Safe with WAL, fsync only at checkpoints
+    'foreign_keys': 'ON',
+    'cache_size': -32000,          # Page cache per connection in KiB (32 MB)
+    'mmap_size': 268435456,        # Memory-mapped reads up to 256 MB
+    'temp_store': 'MEMORY'
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_OVERFLOW = 10
+DEFAULT_POOL_TIMEOUT = 30
+
+DEFAULT_MAINTENANCE_INTERVAL = 3600  # Seconds between PRAGMA optimize runs, 0 disables
+DEFAULT_VACUUM_PAGES = 1000          # Free pages returned to the file system per run
+
+_maintenance = None
+_maintenance_lock = threading.Lock()
+
+def is_sqlite_file(uri):
+    """Check if a database URI points to a SQLite file (not an in-memory database)"""
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def sqlite_pragmas(config):
+    """
+    Get the pragmas for new connections
+
+    Args:
+        config (dict): App config, SQLITE_PRAGMAS overrides single defaults
+
+    Returns:
+        dict: Pragma name -> value
+    """
+    return {**DEFAULT_PRAGMAS, **config.get('SQLITE_PRAGMAS', {})}
+
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the configured database
+
+    File databases get a connection pool sized for threaded workers. The
+    sqlite3 driver timeout matches busy_timeout so both wait for locks
+    equally long.
+
+    Args:
+        config (dict): App config
+
+    Returns:
+        dict: Engine options
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    uri = config['SQLALCHEMY_DATABASE_URI']
+
+    if make_url(uri).get_backend_name() != 'sqlite':
+        return options
+
+    connect_args = dict(options.get('connect_args', {}))
+    connect_args.setdefault('timeout', sqlite_pragmas(config)['busy_timeout'] / 1000)
+    connect_args.setdefault('check_same_thread', False)
+    options['connect_args'] = connect_args
+
+    if is_sqlite_file(uri):
+        options.setdefault('pool_size', config.get('DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+        options.setdefault('max_overflow', config.get('DB_MAX_OVERFLOW', DEFAULT_MAX_OVERFLOW))
+        options.setdefault('pool_timeout', DEFAULT_POOL_TIMEOUT)
+
+    return options
+
+def apply_pragmas(engine, pragmas):
+    """
+    Execute pragmas on every new connection of an engine
+
+    Args:
+        engine: SQLAlchemy engine
+        pragmas (dict): Pragma name -> value
+    """
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+def run_maintenance(engine, vacuum_pages=DEFAULT_VACUUM_PAGES):
+    """
+    Refresh query planner statistics and return free pages to the file system
+
+    Args:
+        engine: SQLAlchemy engine of a SQLite database
+        vacuum_pages (int): Maximum number of free pages to release
+
+    Returns:
+        dict: Free pages before and after the run
+    """
+    with engine.connect() as connection:
+        driver = connection.connection.driver_connection
+        before = driver.execute('PRAGMA freelist_count').fetchone()[0]
+        # executescript runs incremental_vacuum to completion, execute frees only one page.
+        # It is a no-op unless the database uses auto_vacuum = INCREMENTAL
+        driver.executescript(f'PRAGMA optimize; PRAGMA incremental_vacuum({int(vacuum_pages)});')
+        after = driver.execute('PRAGMA freelist_count').fetchone()[0]
+
+    return {'free_pages_before': before, 'free_pages_after': after}
+
+def start_maintenance(app, interval):
+    """Run maintenance in a background thread every interval seconds, once per process"""
+    global _maintenance
+
+    with _maintenance_lock:
+        if _maintenance is None or not _maintenance.is_alive():
+            _maintenance = threading.Thread(
+                target=_run_maintenance_loop, args=(app, interval), name='db-maintenance', daemon=True
+            )
+            _maintenance.start()
+
+def _run_maintenance_loop(app, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            with app.app_context():
+                # Shard databases (see sharding.py) are maintained like the main one
+                for engine in (db.engine, *list(app.extensions.get('db_shards', {}).values())):
+                    run_maintenance(engine, app.config.get('DB_VACUUM_PAGES', DEFAULT_VACUUM_PAGES))
+        except Exception as e:
+            print(f"❌ Database maintenance failed: {e}")
+
+def init_database(app):
+    """
+    Initialize Flask-SQLAlchemy with the tuned engine configuration
+
+    Must be called instead of db.init_app(app), after the database URI is set.
+    With DB_WRITE_QUEUE enabled, saves of generated materials go through a
+    single writer thread (see services/write_coordinator.py).
+
+    Args:
+        app: Flask app
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if make_url(uri).get_backend_name() != 'sqlite':
+        return
+
+    with app.app_context():
+        apply_pragmas(db.engine, sqlite_pragmas(app.config))
+
+    if not is_sqlite_file(uri):
+        return
+
+    if app.config.get('DB_WRITE_QUEUE'):
+        init_write_coordinator(app, make_url(uri).database)
+
+    interval = app.config.get('DB_MAINTENANCE_INTERVAL', DEFAULT_MAINTENANCE_INTERVAL)
+    if interval:
+        start_maintenance(app, interval)
@@ -2,8 +2,33 @@
 Flask extensions
 Initialize extensions here to avoid circular imports
 """
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_bcrypt import Bcrypt
+import sqlalchemy as sa
 
-db = SQLAlchemy()
+# Tables that stay in the main database when materials are sharded (see sharding.py)
+CENTRAL_TABLES = frozenset({'users'})
+
+def _uses_central_table(mapper, clause):
+    if mapper is not None:
+        return sa.inspect(mapper).local_table.name in CENTRAL_TABLES
+    table = clause.table if isinstance(clause, sa.UpdateBase) else clause
+    return isinstance(table, sa.Table) and table.name in CENTRAL_TABLES
+
+class ShardedSession(Session):
+    """
+    Session that sends statements to the shard database selected for the
+    current app context, except those on CENTRAL_TABLES. Without a selected
+    shard everything goes to the main database.
+    """
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            shard = g.get('db_shard_engine')
+            if shard is not None and not _uses_central_table(mapper, clause):
+                return shard
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': ShardedSession})
 bcrypt = Bcrypt()
@@ -6,6 +6,7 @@ Use reset_db.py to drop existing tables and recreate.
 from app import app
 from extensions import db
 import models
+import migrations
 from sqlalchemy import inspect
 
 def init_database():
@@ -18,10 +19,12 @@ def init_database():
             print("Database tables already exist:")
             for table in existing_tables:
                 print(f"  - {table}")
-            print("\nUse 'npm run reset-db' to drop and recreate tables")
+            print("\nUse 'npm run migrate-db' to apply schema changes")
+            print("Use 'npm run reset-db' to drop and recreate tables")
             return
 
         db.create_all()
+        migrations.stamp(db.engine)
 
         print("Database tables created successfully!")
         print("\nTables created:")
@@ -31,6 +34,8 @@ def init_database():
         print("  4. assignments")
         print("  5. questions")
         print("  6. question_options")
+        print("  7. bulk_ingestions")
+        print("  8. bulk_ingestion_entries")
 
 if __name__ == '__main__':
     init_database()
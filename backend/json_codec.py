@@ -0,0 +1,148 @@
+"""
+JSON codec
+Fast JSON encoding/decoding with orjson or msgspec when installed,
+falling back to the standard library json module.
+Set JSON_CODEC=orjson|msgspec|json to force a specific backend.
+"""
+import json
+import os
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+MAX_CACHED_ENCODERS = 8
+
+class _StdlibCodec:
+    """Standard library json backend"""
+    name = 'json'
+
+    def dumps(self, obj, indent=None, sort_keys=False, default=None):
+        separators = (',', ':') if indent is None else None
+        return json.dumps(obj, ensure_ascii=False, indent=indent, separators=separators,
+                          sort_keys=sort_keys, default=default)
+
+    def dumps_bytes(self, obj, indent=None, sort_keys=False, default=None):
+        return self.dumps(obj, indent, sort_keys, default).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+class _OrjsonCodec:
+    """orjson backend (datetimes and dataclasses go through default like in stdlib)"""
+    name = 'orjson'
+
+    def dumps(self, obj, indent=None, sort_keys=False, default=None):
+        return self.dumps_bytes(obj, indent, sort_keys, default).decode('utf-8')
+
+    def dumps_bytes(self, obj, indent=None, sort_keys=False, default=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+class _MsgspecCodec:
+    """
+    msgspec backend
+
+    default is only called for types msgspec can't encode. Datetimes and
+    dataclasses are encoded by msgspec itself (RFC 3339 strings and
+    objects), responses carry datetimes already formatted with isoformat().
+    """
+    name = 'msgspec'
+
+    def __init__(self):
+        self._encoders = {}  # (default, sort_keys) -> Encoder, built on first use
+        self._decoder = msgspec.json.Decoder()
+
+    def _encoder(self, default, sort_keys):
+        encoder = self._encoders.get((default, sort_keys))
+        if encoder is None:
+            encoder = msgspec.json.Encoder(enc_hook=default, order='sorted' if sort_keys else None)
+            # Callers pass a few module level functions, a new one per call isn't kept
+            if len(self._encoders) < MAX_CACHED_ENCODERS:
+                self._encoders[default, sort_keys] = encoder
+        return encoder
+
+    def dumps(self, obj, indent=None, sort_keys=False, default=None):
+        return self.dumps_bytes(obj, indent, sort_keys, default).decode('utf-8')
+
+    def dumps_bytes(self, obj, indent=None, sort_keys=False, default=None):
+        data = self._encoder(default, sort_keys).encode(obj)
+        if indent:
+            data = msgspec.json.format(data, indent=indent)
+        return data
+
+    def loads(self, data):
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            # Same error type as json.loads and orjson.loads
+            raise ValueError(str(e)) from e
+
+def available_codecs():
+    """Get all installed codec backends, fastest first"""
+    codecs = []
+    if orjson is not None:
+        codecs.append(_OrjsonCodec())
+    if msgspec is not None:
+        codecs.append(_MsgspecCodec())
+    codecs.append(_StdlibCodec())
+    return codecs
+
+def _select_codec():
+    """Pick codec from JSON_CODEC env variable or the fastest installed one"""
+    codecs = available_codecs()
+    requested = os.getenv('JSON_CODEC')
+    for codec in codecs:
+        if codec.name == requested:
+            return codec
+    return codecs[0]
+
+codec = _select_codec()
+
+def dumps(obj, indent=None, sort_keys=False, default=None):
+    """Serialize obj to a JSON string (non-ASCII characters kept as is)"""
+    return codec.dumps(obj, indent, sort_keys, default)
+
+def dumps_bytes(obj, indent=None, sort_keys=False, default=None):
+    """Serialize obj to UTF-8 encoded JSON bytes"""
+    return codec.dumps_bytes(obj, indent, sort_keys, default)
+
+def loads(data):
+    """Deserialize JSON from str or bytes"""
+    return codec.loads(data)
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses the selected codec for jsonify and request.get_json"""
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {'indent', 'separators', 'sort_keys', 'default', 'ensure_ascii'}:
+            return super().dumps(obj, **kwargs)
+        return codec.dumps(obj, kwargs.get('indent'), kwargs.get('sort_keys', self.sort_keys),
+                           kwargs.get('default', self.default))
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        body = codec.dumps_bytes(obj, indent, self.sort_keys, self.default)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
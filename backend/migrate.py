@@ -0,0 +1,34 @@
+"""
+Database migration script
+Applies pending schema migrations to an existing database.
+Safe to run repeatedly, already applied migrations are skipped.
+"""
+from app import app
+from extensions import db
+from sharding import shard_engine, shard_indexes
+import models
+import migrations
+
+def migrate_database():
+    """Apply pending migrations, then create tables added since the database was created"""
+    with app.app_context():
+        applied = migrations.upgrade(db.engine)
+        db.create_all()
+
+        for index in shard_indexes(app):
+            engine = shard_engine(app, index)
+            shard_applied = migrations.upgrade(engine)
+            db.metadata.create_all(engine)
+            if shard_applied:
+                print(f"Shard {index}: applied {len(shard_applied)} migrations.")
+
+        if not applied:
+            print("Database schema is up to date.")
+            return
+
+        print("Applied migrations:")
+        for version, name in applied:
+            print(f"  {version:04d} {name}")
+
+if __name__ == '__main__':
+    migrate_database()
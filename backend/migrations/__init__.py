@@ -0,0 +1,91 @@
+"""
+Schema Migrations
+Applies versioned migration scripts from migrations/versions to existing databases
+"""
+import importlib
+import os
+import re
+from datetime import datetime
+from sqlalchemy import text
+
+MIGRATIONS_TABLE = 'schema_migrations'
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'versions')
+VERSION_FILE_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+def load_migrations():
+    """
+    Load migration scripts sorted by version
+
+    Each script in migrations/versions is named NNNN_description.py and
+    defines upgrade(connection). Scripts must be safe to run on a schema
+    that already has their changes (databases created by create_all).
+
+    Returns:
+        list: (version, name, module) tuples
+    """
+    migrations = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        match = VERSION_FILE_RE.match(filename)
+        if match:
+            module = importlib.import_module(f'migrations.versions.{filename[:-3]}')
+            migrations.append((int(match.group(1)), match.group(2), module))
+    return migrations
+
+def table_exists(connection, table):
+    """Check if a table exists"""
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+    ).first() is not None
+
+def column_exists(connection, table, column):
+    """Check if a table has a column"""
+    return any(row[1] == column for row in connection.execute(text(f'PRAGMA table_info("{table}")')))
+
+def _ensure_table(connection):
+    connection.execute(text(
+        f'CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ('
+        'version INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, applied_at DATETIME NOT NULL)'
+    ))
+
+def applied_versions(engine):
+    """Get versions already applied to the database"""
+    with engine.begin() as connection:
+        _ensure_table(connection)
+        return {row[0] for row in connection.execute(text(f'SELECT version FROM {MIGRATIONS_TABLE}'))}
+
+def _record(connection, version, name):
+    connection.execute(
+        text(f'INSERT INTO {MIGRATIONS_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)'),
+        {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+    )
+
+def upgrade(engine):
+    """
+    Apply pending migrations, each in its own transaction
+
+    Args:
+        engine: SQLAlchemy engine of the database
+
+    Returns:
+        list: (version, name) of applied migrations
+    """
+    done = applied_versions(engine)
+    applied = []
+
+    for version, name, module in load_migrations():
+        if version in done:
+            continue
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            _record(connection, version, name)
+        applied.append((version, name))
+
+    return applied
+
+def stamp(engine):
+    """Mark all migrations as applied (for databases just created with create_all)"""
+    done = applied_versions(engine)
+    with engine.begin() as connection:
+        for version, name, _ in load_migrations():
+            if version not in done:
+                _record(connection, version, name)
@@ -0,0 +1,11 @@
+"""
+Migration 0001
+Adds the version column incremented on every saved edit
+"""
+from sqlalchemy import text
+from migrations import table_exists, column_exists
+
+def upgrade(connection):
+    for table in ('tests', 'study_materials'):
+        if table_exists(connection, table) and not column_exists(connection, table, 'version'):
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1'))
@@ -0,0 +1,13 @@
+"""
+Migration 0002
+Adds the updated_at column used for HTTP cache validation
+"""
+from sqlalchemy import text
+from migrations import table_exists, column_exists
+
+def upgrade(connection):
+    for table in ('tests', 'study_materials'):
+        # SQLite can't add a column with a non-constant default, so existing rows are filled in
+        if table_exists(connection, table) and not column_exists(connection, table, 'updated_at'):
+            connection.execute(text(f'ALTER TABLE {table} ADD COLUMN updated_at DATETIME'))
+            connection.execute(text(f'UPDATE {table} SET updated_at = created_at'))
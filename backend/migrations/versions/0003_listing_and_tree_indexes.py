@@ -0,0 +1,22 @@
+"""
+Migration 0003
+Adds composite (user_id, created_at) indexes for per-user listing and
+foreign key indexes for loading test trees
+"""
+from sqlalchemy import text
+from migrations import table_exists
+
+INDEXES = (
+    ('ix_tests_user_id_created_at', 'tests', 'user_id, created_at'),
+    ('ix_study_materials_user_id_created_at', 'study_materials', 'user_id, created_at'),
+    ('ix_assignments_test_id', 'assignments', 'test_id'),
+    ('ix_questions_assignment_id', 'questions', 'assignment_id'),
+    ('ix_question_options_question_id', 'question_options', 'question_id'),
+    ('ix_bulk_ingestion_entries_ingestion_id', 'bulk_ingestion_entries', 'ingestion_id'),
+    ('ix_bulk_ingestion_entries_user_id_content_hash', 'bulk_ingestion_entries', 'user_id, content_hash'),
+)
+
+def upgrade(connection):
+    for name, table, columns in INDEXES:
+        if table_exists(connection, table):
+            connection.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
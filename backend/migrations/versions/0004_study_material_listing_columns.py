@@ -0,0 +1,94 @@
+"""
+Migration 0004
+Adds stored terms_count and summary_preview columns so the material listing never reads content
+"""
+import json
+import re
+from html.parser import HTMLParser
+from sqlalchemy import text
+from migrations import table_exists, column_exists
+
+BATCH_SIZE = 500
+SUMMARY_PREVIEW_LENGTH = 200
+
+BLOCK_TAGS = frozenset([
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'pre', 'table', 'tr', 'td', 'th'
+])
+
+class _TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+def _summary_preview(summary):
+    collector = _TextCollector()
+    collector.feed(summary)
+    collector.close()
+    preview = re.sub(r'\s+', ' ', ''.join(collector.parts)).strip()
+
+    if len(preview) <= SUMMARY_PREVIEW_LENGTH:
+        return preview
+
+    cut = preview[:SUMMARY_PREVIEW_LENGTH].rsplit(' ', 1)[0] or preview[:SUMMARY_PREVIEW_LENGTH]
+    return cut.rstrip(' ,.;:') + '…'
+
+def _listing_columns(content):
+    try:
+        content_data = json.loads(content) if content else {}
+    except ValueError:
+        content_data = {}
+    if not isinstance(content_data, dict):
+        content_data = {}
+
+    summary = content_data.get('summary')
+    terms = content_data.get('terms')
+    return {
+        'terms_count': len(terms) if isinstance(terms, list) else 0,
+        'summary_preview': _summary_preview(summary) if isinstance(summary, str) else ''
+    }
+
+def upgrade(connection):
+    if not table_exists(connection, 'study_materials'):
+        return
+
+    added = False
+    if not column_exists(connection, 'study_materials', 'terms_count'):
+        connection.execute(text('ALTER TABLE study_materials ADD COLUMN terms_count INTEGER NOT NULL DEFAULT 0'))
+        added = True
+    if not column_exists(connection, 'study_materials', 'summary_preview'):
+        connection.execute(text("ALTER TABLE study_materials ADD COLUMN summary_preview VARCHAR(255) NOT NULL DEFAULT ''"))
+        added = True
+
+    if not added:
+        return
+
+    # Fill the new columns from existing content, one batch of rows at a time
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text('SELECT id, content FROM study_materials WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+
+        values = [dict(_listing_columns(content), id=material_id) for material_id, content in rows]
+
+        connection.execute(
+            text('UPDATE study_materials SET terms_count = :terms_count, summary_preview = :summary_preview '
+                 'WHERE id = :id'),
+            values
+        )
+        last_id = rows[-1][0]
@@ -0,0 +1,25 @@
+"""
+Migration 0005
+Removes rows whose parent was deleted while SQLite foreign keys were off, so
+they can't fail foreign key checks now that deletes cascade in the database
+"""
+from sqlalchemy import text
+from migrations import table_exists
+
+# (table, foreign key column, parent table), parents before children
+RELATIONS = (
+    ('tests', 'user_id', 'users'),
+    ('study_materials', 'user_id', 'users'),
+    ('bulk_ingestions', 'user_id', 'users'),
+    ('bulk_ingestion_entries', 'ingestion_id', 'bulk_ingestions'),
+    ('assignments', 'test_id', 'tests'),
+    ('questions', 'assignment_id', 'assignments'),
+    ('question_options', 'question_id', 'questions'),
+)
+
+def upgrade(connection):
+    for table, column, parent in RELATIONS:
+        if table_exists(connection, table) and table_exists(connection, parent):
+            connection.execute(text(
+                f'DELETE FROM {table} WHERE {column} NOT IN (SELECT id FROM {parent})'
+            ))
@@ -0,0 +1,174 @@
+"""
+Migration 0006
+Creates the FTS5 search index with its triggers and fills it from existing materials
+"""
+import json
+import re
+from html.parser import HTMLParser
+from sqlalchemy import text
+from migrations import table_exists
+
+BATCH_SIZE = 500
+
+# Index rows are keyed by rowid = source id * 8 + kind:
+# 1 test title, 2 question, 3 study material title, 4 summary, 5 terms
+CREATE_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    title, body, user_id UNINDEXED, kind UNINDEXED, material_type UNINDEXED, material_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+RANK_CONFIG = "INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+
+TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS search_tests_insert AFTER INSERT ON tests BEGIN
+        INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id)
+        VALUES (new.id * 8 + 1, new.title, '', new.user_id, 1, 'test', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_tests_update AFTER UPDATE OF title, user_id ON tests BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 8 + 1;
+        INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id)
+        VALUES (new.id * 8 + 1, new.title, '', new.user_id, 1, 'test', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_tests_delete AFTER DELETE ON tests BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 8 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_insert AFTER INSERT ON questions BEGIN
+        INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id)
+        SELECT new.id * 8 + 2, '', new.question_text, tests.user_id, 2, 'test', tests.id
+        FROM assignments JOIN tests ON tests.id = assignments.test_id
+        WHERE assignments.id = new.assignment_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_update
+    AFTER UPDATE OF question_text, assignment_id ON questions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 8 + 2;
+        INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id)
+        SELECT new.id * 8 + 2, '', new.question_text, tests.user_id, 2, 'test', tests.id
+        FROM assignments JOIN tests ON tests.id = assignments.test_id
+        WHERE assignments.id = new.assignment_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_questions_delete AFTER DELETE ON questions BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 8 + 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS search_study_materials_delete AFTER DELETE ON study_materials BEGIN
+        DELETE FROM search_index WHERE rowid IN (old.id * 8 + 3, old.id * 8 + 4, old.id * 8 + 5);
+    END
+    """,
+)
+
+FILL_TESTS = """
+INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id)
+SELECT id * 8 + 1, title, '', user_id, 1, 'test', id FROM tests
+"""
+
+FILL_QUESTIONS = """
+INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id)
+SELECT questions.id * 8 + 2, '', questions.question_text, tests.user_id, 2, 'test', tests.id
+FROM questions JOIN assignments ON assignments.id = questions.assignment_id
+JOIN tests ON tests.id = assignments.test_id
+"""
+
+INSERT_ROW = (
+    'INSERT INTO search_index (rowid, title, body, user_id, kind, material_type, material_id) '
+    "VALUES (:rowid, :title, :body, :user_id, :kind, 'study_material', :material_id)"
+)
+
+BLOCK_TAGS = frozenset([
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'pre', 'table', 'tr', 'td', 'th'
+])
+
+class _TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+def _html_to_text(html):
+    collector = _TextCollector()
+    collector.feed(html)
+    collector.close()
+    return re.sub(r'\s+', ' ', ''.join(collector.parts)).strip()
+
+def _study_material_rows(material_id, user_id, title, content):
+    try:
+        content_data = json.loads(content) if content else {}
+    except ValueError:
+        content_data = {}
+    if not isinstance(content_data, dict):
+        content_data = {}
+
+    summary = content_data.get('summary')
+    terms = content_data.get('terms')
+    term_lines = [
+        f"{term.get('name', '')} — {term.get('definition', '')}"
+        for term in (terms if isinstance(terms, list) else []) if isinstance(term, dict)
+    ]
+
+    row = {'user_id': user_id, 'material_id': material_id}
+    return [
+        dict(row, rowid=material_id * 8 + 3, kind=3, title=title, body=''),
+        dict(row, rowid=material_id * 8 + 4, kind=4, title='',
+             body=_html_to_text(summary) if isinstance(summary, str) else ''),
+        dict(row, rowid=material_id * 8 + 5, kind=5, title='', body='\n'.join(term_lines))
+    ]
+
+def upgrade(connection):
+    if not all(table_exists(connection, table) for table in ('tests', 'questions', 'study_materials')):
+        return
+
+    exists = table_exists(connection, 'search_index')
+    connection.execute(text(CREATE_TABLE))
+    if not exists:
+        connection.execute(text(RANK_CONFIG))
+    for statement in TRIGGERS:
+        connection.execute(text(statement))
+
+    if connection.execute(text('SELECT count(*) FROM search_index')).scalar() > 0:
+        return
+
+    connection.execute(text(FILL_TESTS))
+    connection.execute(text(FILL_QUESTIONS))
+
+    # Study material content is JSON with an HTML summary, so its rows are built here
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text('SELECT id, user_id, title, content FROM study_materials WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+
+        values = []
+        for material_id, user_id, title, content in rows:
+            values.extend(_study_material_rows(material_id, user_id, title, content))
+        connection.execute(text(INSERT_ROW), values)
+        last_id = rows[-1][0]
+
+    connection.execute(text("INSERT INTO search_index (search_index) VALUES ('optimize')"))
@@ -0,0 +1,60 @@
+"""
+Migration 0007
+Compresses study material contents and long question answers written before
+the columns were stored compressed
+"""
+import zlib
+from sqlalchemy import text
+from migrations import table_exists
+
+BATCH_SIZE = 500
+MIN_COMPRESSED_SIZE = 256
+COMPRESSION_LEVEL = 6
+WINDOW_BITS = -15
+
+# Version byte and preset dictionary the values are written with
+DICTIONARY_VERSION = 1
+DICTIONARY = ' '.join((
+    'Detalizēta atbilde ar vairākiem punktiem un paskaidrojumiem. Pareizajā atbildē jāmin, ka',
+    'Atbildē jāiekļauj šādi galvenie punkti: 1) 2) 3) Piemēram, tas nozīmē, ka',
+    'procesā, sistēmā, rezultātā, attiecībā uz, savukārt, tāpēc, jo, tomēr, kā arī,',
+    'galvenie jēdzieni, galvenās idejas, piemēri, īpašības, funkcijas, nozīme, cēloņi, sekas,',
+    'Skaidra definīcija, kas nozīmē šis termins satura kontekstā.',
+    '<h2></h2><h3></h3><p></p><ul><li></li></ul><ol><li></li></ol><strong></strong><em></em><br>',
+    'kas ir un tiek var vai ar par no uz kā arī to tas šī šis ir kuras kurā kuru lai nav',
+    '{"summary":"', '"terms":[{"name":"', '","definition":"', '"},{"name":"', '"}]}',
+)).encode('utf-8')
+
+# (table, column) pairs stored with CompressedText
+COLUMNS = (
+    ('study_materials', 'content'),
+    ('questions', 'correct_answer'),
+)
+
+def upgrade(connection):
+    for table, column in COLUMNS:
+        if not table_exists(connection, table):
+            continue
+
+        # Plain rows are TEXT, compressed ones BLOB, so a rerun skips finished rows
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                text(f"SELECT id, {column} FROM {table} WHERE id > :last_id AND typeof({column}) = 'text' "
+                     f'AND length(CAST({column} AS BLOB)) >= :min_size ORDER BY id LIMIT :limit'),
+                {'last_id': last_id, 'min_size': MIN_COMPRESSED_SIZE, 'limit': BATCH_SIZE}
+            ).all()
+            if not rows:
+                break
+
+            values = []
+            for row_id, value in rows:
+                data = value.encode('utf-8')
+                compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, WINDOW_BITS, zdict=DICTIONARY)
+                compressed = compressor.compress(data) + compressor.flush()
+                if len(compressed) + 1 < len(data):  # Incompressible texts stay plain
+                    values.append({'id': row_id, 'value': bytes([DICTIONARY_VERSION]) + compressed})
+
+            if values:
+                connection.execute(text(f'UPDATE {table} SET {column} = :value WHERE id = :id'), values)
+            last_id = rows[-1][0]
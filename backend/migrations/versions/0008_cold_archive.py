@@ -0,0 +1,51 @@
+"""
+Migration 0008
+Adds access tracking columns, the archived_materials table and the triggers
+that delete archived trees together with their stubs
+"""
+from sqlalchemy import text
+from migrations import table_exists, column_exists
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS archived_materials (
+    id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    material_type VARCHAR(20) NOT NULL,
+    material_id INTEGER NOT NULL,
+    assignments_count INTEGER NOT NULL,
+    total_questions INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    archived_at DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    CONSTRAINT uq_archived_materials_material UNIQUE (material_type, material_id),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+)
+"""
+
+TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS archived_tests_delete AFTER DELETE ON tests
+    WHEN old.archived_at IS NOT NULL BEGIN
+        DELETE FROM archived_materials WHERE material_type = 'test' AND material_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS archived_study_materials_delete AFTER DELETE ON study_materials
+    WHEN old.archived_at IS NOT NULL BEGIN
+        DELETE FROM archived_materials WHERE material_type = 'study_material' AND material_id = old.id;
+    END
+    """,
+)
+
+def upgrade(connection):
+    if not (table_exists(connection, 'tests') and table_exists(connection, 'study_materials')):
+        return
+
+    for table in ('tests', 'study_materials'):
+        for column in ('accessed_at', 'archived_at'):
+            if not column_exists(connection, table, column):
+                connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} DATETIME'))
+
+    connection.execute(text(CREATE_TABLE))
+    for statement in TRIGGERS:
+        connection.execute(text(statement))
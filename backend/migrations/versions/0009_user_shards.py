@@ -0,0 +1,10 @@
+"""
+Migration 0009
+Adds the shard directory column to users
+"""
+from sqlalchemy import text
+from migrations import table_exists, column_exists
+
+def upgrade(connection):
+    if table_exists(connection, 'users') and not column_exists(connection, 'users', 'shard'):
+        connection.execute(text('ALTER TABLE users ADD COLUMN shard INTEGER'))
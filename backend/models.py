@@ -1,6 +1,9 @@
 from extensions import db
 from datetime import datetime
 import enum
+import json_codec
+from services.material_preview import listing_columns
+from services.text_compression import CompressedText
 
 # Enum for question types
 class QuestionType(enum.Enum):
@@ -11,6 +14,28 @@ class QuestionType(enum.Enum):
     matching = 'matching'
     fill_in_blank = 'fill_in_blank'
 
+# Version and change time of a material, used for saves and HTTP cache validation
+class VersionedMixin:
+    version = db.Column(db.Integer, default=1, nullable=False)  # Incremented on every write
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def touch(self):
+        """
+        Mark material as changed
+
+        The version is incremented by the UPDATE statement itself, so
+        concurrent saves never write the same number. The row is flushed
+        and the new version is read back on the next access.
+        """
+        self.version = type(self).version + 1
+        self.updated_at = datetime.utcnow()
+        db.session.flush()
+
+# Access tracking of a material for the cold archive (see services/cold_storage.py)
+class ArchivableMixin:
+    accessed_at = db.Column(db.DateTime)  # Last time the material was opened, recorded at most daily
+    archived_at = db.Column(db.DateTime)  # Set while the material tree is kept in archived_materials
+
 # 1. USERS table
 class User(db.Model):
     __tablename__ = 'users'
@@ -19,17 +44,21 @@ class User(db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    shard = db.Column(db.Integer)  # Shard database holding the user's materials, None for the main one (see sharding.py)
 
     # Relationships
-    tests = db.relationship('Test', backref='user', cascade='all, delete-orphan', lazy=True)
-    study_materials = db.relationship('StudyMaterial', backref='user', cascade='all, delete-orphan', lazy=True)
+    tests = db.relationship('Test', backref='user', cascade='all, delete-orphan',
+                            passive_deletes=True, lazy=True)
+    study_materials = db.relationship('StudyMaterial', backref='user', cascade='all, delete-orphan',
+                                      passive_deletes=True, lazy=True)
 
     def __repr__(self):
         return f'<User {self.email}>'
 
 # 2. TESTS table
-class Test(db.Model):
+class Test(VersionedMixin, ArchivableMixin, db.Model):
     __tablename__ = 'tests'
+    __table_args__ = (db.Index('ix_tests_user_id_created_at', 'user_id', 'created_at'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -37,21 +66,36 @@ class Test(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
-    assignments = db.relationship('Assignment', backref='test', cascade='all, delete-orphan', lazy=True)
+    assignments = db.relationship('Assignment', backref='test', cascade='all, delete-orphan',
+                                  passive_deletes=True, lazy=True)
 
     def __repr__(self):
         return f'<Test {self.title}>'
 
 # 3. STUDY_MATERIALS table
-class StudyMaterial(db.Model):
+class StudyMaterial(VersionedMixin, ArchivableMixin, db.Model):
     __tablename__ = 'study_materials'
+    __table_args__ = (db.Index('ix_study_materials_user_id_created_at', 'user_id', 'created_at'),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
-    content = db.Column(db.Text, nullable=False)  # JSON: {summary: "...", terms: [{name, definition}]}
+    content = db.deferred(db.Column(CompressedText, nullable=False))  # JSON: {summary: "...", terms: [{name, definition}]}
+    terms_count = db.Column(db.Integer, default=0, nullable=False)  # Listing columns, kept in sync with content
+    summary_preview = db.Column(db.String(255), default='', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    @property
+    def content_data(self):
+        """Decoded content JSON"""
+        return json_codec.loads(self.content) if self.content else {}
+
+    @content_data.setter
+    def content_data(self, data):
+        self.content = json_codec.dumps(data)
+        for column, value in listing_columns(data).items():
+            setattr(self, column, value)
+
     def __repr__(self):
         return f'<StudyMaterial {self.title}>'
 
@@ -60,14 +104,15 @@ class Assignment(db.Model):
     __tablename__ = 'assignments'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    test_id = db.Column(db.Integer, db.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False)
+    test_id = db.Column(db.Integer, db.ForeignKey('tests.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     max_points = db.Column(db.Integer, default=0)
     order_number = db.Column(db.Integer, nullable=False)
 
     # Relationships
-    questions = db.relationship('Question', backref='assignment', cascade='all, delete-orphan', lazy=True)
+    questions = db.relationship('Question', backref='assignment', cascade='all, delete-orphan',
+                                passive_deletes=True, lazy=True)
 
     def __repr__(self):
         return f'<Assignment {self.title}>'
@@ -77,15 +122,16 @@ class Question(db.Model):
     __tablename__ = 'questions'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('assignments.id', ondelete='CASCADE'), nullable=False, index=True)
     question_text = db.Column(db.Text, nullable=False)
     question_type = db.Column(db.Enum(QuestionType), nullable=False)
-    correct_answer = db.Column(db.Text)
+    correct_answer = db.Column(CompressedText)  # Long model answers are stored compressed
     points = db.Column(db.Integer, default=1)
     order_number = db.Column(db.Integer, nullable=False)
 
     # Relationships
-    options = db.relationship('QuestionOption', backref='question', cascade='all, delete-orphan', lazy=True)
+    options = db.relationship('QuestionOption', backref='question', cascade='all, delete-orphan',
+                              passive_deletes=True, lazy=True)
 
     def __repr__(self):
         return f'<Question {self.question_text[:50]}>'
@@ -95,10 +141,72 @@ class QuestionOption(db.Model):
     __tablename__ = 'question_options'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('questions.id', ondelete='CASCADE'), nullable=False, index=True)
     option_text = db.Column(db.Text, nullable=False)
     is_correct = db.Column(db.Boolean, default=False)
     order_number = db.Column(db.Integer, nullable=False)
 
     def __repr__(self):
         return f'<QuestionOption {self.option_text[:30]}>'
+
+# Enum for bulk ingestion entry status
+class IngestionStatus(enum.Enum):
+    queued = 'queued'
+    generating = 'generating'
+    done = 'done'
+    duplicate = 'duplicate'
+    failed = 'failed'
+
+# 7. BULK_INGESTIONS table (one uploaded ZIP archive)
+class BulkIngestion(db.Model):
+    __tablename__ = 'bulk_ingestions'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    material_type = db.Column(db.String(20), nullable=False)  # "test" or "study_material"
+    num_questions = db.Column(db.Integer, default=10)
+    difficulty = db.Column(db.String(10), default='medium')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    entries = db.relationship('BulkIngestionEntry', backref='ingestion', cascade='all, delete-orphan',
+                              passive_deletes=True, lazy=True, order_by='BulkIngestionEntry.order_number')
+
+    def __repr__(self):
+        return f'<BulkIngestion {self.id}>'
+
+# 8. BULK_INGESTION_ENTRIES table (one file inside an archive)
+class BulkIngestionEntry(db.Model):
+    __tablename__ = 'bulk_ingestion_entries'
+    __table_args__ = (db.Index('ix_bulk_ingestion_entries_user_id_content_hash', 'user_id', 'content_hash'),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    ingestion_id = db.Column(db.Integer, db.ForeignKey('bulk_ingestions.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.Enum(IngestionStatus), nullable=False)
+    content_hash = db.Column(db.String(64))  # SHA-256 of normalized extracted text
+    content = db.Column(db.Text)  # Extracted text, cleared after generation
+    material_id = db.Column(db.Integer)  # Created test or study material ID
+    error = db.Column(db.Text)
+    order_number = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<BulkIngestionEntry {self.filename}>'
+
+# 9. ARCHIVED_MATERIALS table (cold archive, one row per material tree)
+class ArchivedMaterial(db.Model):
+    __tablename__ = 'archived_materials'
+    __table_args__ = (db.UniqueConstraint('material_type', 'material_id', name='uq_archived_materials_material'),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    material_type = db.Column(db.String(20), nullable=False)  # "test" or "study_material"
+    material_id = db.Column(db.Integer, nullable=False)  # Stub row that stays in tests or study_materials
+    assignments_count = db.Column(db.Integer, default=0, nullable=False)  # Listing counts of an archived test
+    total_questions = db.Column(db.Integer, default=0, nullable=False)
+    payload = db.Column(CompressedText, nullable=False)  # JSON: assignments tree or study material content
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ArchivedMaterial {self.material_type} {self.material_id}>'
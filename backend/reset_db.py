@@ -6,7 +6,10 @@ For normal initialization, use init_db.py instead.
 """
 from app import app
 from extensions import db
+from sharding import shard_engine, shard_indexes
 import models
+import migrations
+from sqlalchemy import text
 
 def reset_database():
     """Drop all tables and recreate them (deletes all data!)"""
@@ -18,11 +21,19 @@ def reset_database():
             print("Reset cancelled.")
             return
 
+        # Shard databases are reset too, user IDs start over
+        engines = [db.engine, *(shard_engine(app, index) for index in shard_indexes(app))]
+
         print("\nDropping all tables...")
-        db.drop_all()
+        for engine in engines:
+            db.metadata.drop_all(engine)
+            with engine.begin() as connection:
+                connection.execute(text(f'DROP TABLE IF EXISTS {migrations.MIGRATIONS_TABLE}'))
 
         print("Creating new tables...")
-        db.create_all()
+        for engine in engines:
+            db.metadata.create_all(engine)
+            migrations.stamp(engine)
 
         print("\nDatabase reset successfully!")
         print("\nTables created:")
@@ -32,6 +43,8 @@ def reset_database():
         print("  4. assignments")
         print("  5. questions")
         print("  6. question_options")
+        print("  7. bulk_ingestions")
+        print("  8. bulk_ingestion_entries")
 
 if __name__ == '__main__':
     reset_database()
@@ -4,6 +4,7 @@ Handles user registration, login, and logout
 """
 from flask import Blueprint, request, jsonify, session
 from extensions import db, bcrypt
+from sharding import assign_shard
 import re
 
 auth_bp = Blueprint('auth', __name__)
@@ -63,6 +64,7 @@ def register():
 
         db.session.add(new_user)
         db.session.commit()
+        assign_shard(new_user)
 
         session['user_id'] = new_user.id
         session['user_email'] = new_user.email
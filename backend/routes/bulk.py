@@ -0,0 +1,331 @@
+"""
+Bulk Ingestion Routes
+Creates a material for every document in an uploaded ZIP archive
+"""
+from flask import Blueprint, request, jsonify, session, current_app, g
+from extensions import db
+from models import BulkIngestion, BulkIngestionEntry, IngestionStatus
+from routes.generate import (
+    allowed_file,
+    extract_text_from_file,
+    save_test_to_database,
+    save_study_material_to_database
+)
+from services.archive import iter_archive_texts, ArchiveError
+from services.content_compression import compress_content
+from sharding import use_shard, shard_indexes
+from sqlalchemy import inspect, select, update
+import hashlib
+import os
+import queue
+import re
+import threading
+
+bulk_bp = Blueprint('bulk', __name__)
+
+COMMIT_BATCH_SIZE = 20
+
+_ingestion_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+def content_hash(text):
+    """Hash normalized text so whitespace and case changes count as duplicates"""
+    normalized = re.sub(r'\s+', ' ', text).strip().lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def serialize_ingestion(ingestion):
+    """Build progress response for an ingestion"""
+    entries = [
+        {
+            'id': entry.id,
+            'filename': entry.filename,
+            'status': entry.status.value,
+            'material_id': entry.material_id,
+            'error': entry.error
+        }
+        for entry in ingestion.entries
+    ]
+
+    counts = {status.value: 0 for status in IngestionStatus}
+    for entry in entries:
+        counts[entry['status']] += 1
+
+    return {
+        'id': ingestion.id,
+        'material_type': ingestion.material_type,
+        'created_at': ingestion.created_at.isoformat(),
+        'total': len(entries),
+        'counts': counts,
+        'finished': counts['queued'] == 0 and counts['generating'] == 0,
+        'entries': entries
+    }
+
+@bulk_bp.route('/api/generate/bulk', methods=['POST'])
+def bulk_generate():
+    """
+    Create materials from every document in a ZIP archive
+
+    Entries are extracted immediately, generation is queued and runs
+    in the background. Entries with content already ingested by this
+    user (or repeated inside the archive) are marked as duplicates.
+
+    Request (multipart/form-data):
+        - archive: ZIP file with PDF, DOCX, TXT documents (required)
+        - material_type: "test" or "study_material" (optional, default: "study_material")
+        - num_questions: Number of questions for tests (optional, default: 10)
+        - difficulty: Test difficulty - "easy", "medium", "hard" (optional, default: "medium")
+
+    Returns:
+        JSON with ingestion ID and per-entry status
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+
+    material_type = request.form.get('material_type', 'study_material')
+    num_questions = request.form.get('num_questions', 10, type=int)
+    difficulty = request.form.get('difficulty', 'medium')
+
+    if material_type not in ['test', 'study_material']:
+        return jsonify({'error': 'material_type must be "test" or "study_material"'}), 400
+
+    if material_type == 'test':
+        if num_questions < 1 or num_questions > 50:
+            return jsonify({'error': 'num_questions must be between 1 and 50'}), 400
+
+        if difficulty not in ['easy', 'medium', 'hard']:
+            return jsonify({'error': 'difficulty must be "easy", "medium", or "hard"'}), 400
+
+    archive = request.files.get('archive')
+    if not archive or archive.filename == '':
+        return jsonify({'error': 'archive is required'}), 400
+
+    if not archive.filename.lower().endswith('.zip'):
+        return jsonify({'error': 'archive must be a ZIP file'}), 400
+
+    try:
+        ingestion = BulkIngestion(
+            user_id=user_id,
+            material_type=material_type,
+            num_questions=num_questions,
+            difficulty=difficulty
+        )
+        db.session.add(ingestion)
+        db.session.flush()
+        ingestion_id = ingestion.id
+
+        known_hashes = {
+            row.content_hash
+            for row in db.session.query(BulkIngestionEntry.content_hash).filter(
+                BulkIngestionEntry.user_id == user_id,
+                BulkIngestionEntry.status != IngestionStatus.failed,
+                BulkIngestionEntry.content_hash.isnot(None)
+            )
+        }
+
+        entries = iter_archive_texts(archive.stream, allowed_file, extract_text_from_file)
+        for order_number, (filename, text, error) in enumerate(entries, start=1):
+            entry = BulkIngestionEntry(
+                ingestion_id=ingestion_id,
+                user_id=user_id,
+                filename=filename[:255],
+                order_number=order_number
+            )
+
+            if error is None and not text.strip():
+                error = 'Content cannot be empty'
+
+            if error is not None:
+                entry.status = IngestionStatus.failed
+                entry.error = error
+            else:
+                entry.content_hash = content_hash(text)
+                if entry.content_hash in known_hashes:
+                    entry.status = IngestionStatus.duplicate
+                else:
+                    entry.status = IngestionStatus.queued
+                    entry.content, _ = compress_content(text)
+                    known_hashes.add(entry.content_hash)
+
+            db.session.add(entry)
+
+            # Flush in batches so extracted texts don't pile up in the session
+            if order_number % COMMIT_BATCH_SIZE == 0:
+                db.session.flush()
+                db.session.expunge_all()
+
+        db.session.commit()
+
+    except ArchiveError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to read archive',
+            'details': str(e)
+        }), 500
+
+    enqueue_ingestion(current_app._get_current_object(), ingestion_id, g.get('db_shard'))
+
+    ingestion = BulkIngestion.query.get(ingestion_id)
+    return jsonify({
+        'success': True,
+        'ingestion': serialize_ingestion(ingestion)
+    }), 202
+
+@bulk_bp.route('/api/generate/bulk/<int:ingestion_id>', methods=['GET'])
+def get_bulk_progress(ingestion_id):
+    """
+    Get per-entry progress of a bulk ingestion
+
+    Args:
+        ingestion_id: Ingestion ID
+
+    Returns:
+        JSON with per-entry status and counts
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    ingestion = BulkIngestion.query.filter_by(id=ingestion_id, user_id=session['user_id']).first()
+
+    if not ingestion:
+        return jsonify({'error': 'Ingestion not found'}), 404
+
+    return jsonify({
+        'success': True,
+        'ingestion': serialize_ingestion(ingestion)
+    }), 200
+
+def enqueue_ingestion(app, ingestion_id, shard=None):
+    """Queue ingestion for background generation in a database shard, starting the worker if needed"""
+    global _worker
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name='bulk-ingestion', daemon=True)
+            _worker.start()
+
+    _ingestion_queue.put((app, ingestion_id, shard))
+
+def resume_ingestions(app):
+    """
+    Queue ingestions a previous process left unfinished, call once at startup
+
+    The queue only lives in memory, so entries that were generating when
+    the process stopped are set back to queued and every ingestion with
+    queued entries is queued again, in the main database and every shard.
+
+    Args:
+        app: Flask app
+
+    Returns:
+        int: Number of queued ingestions
+    """
+    pending = []
+    try:
+        with app.app_context():
+            if not inspect(db.engine).has_table(BulkIngestionEntry.__tablename__):
+                return 0
+
+            for shard in (None, *shard_indexes(app)):
+                with use_shard(shard):
+                    db.session.execute(
+                        update(BulkIngestionEntry)
+                        .where(BulkIngestionEntry.status == IngestionStatus.generating)
+                        .values(status=IngestionStatus.queued)
+                    )
+                    ingestion_ids = db.session.scalars(
+                        select(BulkIngestionEntry.ingestion_id)
+                        .where(BulkIngestionEntry.status == IngestionStatus.queued)
+                        .distinct().order_by(BulkIngestionEntry.ingestion_id)
+                    ).all()
+                    db.session.commit()
+                pending.extend((ingestion_id, shard) for ingestion_id in ingestion_ids)
+    except Exception as e:
+        # A database that isn't migrated yet must not stop the app from starting
+        print(f"❌ Resuming bulk ingestions failed: {e}")
+
+    for ingestion_id, shard in pending:
+        enqueue_ingestion(app, ingestion_id, shard)
+    return len(pending)
+
+def _run_worker():
+    """Process queued ingestions one at a time"""
+    while True:
+        app, ingestion_id, shard = _ingestion_queue.get()
+        try:
+            with app.app_context(), use_shard(shard):
+                process_ingestion(ingestion_id)
+        except Exception as e:
+            print(f"❌ Bulk ingestion {ingestion_id} failed: {e}")
+        finally:
+            _ingestion_queue.task_done()
+
+def process_ingestion(ingestion_id):
+    """
+    Generate materials for all queued entries of an ingestion
+
+    Must run inside an application context.
+
+    Args:
+        ingestion_id (int): Ingestion ID
+    """
+    from services.claude_api import get_claude_client
+    from services.parser import (
+        salvage_test_response,
+        pop_parse_report,
+        validate_study_material_response,
+        clean_study_material_data
+    )
+
+    ingestion = BulkIngestion.query.get(ingestion_id)
+    if not ingestion:
+        return
+
+    client = get_claude_client()
+
+    entry_ids = [
+        row.id for row in db.session.query(BulkIngestionEntry.id).filter_by(
+            ingestion_id=ingestion_id, status=IngestionStatus.queued
+        ).order_by(BulkIngestionEntry.order_number)
+    ]
+
+    for entry_id in entry_ids:
+        entry = BulkIngestionEntry.query.get(entry_id)
+        entry.status = IngestionStatus.generating
+        db.session.commit()
+
+        title = os.path.splitext(os.path.basename(entry.filename))[0]
+
+        try:
+            if ingestion.material_type == 'test':
+                response = client.generate_test(
+                    content=entry.content,
+                    num_questions=ingestion.num_questions,
+                    difficulty=ingestion.difficulty
+                )
+                pop_parse_report(response)
+                cleaned_data, _ = salvage_test_response(response)
+                material_id = save_test_to_database(ingestion.user_id, title, cleaned_data)
+            else:
+                response = client.generate_study_material(content=entry.content)
+                pop_parse_report(response)
+                cleaned_data = clean_study_material_data(validate_study_material_response(response))
+                material_id = save_study_material_to_database(ingestion.user_id, title, cleaned_data)
+
+            entry = BulkIngestionEntry.query.get(entry_id)
+            entry.status = IngestionStatus.done
+            entry.material_id = material_id
+            entry.content = None
+
+        except Exception as e:
+            db.session.rollback()
+            entry = BulkIngestionEntry.query.get(entry_id)
+            entry.status = IngestionStatus.failed
+            entry.error = str(e)
+
+        db.session.commit()
@@ -3,13 +3,36 @@ Export Routes
 Handles PDF and DOCX export for tests and study materials
 """
 from flask import Blueprint, request, jsonify, session, send_file
+from sqlalchemy.orm import undefer
+from extensions import db
 from models import Test, StudyMaterial
+from services.cold_storage import open_material
+from services.http_cache import material_etag, not_modified, with_cache_headers
+from services.material_tree import load_test_tree, serialize_test
 from services.pdf_export import generate_test_pdf, generate_study_material_pdf
 from services.docx_export import generate_test_docx, generate_study_material_docx
-import json
 
 export_bp = Blueprint('export', __name__)
 
+def get_material_state(material_type, material_id, user_id):
+    """
+    Load only creation time, version and change time of a user's material, None if not found
+
+    An archived material is restored first, since the export reads its tree.
+    """
+    model = Test if material_type == 'test' else StudyMaterial
+    query = db.session.query(model.id, model.created_at, model.version, model.updated_at,
+                             model.accessed_at, model.archived_at) \
+        .filter_by(id=material_id, user_id=user_id)
+    state = query.first()
+
+    if state and open_material(material_type, state):
+        db.session.commit()
+        if state.archived_at is not None:
+            state = query.first()
+
+    return state
+
 
 @export_bp.route('/api/export/pdf/<int:material_id>', methods=['GET'])
 def export_pdf(material_id):
@@ -38,72 +61,48 @@ def export_pdf(material_id):
         return jsonify({'error': 'type parameter required ("test" or "study_material")'}), 400
 
     try:
+        state = get_material_state(material_type, material_id, user_id)
+
+        if not state:
+            return jsonify({'error': 'Test not found' if material_type == 'test' else 'Study material not found'}), 404
+
+        variant = 'pdf-answers' if material_type == 'test' and include_answers else 'pdf'
+        etag = material_etag(user_id, material_type, material_id, state.created_at, state.version, variant)
+        cached = not_modified(etag, state.updated_at)
+        if cached:
+            return cached
+
         if material_type == 'test':
-            # Get test
-            test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+            # Get test with assignments, questions and options
+            test = load_test_tree(material_id, user_id)
 
             if not test:
                 return jsonify({'error': 'Test not found'}), 404
 
-            # Format test data
-            test_data = {
-                'id': test.id,
-                'title': test.title,
-                'created_at': test.created_at.isoformat(),
-                'assignments': []
-            }
-
-            for assignment in test.assignments:
-                assignment_data = {
-                    'id': assignment.id,
-                    'title': assignment.title,
-                    'description': assignment.description,
-                    'max_points': assignment.max_points,
-                    'questions': []
-                }
-
-                for question in assignment.questions:
-                    question_data = {
-                        'id': question.id,
-                        'question_text': question.question_text,
-                        'question_type': question.question_type.value,
-                        'correct_answer': question.correct_answer,
-                        'points': question.points,
-                        'options': []
-                    }
-
-                    # Add options
-                    for option in question.options:
-                        question_data['options'].append({
-                            'id': option.id,
-                            'option_text': option.option_text,
-                            'is_correct': option.is_correct
-                        })
-
-                    assignment_data['questions'].append(question_data)
-
-                test_data['assignments'].append(assignment_data)
+            test_data = serialize_test(test)
 
             pdf_buffer = generate_test_pdf(test_data, include_answers=include_answers)
 
             answer_suffix = "_with_answers" if include_answers else "_student_version"
             filename = f"{test.title.replace(' ', '_')}{answer_suffix}.pdf"
 
-            return send_file(
+            response = send_file(
                 pdf_buffer,
                 mimetype='application/pdf',
                 as_attachment=True,
                 download_name=filename
             )
+            return with_cache_headers(response, etag, state.updated_at)
 
         else:  # study_material
             # Get study material
-            material = StudyMaterial.query.filter_by(id=material_id, user_id=user_id).first()
+            material = StudyMaterial.query.options(undefer(StudyMaterial.content)) \
+                .filter_by(id=material_id, user_id=user_id).first()
 
             if not material:
                 return jsonify({'error': 'Study material not found'}), 404
 
-            content_data = json.loads(material.content) if material.content else {}
+            content_data = material.content_data
 
             # Format material data
             material_data = {
@@ -117,14 +116,16 @@ def export_pdf(material_id):
 
             filename = f"{material.title.replace(' ', '_')}_study_material.pdf"
 
-            return send_file(
+            response = send_file(
                 pdf_buffer,
                 mimetype='application/pdf',
                 as_attachment=True,
                 download_name=filename
             )
+            return with_cache_headers(response, etag, state.updated_at)
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'error': 'Failed to generate PDF',
             'details': str(e)
@@ -156,71 +157,46 @@ def export_docx(material_id):
         return jsonify({'error': 'type parameter required ("test" or "study_material")'}), 400
 
     try:
+        state = get_material_state(material_type, material_id, user_id)
+
+        if not state:
+            return jsonify({'error': 'Test not found' if material_type == 'test' else 'Study material not found'}), 404
+
+        etag = material_etag(user_id, material_type, material_id, state.created_at, state.version, 'docx')
+        cached = not_modified(etag, state.updated_at)
+        if cached:
+            return cached
+
         if material_type == 'test':
-            # Get test
-            test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+            # Get test with assignments, questions and options
+            test = load_test_tree(material_id, user_id)
 
             if not test:
                 return jsonify({'error': 'Test not found'}), 404
 
-            # Format test data
-            test_data = {
-                'id': test.id,
-                'title': test.title,
-                'created_at': test.created_at.isoformat(),
-                'assignments': []
-            }
-
-            for assignment in test.assignments:
-                assignment_data = {
-                    'id': assignment.id,
-                    'title': assignment.title,
-                    'description': assignment.description,
-                    'max_points': assignment.max_points,
-                    'questions': []
-                }
-
-                for question in assignment.questions:
-                    question_data = {
-                        'id': question.id,
-                        'question_text': question.question_text,
-                        'question_type': question.question_type.value,
-                        'correct_answer': question.correct_answer,
-                        'points': question.points,
-                        'options': []
-                    }
-
-                    # Add options
-                    for option in question.options:
-                        question_data['options'].append({
-                            'id': option.id,
-                            'option_text': option.option_text,
-                            'is_correct': option.is_correct
-                        })
-
-                    assignment_data['questions'].append(question_data)
-
-                test_data['assignments'].append(assignment_data)
+            test_data = serialize_test(test)
 
             docx_buffer = generate_test_docx(test_data)
 
             filename = f"{test.title.replace(' ', '_')}_student_version.docx"
 
-            return send_file(
+            response = send_file(
                 docx_buffer,
                 mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
                 as_attachment=True,
                 download_name=filename
             )
+            return with_cache_headers(response, etag, state.updated_at)
 
         else:  # study_material
             # Get study material
-            material = StudyMaterial.query.filter_by(id=material_id, user_id=user_id).first()
+            material = StudyMaterial.query.options(undefer(StudyMaterial.content)) \
+                .filter_by(id=material_id, user_id=user_id).first()
 
             if not material:
                 return jsonify({'error': 'Study material not found'}), 404
 
-            content_data = json.loads(material.content) if material.content else {}
+            content_data = material.content_data
 
             # Format material data
             material_data = {
@@ -234,14 +210,16 @@ def export_docx(material_id):
 
             filename = f"{material.title.replace(' ', '_')}_study_material.docx"
 
-            return send_file(
+            response = send_file(
                 docx_buffer,
                 mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
                 as_attachment=True,
                 download_name=filename
             )
+            return with_cache_headers(response, etag, state.updated_at)
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'error': 'Failed to generate DOCX',
             'details': str(e)
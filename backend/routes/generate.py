@@ -4,17 +4,20 @@ Handles test and study material generation using Claude API
 """
 from flask import Blueprint, request, jsonify, session
 from extensions import db
-from models import Test, StudyMaterial, Assignment, Question, QuestionOption, QuestionType
-from services.claude_api import get_claude_client
+from models import Test, StudyMaterial
+from services.claude_api import get_claude_client, SOURCE_MARKER
+from services.content_compression import compress_content, compress_sources
+from services.tree_writer import insert_assignments
+from services.write_coordinator import write_transaction
 from services.parser import (
-    validate_test_response,
+    salvage_test_response,
+    pop_parse_report,
     validate_study_material_response,
-    clean_test_data,
     clean_study_material_data,
     ParserError
 )
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 import PyPDF2
 from docx import Document
@@ -23,12 +26,22 @@ generate_bp = Blueprint('generate', __name__)
 
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx'}
-MAX_FILE_SIZE = 10 * 1024 * 1024
+MAX_FILE_SIZE = 10 * 1024 * 1024  # Limit for the total size of all uploaded files
+MAX_FILES = 10
+EXTRACTION_WORKERS = 4
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_file_size(file):
+    """Get uploaded file size in bytes without reading it into memory"""
+    position = file.stream.tell()
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(position)
+    return size
+
 def extract_text_from_file(file):
     """
     Extract text content from uploaded file
@@ -42,8 +55,10 @@ def extract_text_from_file(file):
     Raises:
         ValueError: If file type is not supported or extraction fails
     """
-    filename = secure_filename(file.filename)
-    file_ext = filename.rsplit('.', 1)[1].lower()
+    # Taken from the original name, secure_filename drops non-ASCII names down to the extension
+    file_ext = os.path.splitext(file.filename or '')[1][1:].lower()
+    if not file_ext:
+        raise ValueError(f"File has no extension: {file.filename}")
 
     try:
         if file_ext == 'txt':
@@ -67,6 +82,50 @@ def extract_text_from_file(file):
     except Exception as e:
         raise ValueError(f"Failed to extract text from file: {str(e)}")
 
+def extract_text_from_files(files):
+    """
+    Extract text content from several uploaded files concurrently
+
+    Args:
+        files (list): FileStorage objects from Flask
+
+    Returns:
+        list: (filename, text) tuples in upload order
+
+    Raises:
+        ValueError: If extraction of any file fails
+    """
+    if len(files) == 1:
+        return [(secure_filename(files[0].filename), extract_text_from_file(files[0]))]
+
+    with ThreadPoolExecutor(max_workers=min(EXTRACTION_WORKERS, len(files))) as executor:
+        texts = list(executor.map(extract_text_from_file, files))
+
+    return [(secure_filename(file.filename), text) for file, text in zip(files, texts)]
+
+def combine_sources(sources):
+    """
+    Combine extracted file texts into one prompt content
+
+    Each file keeps its own section header so Claude can organize
+    assignments by source file.
+
+    Args:
+        sources (list): (filename, text) tuples
+
+    Returns:
+        str: Combined content
+    """
+    sources = [(filename, text.strip()) for filename, text in sources if text and text.strip()]
+
+    if len(sources) == 1:
+        return sources[0][1]
+
+    return '\n\n'.join(
+        f"{SOURCE_MARKER} {i}: {filename} ===\n{text}"
+        for i, (filename, text) in enumerate(sources, start=1)
+    )
+
 @generate_bp.route('/api/generate', methods=['POST'])
 def generate_material():
     """
@@ -75,13 +134,15 @@ def generate_material():
     Request (multipart/form-data or JSON):
         - material_type: "test" or "study_material" (required)
         - title: Material title (required)
-        - content: Text content (required if no file)
-        - file: Uploaded file (PDF, DOCX, TXT) (required if no content)
+        - content: Text content (required if no files)
+        - files: Uploaded files (PDF, DOCX, TXT), one or more (required if no content)
+        - file: Single uploaded file (legacy alternative to files)
         - num_questions: Number of questions for tests (optional, default: 10)
         - difficulty: Test difficulty - "easy", "medium", "hard" (optional, default: "medium")
 
     Returns:
-        JSON with generated material data and database ID
+        JSON with generated material data, database ID, prompt token reduction stats
+        and a report of repaired or dropped parts of Claude's response
     """
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
@@ -105,23 +166,36 @@ def generate_material():
             return jsonify({'error': 'title is required'}), 400
 
         if not content:
-            if 'file' not in request.files:
+            files = request.files.getlist('files') or request.files.getlist('file')
+
+            if not files:
                 return jsonify({'error': 'Either content or file is required'}), 400
 
-            file = request.files['file']
+            if len(files) > MAX_FILES:
+                return jsonify({'error': f'Too many files. Maximum: {MAX_FILES}'}), 400
+
+            for file in files:
+                if file.filename == '':
+                    return jsonify({'error': 'No file selected'}), 400
 
-            if file.filename == '':
-                return jsonify({'error': 'No file selected'}), 400
+                if not allowed_file(file.filename):
+                    return jsonify({
+                        'error': f'File type not allowed. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+                    }), 400
 
-            if not allowed_file(file.filename):
+            total_size = sum(get_file_size(file) for file in files)
+            if total_size > MAX_FILE_SIZE:
                 return jsonify({
-                    'error': f'File type not allowed. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
-                }), 400
+                    'error': f'Files too large. Maximum total size: {MAX_FILE_SIZE // (1024 * 1024)} MB'
+                }), 413
 
             try:
-                content = extract_text_from_file(file)
+                sources, compression = compress_sources(extract_text_from_files(files))
+                content = combine_sources(sources)
             except ValueError as e:
                 return jsonify({'error': str(e)}), 400
+        else:
+            content, compression = compress_content(content, clean=False)
 
         if not content or len(content.strip()) == 0:
             return jsonify({'error': 'Content cannot be empty'}), 400
@@ -142,8 +216,9 @@ def generate_material():
                 difficulty=difficulty
             )
 
-            validated_data = validate_test_response(response)
-            cleaned_data = clean_test_data(validated_data)
+            parse_report = pop_parse_report(response)
+            cleaned_data, dropped = salvage_test_response(response)
+            parse_report['dropped'] += dropped
 
             test_id = save_test_to_database(user_id, title, cleaned_data)
 
@@ -152,12 +227,15 @@ def generate_material():
                 'message': 'Test generated successfully',
                 'material_type': 'test',
                 'id': test_id,
-                'data': cleaned_data
+                'data': cleaned_data,
+                'compression': compression,
+                'parse_report': parse_report
             }), 201
 
         else:
             response = client.generate_study_material(content=content)
 
+            parse_report = pop_parse_report(response)
             validated_data = validate_study_material_response(response)
             cleaned_data = clean_study_material_data(validated_data)
 
@@ -168,7 +246,9 @@ def generate_material():
                 'message': 'Study material generated successfully',
                 'material_type': 'study_material',
                 'id': material_id,
-                'data': cleaned_data
+                'data': cleaned_data,
+                'compression': compression,
+                'parse_report': parse_report
             }), 201
 
     except ParserError as e:
@@ -200,45 +280,15 @@ def save_test_to_database(user_id, title, test_data):
     Returns:
         int: Test ID
     """
+    return write_transaction(_insert_test, user_id, title, test_data)
+
+def _insert_test(user_id, title, test_data):
+    """Insert a test with its tree without committing"""
     test = Test(user_id=user_id, title=title)
     db.session.add(test)
     db.session.flush()
 
-    for assignment_data in test_data['assignments']:
-        assignment = Assignment(
-            test_id=test.id,
-            title=assignment_data['title'],
-            description=assignment_data['description'],
-            max_points=assignment_data['max_points'],
-            order_number=assignment_data['order_number']
-        )
-        db.session.add(assignment)
-        db.session.flush()
-
-        for question_data in assignment_data['questions']:
-            question = Question(
-                assignment_id=assignment.id,
-                question_text=question_data['question_text'],
-                question_type=QuestionType[question_data['question_type']],
-                correct_answer=question_data['correct_answer'],
-                points=question_data['points'],
-                order_number=question_data['order_number']
-            )
-            db.session.add(question)
-            db.session.flush()
-
-            # Create question options (for multiple choice, true/false, etc.)
-            if question_data.get('options'):
-                for i, option_data in enumerate(question_data['options']):
-                    option = QuestionOption(
-                        question_id=question.id,
-                        option_text=option_data['option_text'],
-                        is_correct=option_data['is_correct'],
-                        order_number=i + 1
-                    )
-                    db.session.add(option)
-
-    db.session.commit()
+    insert_assignments(test.id, test_data['assignments'])
     return test.id
 
 def save_study_material_to_database(user_id, title, material_data):
@@ -253,13 +303,16 @@ def save_study_material_to_database(user_id, title, material_data):
     Returns:
         int: Study material ID
     """
-    # Store material_data as JSON string
+    return write_transaction(_insert_study_material, user_id, title, material_data)
+
+def _insert_study_material(user_id, title, material_data):
+    """Insert a study material without committing"""
     material = StudyMaterial(
         user_id=user_id,
-        title=title,
-        content=json.dumps(material_data, ensure_ascii=False)
+        title=title
     )
+    material.content_data = material_data
     db.session.add(material)
-    db.session.commit()
+    db.session.flush()
 
     return material.id
@@ -3,19 +3,87 @@ Materials CRUD Routes
 Handles viewing, updating, and deleting tests and study materials
 """
 from flask import Blueprint, request, jsonify, session
+from sqlalchemy import delete
+from sqlalchemy.orm import undefer
 from extensions import db
-from models import Test, StudyMaterial, Assignment, Question, QuestionOption, QuestionType, User
-import json
+from models import Test, StudyMaterial, Assignment, User
+from services.tree_writer import insert_assignments, insert_questions
+from services.tree_copy import copy_tests, MAX_MERGED_TESTS
+from services.ordering import move_row, next_order_number, OrderingError, ORDER_GAP
+from services.tree_patch import apply_test_operations, PatchError
+from services.material_tree import load_test_tree, load_assignments, serialize_assignments
+from services.material_listing import (
+    list_page, serialize_page, parse_date, ListingError, MATERIAL_MODELS, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from services.cold_storage import open_material
+from services.http_cache import material_etag, listing_etag, not_modified, with_cache_headers
 
 materials_bp = Blueprint('materials', __name__)
 
+def test_response(test, assignments_data):
+    """Build test response body in the format of GET /api/materials/<id>"""
+    return {
+        'success': True,
+        'type': 'test',
+        'id': test.id,
+        'title': test.title,
+        'created_at': test.created_at.isoformat(),
+        'version': test.version,
+        'assignments': assignments_data
+    }
+
+def study_material_response(material, content_data):
+    """Build study material response body in the format of GET /api/materials/<id>"""
+    return {
+        'success': True,
+        'type': 'study_material',
+        'id': material.id,
+        'title': material.title,
+        'created_at': material.created_at.isoformat(),
+        'version': material.version,
+        'content': content_data
+    }
+
+MAX_BULK_DELETE = 500
+MAX_TITLE_LENGTH = 255  # Length of the title columns
+
+def delete_user_materials(user_id, material_type, material_ids):
+    """
+    Delete a user's materials of one type with a single statement
+
+    Assignments, questions and options are removed by the database
+    through ON DELETE CASCADE, without loading them.
+
+    Args:
+        user_id (int): Owner's user ID
+        material_type (str): "test" or "study_material"
+        material_ids (list): Material IDs
+
+    Returns:
+        set: IDs of deleted materials (other IDs don't exist or belong to another user)
+    """
+    model = MATERIAL_MODELS[material_type]
+    return set(db.session.scalars(
+        delete(model)
+        .where(model.user_id == user_id, model.id.in_(material_ids))
+        .returning(model.id)
+    ))
+
 @materials_bp.route('/api/materials', methods=['GET'])
 def get_all_materials():
     """
-    Get all materials (tests + study materials) for logged-in user
+    Get one page of materials (tests + study materials) for logged-in user
+
+    Query params:
+        - limit: Page size, 1-100 (optional, default 20)
+        - cursor: next_cursor of the previous page (optional)
+        - type: "test" or "study_material" (optional)
+        - title: Text the title must contain (optional)
+        - created_from: Earliest creation date, ISO format (optional)
+        - created_to: Latest creation date, ISO format, inclusive (optional)
 
     Returns:
-        JSON array with all materials
+        JSON array with materials, newest first, and the cursor of the next page
     """
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
@@ -23,41 +91,38 @@ def get_all_materials():
     user_id = session['user_id']
 
     try:
-        tests = Test.query.filter_by(user_id=user_id).order_by(Test.created_at.desc()).all()
-
-        study_materials = StudyMaterial.query.filter_by(user_id=user_id).order_by(StudyMaterial.created_at.desc()).all()
-
-        materials = []
-
-
-        for test in tests:
-            materials.append({
-                'id': test.id,
-                'type': 'test',
-                'title': test.title,
-                'created_at': test.created_at.isoformat(),
-                'assignments_count': len(test.assignments),
-                'total_questions': sum(len(a.questions) for a in test.assignments)
-            })
-
-
-        for material in study_materials:
-            content_data = json.loads(material.content) if material.content else {}
-            materials.append({
-                'id': material.id,
-                'type': 'study_material',
-                'title': material.title,
-                'created_at': material.created_at.isoformat(),
-                'terms_count': len(content_data.get('terms', []))
-            })
-
-        materials.sort(key=lambda x: x['created_at'], reverse=True)
-
-        return jsonify({
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+        created_from = request.args.get('created_from')
+        created_to = request.args.get('created_to')
+
+        rows, next_cursor = list_page(
+            user_id,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            material_type=request.args.get('type'),
+            title=request.args.get('title'),
+            created_from=parse_date(created_from, 'created_from') if created_from else None,
+            created_to=parse_date(created_to, 'created_to', end=True) if created_to else None
+        )
+
+        etag = listing_etag(user_id, [(row.type, row.id, row.created_at, row.version) for row in rows], next_cursor)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        response = jsonify({
             'success': True,
-            'materials': materials,
-            'total': len(materials)
-        }), 200
+            'materials': serialize_page(rows),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        })
+        return with_cache_headers(response, etag), 200
+
+    except ListingError as e:
+        return jsonify({'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({
@@ -88,75 +153,54 @@ def get_material(material_id):
     if not material_type or material_type not in ['test', 'study_material']:
         return jsonify({'error': 'type parameter required ("test" or "study_material")'}), 400
 
+    model = Test if material_type == 'test' else StudyMaterial
+
     try:
+        # Answer conditional requests from the version alone
+        state = db.session.query(model.id, model.created_at, model.version, model.updated_at, model.accessed_at,
+                                 model.archived_at) \
+            .filter_by(id=material_id, user_id=user_id).first()
+
+        if not state:
+            return jsonify({'error': 'Test not found' if material_type == 'test' else 'Study material not found'}), 404
+
+        etag = material_etag(user_id, material_type, material_id, state.created_at, state.version)
+        cached = not_modified(etag, state.updated_at)
+        if cached:
+            if open_material(material_type, state, restore=False):
+                db.session.commit()
+            return cached
+
+        if open_material(material_type, state):
+            db.session.commit()
+        if state.archived_at is not None:
+            # A restored material has a new version
+            state = db.session.query(model.created_at, model.version, model.updated_at) \
+                .filter_by(id=material_id).first()
+            etag = material_etag(user_id, material_type, material_id, state.created_at, state.version)
+
         if material_type == 'test':
-            test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+            test = load_test_tree(material_id, user_id)
 
             if not test:
                 return jsonify({'error': 'Test not found'}), 404
 
-
-            assignments_data = []
-            for assignment in test.assignments:
-                questions_data = []
-                for question in assignment.questions:
-                    options_data = [
-                        {
-                            'id': opt.id,
-                            'option_text': opt.option_text,
-                            'is_correct': opt.is_correct,
-                            'order_number': opt.order_number
-                        }
-                        for opt in question.options
-                    ]
-
-                    questions_data.append({
-                        'id': question.id,
-                        'question_text': question.question_text,
-                        'question_type': question.question_type.value,
-                        'correct_answer': question.correct_answer,
-                        'points': question.points,
-                        'order_number': question.order_number,
-                        'options': options_data
-                    })
-
-                assignments_data.append({
-                    'id': assignment.id,
-                    'title': assignment.title,
-                    'description': assignment.description,
-                    'max_points': assignment.max_points,
-                    'order_number': assignment.order_number,
-                    'questions': questions_data
-                })
-
-            return jsonify({
-                'success': True,
-                'type': 'test',
-                'id': test.id,
-                'title': test.title,
-                'created_at': test.created_at.isoformat(),
-                'assignments': assignments_data
-            }), 200
+            response = jsonify(test_response(test, serialize_assignments(test.assignments)))
+            return with_cache_headers(response, etag, state.updated_at), 200
 
         else:  # study_material
-            material = StudyMaterial.query.filter_by(id=material_id, user_id=user_id).first()
+            material = StudyMaterial.query.options(undefer(StudyMaterial.content)) \
+                .filter_by(id=material_id, user_id=user_id).first()
 
             if not material:
                 return jsonify({'error': 'Study material not found'}), 404
 
 
-            content_data = json.loads(material.content) if material.content else {}
-
-            return jsonify({
-                'success': True,
-                'type': 'study_material',
-                'id': material.id,
-                'title': material.title,
-                'created_at': material.created_at.isoformat(),
-                'content': content_data
-            }), 200
+            response = jsonify(study_material_response(material, material.content_data))
+            return with_cache_headers(response, etag, state.updated_at), 200
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'error': 'Failed to fetch material',
             'details': str(e)
@@ -177,7 +221,7 @@ def update_material(material_id):
         - For study materials: content object
 
     Returns:
-        JSON with success message
+        JSON with the saved material (same format as GET) and its new version
     """
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
@@ -198,80 +242,137 @@ def update_material(material_id):
             if not test:
                 return jsonify({'error': 'Test not found'}), 404
 
+            open_material('test', test)
 
             if 'title' in data and data['title']:
                 test.title = data['title']
 
             if 'assignments' in data:
                 # Delete existing assignments (CASCADE will delete questions and options)
-                for assignment in test.assignments:
-                    db.session.delete(assignment)
-
-
-                for assignment_data in data['assignments']:
-                    assignment = Assignment(
-                        test_id=test.id,
-                        title=assignment_data['title'],
-                        description=assignment_data.get('description', ''),
-                        max_points=assignment_data.get('max_points', 0),
-                        order_number=assignment_data.get('order_number', 1)
-                    )
-                    db.session.add(assignment)
-                    db.session.flush()
-
-
-                    for question_data in assignment_data.get('questions', []):
-                        question = Question(
-                            assignment_id=assignment.id,
-                            question_text=question_data['question_text'],
-                            question_type=QuestionType[question_data['question_type']],
-                            correct_answer=question_data.get('correct_answer', ''),
-                            points=question_data.get('points', 0),
-                            order_number=question_data.get('order_number', 1)
-                        )
-                        db.session.add(question)
-                        db.session.flush()
-
-
-                        for option_data in question_data.get('options', []):
-                            option = QuestionOption(
-                                question_id=question.id,
-                                option_text=option_data['option_text'],
-                                is_correct=option_data.get('is_correct', False),
-                                order_number=option_data.get('order_number', 1)
-                            )
-                            db.session.add(option)
+                db.session.execute(delete(Assignment).where(Assignment.test_id == test.id))
+                insert_assignments(test.id, data['assignments'])
+
+            # Built from the stored rows, the request values may be coerced and come in another order
+            assignments_data = serialize_assignments(load_assignments(test.id))
 
+            test.touch()
+            response = test_response(test, assignments_data)
             db.session.commit()
 
-            return jsonify({
-                'success': True,
-                'message': 'Test updated successfully',
-                'id': test.id
-            }), 200
+            response['message'] = 'Test updated successfully'
+            return jsonify(response), 200
 
         else:  # study_material
-            material = StudyMaterial.query.filter_by(id=material_id, user_id=user_id).first()
+            material = StudyMaterial.query.options(undefer(StudyMaterial.content)) \
+                .filter_by(id=material_id, user_id=user_id).first()
 
             if not material:
                 return jsonify({'error': 'Study material not found'}), 404
 
+            open_material('study_material', material)
 
             if 'title' in data and data['title']:
                 material.title = data['title']
 
 
             if 'content' in data:
-                material.content = json.dumps(data['content'], ensure_ascii=False)
+                material.content_data = data['content']
+
+            material.touch()
+            response = study_material_response(material, material.content_data)
+            db.session.commit()
+
+            response['message'] = 'Study material updated successfully'
+            return jsonify(response), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to update material',
+            'details': str(e)
+        }), 500
+
+@materials_bp.route('/api/materials/<int:material_id>', methods=['PATCH'])
+def patch_material(material_id):
+    """
+    Apply partial changes to a material
+
+    Only changed rows are written, existing assignments, questions and
+    options keep their IDs.
+
+    Args:
+        material_id: Material ID
+
+    Request body (JSON):
+        - type: "test" or "study_material"
+        - title: New title (optional)
+        - For tests: operations array (see services.tree_patch.apply_test_operations)
+        - For study materials: content object with the keys to replace (summary, terms)
+
+    Returns:
+        JSON with the saved material (same format as GET), its new version
+        and number of changed rows
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+
+    try:
+        data = request.get_json()
+
+        if not data or data.get('type') not in ['test', 'study_material']:
+            return jsonify({'error': 'type is required ("test" or "study_material")'}), 400
+
+        if data['type'] == 'test':
+            test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+
+            if not test:
+                return jsonify({'error': 'Test not found'}), 404
+
+            open_material('test', test)
+
+            if data.get('title'):
+                test.title = data['title']
+
+            assignments_data, changes = apply_test_operations(test.id, data.get('operations', []))
+
+            test.touch()
+            response = test_response(test, assignments_data)
+            db.session.commit()
+
+            response['message'] = 'Test updated successfully'
+            response['changes'] = changes
+            return jsonify(response), 200
+
+        else:  # study_material
+            material = StudyMaterial.query.options(undefer(StudyMaterial.content)) \
+                .filter_by(id=material_id, user_id=user_id).first()
+
+            if not material:
+                return jsonify({'error': 'Study material not found'}), 404
 
+            open_material('study_material', material)
+
+            if data.get('title'):
+                material.title = data['title']
+
+            content = data.get('content')
+            if content is not None:
+                if not isinstance(content, dict):
+                    return jsonify({'error': 'content must be an object'}), 400
+                material.content_data = {**material.content_data, **content}
+
+            material.touch()
+            response = study_material_response(material, material.content_data)
             db.session.commit()
 
-            return jsonify({
-                'success': True,
-                'message': 'Study material updated successfully',
-                'id': material.id
-            }), 200
+            response['message'] = 'Study material updated successfully'
+            return jsonify(response), 200
 
+    except PatchError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -303,38 +404,245 @@ def delete_material(material_id):
         return jsonify({'error': 'type parameter required ("test" or "study_material")'}), 400
 
     try:
-        if material_type == 'test':
-            test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+        if not delete_user_materials(user_id, material_type, [material_id]):
+            name = 'Test' if material_type == 'test' else 'Study material'
+            return jsonify({'error': f'{name} not found'}), 404
 
-            if not test:
-                return jsonify({'error': 'Test not found'}), 404
+        db.session.commit()
 
-            db.session.delete(test)  # CASCADE will delete assignments, questions, options
-            db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': 'Test deleted successfully' if material_type == 'test'
+                       else 'Study material deleted successfully'
+        }), 200
 
-            return jsonify({
-                'success': True,
-                'message': 'Test deleted successfully'
-            }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to delete material',
+            'details': str(e)
+        }), 500
 
-        else:  # study_material
-            material = StudyMaterial.query.filter_by(id=material_id, user_id=user_id).first()
+@materials_bp.route('/api/materials', methods=['DELETE'])
+def delete_materials():
+    """
+    Delete many materials at once
 
-            if not material:
-                return jsonify({'error': 'Study material not found'}), 404
+    Expected JSON:
+        - materials: [{id, type}] items as in GET /api/materials (1-500 items)
 
-            db.session.delete(material)
-            db.session.commit()
+    Returns:
+        JSON with deleted IDs per type and items that were not found
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
 
-            return jsonify({
-                'success': True,
-                'message': 'Study material deleted successfully'
-            }), 200
+    user_id = session['user_id']
+
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('materials')
+
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'materials must be a non-empty list'}), 400
+
+        if len(items) > MAX_BULK_DELETE:
+            return jsonify({'error': f'At most {MAX_BULK_DELETE} materials can be deleted at once'}), 400
+
+        requested = {material_type: set() for material_type in MATERIAL_MODELS}
+        for item in items:
+            if not isinstance(item, dict) or item.get('type') not in MATERIAL_MODELS \
+                    or not isinstance(item.get('id'), int):
+                return jsonify({'error': 'Each material needs an integer id and type "test" or "study_material"'}), 400
+            requested[item['type']].add(item['id'])
+
+        deleted = {
+            material_type: delete_user_materials(user_id, material_type, ids) if ids else set()
+            for material_type, ids in requested.items()
+        }
+        db.session.commit()
+
+        return jsonify({
+            'success': True,
+            'deleted': {material_type: sorted(ids) for material_type, ids in deleted.items()},
+            'not_found': [
+                {'id': material_id, 'type': material_type}
+                for material_type, ids in requested.items()
+                for material_id in sorted(ids - deleted[material_type])
+            ]
+        }), 200
 
     except Exception as e:
         db.session.rollback()
         return jsonify({
-            'error': 'Failed to delete material',
+            'error': 'Failed to delete materials',
+            'details': str(e)
+        }), 500
+
+def copy_title(data, default):
+    """Title of a cloned or merged test, the default cut to the column length, None if the requested one is invalid"""
+    title = data.get('title')
+    if title is None:
+        return default[:MAX_TITLE_LENGTH]
+    if not isinstance(title, str) or not title.strip() or len(title) > MAX_TITLE_LENGTH:
+        return None
+    return title
+
+def copied_test_response(test, copied, message):
+    """Build the response of a cloned or merged test, the same format as GET plus copied row counts"""
+    response = test_response(test, serialize_assignments(load_assignments(test.id)))
+    response['message'] = message
+    response['copied'] = copied
+    return response
+
+@materials_bp.route('/api/materials/<int:material_id>/clone', methods=['POST'])
+def clone_test(material_id):
+    """
+    Copy a test with all assignments, questions and options
+
+    Args:
+        material_id: Test ID
+
+    Request body (JSON, optional):
+        - title: Title of the copy (default: "<title> (kopija)")
+
+    Returns:
+        JSON with the new test (same format as GET) and number of copied rows
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+
+    try:
+        data = request.get_json(silent=True) or {}
+
+        test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+        if not test:
+            return jsonify({'error': 'Test not found'}), 404
+
+        title = copy_title(data, f'{test.title} (kopija)')
+        if title is None:
+            return jsonify({'error': f'title must be a non-empty string of at most {MAX_TITLE_LENGTH} characters'}), 400
+
+        clone, copied = copy_tests(user_id, [test], title)
+        db.session.commit()
+
+        return jsonify(copied_test_response(clone, copied, 'Test cloned successfully')), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to clone test',
+            'details': str(e)
+        }), 500
+
+@materials_bp.route('/api/materials/merge', methods=['POST'])
+def merge_tests():
+    """
+    Combine several tests into a new one
+
+    The assignments of each test follow those of the previous test, the
+    merged tests stay unchanged.
+
+    Expected JSON:
+        - test_ids: IDs of the tests to merge, in order (2-20 tests)
+        - title: Title of the new test (optional, default: titles joined with " + ")
+
+    Returns:
+        JSON with the new test (same format as GET) and number of copied rows
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+
+    try:
+        data = request.get_json(silent=True) or {}
+        test_ids = data.get('test_ids')
+
+        if not isinstance(test_ids, list) or not all(isinstance(test_id, int) for test_id in test_ids):
+            return jsonify({'error': 'test_ids must be a list of integers'}), 400
+
+        test_ids = list(dict.fromkeys(test_ids))
+        if not 2 <= len(test_ids) <= MAX_MERGED_TESTS:
+            return jsonify({'error': f'Between 2 and {MAX_MERGED_TESTS} different tests can be merged'}), 400
+
+        tests = {test.id: test for test in Test.query.filter(Test.user_id == user_id, Test.id.in_(test_ids))}
+        missing = [test_id for test_id in test_ids if test_id not in tests]
+        if missing:
+            return jsonify({'error': 'Test not found', 'not_found': missing}), 404
+
+        sources = [tests[test_id] for test_id in test_ids]
+        title = copy_title(data, ' + '.join(source.title for source in sources))
+        if title is None:
+            return jsonify({'error': f'title must be a non-empty string of at most {MAX_TITLE_LENGTH} characters'}), 400
+
+        merged, copied = copy_tests(user_id, sources, title)
+        db.session.commit()
+
+        return jsonify(copied_test_response(merged, copied, 'Tests merged successfully')), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to merge tests',
+            'details': str(e)
+        }), 500
+
+@materials_bp.route('/api/materials/<int:material_id>/move', methods=['POST'])
+def move_test_row(material_id):
+    """
+    Move an assignment or question within a test
+
+    Only the moved row gets a new order_number (see services.ordering),
+    its siblings keep theirs.
+
+    Args:
+        material_id: Test ID
+
+    Request body (JSON):
+        - entity: "assignment" or "question"
+        - id: ID of the moved row
+        - after_id: Row to place it after, null to make it the first one
+        - assignment_id: Assignment to move a question to (optional, default: the assignment of after_id)
+
+    Returns:
+        JSON with the row's new order_number, parent and the test's new version
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+
+    try:
+        data = request.get_json(silent=True) or {}
+
+        if not isinstance(data.get('id'), int) or not isinstance(data.get('after_id'), (int, type(None))) \
+                or not isinstance(data.get('assignment_id'), (int, type(None))):
+            return jsonify({'error': 'id must be an integer, after_id and assignment_id integers or null'}), 400
+
+        test = Test.query.filter_by(id=material_id, user_id=user_id).first()
+        if not test:
+            return jsonify({'error': 'Test not found'}), 404
+
+        open_material('test', test)
+
+        moved = move_row(test.id, data.get('entity'), data['id'],
+                         after_id=data.get('after_id'), parent_id=data.get('assignment_id'))
+
+        test.touch()
+        db.session.commit()
+
+        return jsonify({'success': True, **moved, 'version': test.version}), 200
+
+    except OrderingError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Failed to move row',
             'details': str(e)
         }), 500
 
@@ -390,7 +698,7 @@ def generate_additional_questions(material_id):
             return jsonify({'error': 'Assignment not found'}), 404
 
         from services.claude_api import get_claude_client
-        from services.parser import validate_test_response, clean_test_data, ParserError
+        from services.parser import salvage_test_response, pop_parse_report, ParserError
 
         try:
             client = get_claude_client()
@@ -411,8 +719,8 @@ def generate_additional_questions(material_id):
             return jsonify({'error': f'AI generation failed: {str(e)}'}), 500
 
         try:
-            validated_data = validate_test_response(response)
-            cleaned_data = clean_test_data(validated_data)
+            pop_parse_report(response)
+            cleaned_data, _ = salvage_test_response(response)
         except Exception as e:
             return jsonify({'error': f'Failed to process AI response: {str(e)}'}), 500
 
@@ -422,57 +730,14 @@ def generate_additional_questions(material_id):
 
         generated_questions = cleaned_data['assignments'][0].get('questions', [])
 
-        # Determine the starting order_number
-        max_order = max([q.order_number for q in assignment.questions], default=0)
+        # Append after the last question, the largest key is read in SQL
+        first_order = next_order_number('question', assignment.id)
 
-        created_questions = []
         for idx, question_data in enumerate(generated_questions):
-            question = Question(
-                assignment_id=assignment.id,
-                question_text=question_data['question_text'],
-                question_type=QuestionType[question_data['question_type']],
-                correct_answer=question_data['correct_answer'],
-                points=question_data['points'],
-                order_number=max_order + idx + 1
-            )
-            db.session.add(question)
-            db.session.flush()  # Get question ID
-
-            # Create question options (for multiple choice, true/false, etc.)
-            options_data = []
-            if question_data.get('options'):
-                for i, option_item in enumerate(question_data['options']):
-                    # Handle both dict and string formats
-                    if isinstance(option_item, dict):
-                        option_text = option_item.get('option_text', '')
-                        is_correct = option_item.get('is_correct', False)
-                    else:
-                        option_text = str(option_item)
-                        is_correct = option_text == question_data['correct_answer']
-
-                    option = QuestionOption(
-                        question_id=question.id,
-                        option_text=option_text,
-                        is_correct=is_correct,
-                        order_number=i + 1
-                    )
-                    db.session.add(option)
-                    options_data.append({
-                        'id': option.id,
-                        'option_text': option_text,
-                        'is_correct': is_correct,
-                        'order_number': i + 1
-                    })
-
-            created_questions.append({
-                'id': question.id,
-                'question_text': question_data['question_text'],
-                'question_type': question_data['question_type'],
-                'correct_answer': question_data['correct_answer'],
-                'points': question_data['points'],
-                'order_number': max_order + idx + 1,
-                'options': options_data
-            })
+            question_data['order_number'] = first_order + idx * ORDER_GAP
+
+        created_questions = insert_questions([(assignment.id, question_data) for question_data in generated_questions])
+        test.touch()
 
         db.session.commit()
 
@@ -0,0 +1,89 @@
+"""
+Search Routes
+Full-text search and title autocomplete over the logged-in user's materials
+"""
+from flask import Blueprint, request, jsonify, session
+from services.search_index import search, suggest, SearchError, DEFAULT_LIMIT, MAX_LIMIT, SUGGEST_LIMIT
+
+search_bp = Blueprint('search', __name__)
+
+SEARCH_TYPES = ('test', 'study_material')
+
+@search_bp.route('/api/search', methods=['GET'])
+def search_materials():
+    """
+    Search test titles, questions, study material titles, summaries and terms
+
+    Query params:
+        - q: Search text, every word must match (required)
+        - type: "test" or "study_material" (optional)
+        - limit: Maximum number of materials, 1-50 (optional, default 20)
+        - prefix: "false" to match the last word exactly (optional, default true)
+
+    Returns:
+        JSON with ranked results, each with up to 3 highlighted snippets
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    try:
+        limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+        if not 1 <= limit <= MAX_LIMIT:
+            return jsonify({'error': f'limit must be between 1 and {MAX_LIMIT}'}), 400
+
+        material_type = request.args.get('type')
+        if material_type and material_type not in SEARCH_TYPES:
+            return jsonify({'error': 'type must be "test" or "study_material"'}), 400
+
+        query = request.args.get('q', '')
+        results = search(
+            session['user_id'],
+            query,
+            material_type=material_type,
+            limit=limit,
+            prefix=request.args.get('prefix', 'true').lower() != 'false'
+        )
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': results
+        }), 200
+
+    except SearchError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Search failed',
+            'details': str(e)
+        }), 500
+
+@search_bp.route('/api/search/suggest', methods=['GET'])
+def suggest_titles():
+    """
+    Autocomplete material titles while typing
+
+    Query params:
+        - q: Typed text, the last word is matched as a prefix (required)
+
+    Returns:
+        JSON with up to 8 matching titles
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    try:
+        return jsonify({
+            'success': True,
+            'suggestions': suggest(session['user_id'], request.args.get('q', ''), SUGGEST_LIMIT)
+        }), 200
+
+    except SearchError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        return jsonify({
+            'error': 'Autocomplete failed',
+            'details': str(e)
+        }), 500
@@ -0,0 +1,157 @@
+"""
+ZIP Archive Reader
+Safely reads uploaded ZIP archives entry by entry for bulk ingestion
+"""
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from werkzeug.datastructures import FileStorage
+
+MAX_ENTRIES = 200
+MAX_ENTRY_SIZE = 10 * 1024 * 1024
+MAX_TOTAL_SIZE = 200 * 1024 * 1024
+MAX_COMPRESSION_RATIO = 100
+EXTRACTION_WORKERS = 4
+
+class ArchiveError(Exception):
+    """Custom exception for invalid or unsafe archives"""
+    pass
+
+def _is_skipped(name):
+    """Check if archive entry is a directory or OS metadata file"""
+    basename = os.path.basename(name)
+    return (
+        name.endswith('/')
+        or name.startswith('__MACOSX/')
+        or basename.startswith('.')
+        or not basename
+    )
+
+def list_entries(archive, allowed_file):
+    """
+    List archive entries that should be ingested, rejecting zip bombs
+
+    Sizes are checked from the central directory before anything
+    is decompressed.
+
+    Args:
+        archive (zipfile.ZipFile): Opened archive
+        allowed_file (callable): Filename filter
+
+    Returns:
+        list: (ZipInfo, error) tuples, error is None for valid entries
+
+    Raises:
+        ArchiveError: If the archive as a whole is unsafe
+    """
+    infos = [info for info in archive.infolist() if not _is_skipped(info.filename)]
+
+    if len(infos) == 0:
+        raise ArchiveError("Archive contains no files")
+
+    if len(infos) > MAX_ENTRIES:
+        raise ArchiveError(f"Archive contains too many files. Maximum: {MAX_ENTRIES}")
+
+    if sum(info.file_size for info in infos) > MAX_TOTAL_SIZE:
+        raise ArchiveError(
+            f"Archive is too large when uncompressed. Maximum: {MAX_TOTAL_SIZE // (1024 * 1024)} MB"
+        )
+
+    entries = []
+    for info in infos:
+        if info.flag_bits & 0x1:
+            raise ArchiveError("Encrypted archives are not supported")
+
+        ratio = info.file_size / max(info.compress_size, 1)
+        if ratio > MAX_COMPRESSION_RATIO:
+            raise ArchiveError(
+                f"Suspicious compression ratio for '{info.filename}' ({ratio:.0f}:1). "
+                f"Maximum: {MAX_COMPRESSION_RATIO}:1"
+            )
+
+        if not allowed_file(info.filename):
+            entries.append((info, 'File type not allowed'))
+        elif info.file_size > MAX_ENTRY_SIZE:
+            entries.append((info, f'File too large. Maximum: {MAX_ENTRY_SIZE // (1024 * 1024)} MB'))
+        else:
+            entries.append((info, None))
+
+    return entries
+
+def read_entry(archive, info):
+    """
+    Read one archive entry, never decompressing past its declared size
+
+    Args:
+        archive (zipfile.ZipFile): Opened archive
+        info (zipfile.ZipInfo): Entry to read
+
+    Returns:
+        bytes: Entry content
+
+    Raises:
+        ArchiveError: If entry decompresses to more than declared
+    """
+    with archive.open(info) as entry:
+        data = entry.read(info.file_size + 1)
+
+    if len(data) > info.file_size:
+        raise ArchiveError(f"'{info.filename}' is larger than declared")
+
+    return data
+
+def iter_archive_texts(stream, allowed_file, extract_text):
+    """
+    Extract text from every archive entry using a worker pool
+
+    Entries are decompressed and extracted by worker threads. At most
+    2 * EXTRACTION_WORKERS entries are in flight at once, so memory use
+    stays bounded regardless of archive size.
+
+    Args:
+        stream: Seekable file object with ZIP data
+        allowed_file (callable): Filename filter
+        extract_text (callable): Text extractor taking a FileStorage
+
+    Yields:
+        tuple: (filename, text, error) in archive order, text is None on error
+
+    Raises:
+        ArchiveError: If the archive is invalid or unsafe
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile as e:
+        raise ArchiveError(f"Invalid ZIP archive: {str(e)}")
+
+    with archive:
+        entries = list_entries(archive, allowed_file)
+
+        def extract(info):
+            data = read_entry(archive, info)
+            return extract_text(FileStorage(stream=BytesIO(data), filename=os.path.basename(info.filename)))
+
+        with ThreadPoolExecutor(max_workers=EXTRACTION_WORKERS) as executor:
+            pending = deque()
+
+            for info, error in entries:
+                future = executor.submit(extract, info) if error is None else None
+                pending.append((info, future, error))
+
+                if len(pending) >= EXTRACTION_WORKERS * 2:
+                    yield _collect(*pending.popleft())
+
+            while pending:
+                yield _collect(*pending.popleft())
+
+def _collect(info, future, error):
+    """Wait for one extraction result, a failing entry is reported without stopping the archive"""
+    if future is None:
+        return info.filename, None, error
+
+    try:
+        return info.filename, future.result(), None
+    except Exception as e:
+        return info.filename, None, str(e)
@@ -0,0 +1,368 @@
+"""
+Database Backup
+Online snapshots of SQLite databases with the backup API, incremental backup
+sets that store only changed pages, and verification of restored copies
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+DEFAULT_STEP_PAGES = 256     # Pages copied per backup step
+DEFAULT_STEP_PAUSE = 0.005   # Seconds between steps, leaves disk and CPU to requests
+DIGEST_SIZE = 8              # Bytes of blake2b digest kept per page
+MANIFEST_FILE = 'manifest.json'
+DELTA_MAGIC = b'KDDELTA1'
+
+class BackupError(Exception):
+    """Custom exception for failed backups and backups that don't verify"""
+    pass
+
+def snapshot_database(source_path, target_path, step_pages=DEFAULT_STEP_PAGES, step_pause=DEFAULT_STEP_PAUSE,
+                      busy_timeout=5000, progress=None):
+    """
+    Copy a database into a new file while it stays in use
+
+    The copy runs inside one read transaction of the source, so in WAL mode
+    every step reads the same snapshot: writers aren't blocked and their
+    commits don't restart the copy. The pause between steps keeps a large
+    copy from competing with requests for the disk. The result is a
+    standalone file in rollback journal mode.
+
+    Args:
+        source_path (str): Database file
+        target_path (str): New file, must not exist
+        step_pages (int): Pages per step
+        step_pause (float): Seconds to wait between steps
+        busy_timeout (int): ms to wait for a lock when the snapshot starts
+        progress: Called with (remaining, total) pages after every step (optional)
+
+    Returns:
+        dict: Page count, number of steps and duration in seconds
+    """
+    if os.path.exists(target_path):
+        raise BackupError(f'{target_path} already exists')
+
+    start = time.perf_counter()
+    steps = 0
+
+    def step_done(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if progress:
+            progress(remaining, total)
+        if remaining and step_pause:
+            time.sleep(step_pause)
+
+    source = sqlite3.connect(source_path, timeout=busy_timeout / 1000, isolation_level=None)
+    target = sqlite3.connect(target_path, isolation_level=None)
+    try:
+        source.execute('BEGIN')
+        source.execute('SELECT count(*) FROM sqlite_master').fetchone()  # Starts the read snapshot
+        source.backup(target, pages=step_pages, progress=step_done)
+        source.execute('COMMIT')
+        target.execute('PRAGMA journal_mode = DELETE')
+        page_count = target.execute('PRAGMA page_count').fetchone()[0]
+    finally:
+        source.close()
+        target.close()
+
+    return {'pages': page_count, 'steps': steps, 'seconds': time.perf_counter() - start}
+
+def _page_size(path):
+    with open(path, 'rb') as f:
+        header = f.read(100)
+    size = struct.unpack('>H', header[16:18])[0]
+    return 65536 if size == 1 else size
+
+def _read_pages(path, page_size):
+    with open(path, 'rb') as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                return
+            yield page
+
+def _digest(page):
+    return hashlib.blake2b(page, digest_size=DIGEST_SIZE).digest()
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _open_read_only(path):
+    return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+def table_counts(path):
+    """Row count of every table of a database file"""
+    connection = _open_read_only(path)
+    try:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND sql NOT LIKE 'CREATE VIRTUAL TABLE%' ORDER BY name"
+        )]
+        return {table: connection.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        connection.close()
+
+def _describe(path):
+    """Manifest entry of a snapshot file"""
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'bytes': os.path.getsize(path),
+        'sha256': _file_sha256(path),
+        'counts': table_counts(path)
+    }
+
+def verify_database(path, expected=None):
+    """
+    Check that a database file is a usable copy
+
+    Args:
+        path (str): Restored or copied database file
+        expected (dict): Manifest entry of the snapshot (optional), the file
+            must have its checksum and row counts
+
+    Returns:
+        dict: sha256 and row counts of the file
+
+    Raises:
+        BackupError: If the file is damaged or differs from the snapshot
+    """
+    connection = _open_read_only(path)
+    try:
+        integrity = [row[0] for row in connection.execute('PRAGMA integrity_check')]
+        foreign_keys = connection.execute('PRAGMA foreign_key_check').fetchall()
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f'{path} is not a valid database: {e}') from e
+    finally:
+        connection.close()
+
+    if integrity != ['ok']:
+        raise BackupError(f'Integrity check of {path} failed: {"; ".join(integrity[:5])}')
+    if foreign_keys:
+        raise BackupError(f'{path} has {len(foreign_keys)} rows with missing parents')
+
+    report = {'sha256': _file_sha256(path), 'counts': table_counts(path)}
+    if expected:
+        if report['sha256'] != expected['sha256']:
+            raise BackupError(f'{path} differs from the snapshot checksum')
+        if report['counts'] != expected['counts']:
+            raise BackupError(f'Row counts of {path} differ from the snapshot')
+    return report
+
+def _load_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'databases': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def _save_manifest(directory, manifest):
+    # Written to a temporary file first, an interrupted run keeps the previous manifest
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f'{path}.tmp', path)
+
+def full_backup(source_path, directory, name, **options):
+    """
+    Snapshot a database into a backup directory and verify the copy
+
+    Args:
+        source_path (str): Database file
+        directory (str): Backup directory, created if needed
+        name (str): File name of the database in the backup
+        **options: step_pages, step_pause, busy_timeout and progress of snapshot_database
+
+    Returns:
+        dict: Manifest entry of the snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, name)
+    stats = snapshot_database(source_path, target, **options)
+
+    entry = dict(_describe(target), file=name, pages=stats['pages'], seconds=round(stats['seconds'], 3))
+    verify_database(target, entry)
+
+    manifest = _load_manifest(directory)
+    manifest['databases'][name] = {'type': 'full', 'snapshots': [entry]}
+    _save_manifest(directory, manifest)
+    return entry
+
+def incremental_backup(source_path, directory, name, **options):
+    """
+    Add a snapshot of a database to an incremental backup set
+
+    The first run stores a full copy as the base. Later runs take a paced
+    snapshot into a staging file and store only the pages that changed
+    since the previous snapshot, compared by the page digests kept in
+    <name>.pages. The staging file is removed afterwards.
+
+    Args:
+        source_path (str): Database file
+        directory (str): Directory of the backup set, created if needed
+        name (str): File name of the database in the backup
+        **options: step_pages, step_pause, busy_timeout and progress of snapshot_database
+
+    Returns:
+        dict: Manifest entry of the new snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = _load_manifest(directory)
+    database = manifest['databases'].setdefault(name, {'type': 'incremental', 'snapshots': []})
+    if database['type'] != 'incremental':
+        raise BackupError(f'{directory} holds a full backup of {name}')
+
+    staging = os.path.join(directory, f'{name}.staging')
+    if os.path.exists(staging):
+        os.remove(staging)  # Left over from an interrupted run
+    stats = snapshot_database(source_path, staging, **options)
+    entry = dict(_describe(staging), pages=stats['pages'], seconds=round(stats['seconds'], 3))
+
+    page_size = _page_size(staging)
+    digests_path = os.path.join(directory, f'{name}.pages')
+    snapshots = database['snapshots']
+
+    if not snapshots:
+        entry['file'] = f'{name}.base'
+        entry['changed_pages'] = stats['pages']
+        database['page_size'] = page_size
+        with open(digests_path, 'wb') as f:
+            f.write(b''.join(_digest(page) for page in _read_pages(staging, page_size)))
+        os.replace(staging, os.path.join(directory, entry['file']))
+
+    else:
+        if page_size != database['page_size']:
+            os.remove(staging)
+            raise BackupError(f'Page size of {name} changed, start a new backup set')
+
+        with open(digests_path, 'rb') as f:
+            previous = f.read()
+
+        entry['file'] = f'{name}.delta-{len(snapshots):04d}'
+        digests, changed = [], 0
+        compressor = zlib.compressobj()
+        with open(os.path.join(directory, entry['file']), 'wb') as delta:
+            delta.write(DELTA_MAGIC + struct.pack('>II', page_size, stats['pages']))
+            for number, page in enumerate(_read_pages(staging, page_size)):
+                digest = _digest(page)
+                digests.append(digest)
+                if previous[number * DIGEST_SIZE:(number + 1) * DIGEST_SIZE] != digest:
+                    delta.write(compressor.compress(struct.pack('>I', number) + page))
+                    changed += 1
+            delta.write(compressor.flush())
+            delta.flush()
+            os.fsync(delta.fileno())
+
+        entry['changed_pages'] = changed
+        with open(f'{digests_path}.tmp', 'wb') as f:
+            f.write(b''.join(digests))
+        os.replace(f'{digests_path}.tmp', digests_path)
+        os.remove(staging)
+
+    snapshots.append(entry)
+    _save_manifest(directory, manifest)
+    return entry
+
+def _apply_delta(path, delta_path):
+    with open(delta_path, 'rb') as f:
+        header = f.read(len(DELTA_MAGIC) + 8)
+        if header[:len(DELTA_MAGIC)] != DELTA_MAGIC:
+            raise BackupError(f'{delta_path} is not a backup delta')
+        page_size, page_count = struct.unpack('>II', header[len(DELTA_MAGIC):])
+        try:
+            data = zlib.decompress(f.read())
+        except zlib.error as e:
+            raise BackupError(f'{delta_path} is damaged: {e}') from e
+
+    record = 4 + page_size
+    with open(path, 'r+b') as target:
+        for offset in range(0, len(data), record):
+            number = struct.unpack('>I', data[offset:offset + 4])[0]
+            target.seek(number * page_size)
+            target.write(data[offset + 4:offset + record])
+        target.truncate(page_count * page_size)
+
+def restore_backup(directory, name, target_path, snapshot=None):
+    """
+    Rebuild a database from a backup directory and verify it
+
+    The copy is assembled next to the target and verified against the
+    snapshot's checksum and row counts before it replaces the target, so a
+    failed restore leaves the target untouched. The application must not
+    use the target database while it is replaced.
+
+    Args:
+        directory (str): Backup directory
+        name (str): File name of the database in the backup
+        target_path (str): Database file to create or replace
+        snapshot (int): Index of the snapshot to restore (optional, latest by default)
+
+    Returns:
+        dict: Manifest entry of the restored snapshot
+
+    Raises:
+        BackupError: If the backup is missing, damaged or doesn't verify
+    """
+    database = _load_manifest(directory)['databases'].get(name)
+    if not database:
+        raise BackupError(f'{directory} has no backup of {name}')
+
+    snapshots = database['snapshots']
+    index = len(snapshots) - 1 if snapshot is None else snapshot
+    if not 0 <= index < len(snapshots):
+        raise BackupError(f'{name} has no snapshot {snapshot}')
+
+    staging = f'{target_path}.restoring'
+    shutil.copyfile(os.path.join(directory, snapshots[0]['file']), staging)
+    try:
+        for entry in snapshots[1:index + 1]:
+            _apply_delta(staging, os.path.join(directory, entry['file']))
+        verify_database(staging, snapshots[index])
+    except Exception:
+        os.remove(staging)
+        raise
+
+    # A log of the replaced database would be applied to the restored one
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(target_path + suffix):
+            os.remove(target_path + suffix)
+    os.replace(staging, target_path)
+    return snapshots[index]
+
+def verify_backup(directory):
+    """
+    Restore every database of a backup into a temporary directory and verify it
+
+    Args:
+        directory (str): Backup directory
+
+    Returns:
+        dict: Database name -> number of verified snapshots
+
+    Raises:
+        BackupError: If any snapshot can't be restored
+    """
+    manifest = _load_manifest(directory)
+    if not manifest['databases']:
+        raise BackupError(f'{directory} has no backups')
+
+    verified = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, database in manifest['databases'].items():
+            for index in range(len(database['snapshots'])):
+                restore_backup(directory, name, os.path.join(scratch, name), snapshot=index)
+            verified[name] = len(database['snapshots'])
+    return verified
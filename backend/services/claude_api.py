@@ -3,12 +3,15 @@ Claude API Client
 Handles communication with Claude AI for generating tests and study materials
 """
 import os
-import json
 from anthropic import Anthropic, APIError
 from dotenv import load_dotenv
+from services.json_repair import TolerantJSONParser, PARSE_REPORT_KEY
 
 load_dotenv()
 
+# Header prefix of each source file section when content is combined from several files
+SOURCE_MARKER = "=== AVOTS"
+
 class ClaudeAPIClient:
     """Client for interacting with Claude API"""
 
@@ -40,23 +43,7 @@ class ClaudeAPIClient:
         prompt = self._build_test_prompt(content, num_questions, difficulty)
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                temperature=0.7,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-
-            # Extract text from response
-            response_text = response.content[0].text
-
-            # Parse JSON from response
-            test_data = self._extract_json(response_text)
+            test_data = self._request_json(prompt)
 
             return test_data
 
@@ -82,23 +69,7 @@ class ClaudeAPIClient:
         prompt = self._build_study_material_prompt(content)
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                temperature=0.7,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-
-            # Extract text from response
-            response_text = response.content[0].text
-
-            # Parse JSON from response
-            material_data = self._extract_json(response_text)
+            material_data = self._request_json(prompt)
 
             return material_data
 
@@ -126,23 +97,7 @@ class ClaudeAPIClient:
         prompt = self._build_additional_questions_prompt(context, num_questions, difficulty)
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4096,
-                temperature=0.7,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-
-            # Extract text from response
-            response_text = response.content[0].text
-
-            # Parse JSON from response
-            questions_data = self._extract_json(response_text)
+            questions_data = self._request_json(prompt)
 
             return questions_data
 
@@ -162,9 +117,17 @@ class ClaudeAPIClient:
 
         difficulty_text = difficulty_instructions.get(difficulty, difficulty_instructions["medium"])
 
+        sources_text = ""
+        if SOURCE_MARKER in content:
+            sources_text = (
+                f"\n\nMĀCĪBU SATURS sastāv no vairākiem avotiem - katrs sākas ar rindu \"{SOURCE_MARKER} N: faila nosaukums ===\". "
+                "Organizē uzdevumus pa avotiem: katram uzdevumam jābalstās uz vienu avotu, "
+                "un uzdevuma aprakstā norādi avota faila nosaukumu."
+            )
+
         prompt = f"""Tu esi eksperts mācību satura veidošanā. Pamatojoties uz šo mācību saturu, izveido testu ar PRECĪZI {num_questions} jautājumiem.
 
-{difficulty_text}
+{difficulty_text}{sources_text}
 
 SVARĪGI: Viss saturs (uzdevumu nosaukumi, apraksti, jautājumi, atbildes) jāģenerē LATVIEŠU VALODĀ!
 
@@ -388,43 +351,44 @@ SVARĪGI:
 
         return prompt
 
-    def _extract_json(self, text):
+    def _request_json(self, prompt):
         """
-        Extract and parse JSON from Claude's response
+        Send prompt to Claude and parse the JSON response while it streams
 
         Args:
-            text (str): Response text from Claude
+            prompt (str): Prompt text
 
         Returns:
             dict: Parsed JSON object
 
         Raises:
-            ValueError: If JSON cannot be extracted or parsed
+            APIError: If Claude API request fails
+            ValueError: If no JSON can be parsed from the response
         """
-        # Remove markdown code blocks if present
-        text = text.strip()
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        text = text.strip()
-
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError as e:
-            # Try to find JSON object in the text
-            start = text.find('{')
-            end = text.rfind('}') + 1
-
-            if start != -1 and end > start:
-                try:
-                    return json.loads(text[start:end])
-                except json.JSONDecodeError:
-                    pass
-
-            raise ValueError(f"Could not parse JSON from response: {str(e)}")
+        parser = TolerantJSONParser()
+
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=4096,
+            temperature=0.7,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        ) as stream:
+            for text in stream.text_stream:
+                parser.feed(text)
+
+        return self._with_parse_report(parser.close())
+
+    def _with_parse_report(self, result):
+        """Attach repairs and dropped parts to parsed data so routes can report them"""
+        data = result.data
+        if isinstance(data, dict) and (result.repairs or result.dropped):
+            data[PARSE_REPORT_KEY] = {'repairs': result.repairs, 'dropped': result.dropped}
+        return data
 
 # Singleton instance
 _client = None
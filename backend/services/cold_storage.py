@@ -0,0 +1,267 @@
+"""
+Cold Storage
+Moves materials that haven't been opened for months into archived_materials
+and restores them on their first access
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, func, insert, select, text, update
+from extensions import db
+from json_codec import dumps, loads
+from models import Test, StudyMaterial, Assignment, Question, QuestionOption, ArchivedMaterial
+from services.material_tree import load_assignments, serialize_assignments
+from services.search_index import unindex_study_material_content
+from services.tree_writer import insert_assignments
+
+DEFAULT_ARCHIVE_MONTHS = 6
+DEFAULT_BATCH_SIZE = 100
+ACCESS_RESOLUTION = timedelta(days=1)  # accessed_at is rewritten at most this often per material
+
+# The archive row has no foreign key to its stub (it points to one of two
+# tables), so deleting a stub removes the archived tree with a trigger
+TRIGGERS = {
+    'archived_tests_delete': """
+        CREATE TRIGGER IF NOT EXISTS archived_tests_delete AFTER DELETE ON tests
+        WHEN old.archived_at IS NOT NULL BEGIN
+            DELETE FROM archived_materials WHERE material_type = 'test' AND material_id = old.id;
+        END
+    """,
+    'archived_study_materials_delete': """
+        CREATE TRIGGER IF NOT EXISTS archived_study_materials_delete AFTER DELETE ON study_materials
+        WHEN old.archived_at IS NOT NULL BEGIN
+            DELETE FROM archived_materials WHERE material_type = 'study_material' AND material_id = old.id;
+        END
+    """
+}
+
+def create_archive_triggers(connection):
+    """Create the triggers that delete archived trees together with their stubs"""
+    for statement in TRIGGERS.values():
+        connection.execute(text(statement))
+
+@event.listens_for(db.metadata, 'after_create')
+def _metadata_created(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        create_archive_triggers(connection)
+
+def last_used(model):
+    """SQL expression of the last time a material was opened or changed"""
+    return func.max(func.coalesce(model.accessed_at, model.updated_at), model.updated_at)
+
+def _archive_tests(test_ids, now):
+    rows = []
+    for test_id, user_id in db.session.execute(select(Test.id, Test.user_id).where(Test.id.in_(test_ids))):
+        assignments = serialize_assignments(load_assignments(test_id))
+        rows.append({
+            'user_id': user_id,
+            'material_type': 'test',
+            'material_id': test_id,
+            'assignments_count': len(assignments),
+            'total_questions': sum(len(assignment['questions']) for assignment in assignments),
+            'payload': dumps({'assignments': assignments}),
+            'archived_at': now
+        })
+
+    db.session.execute(insert(ArchivedMaterial), rows)
+    # Questions and options follow through ON DELETE CASCADE
+    db.session.execute(delete(Assignment).where(Assignment.test_id.in_(test_ids)))
+    # The version changes so cached listings pick up the archived flag, updated_at keeps the last change
+    db.session.execute(update(Test).where(Test.id.in_(test_ids)).values(archived_at=now, version=Test.version + 1))
+
+def _archive_study_materials(material_ids, now):
+    rows = db.session.execute(
+        select(StudyMaterial.id, StudyMaterial.user_id, StudyMaterial.content).where(StudyMaterial.id.in_(material_ids))
+    ).all()
+
+    db.session.execute(insert(ArchivedMaterial), [
+        {'user_id': user_id, 'material_type': 'study_material', 'material_id': material_id,
+         'payload': content, 'archived_at': now}
+        for material_id, user_id, content in rows
+    ])
+    # Title, terms_count and summary_preview stay in the stub for the listing
+    db.session.execute(
+        update(StudyMaterial).where(StudyMaterial.id.in_(material_ids))
+        .values(content='{}', archived_at=now, version=StudyMaterial.version + 1)
+    )
+    unindex_study_material_content(db.session.connection(), material_ids)
+
+def archive_materials(months=DEFAULT_ARCHIVE_MONTHS, batch_size=DEFAULT_BATCH_SIZE, limit=None, now=None):
+    """
+    Archive materials that haven't been opened or changed for the given time
+
+    Each batch is committed separately, so the archival can be stopped and
+    resumed and never holds the write lock for long.
+
+    Args:
+        months (int): Inactivity period, a month counts as 30 days
+        batch_size (int): Materials archived per transaction
+        limit (int): Maximum number of materials per type (optional)
+        now (datetime): Current time (optional, for tests)
+
+    Returns:
+        dict: Number of archived materials per type
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=30 * months)
+    archived = {}
+
+    for material_type, model, archive in (('test', Test, _archive_tests),
+                                          ('study_material', StudyMaterial, _archive_study_materials)):
+        archived[material_type] = 0
+        while limit is None or archived[material_type] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - archived[material_type])
+            ids = db.session.scalars(
+                select(model.id)
+                .where(model.archived_at.is_(None), last_used(model) < cutoff)
+                .order_by(model.id)
+                .limit(size)
+            ).all()
+            if not ids:
+                break
+
+            archive(ids, now)
+            db.session.commit()
+            archived[material_type] += len(ids)
+
+    return archived
+
+def _reassign_taken_ids(assignments):
+    """
+    Give archived rows whose ID has been taken since archiving a new one
+
+    SQLite hands out max(id) + 1, so an archived ID is only reused when it
+    was the largest of its table, or when the material moved to a shard
+    that already had the ID. New IDs come after every existing and
+    archived one.
+    """
+    questions = [question for assignment in assignments for question in assignment['questions']]
+    options = [option for question in questions for option in question['options']]
+
+    for model, rows in ((Assignment, assignments), (Question, questions), (QuestionOption, options)):
+        if not rows:
+            continue
+        ids = [row['id'] for row in rows]
+        taken = set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+        if not taken:
+            continue
+        next_id = max(db.session.scalar(select(func.max(model.id))), max(ids)) + 1
+        for row in rows:
+            if row['id'] in taken:
+                row['id'] = next_id
+                next_id += 1
+
+def restore_material(material_type, material_id):
+    """
+    Move an archived material tree back into the hot tables
+
+    Restored assignments, questions and options keep their archived IDs,
+    so clients can go on referring to them. Only rows whose ID was taken
+    in the meantime get a new one. Like archiving, restoring
+    changes the material's version, so cached listings and detail
+    responses are revalidated. The caller commits.
+
+    Args:
+        material_type (str): "test" or "study_material"
+        material_id (int): Material ID
+
+    Returns:
+        bool: True if the material was restored, False if it wasn't archived
+    """
+    # Taking the archive row with DELETE ... RETURNING makes concurrent restores of one material a no-op
+    payload = db.session.scalar(
+        delete(ArchivedMaterial)
+        .where(ArchivedMaterial.material_type == material_type, ArchivedMaterial.material_id == material_id)
+        .returning(ArchivedMaterial.payload)
+    )
+    if payload is None:
+        return False
+
+    if material_type == 'test':
+        assignments = loads(payload)['assignments']
+        _reassign_taken_ids(assignments)
+        insert_assignments(material_id, assignments, keep_ids=True)
+        test = db.session.get(Test, material_id)
+        test.archived_at = None
+        test.version = Test.version + 1
+    else:
+        material = db.session.get(StudyMaterial, material_id)
+        material.content = payload
+        material.archived_at = None
+        material.version = StudyMaterial.version + 1
+
+    db.session.flush()
+    return True
+
+def restore_materials(batch_size=DEFAULT_BATCH_SIZE, user_id=None):
+    """
+    Restore all archived materials, one committed batch at a time
+
+    Args:
+        batch_size (int): Materials restored per transaction
+        user_id (int): Only restore this user's materials (optional)
+
+    Returns:
+        int: Number of restored materials
+    """
+    restored = 0
+    while True:
+        statement = select(ArchivedMaterial.material_type, ArchivedMaterial.material_id) \
+            .order_by(ArchivedMaterial.id).limit(batch_size)
+        if user_id is not None:
+            statement = statement.where(ArchivedMaterial.user_id == user_id)
+        batch = db.session.execute(statement).all()
+        if not batch:
+            return restored
+
+        for material_type, material_id in batch:
+            restored += restore_material(material_type, material_id)
+        db.session.commit()
+
+def open_material(material_type, material, restore=True, now=None):
+    """
+    Prepare a material that is about to be read or changed
+
+    Restores it from the archive and records the access, which is written
+    at most once per ACCESS_RESOLUTION. The caller commits.
+
+    Args:
+        material_type (str): "test" or "study_material"
+        material: Test or StudyMaterial, or a row with id, archived_at and accessed_at
+        restore (bool): Restore an archived material (False when only its version is needed)
+        now (datetime): Current time (optional, for tests)
+
+    Returns:
+        bool: True if anything was written
+    """
+    now = now or datetime.utcnow()
+    written = False
+
+    if restore and material.archived_at is not None:
+        written = restore_material(material_type, material.id)
+
+    if material.accessed_at is None or now - material.accessed_at >= ACCESS_RESOLUTION:
+        model = Test if material_type == 'test' else StudyMaterial
+        db.session.execute(update(model).where(model.id == material.id).values(accessed_at=now))
+        written = True
+
+    return written
+
+def archived_counts(test_ids):
+    """
+    Listing counts of archived tests
+
+    Args:
+        test_ids (list): Archived test IDs
+
+    Returns:
+        dict: test ID -> (assignments_count, total_questions)
+    """
+    if not test_ids:
+        return {}
+
+    return {
+        material_id: (assignments_count, total_questions)
+        for material_id, assignments_count, total_questions in db.session.execute(
+            select(ArchivedMaterial.material_id, ArchivedMaterial.assignments_count, ArchivedMaterial.total_questions)
+            .where(ArchivedMaterial.material_type == 'test', ArchivedMaterial.material_id.in_(test_ids))
+        )
+    }
@@ -0,0 +1,266 @@
+"""
+Content Compression
+Cleans extracted document text and shortens it before it is sent to Claude
+"""
+import re
+import zlib
+from collections import Counter
+import numpy as np
+
+MAX_CONTENT_TOKENS = 12000
+CHARS_PER_TOKEN = 4
+
+BOILERPLATE_MIN_REPEATS = 3
+BOILERPLATE_MAX_LENGTH = 80
+
+TEXTRANK_MAX_SENTENCES = 1500
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 30
+HASH_FEATURES = 2048
+
+PAGE_NUMBER_RE = re.compile(r'^(?:-\s*)?(?:page|lpp\.?|lappuse)?\s*\d{1,4}(?:\s*(?:/|of|no)\s*\d{1,4})?(?:\s*-)?$', re.IGNORECASE)
+TOC_LINE_RE = re.compile(r'^.{2,}?(?:\s*\.){4,}\s*\d{1,4}$')
+HYPHENATION_RE = re.compile(r'(\w)-\n(\w)')
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=[A-ZĀČĒĢĪĶĻŅŠŪŽ0-9"„(])')
+WORD_RE = re.compile(r'\w+')
+
+def estimate_tokens(text):
+    """Approximate token count (Claude averages about 4 characters per token)"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def normalize_text(text):
+    """
+    Normalize line endings, hyphenated line breaks and whitespace
+
+    Args:
+        text (str): Extracted text
+
+    Returns:
+        str: Normalized text, one line per original line
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n').replace('\xad', '')
+    text = HYPHENATION_RE.sub(r'\1\2', text)
+
+    lines = [re.sub(r'[ \t\f\v\xa0]+', ' ', line).strip() for line in text.split('\n')]
+    return '\n'.join(lines)
+
+def remove_boilerplate(text):
+    """
+    Drop page numbers, table of contents lines and repeated headers/footers
+
+    Args:
+        text (str): Normalized text
+
+    Returns:
+        str: Text without boilerplate lines
+    """
+    lines = text.split('\n')
+    counts = Counter(line for line in lines if line and len(line) <= BOILERPLATE_MAX_LENGTH)
+    repeated = {line for line, count in counts.items() if count >= BOILERPLATE_MIN_REPEATS}
+
+    kept = []
+    for line in lines:
+        if line and (line in repeated or PAGE_NUMBER_RE.match(line) or TOC_LINE_RE.match(line)):
+            continue
+        kept.append(line)
+
+    return '\n'.join(kept)
+
+def join_lines(text):
+    """
+    Join hard-wrapped lines into paragraphs
+
+    A line is joined to the previous one unless the previous line ends a
+    sentence or a blank line separates them.
+
+    Args:
+        text (str): Text without boilerplate
+
+    Returns:
+        str: Paragraphs separated by blank lines
+    """
+    paragraphs = []
+    current = []
+
+    for line in text.split('\n'):
+        if not line:
+            if current:
+                paragraphs.append(' '.join(current))
+                current = []
+            continue
+
+        current.append(line)
+        if line[-1] in '.!?:;':
+            paragraphs.append(' '.join(current))
+            current = []
+
+    if current:
+        paragraphs.append(' '.join(current))
+
+    return '\n\n'.join(paragraphs)
+
+def split_sentences(text):
+    """Split text into (paragraph_index, sentence) pairs"""
+    sentences = []
+    for i, paragraph in enumerate(text.split('\n\n')):
+        for sentence in SENTENCE_RE.split(paragraph):
+            if sentence.strip():
+                sentences.append((i, sentence.strip()))
+    return sentences
+
+def _tfidf_matrix(sentences):
+    """Build L2-normalized TF-IDF rows using hashed word features"""
+    rows = []
+    columns = []
+    for row, sentence in enumerate(sentences):
+        for word in WORD_RE.findall(sentence.lower()):
+            rows.append(row)
+            columns.append(zlib.crc32(word.encode('utf-8')) % HASH_FEATURES)
+
+    matrix = np.zeros((len(sentences), HASH_FEATURES), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1.0)
+
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    matrix *= idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def rank_sentences(sentences):
+    """
+    Score sentences by informativeness
+
+    Uses TextRank over TF-IDF cosine similarity. Very long documents fall
+    back to similarity with the document centroid, which is linear in the
+    number of sentences.
+
+    Args:
+        sentences (list): Sentence strings
+
+    Returns:
+        numpy.ndarray: Score per sentence
+    """
+    matrix = _tfidf_matrix(sentences)
+
+    if len(sentences) > TEXTRANK_MAX_SENTENCES:
+        centroid = matrix.mean(axis=0)
+        return matrix @ centroid
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    row_sums[row_sums == 0] = 1.0
+    transition = similarity / row_sums
+
+    n = len(sentences)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(TEXTRANK_ITERATIONS):
+        scores = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition.T @ scores)
+
+    return scores
+
+def select_sentences(text, max_tokens):
+    """
+    Keep the highest ranked sentences that fit the token budget
+
+    Selected sentences keep their original order and paragraphs.
+
+    Args:
+        text (str): Cleaned text
+        max_tokens (int): Token budget
+
+    Returns:
+        str: Shortened text
+    """
+    sentences = split_sentences(text)
+    if len(sentences) < 2:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+
+    scores = rank_sentences([sentence for _, sentence in sentences])
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    selected = []
+    for index in np.argsort(-scores, kind='stable'):
+        length = len(sentences[index][1]) + 1
+        if length > budget:
+            continue
+        selected.append(index)
+        budget -= length
+
+    paragraphs = {}
+    for index in sorted(selected):
+        paragraph, sentence = sentences[index]
+        paragraphs.setdefault(paragraph, []).append(sentence)
+
+    return '\n\n'.join(' '.join(paragraph) for paragraph in paragraphs.values())
+
+def compress_content(text, max_tokens=MAX_CONTENT_TOKENS, clean=True):
+    """
+    Shorten text to the token budget, text within the budget is returned unchanged
+
+    Args:
+        text (str): Extracted document text or pasted content
+        max_tokens (int): Token budget for the prompt content
+        clean (bool): Remove boilerplate and join wrapped lines first (optional,
+                      default: True, only meant for text extracted from files)
+
+    Returns:
+        tuple: (compressed text, stats dict with token counts)
+    """
+    [(_, compressed)], stats = compress_sources([(None, text)], max_tokens, clean)
+    return compressed, stats
+
+def compress_sources(sources, max_tokens=MAX_CONTENT_TOKENS, clean=True):
+    """
+    Compress several extracted files, sharing the token budget between them
+
+    Nothing is changed while the files fit the budget. Otherwise they are
+    cleaned and the budget is split fairly: files smaller than an equal
+    share are kept whole and the remainder is divided between the larger
+    ones, so file boundaries are kept and no file is dropped entirely.
+
+    Args:
+        sources (list): (filename, text) tuples
+        max_tokens (int): Total token budget
+        clean (bool): Remove boilerplate and join wrapped lines first (optional, default: True)
+
+    Returns:
+        tuple: (list of (filename, compressed text), combined stats dict)
+    """
+    original_tokens = sum(estimate_tokens(text) for _, text in sources)
+    if original_tokens <= max_tokens:
+        return list(sources), {
+            'original_tokens': original_tokens,
+            'compressed_tokens': original_tokens,
+            'reduction': 0.0
+        }
+
+    if clean:
+        cleaned = [join_lines(remove_boilerplate(normalize_text(text))) for _, text in sources]
+    else:
+        cleaned = [text for _, text in sources]
+
+    budgets = [estimate_tokens(text) for text in cleaned]
+    if sum(budgets) > max_tokens:
+        remaining = max_tokens
+        order = sorted(range(len(cleaned)), key=lambda i: budgets[i])
+        for position, index in enumerate(order):
+            budgets[index] = min(budgets[index], remaining // (len(order) - position))
+            remaining -= budgets[index]
+
+    compressed = []
+    for (filename, _), text, budget in zip(sources, cleaned, budgets):
+        if estimate_tokens(text) > budget:
+            text = select_sentences(text, budget)
+        compressed.append((filename, text))
+
+    compressed_tokens = sum(estimate_tokens(text) for _, text in compressed)
+
+    return compressed, {
+        'original_tokens': original_tokens,
+        'compressed_tokens': compressed_tokens,
+        'reduction': round(1 - compressed_tokens / original_tokens, 3) if original_tokens else 0.0
+    }
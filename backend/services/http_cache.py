@@ -0,0 +1,103 @@
+"""
+HTTP Cache Validation
+Strong ETags and Last-Modified headers computed from material versions
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from flask import request, current_app
+
+# Browsers must revalidate every time, but can reuse their copy after a 304
+CACHE_CONTROL = 'private, no-cache'
+
+def _row_stamp(created_at):
+    """Creation time as digits, it tells apart rows that got the same ID after a delete"""
+    return created_at.strftime('%Y%m%d%H%M%S%f')
+
+def material_etag(user_id, material_type, material_id, created_at, version, variant=None):
+    """
+    Build a strong ETag for one representation of a material
+
+    SQLite reuses the ID of the newest row after it is deleted, so the
+    creation time is part of the tag, otherwise a new material could match
+    the cached copy of a deleted one. Every shard database numbers its rows
+    on its own, so the owner is part of it as well.
+
+    Args:
+        user_id (int): Owner's user ID
+        material_type (str): "test" or "study_material"
+        material_id (int): Material ID
+        created_at (datetime): Material creation time
+        version (int): Material version
+        variant (str): Representation, e.g. "pdf-answers" (optional)
+
+    Returns:
+        str: ETag value without quotes
+    """
+    etag = f'{material_type}-{user_id}-{material_id}-{_row_stamp(created_at)}-v{version}'
+    return f'{etag}-{variant}' if variant else etag
+
+def listing_etag(user_id, *states):
+    """
+    Build a strong ETag for a user's material list
+
+    Args:
+        user_id (int): User ID
+        states: (count, version sum, max ID, last update) tuple per material table
+
+    Returns:
+        str: ETag value without quotes
+    """
+    digest = hashlib.sha256(repr(states).encode('utf-8')).hexdigest()[:32]
+    return f'materials-{user_id}-{digest}'
+
+def _http_date(moment):
+    """Naive UTC datetime from the database as aware datetime with whole seconds"""
+    return moment.replace(tzinfo=timezone.utc, microsecond=0) if moment else None
+
+def _settled(moment):
+    """
+    Check that the second of a change has passed
+
+    HTTP dates have whole seconds, so a Last-Modified from the same second
+    as the change would also match a later change made within that second.
+    """
+    return moment is not None and _http_date(moment) + timedelta(seconds=1) <= datetime.now(timezone.utc)
+
+def not_modified(etag, last_modified=None):
+    """
+    Check the request's conditional headers
+
+    If-None-Match takes precedence over If-Modified-Since, which is only
+    trusted once the second of the last change has passed.
+
+    Args:
+        etag (str): Current ETag
+        last_modified (datetime): Last change in UTC (optional)
+
+    Returns:
+        Response: 304 response if the client's copy is current, otherwise None
+    """
+    if request.if_none_match:
+        current = request.if_none_match.contains(etag)
+    elif request.if_modified_since and _settled(last_modified):
+        current = request.if_modified_since >= _http_date(last_modified)
+    else:
+        current = False
+
+    if not current:
+        return None
+
+    return with_cache_headers(current_app.response_class(status=304), etag, last_modified)
+
+def with_cache_headers(response, etag, last_modified=None):
+    """
+    Attach ETag, Cache-Control and Vary headers to a response, and
+    Last-Modified once the second of the last change has passed
+    """
+    response.set_etag(etag)
+    if _settled(last_modified):
+        response.last_modified = _http_date(last_modified)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    # The same URL returns a different user's data after another login
+    response.vary.add('Cookie')
+    return response
@@ -0,0 +1,319 @@
+"""
+Tolerant JSON Parser
+Incrementally parses JSON from Claude, repairing common defects and
+salvaging complete items from truncated output
+"""
+from collections import Counter, namedtuple
+
+ParseResult = namedtuple('ParseResult', ['data', 'repairs', 'dropped'])
+
+# Key under which Claude client attaches repairs and dropped parts to a response
+PARSE_REPORT_KEY = '_parse_report'
+
+WHITESPACE = ' \t\r\n'
+OPEN_QUOTES = '"“”„‟'
+SMART_CLOSE_QUOTES = '“”‟'
+VALUE_END = ',}]:'
+LITERALS = {
+    'true': True, 'false': False, 'null': None,
+    'True': True, 'False': False, 'None': None
+}
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class _Frame:
+    """Open object or array on the parser stack"""
+    __slots__ = ('container', 'is_object', 'key', 'expect', 'path')
+
+    def __init__(self, container, path):
+        self.container = container
+        self.is_object = isinstance(container, dict)
+        self.key = None
+        # object: 'key', 'colon', 'value', 'comma'; array: 'value', 'comma'
+        self.expect = 'key' if self.is_object else 'value'
+        self.path = path
+
+class TolerantJSONParser:
+    """
+    Incremental JSON parser that repairs common model output defects
+
+    Feed text chunks as they arrive and call close() at the end. Repairs
+    markdown fences and surrounding prose, smart quotes used as string
+    delimiters, unescaped quotes and control characters inside strings,
+    trailing and missing commas and Python literals. If the output is cut
+    off, every structurally complete item is kept and the incomplete ones
+    are reported as dropped.
+    """
+
+    def __init__(self):
+        self.repairs = Counter()
+        self.dropped = []
+        self._stack = []
+        self._root = None
+        self._done = False
+        self._string = None  # list of chars while inside a string
+        self._string_smart = False
+        self._escape = None  # pending escape sequence after backslash
+        self._pending_quote = None  # possible closing quote, decided by next char
+        self._pending_space = ''
+        self._literal = None  # list of chars while inside a number or literal
+
+    def feed(self, chunk):
+        """Consume the next chunk of text"""
+        for char in chunk:
+            if self._done:
+                return
+            if self._string is not None:
+                self._string_char(char)
+            else:
+                self._structural_char(char)
+
+    def close(self):
+        """
+        Finish parsing
+
+        Returns:
+            ParseResult: (data, repairs dict, dropped list)
+
+        Raises:
+            ValueError: If no JSON object or array was found
+        """
+        if self._pending_quote is not None:
+            self._end_string()
+
+        if not self._done:
+            self._truncate()
+
+        if self._root is None:
+            raise ValueError("No JSON object found in response")
+
+        return ParseResult(self._root, dict(self.repairs), self.dropped)
+
+    # Strings
+
+    def _string_char(self, char):
+        if self._pending_quote is not None:
+            if char in WHITESPACE:
+                self._pending_space += char
+                return
+            if char in VALUE_END or (char == '"' and self._pending_space):
+                # A quote after whitespace opens the next member, the comma between them is missing
+                self._end_string()
+                self._structural_char(char)
+                return
+            # Quote was part of the text, not the end of the string
+            self.repairs['unescaped_quote'] += 1
+            self._string.append(self._pending_quote + self._pending_space)
+            self._pending_quote = None
+            self._pending_space = ''
+
+        if self._escape is not None:
+            self._escape_char(char)
+        elif char == '\\':
+            self._escape = ''
+        elif char == '"' or (self._string_smart and char in SMART_CLOSE_QUOTES):
+            self._pending_quote = char
+        elif char < ' ':
+            self.repairs['control_character'] += 1
+            self._string.append(char)
+        else:
+            self._string.append(char)
+
+    def _escape_char(self, char):
+        if self._escape == '':
+            if char == 'u':
+                self._escape = 'u'
+            else:
+                self._string.append(ESCAPES.get(char, char))
+                self._escape = None
+            return
+
+        self._escape += char
+        if len(self._escape) == 5:
+            try:
+                self._string.append(chr(int(self._escape[1:], 16)))
+            except ValueError:
+                self.repairs['invalid_escape'] += 1
+                self._string.append(self._escape[1:])
+            self._escape = None
+
+    def _end_string(self):
+        value = ''.join(self._string)
+        self._string = None
+        self._pending_quote = None
+        self._pending_space = ''
+        self._add_value(value, is_key=self._stack[-1].expect == 'key')
+
+    # Structure
+
+    def _structural_char(self, char):
+        if self._literal is not None:
+            if char not in WHITESPACE and char not in VALUE_END and char not in '{[':
+                self._literal.append(char)
+                return
+            self._end_literal()
+
+        if char in WHITESPACE:
+            return
+
+        if not self._stack:
+            # Skip prose and markdown fences before the root value
+            if char in '{[':
+                self._push({} if char == '{' else [], '$')
+            return
+
+        frame = self._stack[-1]
+
+        if char in '{[':
+            if frame.expect == 'comma':
+                self.repairs['missing_comma'] += 1
+                frame.expect = 'value' if not frame.is_object else 'key'
+            if frame.expect != 'value':
+                self.repairs['unexpected_character'] += 1
+                return
+            self._push({} if char == '{' else [], self._child_path(frame))
+        elif char in '}]':
+            if (char == '}') != frame.is_object:
+                self.repairs['mismatched_bracket'] += 1
+                return
+            if frame.expect in ('key', 'value') and frame.container and frame.key is None:
+                self.repairs['trailing_comma'] += 1
+            self._pop()
+        elif char == ',':
+            if frame.expect == 'comma':
+                frame.expect = 'key' if frame.is_object else 'value'
+            else:
+                self.repairs['extra_comma'] += 1
+        elif char == ':':
+            if frame.expect == 'colon':
+                frame.expect = 'value'
+            else:
+                self.repairs['unexpected_character'] += 1
+        elif char in OPEN_QUOTES:
+            if frame.expect == 'comma':
+                self.repairs['missing_comma'] += 1
+                frame.expect = 'key' if frame.is_object else 'value'
+            if char != '"':
+                self.repairs['smart_quotes'] += 1
+            self._string = []
+            self._string_smart = char != '"'
+        else:
+            if frame.expect != 'value':
+                self.repairs['unexpected_character'] += 1
+                return
+            self._literal = [char]
+
+    def _end_literal(self):
+        text = ''.join(self._literal)
+        self._literal = None
+
+        if text in LITERALS:
+            if text not in ('true', 'false', 'null'):
+                self.repairs['python_literal'] += 1
+            self._add_value(LITERALS[text])
+            return
+
+        try:
+            value = int(text)
+        except ValueError:
+            try:
+                value = float(text)
+            except ValueError:
+                # Unquoted text, keep it as a string
+                self.repairs['unquoted_string'] += 1
+                value = text
+        self._add_value(value)
+
+    def _child_path(self, frame):
+        if frame.is_object:
+            return f'{frame.path}.{frame.key}'
+        return f'{frame.path}[{len(frame.container)}]'
+
+    def _push(self, container, path):
+        self._stack.append(_Frame(container, path))
+        if self._root is None:
+            self._root = container
+
+    def _pop(self):
+        frame = self._stack.pop()
+        if not self._stack:
+            self._done = True
+            return
+        self._add_value(frame.container)
+
+    def _add_value(self, value, is_key=False):
+        frame = self._stack[-1]
+
+        if is_key:
+            frame.key = value
+            frame.expect = 'colon'
+            return
+
+        if frame.is_object:
+            if frame.key is None:
+                self.repairs['unexpected_character'] += 1
+                return
+            frame.container[frame.key] = value
+            frame.key = None
+        else:
+            frame.container.append(value)
+
+        frame.expect = 'comma'
+
+    def _truncate(self):
+        """Close containers left open by truncated output"""
+        if not self._stack:
+            return
+
+        self.repairs['truncated'] += 1
+
+        if self._string is not None or self._literal is not None:
+            frame = self._stack[-1]
+            if frame.expect == 'value':
+                self.dropped.append({'path': self._child_path(frame), 'reason': 'truncated value'})
+            self._string = None
+            self._literal = None
+
+        # Innermost first: an open object is kept only if the open collection
+        # it was filling is kept, an open array only if it has complete items
+        keep_child = False
+        while len(self._stack) > 1:
+            frame = self._stack.pop()
+
+            if frame.is_object:
+                keep = keep_child
+            else:
+                keep = any(isinstance(item, (dict, list)) for item in frame.container)
+
+            if keep:
+                self._add_value(frame.container)
+            else:
+                self.dropped.append({'path': frame.path, 'reason': 'truncated'})
+                self._stack[-1].key = None
+
+            keep_child = keep
+
+        self._stack.clear()
+
+        # Report only the outermost dropped item of each branch
+        dropped_paths = [entry['path'] for entry in self.dropped]
+        self.dropped = [
+            entry for entry in self.dropped
+            if not any(entry['path'] != path and entry['path'].startswith(path) for path in dropped_paths)
+        ]
+
+def parse_tolerant(text):
+    """
+    Parse complete response text with the tolerant parser
+
+    Args:
+        text (str): Response text from Claude
+
+    Returns:
+        ParseResult: (data, repairs dict, dropped list)
+
+    Raises:
+        ValueError: If no JSON object or array was found
+    """
+    parser = TolerantJSONParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,218 @@
+"""
+Material Listing
+Builds pages of the dashboard list of a user's tests and study materials
+with one UNION ALL query and keyset pagination on (created_at, id)
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta
+from sqlalchemy import select, func, distinct, literal, tuple_, union_all
+from extensions import db
+from json_codec import dumps, loads
+from models import Test, StudyMaterial, Assignment, Question
+from services.cold_storage import archived_counts
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+MATERIAL_MODELS = {
+    'test': Test,
+    'study_material': StudyMaterial
+}
+
+class ListingError(Exception):
+    """Custom exception for invalid listing parameters"""
+    pass
+
+def encode_cursor(row):
+    """Encode the (created_at, id, type) key of the last listed row as an opaque string"""
+    created_at, material_id, material_type = row
+    data = dumps([created_at.isoformat(), material_id, material_type]).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor returned by encode_cursor
+
+    Raises:
+        ListingError: If the cursor is malformed
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, material_id, material_type = loads(data)
+        if not isinstance(material_id, int) or material_type not in MATERIAL_MODELS:
+            raise ValueError(cursor)
+        return datetime.fromisoformat(created_at), material_id, material_type
+    except (binascii.Error, ValueError, TypeError):
+        raise ListingError("Invalid cursor")
+
+def parse_date(value, name, end=False):
+    """
+    Parse an ISO date or datetime filter value
+
+    A plain date as upper bound includes the whole day.
+
+    Raises:
+        ListingError: If the value is not an ISO date
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ListingError(f"{name} must be an ISO date or datetime")
+
+    if moment.tzinfo is not None:
+        raise ListingError(f"{name} must not contain a timezone")
+
+    if end and len(value) == 10:
+        moment += timedelta(days=1)
+    return moment
+
+def _branch(model, material_type, user_id, limit, after, title, created_from, created_to):
+    """Newest rows of one material table after the cursor, at most limit rows"""
+    statement = (
+        select(
+            literal(material_type).label('type'),
+            model.id.label('id'),
+            model.title.label('title'),
+            model.created_at.label('created_at'),
+            model.version.label('version')
+        )
+        .where(model.user_id == user_id)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit)
+    )
+
+    if title:
+        statement = statement.where(model.title.contains(title, autoescape=True))
+    if created_from:
+        statement = statement.where(model.created_at >= created_from)
+    if created_to:
+        statement = statement.where(model.created_at < created_to)
+
+    if after:
+        created_at, material_id, after_type = after
+        key = tuple_(model.created_at, model.id)
+        # Rows with equal (created_at, id) are ordered by type, descending
+        if material_type < after_type:
+            statement = statement.where(key <= tuple_(created_at, material_id))
+        else:
+            statement = statement.where(key < tuple_(created_at, material_id))
+
+    # SQLite allows ORDER BY and LIMIT only on the whole compound select
+    subquery = statement.subquery()
+    return select(*subquery.c)
+
+def list_page(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None, material_type=None,
+              title=None, created_from=None, created_to=None):
+    """
+    Select one page of a user's materials, newest first
+
+    Each table contributes at most limit + 1 rows through its
+    (user_id, created_at) index and the two are merged in SQL, so the
+    cost does not depend on the number of materials.
+
+    Args:
+        user_id (int): User ID
+        limit (int): Page size
+        cursor (str): Cursor of the previous page (optional)
+        material_type (str): "test" or "study_material" (optional)
+        title (str): Text the title must contain (optional)
+        created_from (datetime): Earliest creation time, inclusive (optional)
+        created_to (datetime): Latest creation time, exclusive (optional)
+
+    Returns:
+        tuple: (list of (type, id, title, created_at, version) rows, next cursor or None)
+
+    Raises:
+        ListingError: If the cursor or material type is invalid
+    """
+    if material_type and material_type not in MATERIAL_MODELS:
+        raise ListingError(f"type must be one of: {', '.join(MATERIAL_MODELS)}")
+
+    after = decode_cursor(cursor) if cursor else None
+
+    branches = [
+        _branch(model, name, user_id, limit + 1, after, title, created_from, created_to)
+        for name, model in MATERIAL_MODELS.items()
+        if not material_type or material_type == name
+    ]
+    merged = union_all(*branches).subquery()
+
+    rows = db.session.execute(
+        select(merged)
+        .order_by(merged.c.created_at.desc(), merged.c.id.desc(), merged.c.type.desc())
+        .limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor((last.created_at, last.id, last.type))
+
+    return rows, next_cursor
+
+def _test_counts(test_ids):
+    """Assignment and question counts of the given tests and whether they are archived, in one grouped query"""
+    if not test_ids:
+        return {}
+
+    counts = {
+        test_id: (assignments_count, total_questions, archived_at is not None)
+        for test_id, archived_at, assignments_count, total_questions in db.session.execute(
+            select(Test.id, Test.archived_at, func.count(distinct(Assignment.id)), func.count(Question.id))
+            .outerjoin(Assignment, Assignment.test_id == Test.id)
+            .outerjoin(Question, Question.assignment_id == Assignment.id)
+            .where(Test.id.in_(test_ids))
+            .group_by(Test.id)
+        )
+    }
+
+    # Archived tests have no assignment rows, their counts are kept with the archived tree
+    archived = archived_counts([test_id for test_id, (_, _, is_archived) in counts.items() if is_archived])
+    for test_id, (assignments_count, total_questions) in archived.items():
+        counts[test_id] = (assignments_count, total_questions, True)
+    return counts
+
+def _study_material_columns(material_ids):
+    """Stored term counts, summary previews and archive state of the given study materials, without their content"""
+    if not material_ids:
+        return {}
+
+    return {
+        material_id: (terms_count, summary_preview, archived_at is not None)
+        for material_id, terms_count, summary_preview, archived_at in db.session.execute(
+            select(StudyMaterial.id, StudyMaterial.terms_count, StudyMaterial.summary_preview,
+                   StudyMaterial.archived_at)
+            .where(StudyMaterial.id.in_(material_ids))
+        )
+    }
+
+def serialize_page(rows):
+    """
+    Convert page rows to listing dicts with counts
+
+    Args:
+        rows (list): Rows returned by list_page
+
+    Returns:
+        list: Listing dicts of tests and study materials
+    """
+    test_counts = _test_counts([row.id for row in rows if row.type == 'test'])
+    study_columns = _study_material_columns([row.id for row in rows if row.type == 'study_material'])
+
+    materials = []
+    for row in rows:
+        material = {
+            'id': row.id,
+            'type': row.type,
+            'title': row.title,
+            'created_at': row.created_at.isoformat()
+        }
+        if row.type == 'test':
+            material['assignments_count'], material['total_questions'], material['archived'] = test_counts[row.id]
+        else:
+            material['terms_count'], material['summary_preview'], material['archived'] = study_columns[row.id]
+        materials.append(material)
+
+    return materials
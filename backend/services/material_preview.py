@@ -0,0 +1,82 @@
+"""
+Material Preview
+Derives the listing columns of a study material from its content
+"""
+import re
+from html.parser import HTMLParser
+
+SUMMARY_PREVIEW_LENGTH = 200
+
+# Tags that separate words even when the markup has no whitespace between them
+BLOCK_TAGS = frozenset([
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'pre', 'table', 'tr', 'td', 'th'
+])
+
+class _TextCollector(HTMLParser):
+    """Collects text nodes of an HTML fragment"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+def html_to_text(html):
+    """
+    Convert an HTML fragment to plain text with collapsed whitespace
+
+    Args:
+        html (str): HTML fragment
+
+    Returns:
+        str: Text content
+    """
+    collector = _TextCollector()
+    collector.feed(html or '')
+    collector.close()
+    return re.sub(r'\s+', ' ', ''.join(collector.parts)).strip()
+
+def summary_preview(summary, length=SUMMARY_PREVIEW_LENGTH):
+    """
+    Build a plain-text preview of an HTML summary
+
+    Args:
+        summary (str): Summary HTML
+        length (int): Maximum preview length in characters
+
+    Returns:
+        str: Preview text, cut at a word boundary and ending with "…" if shortened
+    """
+    text = html_to_text(summary)
+
+    if len(text) <= length:
+        return text
+
+    cut = text[:length].rsplit(' ', 1)[0] or text[:length]
+    return cut.rstrip(' ,.;:') + '…'
+
+def listing_columns(content_data):
+    """
+    Compute the stored listing columns of a study material
+
+    Args:
+        content_data (dict): Decoded content {summary, terms}
+
+    Returns:
+        dict: terms_count and summary_preview values
+    """
+    summary = content_data.get('summary')
+    terms = content_data.get('terms')
+    return {
+        'terms_count': len(terms) if isinstance(terms, list) else 0,
+        'summary_preview': summary_preview(summary) if isinstance(summary, str) else ''
+    }
@@ -0,0 +1,185 @@
+"""
+Test Tree Loader
+Loads a whole test in a constant number of queries into compact objects
+and serializes it for API responses and exports
+"""
+from sqlalchemy import select
+from extensions import db
+from models import Test, Assignment, Question, QuestionOption
+
+class OptionNode:
+    """Answer option of a question"""
+    __slots__ = ('id', 'option_text', 'is_correct', 'order_number')
+
+    def __init__(self, id, option_text, is_correct, order_number):
+        self.id = id
+        self.option_text = option_text
+        self.is_correct = is_correct
+        self.order_number = order_number
+
+class QuestionNode:
+    """Question with its options"""
+    __slots__ = ('id', 'question_text', 'question_type', 'correct_answer', 'points', 'order_number', 'options')
+
+    def __init__(self, id, question_text, question_type, correct_answer, points, order_number):
+        self.id = id
+        self.question_text = question_text
+        self.question_type = question_type.value
+        self.correct_answer = correct_answer
+        self.points = points
+        self.order_number = order_number
+        self.options = []
+
+class AssignmentNode:
+    """Assignment with its questions"""
+    __slots__ = ('id', 'title', 'description', 'max_points', 'order_number', 'questions')
+
+    def __init__(self, id, title, description, max_points, order_number):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.max_points = max_points
+        self.order_number = order_number
+        self.questions = []
+
+class LoadedTest:
+    """Test with its assignments"""
+    __slots__ = ('id', 'title', 'created_at', 'updated_at', 'version', 'assignments')
+
+    def __init__(self, id, title, created_at, updated_at, version):
+        self.id = id
+        self.title = title
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.version = version
+        self.assignments = []
+
+def load_assignments(test_id):
+    """
+    Load assignments of a test with questions and options in three queries
+
+    Args:
+        test_id (int): Test ID
+
+    Returns:
+        list: AssignmentNode objects ordered by order_number, then ID
+    """
+    assignments = {
+        row[0]: AssignmentNode(*row)
+        for row in db.session.execute(
+            select(Assignment.id, Assignment.title, Assignment.description,
+                   Assignment.max_points, Assignment.order_number)
+            .where(Assignment.test_id == test_id)
+            .order_by(Assignment.order_number, Assignment.id)
+        )
+    }
+
+    if not assignments:
+        return []
+
+    questions = {}
+    for row in db.session.execute(
+        select(Question.assignment_id, Question.id, Question.question_text, Question.question_type,
+               Question.correct_answer, Question.points, Question.order_number)
+        .join(Assignment, Question.assignment_id == Assignment.id)
+        .where(Assignment.test_id == test_id)
+        .order_by(Question.order_number, Question.id)
+    ):
+        question = QuestionNode(*row[1:])
+        assignments[row[0]].questions.append(question)
+        questions[question.id] = question
+
+    if questions:
+        for row in db.session.execute(
+            select(QuestionOption.question_id, QuestionOption.id, QuestionOption.option_text,
+                   QuestionOption.is_correct, QuestionOption.order_number)
+            .join(Question, QuestionOption.question_id == Question.id)
+            .join(Assignment, Question.assignment_id == Assignment.id)
+            .where(Assignment.test_id == test_id)
+            .order_by(QuestionOption.order_number, QuestionOption.id)
+        ):
+            questions[row[0]].options.append(OptionNode(*row[1:]))
+
+    return list(assignments.values())
+
+def load_test_tree(test_id, user_id):
+    """
+    Load a user's test with assignments, questions and options in four queries
+
+    Args:
+        test_id (int): Test ID
+        user_id (int): Owner's user ID
+
+    Returns:
+        LoadedTest: Loaded test, None if not found
+    """
+    row = db.session.execute(
+        select(Test.id, Test.title, Test.created_at, Test.updated_at, Test.version)
+        .where(Test.id == test_id, Test.user_id == user_id)
+    ).first()
+
+    if row is None:
+        return None
+
+    test = LoadedTest(*row)
+    test.assignments = load_assignments(test_id)
+    return test
+
+def serialize_assignments(assignments):
+    """
+    Convert assignment nodes to dicts in the format of GET /api/materials/<id>
+
+    Args:
+        assignments (list): AssignmentNode objects
+
+    Returns:
+        list: Assignment dicts with nested questions and options
+    """
+    return [
+        {
+            'id': assignment.id,
+            'title': assignment.title,
+            'description': assignment.description,
+            'max_points': assignment.max_points,
+            'order_number': assignment.order_number,
+            'questions': [
+                {
+                    'id': question.id,
+                    'question_text': question.question_text,
+                    'question_type': question.question_type,
+                    'correct_answer': question.correct_answer,
+                    'points': question.points,
+                    'order_number': question.order_number,
+                    'options': [
+                        {
+                            'id': option.id,
+                            'option_text': option.option_text,
+                            'is_correct': option.is_correct,
+                            'order_number': option.order_number
+                        }
+                        for option in question.options
+                    ]
+                }
+                for question in assignment.questions
+            ]
+        }
+        for assignment in assignments
+    ]
+
+def serialize_test(test):
+    """
+    Convert a loaded test to a dict for API responses and exports
+
+    Args:
+        test (LoadedTest): Loaded test
+
+    Returns:
+        dict: Test data with nested assignments
+    """
+    return {
+        'id': test.id,
+        'title': test.title,
+        'created_at': test.created_at.isoformat(),
+        'version': test.version,
+        'assignments': serialize_assignments(test.assignments)
+    }
@@ -0,0 +1,153 @@
+"""
+Sibling Ordering
+Gap-based order_number keys for assignments and questions: moving or
+appending a row writes only that row, its siblings are renumbered only
+when two neighbouring keys leave no room between them
+"""
+from sqlalchemy import func, select, text, tuple_, update
+from extensions import db
+from models import Assignment, Question
+
+ORDER_GAP = 1024  # Distance between renumbered keys, about ten moves into one spot before renumbering
+
+# entity -> (model, parent foreign key)
+ORDERED_MODELS = {
+    'assignment': (Assignment, Assignment.test_id),
+    'question': (Question, Question.assignment_id)
+}
+
+class OrderingError(Exception):
+    """Custom exception for invalid move requests"""
+    pass
+
+def next_order_number(entity, parent_id):
+    """
+    order_number of a row appended after its last sibling
+
+    Args:
+        entity (str): "assignment" or "question"
+        parent_id (int): Test ID of assignments, assignment ID of questions
+
+    Returns:
+        int: Largest sibling key plus ORDER_GAP, read with one MAX query
+    """
+    model, parent = ORDERED_MODELS[entity]
+    largest = db.session.scalar(select(func.max(model.order_number)).where(parent == parent_id))
+    return (largest or 0) + ORDER_GAP
+
+def renumber_siblings(entity, parent_id):
+    """
+    Spread the keys of a parent's rows ORDER_GAP apart, keeping their order
+
+    One UPDATE ... FROM statement ranks the rows by (order_number, id), the
+    same order the test tree is loaded in.
+
+    Args:
+        entity (str): "assignment" or "question"
+        parent_id (int): Test ID of assignments, assignment ID of questions
+
+    Returns:
+        int: Number of renumbered rows
+    """
+    model, parent = ORDERED_MODELS[entity]
+    table = model.__tablename__
+    return db.session.execute(text(
+        f'UPDATE {table} SET order_number = ranked.position * {ORDER_GAP} '
+        f'FROM (SELECT id, row_number() OVER (ORDER BY order_number, id) AS position '
+        f'      FROM {table} WHERE {parent.key} = :parent_id) AS ranked '
+        f'WHERE {table}.id = ranked.id'
+    ), {'parent_id': parent_id}).rowcount
+
+def _between(lower, upper):
+    """Key strictly between two sibling keys (None for an open end), None if there is no room"""
+    lower = 0 if lower is None else lower
+    if upper is None:
+        return lower + ORDER_GAP
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+def _rows_in_test(entity, test_id, ids):
+    """(id, parent ID, order_number) of the given rows that belong to a test, by ID"""
+    model, parent = ORDERED_MODELS[entity]
+    statement = select(model.id, parent, model.order_number).where(model.id.in_(ids))
+    if entity == 'question':
+        statement = statement.join(Assignment, Assignment.id == Question.assignment_id)
+    return {row[0]: row for row in db.session.execute(statement.where(Assignment.test_id == test_id))}
+
+def move_row(test_id, entity, row_id, after_id=None, parent_id=None):
+    """
+    Place an assignment or question right after a sibling
+
+    Only the moved row is written: it gets a key between its new
+    neighbours. When they are adjacent integers the new parent's rows are
+    renumbered first. The caller commits.
+
+    Args:
+        test_id (int): Test ID
+        entity (str): "assignment" or "question"
+        row_id (int): ID of the moved row
+        after_id (int): Sibling to place the row after, None to make it the first one
+        parent_id (int): Assignment to move a question to (optional, default: the
+                         assignment of after_id, or the question's own)
+
+    Returns:
+        dict: id, parent_id (test or assignment), new order_number and
+              whether siblings were renumbered
+
+    Raises:
+        OrderingError: If the rows don't exist in the test or don't fit together
+    """
+    if entity not in ORDERED_MODELS:
+        raise OrderingError(f"entity must be one of: {', '.join(ORDERED_MODELS)}")
+    if after_id == row_id:
+        raise OrderingError("after_id must differ from id")
+
+    model, parent = ORDERED_MODELS[entity]
+    rows = _rows_in_test(entity, test_id, [row_id] + ([after_id] if after_id is not None else []))
+
+    if row_id not in rows:
+        raise OrderingError(f"{entity} {row_id} not found in this test")
+    if after_id is not None and after_id not in rows:
+        raise OrderingError(f"{entity} {after_id} not found in this test")
+
+    if entity == 'assignment':
+        target = test_id
+    elif parent_id is not None:
+        if not _rows_in_test('assignment', test_id, [parent_id]):
+            raise OrderingError(f"assignment {parent_id} not found in this test")
+        target = parent_id
+    else:
+        target = rows[after_id][1] if after_id is not None else rows[row_id][1]
+
+    if after_id is not None and rows[after_id][1] != target:
+        raise OrderingError(f"{entity} {after_id} is not in the target assignment")
+
+    renumbered = False
+    while True:
+        statement = select(model.order_number).where(parent == target, model.id != row_id)
+        if after_id is not None:
+            lower = db.session.scalar(select(model.order_number).where(model.id == after_id))
+            statement = statement.where(tuple_(model.order_number, model.id) > tuple_(lower, after_id))
+        else:
+            lower = None
+
+        upper = db.session.scalar(statement.order_by(model.order_number, model.id).limit(1))
+        key = _between(lower, upper)
+        if key is not None or renumbered:
+            break
+
+        renumber_siblings(entity, target)
+        renumbered = True
+
+    values = {'order_number': key}
+    if target != rows[row_id][1]:
+        values[parent.key] = target
+    db.session.execute(update(model).where(model.id == row_id).values(**values))
+
+    return {
+        'id': row_id,
+        'parent_id': target,
+        'order_number': key,
+        'renumbered': renumbered
+    }
@@ -3,40 +3,290 @@ JSON Parser and Validator
 Validates and processes JSON responses from Claude API
 """
 from models import QuestionType
+from services.json_repair import PARSE_REPORT_KEY
 
 class ParserError(Exception):
     """Custom exception for parsing errors"""
-    pass
 
-def validate_test_response(data):
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        # List of {'path': JSON path, 'message': str} for every problem found
+        self.errors = errors or []
+
+# Lookup sets built once instead of per question
+VALID_QUESTION_TYPES = frozenset(qt.value for qt in QuestionType)
+OPTION_REQUIRED_TYPES = frozenset(['multiple_choice', 'true_false', 'matching'])
+
+# Field schemas: (field, accepted types, type description)
+ASSIGNMENT_SCHEMA = (
+    ('title', str, 'a string'),
+    ('description', str, 'a string'),
+    ('max_points', (int, float), 'a number'),
+    ('questions', list, 'a list'),
+)
+
+QUESTION_SCHEMA = (
+    ('question_text', str, 'a string'),
+    ('question_type', str, 'a string'),
+    ('correct_answer', str, 'a string'),
+    ('points', (int, float), 'a number'),
+)
+
+MAX_ERRORS_IN_MESSAGE = 5
+
+_MISSING = object()
+
+def _json_path(location, field=None):
+    """Format JSON path from (assignment_index[, question_index]) location"""
+    path = f'$.assignments[{location[0]}]'
+    if len(location) > 1:
+        path += f'.questions[{location[1]}]'
+    if field:
+        path += f'.{field}'
+    return path
+
+class CompiledTestValidator:
     """
-    Validate test JSON response from Claude
+    Single-pass validator and normalizer for test responses
+
+    Field checks are compiled from the schemas once. A call walks the
+    response tree one time, normalizes valid nodes in place and collects
+    every error with its JSON path instead of stopping at the first one.
+    """
+
+    def __init__(self, assignment_schema, question_schema):
+        self._assignment_fields = self._compile(assignment_schema)
+        self._question_fields = self._compile(question_schema)
+
+    @staticmethod
+    def _compile(schema):
+        """Precompute required field checks and their error messages"""
+        return tuple(
+            (field, types, f"missing required field: '{field}'", f"'{field}' must be {label}")
+            for field, types, label in schema
+        )
+
+    @staticmethod
+    def _check_fields(node, fields, location, errors):
+        """Check required fields and types, return True if node is valid"""
+        valid = True
+        for field, types, missing_message, type_message in fields:
+            value = node.get(field, _MISSING)
+            if value is _MISSING:
+                errors.append({'path': _json_path(location), 'message': missing_message})
+                valid = False
+            elif not isinstance(value, types):
+                errors.append({'path': _json_path(location, field), 'message': type_message})
+                valid = False
+        return valid
+
+    def __call__(self, data, clean=True):
+        """
+        Validate (and optionally clean) a test response
+
+        Args:
+            data (dict): JSON response from Claude
+            clean (bool): Normalize data for database insertion
+
+        Returns:
+            dict: Validated data (cleaned in place if clean=True)
+
+        Raises:
+            ParserError: With all errors found, if data structure is invalid
+        """
+        self._check_root(data)
+
+        errors = []
+        for i, assignment in enumerate(data['assignments']):
+            self._assignment(assignment, i, errors, clean)
+
+        if errors:
+            details = '; '.join(f"{e['path']}: {e['message']}" for e in errors[:MAX_ERRORS_IN_MESSAGE])
+            if len(errors) > MAX_ERRORS_IN_MESSAGE:
+                details += f"; ... and {len(errors) - MAX_ERRORS_IN_MESSAGE} more"
+            raise ParserError(f"Invalid test response ({len(errors)} errors): {details}", errors)
+
+        return data
+
+    def salvage(self, data):
+        """
+        Validate and clean a test response, dropping invalid parts
+
+        Questions with errors are removed, as are assignments with invalid
+        fields or no valid questions left. Kept parts are cleaned and
+        renumbered in the same pass. Only a response with nothing
+        salvageable raises.
+
+        Args:
+            data (dict): JSON response from Claude
+
+        Returns:
+            tuple: (cleaned data, list of dropped parts with JSON paths and errors)
+
+        Raises:
+            ParserError: If root is invalid or no valid assignment remains
+        """
+        self._check_root(data)
+
+        dropped = []
+        kept_assignments = []
+
+        for i, assignment in enumerate(data['assignments']):
+            errors = []
+            if not isinstance(assignment, dict):
+                errors.append({'path': _json_path((i,)), 'message': 'must be an object'})
+            else:
+                self._check_fields(assignment, self._assignment_fields, (i,), errors)
+
+            if errors:
+                dropped.append({'path': _json_path((i,)), 'errors': errors})
+                continue
+
+            kept_questions = []
+            for j, question in enumerate(assignment['questions']):
+                question_errors = []
+                self._question(question, i, j, question_errors, clean=False)
+                if question_errors:
+                    dropped.append({'path': _json_path((i, j)), 'errors': question_errors})
+                else:
+                    _clean_question(question, len(kept_questions) + 1)
+                    kept_questions.append(question)
+
+            if not kept_questions:
+                dropped.append({
+                    'path': _json_path((i,)),
+                    'errors': [{'path': _json_path((i,), 'questions'), 'message': 'no valid questions'}]
+                })
+                continue
+
+            assignment['questions'] = kept_questions
+            assignment['order_number'] = len(kept_assignments) + 1
+            assignment['max_points'] = float(assignment['max_points'])
+            kept_assignments.append(assignment)
+
+        if not kept_assignments:
+            errors = [error for part in dropped for error in part['errors']]
+            raise ParserError("Response contains no valid assignments", errors)
+
+        data['assignments'] = kept_assignments
+        return data, dropped
+
+    @staticmethod
+    def _check_root(data):
+        """Check response root, raising on the first problem"""
+        if not isinstance(data, dict):
+            raise ParserError("Response must be a JSON object", [{'path': '$', 'message': 'must be a JSON object'}])
+
+        if 'assignments' not in data:
+            raise ParserError("Response missing 'assignments' field",
+                              [{'path': '$', 'message': "missing required field: 'assignments'"}])
+
+        if not isinstance(data['assignments'], list):
+            raise ParserError("'assignments' must be a list",
+                              [{'path': '$.assignments', 'message': 'must be a list'}])
+
+        if len(data['assignments']) == 0:
+            raise ParserError("Response must contain at least one assignment",
+                              [{'path': '$.assignments', 'message': 'must contain at least one assignment'}])
+
+    def _assignment(self, assignment, index, errors, clean):
+        """Validate and clean a single assignment"""
+        # JSON paths are only formatted when an error is reported
+        location = (index,)
+
+        if not isinstance(assignment, dict):
+            errors.append({'path': _json_path(location), 'message': 'must be an object'})
+            return
+
+        valid = self._check_fields(assignment, self._assignment_fields, location, errors)
+
+        questions = assignment.get('questions')
+        if isinstance(questions, list):
+            if len(questions) == 0:
+                errors.append({'path': _json_path(location, 'questions'), 'message': 'must contain at least one question'})
+            for j, question in enumerate(questions):
+                self._question(question, index, j, errors, clean)
+
+        if valid and clean:
+            assignment['order_number'] = index + 1
+            assignment['max_points'] = float(assignment['max_points'])
+
+    def _question(self, question, assignment_index, index, errors, clean):
+        """Validate and clean a single question"""
+        location = (assignment_index, index)
+
+        if not isinstance(question, dict):
+            errors.append({'path': _json_path(location), 'message': 'must be an object'})
+            return
+
+        valid = self._check_fields(question, self._question_fields, location, errors)
+
+        question_type = question.get('question_type')
+        if isinstance(question_type, str) and question_type not in VALID_QUESTION_TYPES:
+            errors.append({
+                'path': _json_path(location, 'question_type'),
+                'message': f"invalid value '{question_type}'. Must be one of: {', '.join(sorted(VALID_QUESTION_TYPES))}"
+            })
+            valid = False
+
+        # Options field may be omitted for question types without options
+        options = question.setdefault('options', [])
+
+        if not isinstance(options, list):
+            errors.append({'path': _json_path(location, 'options'), 'message': 'must be a list'})
+            valid = False
+        elif len(options) == 0 and question_type in OPTION_REQUIRED_TYPES:
+            errors.append({'path': _json_path(location, 'options'),
+                           'message': f"question type '{question_type}' requires options"})
+            valid = False
+
+        if valid and clean:
+            _clean_question(question, index + 1)
+
+validate_and_clean_test = CompiledTestValidator(ASSIGNMENT_SCHEMA, QUESTION_SCHEMA)
+
+def salvage_test_response(data):
+    """
+    Validate and clean test response, keeping every valid part
 
     Args:
         data (dict): JSON response from Claude
 
     Returns:
-        dict: Validated and cleaned data
+        tuple: (cleaned data, list of dropped parts)
 
     Raises:
-        ParserError: If data structure is invalid
+        ParserError: If nothing in the response is valid
     """
-    if not isinstance(data, dict):
-        raise ParserError("Response must be a JSON object")
+    return validate_and_clean_test.salvage(data)
+
+def pop_parse_report(data):
+    """
+    Remove the tolerant parser report attached to a Claude response
 
-    if 'assignments' not in data:
-        raise ParserError("Response missing 'assignments' field")
+    Args:
+        data: Parsed response
 
-    if not isinstance(data['assignments'], list):
-        raise ParserError("'assignments' must be a list")
+    Returns:
+        dict: {'repairs': {...}, 'dropped': [...]} (empty if JSON was valid)
+    """
+    report = data.pop(PARSE_REPORT_KEY, None) if isinstance(data, dict) else None
+    return report or {'repairs': {}, 'dropped': []}
+
+def validate_test_response(data):
+    """
+    Validate test JSON response from Claude
 
-    if len(data['assignments']) == 0:
-        raise ParserError("Response must contain at least one assignment")
+    Args:
+        data (dict): JSON response from Claude
 
-    for i, assignment in enumerate(data['assignments']):
-        _validate_assignment(assignment, i)
+    Returns:
+        dict: Validated data
 
-    return data
+    Raises:
+        ParserError: If data structure is invalid
+    """
+    return validate_and_clean_test(data, clean=False)
 
 def validate_study_material_response(data):
     """
@@ -74,95 +324,6 @@ def validate_study_material_response(data):
 
     return data
 
-def _validate_assignment(assignment, index):
-    """Validate a single assignment"""
-    required_fields = ['title', 'description', 'max_points', 'questions']
-
-    for field in required_fields:
-        if field not in assignment:
-            raise ParserError(f"Assignment {index} missing required field: '{field}'")
-
-    if not isinstance(assignment['title'], str):
-        raise ParserError(f"Assignment {index} 'title' must be a string")
-
-    if not isinstance(assignment['description'], str):
-        raise ParserError(f"Assignment {index} 'description' must be a string")
-
-    if not isinstance(assignment['max_points'], (int, float)):
-        raise ParserError(f"Assignment {index} 'max_points' must be a number")
-
-    if not isinstance(assignment['questions'], list):
-        raise ParserError(f"Assignment {index} 'questions' must be a list")
-
-    if len(assignment['questions']) == 0:
-        raise ParserError(f"Assignment {index} must contain at least one question")
-
-    for j, question in enumerate(assignment['questions']):
-        _validate_question(question, index, j)
-
-def _validate_question(question, assignment_index, question_index):
-    """Validate a single question"""
-    required_fields = ['question_text', 'question_type', 'correct_answer', 'points']
-
-    for field in required_fields:
-        if field not in question:
-            raise ParserError(
-                f"Assignment {assignment_index}, Question {question_index} "
-                f"missing required field: '{field}'"
-            )
-
-    if not isinstance(question['question_text'], str):
-        raise ParserError(
-            f"Assignment {assignment_index}, Question {question_index} "
-            f"'question_text' must be a string"
-        )
-
-    if not isinstance(question['question_type'], str):
-        raise ParserError(
-            f"Assignment {assignment_index}, Question {question_index} "
-            f"'question_type' must be a string"
-        )
-
-    # Validate question type is valid
-    valid_types = [qt.value for qt in QuestionType]
-    if question['question_type'] not in valid_types:
-        raise ParserError(
-            f"Assignment {assignment_index}, Question {question_index} "
-            f"invalid 'question_type': '{question['question_type']}'. "
-            f"Must be one of: {', '.join(valid_types)}"
-        )
-
-    if not isinstance(question['correct_answer'], str):
-        raise ParserError(
-            f"Assignment {assignment_index}, Question {question_index} "
-            f"'correct_answer' must be a string"
-        )
-
-    if not isinstance(question['points'], (int, float)):
-        raise ParserError(
-            f"Assignment {assignment_index}, Question {question_index} "
-            f"'points' must be a number"
-        )
-
-    # Validate options field exists (even if empty for some question types)
-    if 'options' not in question:
-        # Add empty options if not present
-        question['options'] = []
-
-    if not isinstance(question['options'], list):
-        raise ParserError(
-            f"Assignment {assignment_index}, Question {question_index} "
-            f"'options' must be a list"
-        )
-
-    # For multiple_choice and true_false, validate options
-    if question['question_type'] in ['multiple_choice', 'true_false', 'matching']:
-        if len(question['options']) == 0:
-            raise ParserError(
-                f"Assignment {assignment_index}, Question {question_index} "
-                f"question type '{question['question_type']}' requires options"
-            )
-
 def _validate_term(term, index):
     """Validate a single term"""
     required_fields = ['name', 'definition']
@@ -183,6 +344,36 @@ def _validate_term(term, index):
     if len(term['definition'].strip()) == 0:
         raise ParserError(f"Term {index} 'definition' cannot be empty")
 
+def _clean_options(options, correct_answer):
+    """Normalize options format: convert strings to objects"""
+    normalized_options = []
+
+    for option in options:
+        if isinstance(option, str):
+            # Claude returned simple string - convert to object
+            normalized_options.append({
+                'option_text': option,
+                'is_correct': option == correct_answer
+            })
+        elif isinstance(option, dict):
+            # Already in correct format
+            if 'option_text' not in option:
+                # Handle legacy format if needed
+                option['option_text'] = option.get('text', str(option))
+            if 'is_correct' not in option:
+                option['is_correct'] = option.get('option_text') == correct_answer
+            normalized_options.append(option)
+
+    return normalized_options
+
+def _clean_question(question, order_number):
+    """Normalize a single question in place"""
+    question['order_number'] = order_number
+    question['points'] = float(question['points'])
+
+    # Ensure options is a list (empty for non-multiple-choice)
+    question['options'] = _clean_options(question.get('options', []), question.get('correct_answer', ''))
+
 def clean_test_data(data):
     """
     Clean and normalize test data for database insertion
@@ -193,41 +384,12 @@ def clean_test_data(data):
     Returns:
         dict: Cleaned data ready for database
     """
-    # Ensure proper order numbers for assignments
     for i, assignment in enumerate(data['assignments']):
+        # Ensure proper order numbers for assignments and questions
         assignment['order_number'] = i + 1
 
-        # Ensure proper order numbers for questions
         for j, question in enumerate(assignment['questions']):
-            question['order_number'] = j + 1
-
-            question['points'] = float(question['points'])
-
-            # Ensure options is a list (empty for non-multiple-choice)
-            if 'options' not in question:
-                question['options'] = []
-
-            # Normalize options format: convert strings to objects
-            normalized_options = []
-            correct_answer = question.get('correct_answer', '')
-
-            for option in question['options']:
-                if isinstance(option, str):
-                    # Claude returned simple string - convert to object
-                    normalized_options.append({
-                        'option_text': option,
-                        'is_correct': option == correct_answer
-                    })
-                elif isinstance(option, dict):
-                    # Already in correct format
-                    if 'option_text' not in option:
-                        # Handle legacy format if needed
-                        option['option_text'] = option.get('text', str(option))
-                    if 'is_correct' not in option:
-                        option['is_correct'] = option.get('option_text') == correct_answer
-                    normalized_options.append(option)
-
-            question['options'] = normalized_options
+            _clean_question(question, j + 1)
 
         # Convert max_points to int/float
         assignment['max_points'] = float(assignment['max_points'])
@@ -0,0 +1,390 @@
+"""
+Search Index
+SQLite FTS5 full-text index over test titles, question texts, study material
+summaries and terms, with ranked search, snippets and prefix autocomplete
+"""
+import html
+import re
+from sqlalchemy import event, inspect, text
+from extensions import db
+from json_codec import loads
+from models import StudyMaterial, Test
+from services.material_preview import html_to_text
+from services.text_compression import decompress_text
+
+SEARCH_TABLE = 'search_index'
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+SUGGEST_LIMIT = 8
+HITS_PER_RESULT = 3      # Snippets returned per material
+HIT_POOL_FACTOR = 5      # Ranked rows read per requested material, several rows can belong to one material
+SNIPPET_TOKENS = 12
+
+# Index rows are keyed by rowid = source id * ROWID_STRIDE + kind, so every
+# write hook updates its row by primary key instead of scanning the index
+ROWID_STRIDE = 8
+KIND_TEST = 1
+KIND_QUESTION = 2
+KIND_MATERIAL = 3
+KIND_SUMMARY = 4
+KIND_TERMS = 5
+
+KIND_NAMES = {
+    KIND_TEST: 'title',
+    KIND_QUESTION: 'question',
+    KIND_MATERIAL: 'title',
+    KIND_SUMMARY: 'summary',
+    KIND_TERMS: 'terms'
+}
+
+# Snippet markers that can't occur in stored text, replaced with <mark> after escaping
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+WORD_RE = re.compile(r'\w+')
+
+# Only title and body are tokenized. remove_diacritics lets "skolas" match
+# "skolās" and vice versa, prefix indexes keep autocomplete queries fast.
+# user_id is a plain column filtered after matching: an indexed owner token
+# would make every query read the owner's whole posting list
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    title, body, user_id UNINDEXED, kind UNINDEXED, material_type UNINDEXED, material_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# Title matches rank ten times higher than body matches
+RANK_CONFIG = f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')"
+
+# Tests and questions are indexed by triggers, so bulk inserts, tree patches
+# and cascading deletes keep the index in sync. Study material content is
+# HTML (and may be stored encoded), so its rows are written by the ORM hooks
+# below, only their deletion is a trigger.
+TRIGGERS = {
+    'search_tests_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS search_tests_insert AFTER INSERT ON tests BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id)
+            VALUES (new.id * {ROWID_STRIDE} + {KIND_TEST}, new.title, '', new.user_id,
+                    {KIND_TEST}, 'test', new.id);
+        END
+    """,
+    'search_tests_update': f"""
+        CREATE TRIGGER IF NOT EXISTS search_tests_update AFTER UPDATE OF title, user_id ON tests BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * {ROWID_STRIDE} + {KIND_TEST};
+            INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id)
+            VALUES (new.id * {ROWID_STRIDE} + {KIND_TEST}, new.title, '', new.user_id,
+                    {KIND_TEST}, 'test', new.id);
+        END
+    """,
+    'search_tests_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS search_tests_delete AFTER DELETE ON tests BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * {ROWID_STRIDE} + {KIND_TEST};
+        END
+    """,
+    'search_questions_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS search_questions_insert AFTER INSERT ON questions BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id)
+            SELECT new.id * {ROWID_STRIDE} + {KIND_QUESTION}, '', new.question_text, tests.user_id,
+                   {KIND_QUESTION}, 'test', tests.id
+            FROM assignments JOIN tests ON tests.id = assignments.test_id
+            WHERE assignments.id = new.assignment_id;
+        END
+    """,
+    'search_questions_update': f"""
+        CREATE TRIGGER IF NOT EXISTS search_questions_update
+        AFTER UPDATE OF question_text, assignment_id ON questions BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * {ROWID_STRIDE} + {KIND_QUESTION};
+            INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id)
+            SELECT new.id * {ROWID_STRIDE} + {KIND_QUESTION}, '', new.question_text, tests.user_id,
+                   {KIND_QUESTION}, 'test', tests.id
+            FROM assignments JOIN tests ON tests.id = assignments.test_id
+            WHERE assignments.id = new.assignment_id;
+        END
+    """,
+    'search_questions_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS search_questions_delete AFTER DELETE ON questions BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * {ROWID_STRIDE} + {KIND_QUESTION};
+        END
+    """,
+    'search_study_materials_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS search_study_materials_delete AFTER DELETE ON study_materials BEGIN
+            DELETE FROM {SEARCH_TABLE}
+            WHERE rowid IN (old.id * {ROWID_STRIDE} + {KIND_MATERIAL}, old.id * {ROWID_STRIDE} + {KIND_SUMMARY},
+                            old.id * {ROWID_STRIDE} + {KIND_TERMS});
+        END
+    """
+}
+
+INSERT_ROW = text(
+    f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id) '
+    'VALUES (:rowid, :title, :body, :user_id, :kind, :material_type, :material_id)'
+)
+
+class SearchError(Exception):
+    """Custom exception for invalid search queries"""
+    pass
+
+def create_search_index(connection):
+    """
+    Create the FTS5 table and its triggers if they don't exist
+
+    Args:
+        connection: SQLAlchemy connection
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': SEARCH_TABLE}
+    ).first() is not None
+
+    connection.execute(text(CREATE_TABLE))
+    if not exists:
+        connection.execute(text(RANK_CONFIG))
+    for statement in TRIGGERS.values():
+        connection.execute(text(statement))
+
+def drop_search_index(connection):
+    """Drop the FTS5 table and its triggers"""
+    for name in TRIGGERS:
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+    connection.execute(text(f'DROP TABLE IF EXISTS {SEARCH_TABLE}'))
+
+def study_material_rows(material_id, user_id, title, content_data):
+    """
+    Build the index rows of a study material
+
+    Args:
+        material_id (int): Study material ID
+        user_id (int): Owner ID
+        title (str): Material title
+        content_data (dict): Decoded content {summary, terms}
+
+    Returns:
+        list: Row dicts for INSERT_ROW
+    """
+    summary = content_data.get('summary')
+    terms = content_data.get('terms')
+    term_lines = [
+        f"{term.get('name', '')} — {term.get('definition', '')}"
+        for term in (terms if isinstance(terms, list) else []) if isinstance(term, dict)
+    ]
+
+    row = {'user_id': user_id, 'material_type': 'study_material', 'material_id': material_id}
+    return [
+        dict(row, rowid=material_id * ROWID_STRIDE + KIND_MATERIAL, kind=KIND_MATERIAL, title=title, body=''),
+        dict(row, rowid=material_id * ROWID_STRIDE + KIND_SUMMARY, kind=KIND_SUMMARY, title='',
+             body=html_to_text(summary) if isinstance(summary, str) else ''),
+        dict(row, rowid=material_id * ROWID_STRIDE + KIND_TERMS, kind=KIND_TERMS, title='',
+             body='\n'.join(term_lines))
+    ]
+
+def _delete_study_material_rows(connection, material_id):
+    connection.execute(
+        text(f'DELETE FROM {SEARCH_TABLE} WHERE rowid BETWEEN :first AND :last'),
+        {'first': material_id * ROWID_STRIDE + KIND_MATERIAL, 'last': material_id * ROWID_STRIDE + KIND_TERMS}
+    )
+
+def unindex_study_material_content(connection, material_ids):
+    """
+    Remove the summary and terms rows of study materials, keeping their titles
+
+    Args:
+        connection: SQLAlchemy connection
+        material_ids (list): Study material IDs
+    """
+    connection.execute(
+        text(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid'),
+        [{'rowid': material_id * ROWID_STRIDE + kind}
+         for material_id in material_ids for kind in (KIND_SUMMARY, KIND_TERMS)]
+    )
+
+def index_study_material(connection, material):
+    """
+    Write the index rows of a study material, replacing existing ones
+
+    Args:
+        connection: SQLAlchemy connection of the flushing session
+        material (StudyMaterial): Flushed study material
+    """
+    _delete_study_material_rows(connection, material.id)
+    connection.execute(INSERT_ROW, study_material_rows(material.id, material.user_id, material.title,
+                                                       material.content_data))
+
+@event.listens_for(StudyMaterial, 'after_insert')
+def _study_material_inserted(mapper, connection, target):
+    index_study_material(connection, target)
+
+@event.listens_for(StudyMaterial, 'after_update')
+def _study_material_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ('title', 'content', 'user_id')):
+        index_study_material(connection, target)
+
+@event.listens_for(db.metadata, 'after_create')
+def _metadata_created(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        create_search_index(connection)
+
+@event.listens_for(db.metadata, 'before_drop')
+def _metadata_dropped(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        drop_search_index(connection)
+
+def rebuild_search_index(connection, batch_size=500):
+    """
+    Refill the index from the material tables
+
+    Args:
+        connection: SQLAlchemy connection
+        batch_size (int): Study materials decoded per batch
+
+    Returns:
+        int: Number of index rows written
+    """
+    connection.execute(text(f'DELETE FROM {SEARCH_TABLE}'))
+    connection.execute(text(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id) '
+        f"SELECT id * {ROWID_STRIDE} + {KIND_TEST}, title, '', user_id, {KIND_TEST}, 'test', id FROM tests"
+    ))
+    connection.execute(text(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id) '
+        f"SELECT questions.id * {ROWID_STRIDE} + {KIND_QUESTION}, '', questions.question_text, "
+        f"tests.user_id, {KIND_QUESTION}, 'test', tests.id "
+        'FROM questions JOIN assignments ON assignments.id = questions.assignment_id '
+        'JOIN tests ON tests.id = assignments.test_id'
+    ))
+
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            text('SELECT id, user_id, title, content FROM study_materials WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': batch_size}
+        ).all()
+        if not rows:
+            break
+
+        values = []
+        for material_id, user_id, title, content in rows:
+            try:
+                content_data = loads(decompress_text(content)) if content else {}
+            except ValueError:
+                content_data = {}
+            values.extend(study_material_rows(material_id, user_id, title,
+                                              content_data if isinstance(content_data, dict) else {}))
+        connection.execute(INSERT_ROW, values)
+        last_id = rows[-1][0]
+
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"))
+    return connection.execute(text(f'SELECT count(*) FROM {SEARCH_TABLE}')).scalar()
+
+def build_match_query(query, prefix=True, column=None):
+    """
+    Turn user input into an FTS5 query
+
+    Every word must match. Words are quoted, so FTS5 operators typed by the
+    user are searched as text. With prefix the last word also matches longer
+    words, which makes search-as-you-type work.
+
+    Args:
+        query (str): Search text
+        prefix (bool): Match the last word as a prefix
+        column (str): Only match this column, None for title and body
+
+    Returns:
+        str: FTS5 MATCH expression
+
+    Raises:
+        SearchError: If the query has no words
+    """
+    words = WORD_RE.findall(query or '')
+    if not words:
+        raise SearchError('Search query must contain at least one word')
+
+    terms = [f'"{word}"' for word in words]
+    if prefix:
+        terms[-1] += '*'
+    expression = ' '.join(terms)
+    return f'{column}: ({expression})' if column else expression
+
+def _highlight(snippet):
+    """Escape snippet text and turn the match markers into <mark> tags"""
+    return html.escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+def search(user_id, query, material_type=None, limit=DEFAULT_LIMIT, prefix=True):
+    """
+    Search a user's materials
+
+    Args:
+        user_id (int): Owner ID
+        query (str): Search text
+        material_type (str): Only "test" or "study_material" results, None for both
+        limit (int): Maximum number of materials
+        prefix (bool): Match the last word as a prefix
+
+    Returns:
+        list: Result dicts {id, type, title, created_at, score, matches}, best first.
+        matches holds up to HITS_PER_RESULT {field, snippet} dicts, snippet is
+        HTML-escaped text with the matched words in <mark> tags.
+
+    Raises:
+        SearchError: If the query has no words
+    """
+    params = {'match': build_match_query(query, prefix), 'user_id': user_id, 'pool': limit * HIT_POOL_FACTOR}
+    filters = 'AND user_id = :user_id'
+    if material_type:
+        filters += ' AND material_type = :material_type'
+        params['material_type'] = material_type
+
+    hits = db.session.execute(text(
+        f"SELECT material_type, material_id, kind, rank, "
+        f"snippet({SEARCH_TABLE}, -1, '{_MARK_START}', '{_MARK_END}', '…', {SNIPPET_TOKENS}) "
+        f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match {filters} '
+        'ORDER BY rank LIMIT :pool'
+    ), params).all()
+
+    results = {}
+    for hit_type, material_id, kind, rank, snippet in hits:
+        key = (hit_type, material_id)
+        if key not in results:
+            if len(results) >= limit:
+                continue
+            # bm25 ranks are negative, lower is better
+            results[key] = {'id': material_id, 'type': hit_type, 'score': round(-rank, 4), 'matches': []}
+        if len(results[key]['matches']) < HITS_PER_RESULT:
+            results[key]['matches'].append({'field': KIND_NAMES[kind], 'snippet': _highlight(snippet)})
+
+    _add_material_columns(results)
+    return list(results.values())
+
+def _add_material_columns(results):
+    """Fill titles and creation dates of search results, one query per material type"""
+    for material_type, model in (('test', Test), ('study_material', StudyMaterial)):
+        ids = [material_id for result_type, material_id in results if result_type == material_type]
+        if not ids:
+            continue
+        rows = db.session.query(model.id, model.title, model.created_at).filter(model.id.in_(ids))
+        for material_id, title, created_at in rows:
+            results[(material_type, material_id)].update(title=title, created_at=created_at.isoformat())
+
+def suggest(user_id, query, limit=SUGGEST_LIMIT):
+    """
+    Autocomplete material titles
+
+    Args:
+        user_id (int): Owner ID
+        query (str): Typed text, the last word is matched as a prefix
+        limit (int): Maximum number of suggestions
+
+    Returns:
+        list: {id, type, title} dicts, best first
+
+    Raises:
+        SearchError: If the query has no words
+    """
+    rows = db.session.execute(text(
+        f'SELECT material_type, material_id, title FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH :match AND user_id = :user_id ORDER BY rank LIMIT :limit'
+    ), {'match': build_match_query(query, column='title'), 'user_id': user_id, 'limit': limit}).all()
+
+    return [{'id': material_id, 'type': material_type, 'title': title}
+            for material_type, material_id, title in rows]
@@ -0,0 +1,93 @@
+"""
+Text Compression
+Stores long text columns deflate-compressed with a shared preset dictionary
+"""
+import zlib
+from sqlalchemy.types import Text, TypeDecorator
+
+MIN_COMPRESSED_SIZE = 256  # Shorter texts stay plain, deflate gains little on them
+COMPRESSION_LEVEL = 6
+WINDOW_BITS = -15          # Raw deflate stream, the header and checksum of zlib format are dropped
+
+# Preset dictionary: strings that recur across generated materials, so even a
+# single short row compresses well. deflate prefers matches near the end of
+# the dictionary, so the most frequent strings come last. Existing rows keep
+# the version they were written with, change the dictionary only by adding
+# a new version.
+_DICTIONARY_V1 = ' '.join((
+    'Detalizēta atbilde ar vairākiem punktiem un paskaidrojumiem. Pareizajā atbildē jāmin, ka',
+    'Atbildē jāiekļauj šādi galvenie punkti: 1) 2) 3) Piemēram, tas nozīmē, ka',
+    'procesā, sistēmā, rezultātā, attiecībā uz, savukārt, tāpēc, jo, tomēr, kā arī,',
+    'galvenie jēdzieni, galvenās idejas, piemēri, īpašības, funkcijas, nozīme, cēloņi, sekas,',
+    'Skaidra definīcija, kas nozīmē šis termins satura kontekstā.',
+    '<h2></h2><h3></h3><p></p><ul><li></li></ul><ol><li></li></ol><strong></strong><em></em><br>',
+    'kas ir un tiek var vai ar par no uz kā arī to tas šī šis ir kuras kurā kuru lai nav',
+    '{"summary":"', '"terms":[{"name":"', '","definition":"', '"},{"name":"', '"}]}',
+)).encode('utf-8')
+
+# Version 0 is plain deflate without a dictionary
+DICTIONARIES = {0: b'', 1: _DICTIONARY_V1}
+CURRENT_DICTIONARY = 1
+
+def compress_text(value):
+    """
+    Compress a text if that makes it smaller
+
+    Args:
+        value (str): Text
+
+    Returns:
+        str or bytes: The text itself when short or incompressible, otherwise
+        one byte with the dictionary version followed by the deflate stream
+    """
+    data = value.encode('utf-8')
+    if len(data) < MIN_COMPRESSED_SIZE:
+        return value
+
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, WINDOW_BITS,
+                                  zdict=DICTIONARIES[CURRENT_DICTIONARY])
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) + 1 >= len(data):
+        return value
+    return bytes([CURRENT_DICTIONARY]) + compressed
+
+def decompress_text(value):
+    """
+    Decode a stored value written by compress_text
+
+    Plain strings (short texts and rows written before compression) are
+    returned unchanged, SQLite returns compressed values as bytes.
+
+    Args:
+        value (str or bytes): Stored value
+
+    Returns:
+        str: Text
+    """
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+
+    value = bytes(value)
+    decompressor = zlib.decompressobj(WINDOW_BITS, zdict=DICTIONARIES[value[0]])
+    return (decompressor.decompress(value[1:]) + decompressor.flush()).decode('utf-8')
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored compressed
+
+    Values are compressed when written and decompressed when the column is
+    loaded, so deferred columns are only decompressed on access. The column
+    stays TEXT in the schema, compressed values are BLOBs in it.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return compress_text(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -0,0 +1,117 @@
+"""
+Test Tree Copy
+Clones and merges tests inside the database with one INSERT ... SELECT per
+tree level, without loading the copied rows
+"""
+from sqlalchemy import case, func, insert, literal, select
+from extensions import db
+from models import Test, Assignment, Question, QuestionOption
+from services.cold_storage import open_material
+
+MAX_MERGED_TESTS = 20
+
+def _id_offset(model, source_ids):
+    """
+    Shift that moves the copied IDs above every existing ID of a table
+
+    Copies keep the relative order of their sources, and children find their
+    copied parent by adding the parent's offset to the foreign key.
+    """
+    smallest = db.session.scalar(select(func.min(model.id)).where(model.id.in_(source_ids)))
+    if smallest is None:
+        return 0
+    largest = db.session.scalar(select(func.max(model.id)))
+    return largest + 1 - smallest
+
+def _assignment_shifts(test_ids):
+    """
+    ID offset and order number shift of the copied assignments of each test
+
+    Every test gets its own ID range above the existing IDs, so the copies
+    of later tests come after those of earlier ones even when their source
+    IDs are lower, and their order numbers continue from the previous test.
+
+    Returns:
+        tuple: (ID offset, order_number shift) SQL expressions by Assignment.test_id
+    """
+    ranges = {
+        test_id: (smallest, largest, last)
+        for test_id, smallest, largest, last in db.session.execute(
+            select(Assignment.test_id, func.min(Assignment.id), func.max(Assignment.id),
+                   func.max(Assignment.order_number))
+            .where(Assignment.test_id.in_(test_ids))
+            .group_by(Assignment.test_id)
+        )
+    }
+
+    next_id = (db.session.scalar(select(func.max(Assignment.id))) or 0) + 1
+    offsets, shifts, total = {}, {}, 0
+    for test_id in test_ids:
+        if test_id not in ranges:
+            continue
+        smallest, largest, last = ranges[test_id]
+        offsets[test_id], shifts[test_id] = next_id - smallest, total
+        next_id += largest - smallest + 1
+        total += last
+
+    if not offsets:
+        return literal(0), literal(0)
+    return case(offsets, value=Assignment.test_id), case(shifts, value=Assignment.test_id)
+
+def copy_tests(user_id, sources, title):
+    """
+    Create a test holding copies of the assignments of other tests
+
+    The new test is inserted first, so the transaction holds the write lock
+    before the ID offsets are read. Archived sources are restored first.
+    Search index rows of the copied questions are written by triggers. The
+    caller commits.
+
+    Args:
+        user_id (int): Owner of the new test
+        sources (list): Test objects to copy, in order
+        title (str): Title of the new test
+
+    Returns:
+        tuple: (new Test, dict of copied rows per table)
+    """
+    for source in sources:
+        open_material('test', source)
+
+    test = Test(user_id=user_id, title=title)
+    db.session.add(test)
+    db.session.flush()
+
+    test_ids = [source.id for source in sources]
+    source_assignments = select(Assignment.id).where(Assignment.test_id.in_(test_ids))
+    source_questions = select(Question.id).where(Question.assignment_id.in_(source_assignments))
+    source_options = select(QuestionOption.id).where(QuestionOption.question_id.in_(source_questions))
+
+    assignment_offset, order_shift = _assignment_shifts(test_ids)
+    question_offset = _id_offset(Question, source_questions)
+    option_offset = _id_offset(QuestionOption, source_options)
+    copied = {}
+
+    copied['assignments'] = db.session.execute(insert(Assignment).from_select(
+        ['id', 'test_id', 'title', 'description', 'max_points', 'order_number'],
+        select(Assignment.id + assignment_offset, literal(test.id), Assignment.title, Assignment.description,
+               Assignment.max_points, Assignment.order_number + order_shift)
+        .where(Assignment.test_id.in_(test_ids))
+    )).rowcount
+
+    copied['questions'] = db.session.execute(insert(Question).from_select(
+        ['id', 'assignment_id', 'question_text', 'question_type', 'correct_answer', 'points', 'order_number'],
+        select(Question.id + question_offset, Question.assignment_id + assignment_offset, Question.question_text,
+               Question.question_type, Question.correct_answer, Question.points, Question.order_number)
+        .join(Assignment, Assignment.id == Question.assignment_id)
+        .where(Assignment.test_id.in_(test_ids))
+    )).rowcount
+
+    copied['question_options'] = db.session.execute(insert(QuestionOption).from_select(
+        ['id', 'question_id', 'option_text', 'is_correct', 'order_number'],
+        select(QuestionOption.id + option_offset, QuestionOption.question_id + question_offset,
+               QuestionOption.option_text, QuestionOption.is_correct, QuestionOption.order_number)
+        .where(QuestionOption.question_id.in_(source_questions))
+    )).rowcount
+
+    return test, copied
@@ -0,0 +1,286 @@
+"""
+Test Tree Patch
+Applies keyed add/update/remove operations to assignments, questions and options of a test
+"""
+from sqlalchemy import Boolean, Integer, update, delete
+from extensions import db
+from models import Assignment, Question, QuestionOption, QuestionType
+from services.tree_writer import insert_assignments, insert_questions, insert_options
+from services.material_tree import load_assignments, serialize_assignments
+
+ENTITY_MODELS = {
+    'assignment': Assignment,
+    'question': Question,
+    'option': QuestionOption
+}
+
+UPDATABLE_FIELDS = {
+    'assignment': frozenset(['title', 'description', 'max_points', 'order_number']),
+    'question': frozenset(['question_text', 'question_type', 'correct_answer', 'points', 'order_number']),
+    'option': frozenset(['option_text', 'is_correct', 'order_number'])
+}
+
+# Field that must be present when adding an entity
+REQUIRED_FIELDS = {
+    'assignment': 'title',
+    'question': 'question_text',
+    'option': 'option_text'
+}
+
+PARENT_ENTITY = {
+    'question': 'assignment',
+    'option': 'question'
+}
+
+VALID_QUESTION_TYPES = frozenset(qt.value for qt in QuestionType)
+
+NESTED_ENTITY = {
+    'assignment': ('questions', 'question'),
+    'question': ('options', 'option')
+}
+
+def _column_rule(column):
+    """(accepted Python types, nullable, maximum length) of a value written to a column"""
+    if isinstance(column.type, Boolean):
+        types = (bool,)
+    elif isinstance(column.type, Integer):
+        types = (int, float)
+    else:
+        types = (str,)
+    return types, column.nullable, getattr(column.type, 'length', None)
+
+# entity -> field -> rule, read from the model columns
+FIELD_RULES = {
+    entity: {field: _column_rule(ENTITY_MODELS[entity].__table__.columns[field]) for field in fields}
+    for entity, fields in UPDATABLE_FIELDS.items()
+}
+
+class PatchError(Exception):
+    """Custom exception for invalid patch operations"""
+    pass
+
+def _load_tree(test_id):
+    """
+    Load the test tree as response dicts indexed by ID
+
+    Returns:
+        tuple: (assignment dicts in the format of GET /api/materials/<id>,
+                entity -> {id: (row dict, parent ID)})
+    """
+    assignments = serialize_assignments(load_assignments(test_id))
+
+    rows = {'assignment': {}, 'question': {}, 'option': {}}
+    for assignment in assignments:
+        rows['assignment'][assignment['id']] = (assignment, test_id)
+        for question in assignment['questions']:
+            rows['question'][question['id']] = (question, assignment['id'])
+            for option in question['options']:
+                rows['option'][option['id']] = (option, question['id'])
+
+    return assignments, rows
+
+def _check_value(entity, value, path, add=False):
+    """
+    Validate fields of an add or update value against the model columns
+
+    Added values must contain the required fields and may contain nested
+    children, which are checked the same way.
+    """
+    if not isinstance(value, dict):
+        raise PatchError(f"{path} must be an object")
+
+    rules = FIELD_RULES[entity]
+    nested, child = NESTED_ENTITY.get(entity, (None, None))
+    unknown = set(value) - set(rules) - ({nested} if add else set())
+    if unknown:
+        raise PatchError(f"{path}: cannot set {', '.join(sorted(unknown))} on {entity}")
+
+    for field, (types, nullable, length) in rules.items():
+        if field not in value:
+            continue
+        field_value = value[field]
+        if field_value is None:
+            if not nullable:
+                raise PatchError(f"{path}.{field} cannot be null")
+        elif not isinstance(field_value, types) or (bool not in types and isinstance(field_value, bool)):
+            raise PatchError(f"{path}.{field} must be {'a number' if int in types else types[0].__name__}")
+        elif length is not None and len(field_value) > length:
+            raise PatchError(f"{path}.{field} must be at most {length} characters")
+
+    if 'question_type' in value and value['question_type'] not in VALID_QUESTION_TYPES:
+        raise PatchError(f"{path}: invalid question_type '{value['question_type']}'")
+
+    if not add:
+        return
+
+    if not value.get(REQUIRED_FIELDS[entity]):
+        raise PatchError(f"{path}.{REQUIRED_FIELDS[entity]} is required")
+
+    if entity == 'question' and 'question_type' not in value:
+        raise PatchError(f"{path}.question_type is required")
+
+    if nested in value:
+        if not isinstance(value[nested], list):
+            raise PatchError(f"{path}.{nested} must be a list")
+        for i, child_value in enumerate(value[nested]):
+            _check_value(child, child_value, f"{path}.{nested}[{i}]", add=True)
+
+def apply_test_operations(test_id, operations):
+    """
+    Apply operations to a test tree inside the current transaction
+
+    The tree is loaded once to check IDs and to build the response. Only
+    the rows named by the operations are written and existing rows
+    keep their IDs. Operations:
+        {"op": "add", "entity": "assignment", "value": {...}}
+        {"op": "add", "entity": "question" | "option", "parent_id": ID, "value": {...}}
+        {"op": "update", "entity": ..., "id": ID, "value": {changed fields}}
+        {"op": "remove", "entity": ..., "id": ID}
+    Added assignments and questions may contain nested questions and options.
+    Removing a row also removes its children.
+
+    Args:
+        test_id (int): Test ID
+        operations (list): Operation dicts
+
+    Returns:
+        tuple: (saved assignment dicts with IDs, built from the loaded rows
+                and the applied changes, dict with number of added,
+                updated and removed rows)
+
+    Raises:
+        PatchError: If an operation is malformed or refers to rows outside the test
+    """
+    if not isinstance(operations, list):
+        raise PatchError("operations must be a list")
+
+    assignments, loaded = _load_tree(test_id)
+
+    removes = {entity: set() for entity in ENTITY_MODELS}
+    updates = {entity: {} for entity in ENTITY_MODELS}
+    adds = {entity: [] for entity in ENTITY_MODELS}
+
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise PatchError(f"operations[{index}] must be an object")
+
+        op = operation.get('op')
+        entity = operation.get('entity')
+
+        if entity not in ENTITY_MODELS:
+            raise PatchError(f"operations[{index}].entity must be one of: {', '.join(ENTITY_MODELS)}")
+
+        if op in ('update', 'remove'):
+            row_id = operation.get('id')
+            if row_id not in loaded[entity]:
+                raise PatchError(f"operations[{index}]: {entity} {row_id} not found in this test")
+
+            if op == 'remove':
+                removes[entity].add(row_id)
+            else:
+                value = operation.get('value')
+                _check_value(entity, value, f"operations[{index}].value")
+                updates[entity].setdefault(row_id, {}).update(value)
+
+        elif op == 'add':
+            value = operation.get('value')
+            _check_value(entity, value, f"operations[{index}].value", add=True)
+
+            if entity == 'assignment':
+                adds[entity].append(value)
+            else:
+                parent_id = operation.get('parent_id')
+                if parent_id not in loaded[PARENT_ENTITY[entity]]:
+                    raise PatchError(
+                        f"operations[{index}]: {PARENT_ENTITY[entity]} {parent_id} not found in this test"
+                    )
+                adds[entity].append((parent_id, value))
+
+        else:
+            raise PatchError(f"operations[{index}].op must be add, update or remove")
+
+    # Removing a parent removes its children
+    removes['question'] |= {
+        question_id for question_id, (_, assignment_id) in loaded['question'].items()
+        if assignment_id in removes['assignment']
+    }
+    removes['option'] |= {
+        option_id for option_id, (_, question_id) in loaded['option'].items()
+        if question_id in removes['question']
+    }
+
+    for entity, parents in (('question', removes['assignment']), ('option', removes['question'])):
+        if any(parent_id in parents for parent_id, _ in adds[entity]):
+            raise PatchError(f"Cannot add {entity} to a removed {PARENT_ENTITY[entity]}")
+
+    for entity in ('option', 'question', 'assignment'):
+        if removes[entity]:
+            model = ENTITY_MODELS[entity]
+            db.session.execute(delete(model).where(model.id.in_(removes[entity])))
+
+    for entity, rows in updates.items():
+        rows = [
+            dict(value, id=row_id) for row_id, value in rows.items()
+            if value and row_id not in removes[entity]
+        ]
+        for row in rows:
+            loaded[entity][row['id']][0].update(row)
+            if 'question_type' in row:
+                row['question_type'] = QuestionType[row['question_type']]
+        if rows:
+            db.session.execute(update(ENTITY_MODELS[entity]), rows)
+        updates[entity] = rows
+
+    try:
+        added = insert_assignments(test_id, adds['assignment'])
+        added_questions = insert_questions(adds['question'])
+        added_options = insert_options(adds['option'])
+    except KeyError as e:
+        raise PatchError(f"Added rows have a missing or invalid field: {e}")
+
+    # Apply the same changes to the loaded tree
+    assignments = [
+        _prune(assignment, removes) for assignment in assignments
+        if assignment['id'] not in removes['assignment']
+    ]
+    assignments.extend(added)
+    for (assignment_id, _), question in zip(adds['question'], added_questions):
+        loaded['assignment'][assignment_id][0]['questions'].append(question)
+    for (question_id, _), option in zip(adds['option'], added_options):
+        loaded['question'][question_id][0]['options'].append(option)
+    _sort_tree(assignments)
+
+    return assignments, {
+        'added': _count_rows(added, 'assignment') + _count_rows(added_questions, 'question') + len(added_options),
+        'updated': sum(len(rows) for rows in updates.values()),
+        'removed': sum(len(ids) for ids in removes.values())
+    }
+
+def _prune(assignment, removes):
+    """Drop removed questions and options from a loaded assignment"""
+    assignment['questions'] = [
+        question for question in assignment['questions'] if question['id'] not in removes['question']
+    ]
+    for question in assignment['questions']:
+        question['options'] = [
+            option for option in question['options'] if option['id'] not in removes['option']
+        ]
+    return assignment
+
+def _order_key(row):
+    """Sibling order of GET /api/materials/<id>"""
+    return row['order_number'], row['id']
+
+def _sort_tree(assignments):
+    """Put added, moved and renumbered rows back into the order the tree is loaded in"""
+    assignments.sort(key=_order_key)
+    for assignment in assignments:
+        assignment['questions'].sort(key=_order_key)
+        for question in assignment['questions']:
+            question['options'].sort(key=_order_key)
+
+def _count_rows(saved, entity):
+    """Count saved rows including nested children"""
+    if entity == 'assignment':
+        return sum(1 + _count_rows(row['questions'], 'question') for row in saved)
+    return sum(1 + len(row['options']) for row in saved)
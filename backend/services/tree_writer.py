@@ -0,0 +1,134 @@
+"""
+Test Tree Writer
+Inserts assignments, questions and options with one statement per tree level
+"""
+from sqlalchemy import insert
+from extensions import db
+from models import Assignment, Question, QuestionOption, QuestionType
+
+def _insert_returning_ids(model, rows):
+    """Insert rows as one executemany statement and return their IDs in row order"""
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.session.scalars(statement, rows))
+
+def insert_assignments(test_id, assignments, keep_ids=False):
+    """
+    Insert assignments of a test together with their questions and options
+
+    Args:
+        test_id (int): Test ID
+        assignments (list): Assignment dicts with nested questions and options
+        keep_ids (bool): Insert the rows with the IDs in their dicts (optional, default: new IDs)
+
+    Returns:
+        list: Saved assignment dicts with IDs, in the format of GET /api/materials/<id>
+    """
+    saved = [
+        {
+            'title': assignment_data['title'],
+            'description': assignment_data.get('description', ''),
+            'max_points': assignment_data.get('max_points', 0),
+            'order_number': assignment_data.get('order_number', 1)
+        }
+        for assignment_data in assignments
+    ]
+    if keep_ids:
+        for row, assignment_data in zip(saved, assignments):
+            row['id'] = assignment_data['id']
+
+    ids = _insert_returning_ids(Assignment, [dict(row, test_id=test_id) for row in saved])
+
+    pending_questions = []
+    for row, assignment_id, assignment_data in zip(saved, ids, assignments):
+        row['id'] = assignment_id
+        pending_questions.extend(
+            (assignment_id, question_data) for question_data in assignment_data.get('questions', [])
+        )
+
+    questions = insert_questions(pending_questions, keep_ids)
+
+    by_assignment = {row['id']: row for row in saved}
+    for row in saved:
+        row['questions'] = []
+    for (assignment_id, _), question in zip(pending_questions, questions):
+        by_assignment[assignment_id]['questions'].append(question)
+
+    return saved
+
+def insert_questions(questions, keep_ids=False):
+    """
+    Insert questions with their options
+
+    Args:
+        questions (list): (assignment_id, question dict) tuples
+        keep_ids (bool): Insert the rows with the IDs in their dicts (optional, default: new IDs)
+
+    Returns:
+        list: Saved question dicts with IDs, in input order
+    """
+    saved = [
+        {
+            'question_text': question_data['question_text'],
+            'question_type': question_data['question_type'],
+            'correct_answer': question_data.get('correct_answer', ''),
+            'points': question_data.get('points', 0),
+            'order_number': question_data.get('order_number', 1)
+        }
+        for _, question_data in questions
+    ]
+    if keep_ids:
+        for row, (_, question_data) in zip(saved, questions):
+            row['id'] = question_data['id']
+
+    ids = _insert_returning_ids(Question, [
+        dict(row, assignment_id=assignment_id, question_type=QuestionType[row['question_type']])
+        for row, (assignment_id, _) in zip(saved, questions)
+    ])
+
+    option_rows = []
+    for row, question_id, (_, question_data) in zip(saved, ids, questions):
+        row['id'] = question_id
+        row['options'] = []
+        option_rows.extend(
+            (question_id, dict(option_data, order_number=option_data.get('order_number', i + 1)))
+            for i, option_data in enumerate(question_data.get('options') or [])
+        )
+
+    by_question = {row['id']: row for row in saved}
+    for (question_id, _), option in zip(option_rows, insert_options(option_rows, keep_ids)):
+        by_question[question_id]['options'].append(option)
+
+    return saved
+
+def insert_options(options, keep_ids=False):
+    """
+    Insert question options
+
+    Args:
+        options (list): (question_id, option dict) tuples
+        keep_ids (bool): Insert the rows with the IDs in their dicts (optional, default: new IDs)
+
+    Returns:
+        list: Saved option dicts with IDs, in input order
+    """
+    saved = [
+        {
+            'option_text': option_data['option_text'],
+            'is_correct': option_data.get('is_correct', False),
+            'order_number': option_data.get('order_number', 1)
+        }
+        for _, option_data in options
+    ]
+    if keep_ids:
+        for row, (_, option_data) in zip(saved, options):
+            row['id'] = option_data['id']
+
+    ids = _insert_returning_ids(QuestionOption, [
+        dict(row, question_id=question_id) for row, (question_id, _) in zip(saved, options)
+    ])
+    for row, option_id in zip(saved, ids):
+        row['id'] = option_id
+
+    return saved
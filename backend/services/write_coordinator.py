@@ -0,0 +1,225 @@
+"""
+Write Coordinator
+Funnels write transactions through one writer thread per process and commits
+queued writes together, so concurrent saves don't fight over SQLite's write lock
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from flask import current_app, g
+from extensions import db
+
+try:
+    import fcntl
+except ImportError:  # Windows, the SQLite lock and busy_timeout still serialize processes
+    fcntl = None
+
+EXTENSION_KEY = 'write_coordinator'
+SHARD_EXTENSION_KEY = 'shard_write_coordinators'
+DEFAULT_MAX_BATCH = 32
+
+class WriteCoordinator:
+    """
+    Single writer thread with group commit
+
+    Each submitted function runs on the writer thread inside its own
+    SAVEPOINT of a shared transaction, so a failing write doesn't undo the
+    others. All writes waiting in the queue share one BEGIN IMMEDIATE ...
+    COMMIT, and an exclusive file lock orders writer threads of different
+    processes. Reads don't go through the coordinator. With sharding every
+    shard database has its own coordinator.
+    """
+
+    def __init__(self, app, max_batch=DEFAULT_MAX_BATCH, lock_path=None, shard=None):
+        self.app = app
+        self.max_batch = max_batch
+        self.lock_path = lock_path
+        self.shard = shard
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue a write function
+
+        The function uses db.session and must not commit. Its return value
+        should not reference ORM objects, since they are expired after commit.
+
+        Returns:
+            Future: Resolved with the function's return value after commit
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Run a write function on the writer thread and wait for its committed result"""
+        if threading.current_thread() is self._thread:
+            # Already inside a batch, e.g. a write function that saves another material
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stop(self):
+        """Finish queued writes and stop the writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        lock_file = open(self.lock_path, 'a+') if self.lock_path and fcntl else None
+
+        with self.app.app_context():
+            if self.shard is None:
+                self._process_queue(lock_file)
+            else:
+                from sharding import use_shard
+                with use_shard(self.shard):
+                    self._process_queue(lock_file)
+            db.session.remove()
+
+        if lock_file:
+            lock_file.close()
+
+    def _process_queue(self, lock_file):
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            batch = [job]
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            if lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._commit_batch(batch)
+            finally:
+                if lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _commit_batch(self, batch):
+        self.batches += 1
+        self.jobs += len(batch)
+        results = []
+        try:
+            # Take the write lock up front instead of upgrading a read lock mid-transaction
+            db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+
+            for future, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                savepoint = db.session.begin_nested()
+                try:
+                    result = fn(*args, **kwargs)
+                    savepoint.commit()
+                    results.append((future, result))
+                except Exception as e:
+                    savepoint.rollback()
+                    future.set_exception(e)
+
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+        else:
+            for future, result in results:
+                future.set_result(result)
+
+        finally:
+            db.session.close()
+
+def init_write_coordinator(app, database_path):
+    """
+    Route write_transaction calls of an app through a writer thread
+
+    Args:
+        app: Flask app
+        database_path (str): SQLite database file, its lock file is created next to it
+
+    Returns:
+        WriteCoordinator: Registered coordinator
+    """
+    coordinator = WriteCoordinator(
+        app,
+        max_batch=app.config.get('DB_WRITE_QUEUE_BATCH', DEFAULT_MAX_BATCH),
+        lock_path=f'{os.path.abspath(database_path)}.write-lock'
+    )
+    app.extensions[EXTENSION_KEY] = coordinator
+    return coordinator
+
+_shard_coordinators_lock = threading.Lock()
+
+def shard_write_coordinator(app, shard, database_path):
+    """
+    Writer thread of a shard database, created on first use
+
+    Args:
+        app: Flask app with a registered coordinator
+        shard (int): Shard index
+        database_path (str): Shard database file
+
+    Returns:
+        WriteCoordinator: The shard's coordinator
+    """
+    coordinators = app.extensions.setdefault(SHARD_EXTENSION_KEY, {})
+    with _shard_coordinators_lock:
+        if shard not in coordinators:
+            coordinators[shard] = WriteCoordinator(
+                app,
+                max_batch=app.extensions[EXTENSION_KEY].max_batch,
+                lock_path=f'{os.path.abspath(database_path)}.write-lock',
+                shard=shard
+            )
+        return coordinators[shard]
+
+def write_transaction(fn, *args, **kwargs):
+    """
+    Run a write function and commit it
+
+    Without a coordinator the function runs in the current session, which
+    is then committed. With a coordinator it runs on the writer thread of
+    the database selected for the current app context.
+
+    Args:
+        fn: Function that writes through db.session without committing
+
+    Returns:
+        Return value of fn
+    """
+    coordinator = current_app.extensions.get(EXTENSION_KEY)
+
+    if coordinator is not None and g.get('db_shard') is not None:
+        coordinator = shard_write_coordinator(current_app._get_current_object(), g.db_shard,
+                                              g.db_shard_engine.url.database)
+
+    if coordinator is None:
+        result = fn(*args, **kwargs)
+        db.session.commit()
+        return result
+
+    return coordinator.run(fn, *args, **kwargs)
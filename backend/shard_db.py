@@ -0,0 +1,48 @@
+"""
+Shard rebalancing script
+Shows how users and materials are spread over the shard databases and moves
+users whose materials aren't in their home shard, e.g. after DB_SHARDS changed.
+Moving an active user's materials is safe but briefly blocks their writes.
+"""
+import argparse
+from app import app
+from sharding import move_user, rebalance, shard_count, shard_status
+
+def _name(shard):
+    return 'main' if shard is None else f'shard {shard}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and rebalance material shards')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='users and materials per database')
+
+    rebalance_parser = commands.add_parser('rebalance', help='move users to their home shard')
+    rebalance_parser.add_argument('--shards', type=int,
+                                  help='number of shards (default DB_SHARDS, 0 moves everything to the main database)')
+    rebalance_parser.add_argument('--limit', type=int, help='maximum number of users to move')
+
+    move_parser = commands.add_parser('move', help="move one user's materials")
+    move_parser.add_argument('user', type=int, help='user ID')
+    move_parser.add_argument('shard', help='target shard index or "main"')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.command == 'status':
+            print(f"DB_SHARDS = {shard_count(app)}")
+            for row in shard_status(app):
+                print(f"  {_name(row['shard']):<10} {row['users']:>6} users {row['tests']:>8} tests "
+                      f"{row['study_materials']:>8} study materials")
+
+        elif args.command == 'rebalance':
+            moves = rebalance(app, count=args.shards, limit=args.limit)
+            for user_id, source, target in moves:
+                print(f"  user {user_id}: {_name(source)} -> {_name(target)}")
+            print(f"Moved {len(moves)} users.")
+
+        else:
+            target = None if args.shard == 'main' else int(args.shard)
+            moved = move_user(app, args.user, target)
+            print(f"Moved {sum(moved.values())} rows of user {args.user} to {_name(target)}.")
+
+if __name__ == '__main__':
+    main()
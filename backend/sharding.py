@@ -0,0 +1,342 @@
+"""
+Database Sharding
+Optional per-user sharding: users stay in the main database, their tests,
+study materials and everything below them live in shard database files, so
+writes of users in different shards don't wait for the same SQLite lock
+"""
+import os
+import threading
+from contextlib import contextmanager
+from flask import current_app, g, session
+from sqlalchemy import create_engine, func, inspect, select, text
+from sqlalchemy.engine import make_url
+from extensions import db, CENTRAL_TABLES
+from db_config import apply_pragmas, engine_options, sqlite_pragmas
+from services.search_index import SEARCH_TABLE, ROWID_STRIDE
+import migrations
+
+EXTENSION_KEY = 'db_shards'
+SHARD_FILE = 'shard_{}.db'
+
+# Columns that point to a test or a study material depending on the material type
+MATERIAL_REFERENCES = {
+    ('archived_materials', 'material_id'): 'archived_materials.material_type',
+    ('bulk_ingestion_entries', 'material_id'):
+        '(SELECT material_type FROM main.bulk_ingestions WHERE bulk_ingestions.id = bulk_ingestion_entries.ingestion_id)'
+}
+
+_engines_lock = threading.Lock()
+
+def shard_count(app):
+    """Number of shards new users are spread over, 0 when sharding is disabled"""
+    return app.config.get('DB_SHARDS', 0)
+
+def home_shard(user_id, count):
+    """
+    Shard a user's materials belong in
+
+    Args:
+        user_id (int): User ID
+        count (int): Number of shards
+
+    Returns:
+        int: Shard index, None for the main database
+    """
+    return user_id % count if count else None
+
+def shard_path(app, index):
+    """Database file of a shard, next to the main database unless DB_SHARD_DIR is set"""
+    directory = app.config.get('DB_SHARD_DIR') or \
+        os.path.dirname(make_url(app.config['SQLALCHEMY_DATABASE_URI']).database)
+    return os.path.join(directory, SHARD_FILE.format(index))
+
+def shard_engine(app, index):
+    """
+    Engine of a database holding materials
+
+    Shard engines are created on first use with the same pool and pragmas
+    as the main database, a new shard file gets the current schema.
+
+    Args:
+        app: Flask app
+        index (int): Shard index, None for the main database
+
+    Returns:
+        Engine
+    """
+    if index is None:
+        return db.engine
+
+    engines = app.extensions.setdefault(EXTENSION_KEY, {})
+    engine = engines.get(index)
+    if engine is None:
+        with _engines_lock:
+            engine = engines.get(index)
+            if engine is None:
+                engine = engines[index] = _create_shard_engine(app, shard_path(app, index))
+    return engine
+
+def _create_shard_engine(app, path):
+    uri = f'sqlite:///{path}'
+    engine = create_engine(uri, **engine_options({**app.config, 'SQLALCHEMY_DATABASE_URI': uri,
+                                                  'SQLALCHEMY_ENGINE_OPTIONS': {}}))
+    apply_pragmas(engine, sqlite_pragmas(app.config))
+
+    if not inspect(engine).has_table('tests'):
+        db.metadata.create_all(engine)
+        migrations.stamp(engine)
+    return engine
+
+def shard_indexes(app):
+    """Configured shards and shards that still hold users, sorted"""
+    from models import User
+
+    used = db.session.scalars(select(User.shard).where(User.shard.is_not(None)).distinct())
+    return sorted(set(range(shard_count(app))) | set(used))
+
+def _select_shard(index):
+    g.db_shard = index
+    g.db_shard_engine = None if index is None else shard_engine(current_app, index)
+
+@contextmanager
+def use_shard(index):
+    """
+    Send db.session statements of the current app context to a shard
+
+    The session is closed on entry and on exit, so objects of different
+    databases never share its identity map. Commit before leaving.
+
+    Args:
+        index (int): Shard index, None for the main database
+    """
+    previous = g.get('db_shard'), g.get('db_shard_engine')
+    db.session.close()
+    _select_shard(index)
+    try:
+        yield
+    finally:
+        db.session.close()
+        g.db_shard, g.db_shard_engine = previous
+
+def select_user_shard():
+    """Route the statements of a logged-in user's request to their shard"""
+    if not shard_count(current_app) or 'user_id' not in session:
+        return
+
+    from models import User
+    _select_shard(db.session.scalar(select(User.shard).where(User.id == session['user_id'])))
+
+def release_shard(exception=None):
+    """Forget the request's shard, the session may hold objects of it"""
+    if 'db_shard' in g:
+        g.pop('db_shard')
+        g.pop('db_shard_engine', None)
+        db.session.remove()
+
+def init_sharding(app):
+    """Select the logged-in user's shard for every request (no-op until DB_SHARDS is set)"""
+    app.before_request(select_user_shard)
+    app.teardown_request(release_shard)
+
+def _add_user_stub(connection, schema, directory, user_id):
+    # Shards keep a copy of the user row without the password, so foreign keys
+    # and ON DELETE CASCADE work inside each file
+    connection.execute(text(
+        f"INSERT OR IGNORE INTO {schema}.users (id, email, password_hash, created_at) "
+        f"SELECT id, email, '', created_at FROM {directory}.users WHERE id = :user_id"
+    ), {'user_id': user_id})
+
+def assign_shard(user):
+    """
+    Place a new user in their home shard when sharding is enabled, commits
+
+    Args:
+        user (User): Saved user
+    """
+    index = home_shard(user.id, shard_count(current_app))
+    if index is None:
+        return
+
+    with shard_engine(current_app, index).connect() as connection:
+        connection.execute(text('ATTACH DATABASE :path AS directory'), {'path': db.engine.url.database})
+        try:
+            _add_user_stub(connection, 'main', 'directory', user.id)
+            connection.commit()
+        finally:
+            connection.execute(text('DETACH DATABASE directory'))
+            connection.commit()
+
+    user.shard = index
+    db.session.commit()
+
+def _material_tables():
+    return [table for table in db.metadata.sorted_tables if table.name not in CENTRAL_TABLES]
+
+def _owned(table):
+    """Condition selecting the rows of a material table that belong to :user_id"""
+    if 'user_id' in table.c:
+        return f'{table.name}.user_id = :user_id'
+
+    foreign_key = next(iter(table.foreign_keys))
+    parent = foreign_key.column.table
+    return (f'{table.name}.{foreign_key.parent.name} IN '
+            f'(SELECT {parent.name}.id FROM main.{parent.name} WHERE {_owned(parent)})')
+
+def _copied_value(table, column, offsets):
+    """SQL expression of a column copied to the target database, with IDs shifted by their table's offset"""
+    value = f'{table.name}.{column.name}'
+    if column.primary_key:
+        return f'{value} + {offsets[table.name]}'
+
+    for foreign_key in column.foreign_keys:
+        parent = foreign_key.column.table.name
+        if parent not in CENTRAL_TABLES:
+            return f'{value} + {offsets[parent]}'
+
+    material_type = MATERIAL_REFERENCES.get((table.name, column.name))
+    if material_type:
+        return (f"{value} + CASE {material_type} WHEN 'test' THEN {offsets['tests']} "
+                f"ELSE {offsets['study_materials']} END")
+    return value
+
+def _id_offset(connection, table, params):
+    """0 when the user's IDs are free in the target table, otherwise its largest ID"""
+    collides = connection.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM dest.{table.name} WHERE id IN '
+        f'(SELECT {table.name}.id FROM main.{table.name} WHERE {_owned(table)}))'
+    ), params).scalar()
+    if not collides:
+        return 0
+    return connection.execute(text(f'SELECT coalesce(max(id), 0) FROM dest.{table.name}')).scalar()
+
+def move_user(app, user_id, index):
+    """
+    Move a user's materials to another database
+
+    All rows are copied with INSERT ... SELECT into the attached target
+    database, deleted from the source and the user's directory entry is
+    updated in one transaction that holds the source's write lock. IDs are
+    kept unless they are taken in the target, then the user's rows of that
+    table get IDs above the target's largest one. Search index rows of tests
+    and questions are rebuilt by the target's triggers.
+
+    Args:
+        app: Flask app
+        user_id (int): User ID
+        index (int): Target shard index, None for the main database
+
+    Returns:
+        dict: Moved rows per table, empty if the user already was there
+    """
+    from models import User
+
+    source = db.session.scalar(select(User.shard).where(User.id == user_id))
+    db.session.commit()
+    if source == index:
+        return {}
+
+    central_path = db.engine.url.database
+    target_path = shard_engine(app, index).url.database
+    directory = 'main' if source is None else 'dest' if index is None else 'directory'
+    params = {'user_id': user_id}
+    moved = {}
+
+    with shard_engine(app, source).connect() as connection:
+        connection.execute(text('ATTACH DATABASE :path AS dest'), {'path': target_path})
+        if directory == 'directory':
+            connection.execute(text('ATTACH DATABASE :path AS directory'), {'path': central_path})
+
+        try:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            if index is not None:
+                _add_user_stub(connection, 'dest', directory, user_id)
+
+            tables = _material_tables()
+            offsets = {table.name: _id_offset(connection, table, params) for table in tables}
+            for table in tables:
+                columns = ', '.join(column.name for column in table.columns)
+                values = ', '.join(_copied_value(table, column, offsets) for column in table.columns)
+                moved[table.name] = connection.execute(text(
+                    f'INSERT INTO dest.{table.name} ({columns}) SELECT {values} FROM main.{table.name} '
+                    f'WHERE {_owned(table)}'
+                ), params).rowcount
+
+            # Study materials are indexed on save instead of by triggers, copy their rows
+            offset = offsets['study_materials']
+            connection.execute(text(
+                f'INSERT INTO dest.{SEARCH_TABLE} (rowid, title, body, user_id, kind, material_type, material_id) '
+                f'SELECT (s.material_id + {offset}) * {ROWID_STRIDE} + s.kind, s.title, s.body, s.user_id, s.kind, '
+                f's.material_type, s.material_id + {offset} '
+                f'FROM main.study_materials m JOIN main.{SEARCH_TABLE} s '
+                f'ON s.rowid BETWEEN m.id * {ROWID_STRIDE} AND m.id * {ROWID_STRIDE} + {ROWID_STRIDE - 1} '
+                f"WHERE m.user_id = :user_id AND s.material_type = 'study_material'"
+            ), params)
+
+            # Child rows, archive rows and search index rows follow through cascades and triggers
+            for table in reversed(tables):
+                if 'user_id' in table.c:
+                    connection.execute(text(f'DELETE FROM main.{table.name} WHERE user_id = :user_id'), params)
+            if source is not None:
+                connection.execute(text('DELETE FROM main.users WHERE id = :user_id'), params)
+
+            connection.execute(text(f'UPDATE {directory}.users SET shard = :shard WHERE id = :user_id'),
+                               {**params, 'shard': index})
+            connection.commit()
+
+        except Exception:
+            connection.rollback()
+            raise
+
+        finally:
+            connection.execute(text('DETACH DATABASE dest'))
+            if directory == 'directory':
+                connection.execute(text('DETACH DATABASE directory'))
+            connection.commit()
+
+    return moved
+
+def rebalance(app, count=None, limit=None):
+    """
+    Move every user whose materials aren't in their home shard
+
+    Args:
+        app: Flask app
+        count (int): Number of shards (optional, DB_SHARDS by default, 0 moves everything to the main database)
+        limit (int): Maximum number of users to move (optional)
+
+    Returns:
+        list: (user ID, source shard, target shard) of moved users
+    """
+    from models import User
+
+    count = shard_count(app) if count is None else count
+    moves = []
+    for user_id, source in db.session.execute(select(User.id, User.shard).order_by(User.id)).all():
+        target = home_shard(user_id, count)
+        if target == source:
+            continue
+        if limit is not None and len(moves) >= limit:
+            break
+
+        move_user(app, user_id, target)
+        moves.append((user_id, source, target))
+
+    return moves
+
+def shard_status(app):
+    """
+    Users and materials per database
+
+    Returns:
+        list: dicts with shard (None for the main database), users, tests and study_materials
+    """
+    from models import User
+
+    users = dict(db.session.execute(select(User.shard, func.count()).group_by(User.shard)).all())
+    status = []
+    for index in [None, *shard_indexes(app)]:
+        with shard_engine(app, index).connect() as connection:
+            counts = {table: connection.execute(text(f'SELECT count(*) FROM {table}')).scalar()
+                      for table in ('tests', 'study_materials')}
+        status.append({'shard': index, 'users': users.get(index, 0), **counts})
+    return status
@@ -5,10 +5,22 @@ Pytest konfigurācija un fixtures visiem testiem
 import pytest
 import sys
 import os
+import atexit
+import shutil
+import tempfile
+from contextlib import contextmanager
+from sqlalchemy import event
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# The engine is created when app.py is imported, so the test database is chosen here
+# instead of instance/database.db
+_test_db_dir = tempfile.mkdtemp(prefix='kd-tests-')
+atexit.register(shutil.rmtree, _test_db_dir, ignore_errors=True)
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(_test_db_dir, "test.db")}'
+os.environ['DB_MAINTENANCE_INTERVAL'] = '0'
+
 from app import app as flask_app
 from extensions import db, bcrypt
 from models import User, Test, StudyMaterial, Assignment, Question, QuestionOption
@@ -19,7 +31,6 @@ def app():
     """Izveido Flask aplikāciju test režīmā"""
     flask_app.config.update({
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
         'SECRET_KEY': 'test_key',
         'WTF_CSRF_ENABLED': False
     })
@@ -31,6 +42,25 @@ def app():
         db.drop_all()
 
 
+@pytest.fixture
+def count_queries(app):
+    """Konteksta pārvaldnieks, kas savāc izpildītos SQL vaicājumus"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    return counter
+
+
 @pytest.fixture
 def client(app):
     """Test client HTTP pieprasījumiem"""
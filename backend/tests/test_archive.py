@@ -0,0 +1,145 @@
+"""
+MODUĻA 13: Arhīva testi
+4 testi neizmantoto materiālu arhivēšanai un atjaunošanai
+"""
+from datetime import datetime, timedelta
+from extensions import db
+from models import Test, StudyMaterial, Assignment, Question, ArchivedMaterial
+from services.cold_storage import archive_materials, restore_materials
+
+
+def _archive_all(app):
+    """Arhivē visus materiālus, pārbaudes laiku pārceļot gadu uz priekšu"""
+    with app.app_context():
+        return archive_materials(months=6, now=datetime.utcnow() + timedelta(days=365))
+
+
+def test_01_archive_keeps_listing(auth_client, test_test_material, test_study_material, app):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Neizmantotu materiālu pārvietošana uz arhīvu
+    Sagaidamais rezultāts: Koks pārvietots uz archived_materials, sarakstā materiāli redzami ar skaitiem un atzīmi "archived"
+    """
+    # SETUP - nesen atvērti materiāli netiek arhivēti
+    with app.app_context():
+        assert archive_materials(months=6) == {'test': 0, 'study_material': 0}, "Jauni materiāli nav jāarhivē"
+
+    before = {material['type']: material for material in auth_client.get('/api/materials').get_json()['materials']}
+
+    # ACTION - arhivē
+    archived = _archive_all(app)
+
+    # ASSERT - pārbauda rezultātu
+    assert archived == {'test': 1, 'study_material': 1}, "Jāarhivē abi materiāli"
+    materials = {material['type']: material for material in auth_client.get('/api/materials').get_json()['materials']}
+    assert materials['test']['archived'] is True, "Testam jābūt atzīmētam kā arhivētam"
+    assert materials['test']['assignments_count'] == 1, "Skaitiem jāsaglabājas"
+    assert materials['test']['total_questions'] == 1, "Skaitiem jāsaglabājas"
+    assert materials['study_material']['archived'] is True, "Materiālam jābūt atzīmētam kā arhivētam"
+    assert materials['study_material']['summary_preview'] == before['study_material']['summary_preview'], \
+        "Kopsavilkuma priekšskatījumam jāsaglabājas"
+
+    # DB CHECK - karstajās tabulās palikuši tikai ieraksti sarakstam
+    with app.app_context():
+        assert Assignment.query.count() == 0, "Uzdevumiem jābūt pārvietotiem uz arhīvu"
+        assert Question.query.count() == 0, "Jautājumiem jābūt pārvietotiem uz arhīvu"
+        assert ArchivedMaterial.query.count() == 2, "Arhīvā jābūt abiem materiāliem"
+        assert db.session.get(StudyMaterial, test_study_material['material_id']).content == '{}', \
+            "Materiāla saturam jābūt pārvietotam uz arhīvu"
+
+
+def test_02_restore_on_first_access(auth_client, test_test_material, test_study_material, app):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Arhivēta materiāla atjaunošana pirmajā atvēršanā
+    Sagaidamais rezultāts: Atvērts materiāls atgriež to pašu saturu, arhīva ieraksts dzēsts, versija mainīta
+    """
+    # SETUP - atver un arhivē
+    test_url = f"/api/materials/{test_test_material['test_id']}?type=test"
+    material_url = f"/api/materials/{test_study_material['material_id']}?type=study_material"
+    before_test = auth_client.get(test_url)
+    before_material = auth_client.get(material_url).get_json()
+    _archive_all(app)
+
+    # ACTION - atver arhivētos materiālus
+    after_test = auth_client.get(test_url, headers={'If-None-Match': before_test.headers['ETag']})
+    after_material = auth_client.get(material_url).get_json()
+
+    # ASSERT - pārbauda rezultātu
+    assert after_test.status_code == 200, "Atjaunotam materiālam jāatgriež jauna versija"
+    assert after_test.headers['ETag'] != before_test.headers['ETag'], "ETag jāmainās"
+    question = after_test.get_json()['assignments'][0]['questions'][0]
+    assert question['question_text'] == 'Kas ir Python?', "Jautājumam jābūt atjaunotam"
+    assert question['options'][0]['option_text'] == 'Programmēšanas valoda', "Atbilžu variantiem jābūt atjaunotiem"
+    assert question['id'] == test_test_material['question_id'], "Jautājumam jāsaglabā arhivētais ID"
+    assert after_test.get_json()['assignments'][0]['id'] == test_test_material['assignment_id'], \
+        "Uzdevumam jāsaglabā arhivētais ID"
+    assert after_material['content'] == before_material['content'], "Saturam jābūt atjaunotam"
+
+    # DB CHECK - arhīvs ir tukšs
+    with app.app_context():
+        assert ArchivedMaterial.query.count() == 0, "Arhīva ierakstiem jābūt dzēstiem"
+        assert db.session.get(Test, test_test_material['test_id']).archived_at is None, "Testam jābūt atjaunotam"
+    listing = auth_client.get('/api/materials').get_json()['materials']
+    assert not any(material['archived'] for material in listing), "Sarakstā nedrīkst būt arhivētu materiālu"
+
+
+def test_03_batch_restore_and_delete(auth_client, test_test_material, test_study_material, app):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Arhīva atjaunošana partijās un arhivēta materiāla dzēšana
+    Sagaidamais rezultāts: restore_materials atjauno visus materiālus, dzēšot arhivētu materiālu, dzēsts arī arhīva ieraksts
+    """
+    # SETUP - arhivē
+    _archive_all(app)
+
+    # ACTION - atjauno partijās pa vienam
+    with app.app_context():
+        restored = restore_materials(batch_size=1)
+
+    # ASSERT - pārbauda rezultātu
+    assert restored == 2, "Jāatjauno abi materiāli"
+    with app.app_context():
+        assert Question.query.count() == 1, "Jautājumam jābūt atjaunotam"
+        assert ArchivedMaterial.query.count() == 0, "Arhīvam jābūt tukšam"
+
+    # ACTION - arhivē vēlreiz un dzēš testu
+    _archive_all(app)
+    response = auth_client.delete(f"/api/materials/{test_test_material['test_id']}?type=test")
+
+    # DB CHECK - arhīvā palicis tikai mācību materiāls
+    assert response.status_code == 200, "Dzēšanai jāizdodas"
+    with app.app_context():
+        rows = [(row.material_type, row.material_id) for row in ArchivedMaterial.query.all()]
+        assert rows == [('study_material', test_study_material['material_id'])], \
+            "Dzēsta testa arhīva ierakstam jābūt dzēstam"
+
+
+def test_04_restore_with_taken_id(auth_client, test_test_material, test_user, app):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Atjaunošana, ja arhivētā uzdevuma ID pa to laiku aizņemts
+    Sagaidamais rezultāts: Aizņemtajam uzdevumam piešķirts jauns ID, brīvie ID saglabāti, cits tests nemainās
+    """
+    # SETUP - arhivē un cits tests aizņem uzdevuma ID
+    _archive_all(app)
+    with app.app_context():
+        other = Test(title='Cits tests', user_id=test_user['id'])
+        db.session.add(other)
+        db.session.flush()
+        assignment = Assignment(test_id=other.id, title='Cits uzdevums', order_number=1)
+        db.session.add(assignment)
+        db.session.commit()
+        assert assignment.id == test_test_material['assignment_id'], "ID jāsakrīt, lai pārbaudītu aizņemtu ID"
+
+    # ACTION - atver arhivēto testu
+    response = auth_client.get(f"/api/materials/{test_test_material['test_id']}?type=test")
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    restored = response.get_json()['assignments'][0]
+    assert restored['id'] != test_test_material['assignment_id'], "Aizņemtajam ID jābūt nomainītam"
+    assert restored['questions'][0]['id'] == test_test_material['question_id'], "Brīvajam ID jāsaglabājas"
+    with app.app_context():
+        assert db.session.get(Assignment, test_test_material['assignment_id']).title == 'Cits uzdevums', \
+            "Cita testa uzdevumam jāpaliek"
@@ -0,0 +1,127 @@
+"""
+MODUĻA 15: Rezerves kopiju testi
+3 testi tiešsaistes rezerves kopijām, inkrementālajām kopijām un atjaunošanas pārbaudei
+"""
+import json
+import os
+import sqlite3
+import pytest
+from extensions import db
+from models import StudyMaterial
+from services.backup import (
+    BackupError, MANIFEST_FILE, full_backup, incremental_backup, restore_backup, verify_backup
+)
+
+
+def _add_study_material(user_id, title):
+    material = StudyMaterial(user_id=user_id, title=title)
+    material.content_data = {'summary': f'<p>{title}</p>', 'terms': []}
+    db.session.add(material)
+    db.session.commit()
+    return material.id
+
+
+def _titles(path):
+    connection = sqlite3.connect(path)
+    try:
+        return [row[0] for row in connection.execute('SELECT title FROM study_materials ORDER BY id')]
+    finally:
+        connection.close()
+
+
+def test_01_snapshot_while_writing(app, test_user, tmp_path):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Rezerves kopija, kamēr lietotne turpina rakstīt
+    Sagaidamais rezultāts: Rakstīšana kopēšanas laikā izdodas, kopijā ir dati kopēšanas sākuma brīdī, kopija pārbaudīta
+    """
+    # SETUP - datu bāze ar materiāliem
+    with app.app_context():
+        for i in range(30):
+            _add_study_material(test_user['id'], f'Materiāls {i}')
+        source = db.engine.url.database
+
+    written = []
+
+    def write_during_backup(remaining, total):
+        if not written:
+            with app.app_context():
+                written.append(_add_study_material(test_user['id'], 'Jauns materiāls'))
+
+    # ACTION - kopē pa 1 lapai, pa vidu saglabā jaunu materiālu
+    entry = full_backup(source, str(tmp_path / 'backup'), 'database.db',
+                        step_pages=1, step_pause=0, progress=write_during_backup)
+
+    # ASSERT - pārbauda rezultātu
+    assert written, "Rakstīšanai kopēšanas laikā jāizdodas"
+    assert entry['counts']['study_materials'] == 30, "Kopijā jābūt datiem kopēšanas sākuma brīdī"
+    assert len(_titles(source)) == 31, "Jaunajam materiālam jābūt datu bāzē"
+
+    restored = tmp_path / 'restored.db'
+    restore_backup(str(tmp_path / 'backup'), 'database.db', str(restored))
+    assert _titles(str(restored)) == [f'Materiāls {i}' for i in range(30)], "Atjaunotajai kopijai jāsakrīt"
+
+
+def test_02_incremental_backup_stores_changed_pages(app, test_user, tmp_path):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Inkrementālā rezerves kopija
+    Sagaidamais rezultāts: Otrā kopija satur tikai mainītās lapas, atjaunojami abi momentuzņēmumi
+    """
+    # SETUP - bāzes kopija
+    directory = str(tmp_path / 'incremental')
+    with app.app_context():
+        for i in range(200):
+            _add_study_material(test_user['id'], f'Materiāls {i}')
+        source = db.engine.url.database
+    base = incremental_backup(source, directory, 'database.db', step_pause=0)
+
+    # ACTION - maina vienu materiālu un kopē vēlreiz
+    with app.app_context():
+        material = db.session.get(StudyMaterial, 1)
+        material.title = 'Labots materiāls'
+        db.session.commit()
+    delta = incremental_backup(source, directory, 'database.db', step_pause=0)
+
+    # ASSERT - pārbauda rezultātu
+    assert base['changed_pages'] == base['pages'], "Bāzē jābūt visām lapām"
+    assert 0 < delta['changed_pages'] < delta['pages'] / 2, \
+        f"Jāsaglabā tikai mainītās lapas: {delta['changed_pages']} no {delta['pages']}"
+    assert verify_backup(directory) == {'database.db': 2}, "Jāpārbauda abi momentuzņēmumi"
+
+    first, latest = tmp_path / 'first.db', tmp_path / 'latest.db'
+    restore_backup(directory, 'database.db', str(first), snapshot=0)
+    restore_backup(directory, 'database.db', str(latest))
+    assert _titles(str(first))[0] == 'Materiāls 0', "Pirmajā momentuzņēmumā jābūt sākotnējam nosaukumam"
+    assert _titles(str(latest))[0] == 'Labots materiāls', "Pēdējā momentuzņēmumā jābūt labojumam"
+
+
+def test_03_verification_rejects_damaged_backup(app, test_user, tmp_path):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Bojātas rezerves kopijas atpazīšana
+    Sagaidamais rezultāts: Bojāta kopija netiek atjaunota, esošais fails paliek neskarts
+    """
+    # SETUP - kopija un esošs mērķa fails
+    directory = str(tmp_path / 'backup')
+    with app.app_context():
+        _add_study_material(test_user['id'], 'Materiāls')
+        source = db.engine.url.database
+    full_backup(source, directory, 'database.db', step_pause=0)
+    target = tmp_path / 'target.db'
+    target.write_bytes(b'existing data')
+
+    # ACTION - sabojā kopijas pēdējo lapu
+    backup_file = os.path.join(directory, 'database.db')
+    with open(backup_file, 'r+b') as f:
+        f.seek(-100, os.SEEK_END)
+        f.write(b'\xff' * 100)
+
+    # ASSERT - pārbauda rezultātu
+    with pytest.raises(BackupError):
+        verify_backup(directory)
+    with pytest.raises(BackupError):
+        restore_backup(directory, 'database.db', str(target))
+    assert target.read_bytes() == b'existing data', "Mērķa failam jāpaliek neskartam"
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        assert 'database.db' in json.load(f)['databases'], "Manifestam jāsaglabājas"
@@ -0,0 +1,135 @@
+"""
+MODUĻA 6: Lielapjoma importa testi
+4 testi ZIP arhīvu importam
+"""
+import pytest
+import zipfile
+from io import BytesIO
+from unittest.mock import Mock
+from models import StudyMaterial, BulkIngestionEntry, IngestionStatus
+
+
+def make_zip(files, compression=zipfile.ZIP_DEFLATED):
+    """Izveido ZIP arhīvu atmiņā"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_01_bulk_upload_dedupes_entries(auth_client, test_db, mocker):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: ZIP arhīva augšupielāde ar dublētu saturu
+    Sagaidamais rezultāts: Katram failam tiek izveidots ieraksts, dublikāti un neatbalstīti faili tiek atzīmēti
+    """
+    # SETUP - aptur fona apstrādi
+    enqueue = mocker.patch('routes.bulk.enqueue_ingestion')
+    archive = make_zip({
+        'kurss/lekcija1.txt': 'Fotosintēze notiek hloroplastos.',
+        'kurss/lekcija1_kopija.txt': 'fotosintēze  notiek hloroplastos.',
+        'kurss/lekcija2.txt': 'Šūnas elpošana notiek mitohondrijos.',
+        'kurss/attels.png': b'PNG',
+        'kurss/тест.txt': 'Hromosomas atrodas kodolā.',
+        'kurss/bojats.docx': b'nav docx fails'
+    })
+
+    # ACTION - augšupielādē arhīvu
+    response = auth_client.post('/api/generate/bulk', data={
+        'archive': (archive, 'kurss.zip')
+    }, content_type='multipart/form-data')
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 202, "Statuss būtu jābūt 202"
+    ingestion = response.json['ingestion']
+    statuses = [entry['status'] for entry in ingestion['entries']]
+    assert statuses == ['queued', 'duplicate', 'queued', 'failed', 'queued', 'failed'], \
+        "Ierakstu statusiem jāsakrīt, bojāts fails neaptur arhīvu"
+    assert enqueue.called, "Ģenerēšanai jābūt ievietotai rindā"
+
+
+def test_02_bulk_rejects_zip_bomb(auth_client, test_db, mocker):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: ZIP bumbas noraidīšana
+    Sagaidamais rezultāts: Arhīvs ar aizdomīgu saspiešanas attiecību tiek noraidīts
+    """
+    # SETUP - ļoti labi saspiežams fails
+    enqueue = mocker.patch('routes.bulk.enqueue_ingestion')
+    archive = make_zip({'bumba.txt': b'0' * (5 * 1024 * 1024)})
+
+    # ACTION - augšupielādē arhīvu
+    response = auth_client.post('/api/generate/bulk', data={
+        'archive': (archive, 'bumba.zip')
+    }, content_type='multipart/form-data')
+
+    # ASSERT - pārbauda kļūdu
+    assert response.status_code == 400, "Statuss būtu jābūt 400"
+    assert 'compression ratio' in response.json['error'], "Kļūdā jābūt saspiešanas attiecībai"
+    assert not enqueue.called, "Ģenerēšanai nevajadzētu būt rindā"
+
+
+def test_03_process_ingestion_creates_materials(auth_client, test_db, mocker):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Rindā ievietoto ierakstu apstrāde
+    Sagaidamais rezultāts: Katram unikālam failam tiek izveidots mācību materiāls
+    """
+    # SETUP - mock Claude API un augšupielādē arhīvu
+    from routes.bulk import process_ingestion
+    mocker.patch('routes.bulk.enqueue_ingestion')
+    mock_client = Mock()
+    mock_client.generate_study_material = Mock(return_value={
+        "summary": "Kopsavilkums",
+        "terms": [{"name": "Termins", "definition": "Definīcija"}]
+    })
+    mocker.patch('services.claude_api.get_claude_client', return_value=mock_client)
+
+    response = auth_client.post('/api/generate/bulk', data={
+        'archive': (make_zip({'a.txt': 'Pirmais saturs.', 'kurss/b.v2.txt': 'Otrais saturs.'}), 'kurss.zip')
+    }, content_type='multipart/form-data')
+    ingestion_id = response.json['ingestion']['id']
+
+    # ACTION - apstrādā rindu
+    process_ingestion(ingestion_id)
+
+    # ASSERT - pārbauda progresu un datu bāzi
+    progress = auth_client.get(f'/api/generate/bulk/{ingestion_id}')
+    assert progress.status_code == 200, "Statuss būtu jābūt 200"
+    assert progress.json['ingestion']['finished'], "Importam jābūt pabeigtam"
+    assert progress.json['ingestion']['counts']['done'] == 2, "Abiem failiem jābūt apstrādātiem"
+
+    titles = sorted(m.title for m in StudyMaterial.query.all())
+    assert titles == ['a', 'b.v2'], "Materiālu nosaukumiem jāatbilst failu nosaukumiem bez mapes"
+    assert all(e.content is None for e in BulkIngestionEntry.query.all()), \
+        "Izvilktajam tekstam jābūt notīrītam pēc ģenerēšanas"
+
+
+def test_04_resume_unfinished_ingestions(app, auth_client, test_db, mocker):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Nepabeigtu importu atsākšana pēc restartēšanas
+    Sagaidamais rezultāts: Ģenerēšanā iestrēgušie ieraksti atkal rindā, imports ievietots rindā no jauna
+    """
+    # SETUP - imports, kura viens ieraksts tika ģenerēts, kad process apstājās
+    from routes.bulk import resume_ingestions
+    enqueue = mocker.patch('routes.bulk.enqueue_ingestion')
+    response = auth_client.post('/api/generate/bulk', data={
+        'archive': (make_zip({'a.txt': 'Pirmais saturs.', 'b.txt': 'Otrais saturs.'}), 'kurss.zip')
+    }, content_type='multipart/form-data')
+    ingestion_id = response.json['ingestion']['id']
+    entry = BulkIngestionEntry.query.filter_by(filename='a.txt').first()
+    entry.status = IngestionStatus.generating
+    test_db.session.commit()
+    enqueue.reset_mock()
+
+    # ACTION - atsāk importus
+    resumed = resume_ingestions(app)
+
+    # ASSERT - pārbauda rezultātu
+    assert resumed == 1, "Jāatsāk viens imports"
+    enqueue.assert_called_once_with(app, ingestion_id, None)
+    statuses = [e.status for e in BulkIngestionEntry.query.order_by(BulkIngestionEntry.order_number)]
+    assert statuses == [IngestionStatus.queued, IngestionStatus.queued], "Ierakstiem jābūt atkal rindā"
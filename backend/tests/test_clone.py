@@ -0,0 +1,175 @@
+"""
+MODUĻA 16: Kopēšanas testi
+4 testi testu klonēšanai un apvienošanai datu bāzē
+"""
+from extensions import db
+from models import Test, Assignment, Question, QuestionOption
+from services.tree_writer import insert_assignments
+
+
+def make_test(user_id, title, num_assignments, num_questions):
+    """Izveido testu ar uzdevumiem, jautājumiem un atbilžu variantiem"""
+    test = Test(title=title, user_id=user_id)
+    db.session.add(test)
+    db.session.flush()
+    insert_assignments(test.id, [{
+        'title': f'{title} {a + 1}. uzdevums',
+        'max_points': num_questions,
+        'order_number': a + 1,
+        'questions': [{
+            'question_text': f'{title} jautājums {a + 1}.{q + 1}',
+            'question_type': 'multiple_choice',
+            'correct_answer': 'A',
+            'points': 1,
+            'order_number': q + 1,
+            'options': [{'option_text': text, 'is_correct': text == 'A'} for text in ('A', 'B', 'C')]
+        } for q in range(num_questions)]
+    } for a in range(num_assignments)])
+    db.session.commit()
+    return test.id
+
+
+def test_01_clone_test(auth_client, test_user, app, count_queries):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Testa klonēšana ar INSERT ... SELECT
+    Sagaidamais rezultāts: Kopijā ir visi uzdevumi, jautājumi un varianti ar jauniem ID,
+    vaicājumu skaits nav atkarīgs no testa izmēra, oriģināls nemainās
+    """
+    # SETUP - izveido testu ar 100 jautājumiem
+    with app.app_context():
+        source_id = make_test(test_user['id'], 'Bioloģija', 4, 25)
+        original = auth_client.get(f'/api/materials/{source_id}?type=test').get_json()
+
+    # ACTION - klonē testu
+    with count_queries() as statements:
+        response = auth_client.post(f'/api/materials/{source_id}/clone', json={})
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 201, "Statuss būtu jābūt 201"
+    data = response.get_json()
+    assert data['title'] == 'Bioloģija (kopija)', "Kopijai jābūt noklusētajam nosaukumam"
+    assert data['copied'] == {'assignments': 4, 'questions': 100, 'question_options': 300}, \
+        "Jānokopē visi koka ieraksti"
+    assert len([s for s in statements if s.lstrip().upper().startswith('INSERT')]) == 4, \
+        "Katram koka līmenim jābūt vienam INSERT vaicājumam"
+
+    def strip_ids(assignments):
+        return [
+            (a['title'], a['order_number'], [
+                (q['question_text'], q['order_number'], [o['option_text'] for o in q['options']])
+                for q in a['questions']
+            ])
+            for a in assignments
+        ]
+
+    assert strip_ids(data['assignments']) == strip_ids(original['assignments']), \
+        "Kopijas saturam jāsakrīt ar oriģinālu"
+    copied_ids = {q['id'] for a in data['assignments'] for q in a['questions']}
+    original_ids = {q['id'] for a in original['assignments'] for q in a['questions']}
+    assert not copied_ids & original_ids, "Kopijas jautājumiem jābūt jauniem ID"
+
+    # DB CHECK - oriģināls nav mainīts, kopija atrodama meklēšanā
+    with app.app_context():
+        assert Assignment.query.filter_by(test_id=source_id).count() == 4, "Oriģinālam jāpaliek nemainītam"
+        assert Question.query.join(Assignment).filter(Assignment.test_id == source_id).count() == 100, \
+            "Oriģināla jautājumiem jāpaliek"
+
+    search = auth_client.get('/api/search?q=jautājums 2.5').get_json()
+    assert {r['id'] for r in search['results']} >= {source_id, data['id']}, \
+        "Kopijas jautājumiem jābūt meklēšanas indeksā"
+
+
+def test_02_merge_tests(auth_client, test_user, app):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Vairāku testu apvienošana jaunā testā
+    Sagaidamais rezultāts: Uzdevumi seko testu secībai, apvienotie testi nemainās
+    """
+    # SETUP - izveido trīs testus
+    with app.app_context():
+        first = make_test(test_user['id'], 'Vēsture', 2, 3)
+        second = make_test(test_user['id'], 'Ģeogrāfija', 1, 2)
+        third = make_test(test_user['id'], 'Ķīmija', 3, 1)
+
+    # ACTION - apvieno testus (dublikāts tiek ignorēts)
+    response = auth_client.post('/api/materials/merge', json={
+        'test_ids': [second, first, third, first],
+        'title': 'Kopējais tests'
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 201, "Statuss būtu jābūt 201"
+    data = response.get_json()
+    assert data['title'] == 'Kopējais tests', "Nosaukumam jābūt no pieprasījuma"
+    assert [a['title'] for a in data['assignments']] == [
+        'Ģeogrāfija 1. uzdevums', 'Vēsture 1. uzdevums', 'Vēsture 2. uzdevums',
+        'Ķīmija 1. uzdevums', 'Ķīmija 2. uzdevums', 'Ķīmija 3. uzdevums'
+    ], "Uzdevumiem jābūt testu secībā"
+    assert [a['order_number'] for a in data['assignments']] == [1, 2, 3, 4, 5, 6], \
+        "Kārtas numuriem jāturpinās pa testiem"
+    assert data['copied']['questions'] == 11, "Jānokopē visi jautājumi"
+
+    # DB CHECK - apvienotie testi paliek
+    with app.app_context():
+        for test_id, count in ((first, 2), (second, 1), (third, 3)):
+            assert Assignment.query.filter_by(test_id=test_id).count() == count, \
+                "Apvienotajiem testiem jāpaliek nemainītiem"
+        assert QuestionOption.query.count() == 2 * 33, "Varianti jānokopē vienu reizi"
+
+
+def test_03_merge_rejects_foreign_tests(auth_client, test_user, app):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Apvienošana ar neeksistējošu vai cita lietotāja testu
+    Sagaidamais rezultāts: 404 vai 400 kļūda, jauns tests netiek izveidots
+    """
+    # SETUP - izveido testu
+    with app.app_context():
+        own = make_test(test_user['id'], 'Fizika', 1, 1)
+
+    # ACTION - apvieno ar neeksistējošu testu, ar vienu testu un klonē neeksistējošu
+    missing = auth_client.post('/api/materials/merge', json={'test_ids': [own, 9999]})
+    single = auth_client.post('/api/materials/merge', json={'test_ids': [own, own]})
+    clone = auth_client.post('/api/materials/9999/clone')
+
+    # ASSERT - pārbauda rezultātu
+    assert missing.status_code == 404, "Neeksistējošam testam jāatgriež 404"
+    assert missing.get_json()['not_found'] == [9999], "Jānorāda trūkstošie testi"
+    assert single.status_code == 400, "Vienu testu nevar apvienot"
+    assert clone.status_code == 404, "Neeksistējošu testu nevar klonēt"
+
+    # DB CHECK - jauni testi nav izveidoti
+    with app.app_context():
+        assert Test.query.count() == 1, "Jauniem testiem nebūtu jābūt izveidotiem"
+
+
+def test_04_copy_rejects_invalid_title(auth_client, test_user, app):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Klonēšana un apvienošana ar nederīgu vai garu nosaukumu
+    Sagaidamais rezultāts: Nederīgam nosaukumam 400 kļūda, noklusētais nosaukums saīsināts līdz 255 simboliem
+    """
+    # SETUP - divi testi, viens ar garu nosaukumu
+    with app.app_context():
+        first = make_test(test_user['id'], 'Ģ' * 255, 1, 1)
+        second = make_test(test_user['id'], 'Fizika', 1, 1)
+
+    # ACTION - klonē un apvieno ar dažādiem nosaukumiem
+    invalid = [
+        auth_client.post(f'/api/materials/{first}/clone', json={'title': 42}),
+        auth_client.post(f'/api/materials/{first}/clone', json={'title': '   '}),
+        auth_client.post('/api/materials/merge', json={'test_ids': [first, second], 'title': 'x' * 256})
+    ]
+    clone = auth_client.post(f'/api/materials/{first}/clone')
+    merged = auth_client.post('/api/materials/merge', json={'test_ids': [first, second]})
+
+    # ASSERT - pārbauda rezultātu
+    assert [response.status_code for response in invalid] == [400, 400, 400], "Nederīgam nosaukumam jāatgriež 400"
+    assert clone.status_code == 201, "Klonēšanai ar noklusēto nosaukumu jāizdodas"
+    assert len(clone.get_json()['title']) == 255, "Noklusētajam nosaukumam jābūt saīsinātam"
+    assert len(merged.get_json()['title']) == 255, "Apvienotā testa nosaukumam jābūt saīsinātam"
+
+    # DB CHECK - nederīgie pieprasījumi neko neizveido
+    with app.app_context():
+        assert Test.query.count() == 4, "Jābūt tikai 2 sākotnējiem un 2 jaunajiem testiem"
@@ -0,0 +1,90 @@
+"""
+MODUĻA 7: Satura saspiešanas testi
+4 testi izvilktā teksta tīrīšanai pirms sūtīšanas Claude API
+"""
+import pytest
+from services.content_compression import compress_content, compress_sources, estimate_tokens
+
+
+def test_01_remove_boilerplate_and_hyphenation():
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Lappušu numuru, atkārtotu galveņu un pārnesumu tīrīšana
+    Sagaidamais rezultāts: Tiek saglabāts tikai mācību saturs, vārdi ar pārnesumiem tiek savienoti
+    """
+    # SETUP - PDF līdzīgs teksts ar galvenēm un lappušu numuriem
+    pages = []
+    for page in range(1, 4):
+        pages.append(
+            f"Bioloģija 10. klasei\n"
+            f"Fotosintēzes {page}. posmā augi pārvei-\ndo gaismas enerģiju.\n"
+            f"{page}\n"
+        )
+    text = '\n'.join(pages)
+
+    # ACTION - saspiež saturu, kas nedaudz pārsniedz budžetu
+    compressed, stats = compress_content(text, max_tokens=estimate_tokens(text) - 1)
+
+    # ASSERT - pārbauda rezultātu
+    assert 'Bioloģija 10. klasei' not in compressed, "Atkārtotai galvenei jābūt izņemtai"
+    assert 'pārveido' in compressed, "Pārnesumam jābūt savienotam"
+    assert '\n1\n' not in compressed, "Lappušu numuriem jābūt izņemtiem"
+    assert stats['compressed_tokens'] < stats['original_tokens'], "Tokenu skaitam jāsamazinās"
+
+
+def test_02_compress_to_budget():
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Teksta saīsināšana līdz tokenu budžetam
+    Sagaidamais rezultāts: Saspiests teksts iekļaujas budžetā un saglabā informatīvākos teikumus
+    """
+    # SETUP - teksts ar vienu atkārtotu tēmu un nejaušiem teikumiem
+    sentences = [f"Fotosintēze hloroplastos ražo glikozi un skābekli {i}. reizi." for i in range(40)]
+    sentences += [f"Nejaušs teikums par laikapstākļiem numur {i}." for i in range(5)]
+    text = ' '.join(sentences)
+
+    # ACTION - saspiež ar mazu budžetu
+    compressed, stats = compress_content(text, max_tokens=100)
+
+    # ASSERT - pārbauda rezultātu
+    assert estimate_tokens(compressed) <= 100, "Tekstam jāiekļaujas budžetā"
+    assert 'Fotosintēze' in compressed, "Galvenajai tēmai jāsaglabājas"
+    assert stats['reduction'] > 0.5, "Samazinājumam jābūt būtiskam"
+
+
+def test_03_compress_sources_keeps_every_file():
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Vairāku failu saspiešana ar kopīgu budžetu
+    Sagaidamais rezultāts: Neviens fails netiek izmests pilnībā
+    """
+    # SETUP - divi faili ar atšķirīgu garumu
+    long_text = ' '.join(f"Garais fails apraksta tēmu {i}. teikumā." for i in range(200))
+    short_text = 'Īsais fails satur vienu svarīgu teikumu. Un vēl vienu.'
+
+    # ACTION - saspiež abus failus
+    sources, stats = compress_sources([('a.txt', long_text), ('b.txt', short_text)], max_tokens=200)
+
+    # ASSERT - pārbauda rezultātu
+    assert [name for name, _ in sources] == ['a.txt', 'b.txt'], "Failu secībai jāsaglabājas"
+    assert all(text for _, text in sources), "Katram failam jāsaglabā saturs"
+    assert stats['compressed_tokens'] <= 200, "Kopējam apjomam jāiekļaujas budžetā"
+
+
+def test_04_content_within_budget_is_unchanged():
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Satura saglabāšana, ja tas iekļaujas budžetā
+    Sagaidamais rezultāts: Saraksti, tabulas un īsas rindas netiek mainītas, ielīmēts saturs netiek tīrīts
+    """
+    # SETUP - ielīmēts saturs ar numurētu sarakstu un tabulu
+    text = 'Atbildes:\n1\n2\n3\n| Viela | Formula |\n| Ūdens | H2O |\n| - | - |\n| - | - |\n| - | - |'
+
+    # ACTION - saspiež saturu ar lielu un ar mazu budžetu
+    compressed, stats = compress_content(text)
+    pasted, _ = compress_content(text * 20, max_tokens=estimate_tokens(text) * 10, clean=False)
+
+    # ASSERT - pārbauda rezultātu
+    assert compressed == text, "Saturam budžeta robežās jāpaliek nemainītam"
+    assert stats['reduction'] == 0.0, "Samazinājumam jābūt 0"
+    assert '| - | - |\n| - | - |' in pasted, "Ielīmētam saturam atkārtotās rindas netiek izņemtas"
@@ -0,0 +1,157 @@
+"""
+MODUĻA 11: Datu bāzes konfigurācijas testi
+4 testi SQLite savienojumu iestatījumiem, uzturēšanai, rakstīšanas rindai un saspiestām kolonnām
+"""
+import threading
+import pytest
+from sqlalchemy import create_engine, text
+from extensions import db
+from db_config import DEFAULT_PRAGMAS, apply_pragmas, engine_options, run_maintenance
+from models import StudyMaterial, Question
+from routes.generate import save_study_material_to_database
+from services.write_coordinator import WriteCoordinator, EXTENSION_KEY
+
+
+def test_01_connection_pragmas(app):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: SQLite iestatījumi katram savienojumam
+    Sagaidamais rezultāts: WAL žurnāls, synchronous=NORMAL, ārējās atslēgas un gaidīšana uz slēdzeni
+    """
+    # ACTION - nolasa aktīvos iestatījumus
+    with db.engine.connect() as connection:
+        pragmas = {
+            name: connection.execute(text(f'PRAGMA {name}')).scalar()
+            for name in ('journal_mode', 'synchronous', 'foreign_keys', 'busy_timeout', 'cache_size')
+        }
+
+    # ASSERT - pārbauda rezultātu
+    assert pragmas['journal_mode'] == 'wal', "Jābūt WAL režīmam"
+    assert pragmas['synchronous'] == 1, "synchronous jābūt NORMAL"
+    assert pragmas['foreign_keys'] == 1, "Ārējām atslēgām jābūt ieslēgtām"
+    assert pragmas['busy_timeout'] == DEFAULT_PRAGMAS['busy_timeout'], "Jābūt gaidīšanai uz slēdzeni"
+    assert pragmas['cache_size'] == DEFAULT_PRAGMAS['cache_size'], "Jābūt lielākai kešatmiņai"
+
+    options = engine_options(app.config)
+    assert options['pool_size'] == app.config['DB_POOL_SIZE'], "Pūla izmēram jānāk no konfigurācijas"
+    assert options['connect_args']['timeout'] == DEFAULT_PRAGMAS['busy_timeout'] / 1000, \
+        "Draivera gaidīšanai jāsakrīt ar busy_timeout"
+
+
+def test_02_maintenance_releases_free_pages(tmp_path):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Periodiskā uzturēšana (PRAGMA optimize un incremental_vacuum)
+    Sagaidamais rezultāts: Pēc lielu datu dzēšanas brīvās lapas tiek atdotas failu sistēmai
+    """
+    # SETUP - jauna datu bāze ar dzēstiem datiem
+    engine = create_engine(f'sqlite:///{tmp_path / "maintenance.db"}')
+    apply_pragmas(engine, DEFAULT_PRAGMAS)
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE blobs (id INTEGER PRIMARY KEY, data TEXT)'))
+        connection.execute(text('INSERT INTO blobs (data) VALUES (:data)'), [{'data': 'x' * 4000}] * 200)
+    with engine.begin() as connection:
+        connection.execute(text('DELETE FROM blobs'))
+
+    # ACTION - palaiž uzturēšanu
+    result = run_maintenance(engine)
+
+    # ASSERT - pārbauda rezultātu
+    assert result['free_pages_before'] > 100, "Pēc dzēšanas jābūt brīvām lapām"
+    assert result['free_pages_after'] == 0, "Brīvajām lapām jābūt atbrīvotām"
+    engine.dispose()
+
+
+def test_03_write_queue_group_commit(app, test_user, tmp_path):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Rakstīšana caur vienu rakstītāja pavedienu ar grupas commit
+    Sagaidamais rezultāts: Rindā gaidošie ieraksti saglabājas vienā transakcijā, kļūdains ieraksts neatceļ pārējos
+    """
+    # SETUP - rakstītājs, kura pirmais darbs gaida signālu
+    coordinator = WriteCoordinator(app, lock_path=str(tmp_path / 'write-lock'))
+    app.extensions[EXTENSION_KEY] = coordinator
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_write():
+        started.set()
+        return release.wait()
+
+    def failing_write():
+        db.session.add(StudyMaterial(user_id=test_user['id'], title='Kļūda', content='{}'))
+        db.session.flush()
+        raise ValueError('kļūda')
+
+    try:
+        first = coordinator.submit(blocking_write)
+        started.wait(timeout=10)
+
+        # ACTION - kamēr rakstītājs ir aizņemts, rindā ievieto vairākus ierakstus
+        futures = [
+            coordinator.submit(save_study_material_to_database, test_user['id'], f'Materiāls {i}',
+                               {'summary': '', 'terms': []})
+            for i in range(5)
+        ]
+        failed = coordinator.submit(failing_write)
+        release.set()
+        ids = [future.result(timeout=10) for future in futures]
+
+        # ASSERT - pārbauda rezultātu
+        assert first.result(timeout=10) is True, "Pirmajam darbam jāizpildās"
+        with pytest.raises(ValueError):
+            failed.result(timeout=10)
+        assert coordinator.batches == 2, f"Gaidošajiem ierakstiem jābūt vienā grupā: {coordinator.batches}"
+        assert coordinator.jobs == 7, "Jāizpilda visi 7 darbi"
+
+        # DB CHECK - saglabāti tikai veiksmīgie ieraksti
+        titles = {material.title for material in StudyMaterial.query.filter(StudyMaterial.id.in_(ids))}
+        assert titles == {f'Materiāls {i}' for i in range(5)}, "Jābūt saglabātiem 5 materiāliem"
+        assert StudyMaterial.query.filter_by(title='Kļūda').count() == 0, "Kļūdainajam ierakstam jābūt atceltam"
+
+    finally:
+        coordinator.stop()
+        app.extensions.pop(EXTENSION_KEY)
+
+
+def test_04_compressed_text_columns(auth_client, test_test_material, test_user, app):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Saspiesta mācību materiālu satura un garo atbilžu glabāšana
+    Sagaidamais rezultāts: Datu bāzē saglabāts mazāks BLOB, API atgriež sākotnējo saturu
+    """
+    # SETUP - liels mācību materiāls un gara atbilde
+    content_data = {
+        'summary': '<p>Fotosintēze ir process, kurā augi gaismas enerģiju pārvērš ķīmiskajā enerģijā.</p>' * 20,
+        'terms': [{'name': f'Termins {i}', 'definition': f'Skaidra definīcija terminam {i}.'} for i in range(30)]
+    }
+    long_answer = 'Atbildē jāiekļauj gaismas fāze, tumsas fāze un hlorofila loma. ' * 10
+
+    # ACTION - saglabā caur ORM
+    with app.app_context():
+        material = StudyMaterial(user_id=test_user['id'], title='Liels materiāls')
+        material.content_data = content_data
+        db.session.add(material)
+        db.session.get(Question, test_test_material['question_id']).correct_answer = long_answer
+        db.session.commit()
+        material_id = material.id
+
+        # DB CHECK - glabātās vērtības ir saspiestas
+        stored = db.session.execute(text(
+            'SELECT typeof(content), length(content) FROM study_materials WHERE id = :id'
+        ), {'id': material_id}).one()
+        answer_type = db.session.execute(text(
+            'SELECT typeof(correct_answer) FROM questions WHERE id = :id'
+        ), {'id': test_test_material['question_id']}).scalar()
+        plain_size = len(material.content.encode('utf-8'))
+
+    assert stored[0] == 'blob', "Saturam jābūt saspiestam"
+    assert stored[1] < plain_size / 3, f"Saspiestam saturam jābūt mazākam: {stored[1]} no {plain_size}"
+    assert answer_type == 'blob', "Garai atbildei jābūt saspiestai"
+
+    # ASSERT - API atgriež sākotnējo saturu
+    material_response = auth_client.get(f'/api/materials/{material_id}?type=study_material').get_json()
+    test_response = auth_client.get(f'/api/materials/{test_test_material["test_id"]}?type=test').get_json()
+    assert material_response['content'] == content_data, "Saturam jāsakrīt ar saglabāto"
+    assert test_response['assignments'][0]['questions'][0]['correct_answer'] == long_answer, \
+        "Atbildei jāsakrīt ar saglabāto"
@@ -1,9 +1,9 @@
 """
 MODUĻA 3: Rediģēšanas testi
-6 testi materiālu rediģēšanai un modificēšanai
+15 testi materiālu rediģēšanai un modificēšanai
 """
 import pytest
-from models import Test, Question
+from models import Test, Assignment, Question, QuestionOption
 
 
 def test_01_edit_question_text(auth_client, test_test_material, app):
@@ -236,3 +236,293 @@ def test_06_add_question(auth_client, test_test_material, app):
         assert len(test.assignments[0].questions) == 2, "Uzdevumam jābūt 2 jautājumiem"
         assert test.assignments[0].questions[1].question_text == 'Jauns jautājums?', \
             "Jaunajam jautājumam jābūt ar pareizu tekstu"
+
+
+def test_07_patch_keeps_ids(auth_client, test_test_material, app):
+    """
+    Nr: 7
+    Testējamā funkcionalitāte: Jautājuma teksta labošana ar PATCH operāciju
+    Sagaidamais rezultāts: Mainās tikai norādītais lauks, visi ID paliek nemainīgi
+    """
+    # SETUP - atceras esošos ID
+    with app.app_context():
+        option_ids = [o.id for o in QuestionOption.query.all()]
+
+    # ACTION - labo jautājuma tekstu
+    response = auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'operations': [
+            {'op': 'update', 'entity': 'question', 'id': test_test_material['question_id'],
+             'value': {'question_text': 'Kas ir Python valoda?'}}
+        ]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.json['changes'] == {'added': 0, 'updated': 1, 'removed': 0}, "Jāmaina tikai viena rinda"
+
+    # DB CHECK - pārbauda datu bāzi
+    with app.app_context():
+        question = Question.query.get(test_test_material['question_id'])
+        assert question.question_text == 'Kas ir Python valoda?', "Tekstam jābūt atjauninātam"
+        assert question.correct_answer == 'A', "Citiem laukiem jāpaliek nemainīgiem"
+        assert question.assignment_id == test_test_material['assignment_id'], "Uzdevuma ID jāpaliek"
+        assert [o.id for o in QuestionOption.query.all()] == option_ids, "Atbilžu variantu ID jāpaliek"
+
+
+def test_08_patch_add_and_remove(auth_client, test_test_material, app):
+    """
+    Nr: 8
+    Testējamā funkcionalitāte: Uzdevuma pievienošana un jautājuma dzēšana ar PATCH operācijām
+    Sagaidamais rezultāts: Jaunais uzdevums saglabāts ar jautājumiem, dzēstais jautājums un tā varianti izņemti
+    """
+    # ACTION - pievieno uzdevumu un dzēš jautājumu
+    response = auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'title': 'Jauns nosaukums',
+        'operations': [
+            {'op': 'remove', 'entity': 'question', 'id': test_test_material['question_id']},
+            {'op': 'add', 'entity': 'assignment', 'value': {
+                'title': '2. uzdevums',
+                'order_number': 2,
+                'questions': [{
+                    'question_text': 'Vai Python ir interpretējama valoda?',
+                    'question_type': 'true_false',
+                    'correct_answer': 'Patiess',
+                    'points': 1,
+                    'options': [
+                        {'option_text': 'Patiess', 'is_correct': True},
+                        {'option_text': 'Nepatiess', 'is_correct': False}
+                    ]
+                }]
+            }}
+        ]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.json['changes'] == {'added': 4, 'updated': 0, 'removed': 2}, "Izmaiņu skaitam jāsakrīt"
+
+    # DB CHECK - pārbauda datu bāzi
+    with app.app_context():
+        test = Test.query.get(test_test_material['test_id'])
+        assert test.title == 'Jauns nosaukums', "Nosaukumam jābūt atjauninātam"
+        assignments = sorted(test.assignments, key=lambda a: a.order_number)
+        assert assignments[0].id == test_test_material['assignment_id'], "Esošā uzdevuma ID jāpaliek"
+        assert assignments[0].questions == [], "Dzēstajam jautājumam jābūt izņemtam"
+        assert [len(q.options) for q in assignments[1].questions] == [2], "Jaunajam jautājumam jābūt 2 variantiem"
+        assert QuestionOption.query.count() == 2, "Dzēstā jautājuma variantiem jābūt izņemtiem"
+
+
+def test_09_patch_rejects_foreign_rows(auth_client, test_test_material, app):
+    """
+    Nr: 9
+    Testējamā funkcionalitāte: PATCH operācija ar cita testa jautājuma ID
+    Sagaidamais rezultāts: Pieprasījums noraidīts, nekas netiek mainīts
+    """
+    # SETUP - cits tests ar jautājumu
+    with app.app_context():
+        other = Test(title='Cits tests', user_id=Test.query.get(test_test_material['test_id']).user_id)
+        from extensions import db
+        db.session.add(other)
+        db.session.flush()
+        assignment = Assignment(test_id=other.id, title='Uzdevums', order_number=1)
+        db.session.add(assignment)
+        db.session.flush()
+        question = Question(assignment_id=assignment.id, question_text='Svešs?',
+                            question_type='short_answer', order_number=1)
+        db.session.add(question)
+        db.session.commit()
+        other_question_id = question.id
+
+    # ACTION - mēģina labot svešu jautājumu
+    response = auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'operations': [
+            {'op': 'update', 'entity': 'question', 'id': test_test_material['question_id'],
+             'value': {'points': 3}},
+            {'op': 'update', 'entity': 'question', 'id': other_question_id,
+             'value': {'question_text': 'Uzlauzts'}}
+        ]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 400, "Statuss būtu jābūt 400"
+
+    # DB CHECK - pārbauda ka nekas nav mainīts
+    with app.app_context():
+        assert Question.query.get(other_question_id).question_text == 'Svešs?', "Svešam jautājumam jāpaliek"
+        assert Question.query.get(test_test_material['question_id']).points == 5, "Punktiem jāpaliek"
+
+
+def test_10_patch_returns_saved_tree(auth_client, test_test_material):
+    """
+    Nr: 10
+    Testējamā funkcionalitāte: PATCH atbilde ar saglabāto testu un versiju
+    Sagaidamais rezultāts: Atbilde sakrīt ar nākamo GET atbildi, versija palielināta
+    """
+    # ACTION - labo uzdevumu un pievieno atbilžu variantu
+    response = auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'operations': [
+            {'op': 'update', 'entity': 'assignment', 'id': test_test_material['assignment_id'],
+             'value': {'title': 'Labots uzdevums'}},
+            {'op': 'add', 'entity': 'option', 'parent_id': test_test_material['question_id'],
+             'value': {'option_text': 'Čūska', 'is_correct': False, 'order_number': 2}}
+        ]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.json['version'] == 2, "Versijai jābūt palielinātai"
+
+    saved = auth_client.get(f'/api/materials/{test_test_material["test_id"]}?type=test').json
+    for key in ('id', 'title', 'version', 'assignments'):
+        assert response.json[key] == saved[key], f"Laukam '{key}' jāsakrīt ar GET atbildi"
+    assert [o['option_text'] for o in saved['assignments'][0]['questions'][0]['options']] == \
+        ['Programmēšanas valoda', 'Čūska'], "Jaunajam variantam jābūt saglabātam"
+
+
+def test_11_put_returns_saved_tree(auth_client, test_test_material):
+    """
+    Nr: 11
+    Testējamā funkcionalitāte: PUT atbilde ar saglabāto testu un versiju
+    Sagaidamais rezultāts: Atbildē ir jaunie ID, tā sakrīt ar nākamo GET atbildi
+    """
+    # ACTION - saglabā visu testu
+    response = auth_client.put(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'title': 'Pārsaukts tests',
+        'assignments': [{
+            'title': '1. uzdevums',
+            'description': 'Apraksts',
+            'max_points': 2,
+            'order_number': 1,
+            'questions': [{
+                'question_text': 'Vai Python ir valoda?',
+                'question_type': 'true_false',
+                'correct_answer': 'Patiess',
+                'points': 2,
+                'order_number': 1,
+                'options': [
+                    {'option_text': 'Patiess', 'is_correct': True, 'order_number': 1},
+                    {'option_text': 'Nepatiess', 'is_correct': False, 'order_number': 2}
+                ]
+            }]
+        }]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.json['version'] == 2, "Versijai jābūt palielinātai"
+
+    saved = auth_client.get(f'/api/materials/{test_test_material["test_id"]}?type=test').json
+    for key in ('id', 'title', 'created_at', 'version', 'assignments'):
+        assert response.json[key] == saved[key], f"Laukam '{key}' jāsakrīt ar GET atbildi"
+
+
+def test_12_version_incremented_in_sql(test_test_material, app):
+    """
+    Nr: 12
+    Testējamā funkcionalitāte: Versijas palielināšana ar SQL izteiksmi
+    Sagaidamais rezultāts: Versija tiek palielināta no datu bāzes vērtības, nevis no ielādētās kopijas
+    """
+    from sqlalchemy import update
+    from extensions import db
+
+    with app.app_context():
+        # SETUP - ielādē testu, tad cits saglabājums palielina versiju datu bāzē
+        test = db.session.get(Test, test_test_material['test_id'])
+        assert test.version == 1, "Sākumā versijai jābūt 1"
+        db.session.execute(update(Test).where(Test.id == test.id).values(version=5))
+
+        # ACTION - atzīmē testu kā mainītu
+        test.touch()
+
+        # ASSERT - pārbauda rezultātu
+        assert test.version == 6, "Versijai jābūt palielinātai no datu bāzes vērtības"
+        db.session.commit()
+
+
+def test_13_patch_rejects_invalid_values(auth_client, test_test_material, app):
+    """
+    Nr: 13
+    Testējamā funkcionalitāte: PATCH operācijas ar nederīga tipa vai null vērtībām
+    Sagaidamais rezultāts: Pieprasījums noraidīts ar 400, nekas netiek mainīts
+    """
+    # SETUP - nederīgas vērtības
+    invalid = [
+        {'op': 'update', 'entity': 'assignment', 'id': test_test_material['assignment_id'],
+         'value': {'title': None}},
+        {'op': 'update', 'entity': 'question', 'id': test_test_material['question_id'],
+         'value': {'points': 'pieci'}},
+        {'op': 'update', 'entity': 'question', 'id': test_test_material['question_id'],
+         'value': {'question_type': ['true_false']}},
+        {'op': 'add', 'entity': 'assignment', 'value': {
+            'title': 'Jauns', 'questions': [{'question_text': 'Q', 'question_type': 'true_false',
+                                             'options': [{'option_text': 'Jā', 'is_correct': 'jā'}]}]
+        }}
+    ]
+
+    for operation in invalid:
+        # ACTION - sūta nederīgu operāciju
+        response = auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={
+            'type': 'test',
+            'operations': [operation]
+        })
+
+        # ASSERT - pārbauda rezultātu
+        assert response.status_code == 400, f"Statuss būtu jābūt 400: {operation}"
+
+    # DB CHECK - pārbauda ka nekas nav mainīts
+    with app.app_context():
+        question = Question.query.get(test_test_material['question_id'])
+        assert question.points == 5, "Punktiem jāpaliek"
+        assert Assignment.query.count() == 1, "Jaunam uzdevumam nav jābūt saglabātam"
+
+
+def test_14_patch_response_keeps_get_order(auth_client, test_test_material):
+    """
+    Nr: 14
+    Testējamā funkcionalitāte: PATCH atbildes secība pēc pievienošanas un kārtas numuru maiņas
+    Sagaidamais rezultāts: Rindas atbildē sakārtotas tāpat kā nākamajā GET atbildē
+    """
+    # ACTION - pievieno uzdevumu un variantu pirms esošajiem
+    response = auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'operations': [
+            {'op': 'add', 'entity': 'assignment', 'value': {'title': '0. uzdevums', 'order_number': 0}},
+            {'op': 'add', 'entity': 'option', 'parent_id': test_test_material['question_id'],
+             'value': {'option_text': 'Čūska', 'order_number': 0}}
+        ]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    saved = auth_client.get(f'/api/materials/{test_test_material["test_id"]}?type=test').json
+    assert [a['title'] for a in saved['assignments']][0] == '0. uzdevums', "Jaunajam uzdevumam jābūt pirmajam"
+    assert response.json['assignments'] == saved['assignments'], "Secībai jāsakrīt ar GET atbildi"
+
+
+def test_15_put_response_matches_stored_rows(auth_client, test_test_material):
+    """
+    Nr: 15
+    Testējamā funkcionalitāte: PUT atbilde, ja pieprasījuma secība un vērtību tipi atšķiras no saglabātajiem
+    Sagaidamais rezultāts: Atbilde sakārtota un ar vērtībām kā nākamajā GET atbildē
+    """
+    # ACTION - saglabā uzdevumus apgrieztā secībā ar punktiem kā tekstu
+    response = auth_client.put(f'/api/materials/{test_test_material["test_id"]}', json={
+        'type': 'test',
+        'assignments': [
+            {'title': 'B', 'max_points': '7', 'order_number': 2, 'questions': []},
+            {'title': 'C', 'max_points': 3, 'order_number': 1, 'questions': []}
+        ]
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    saved = auth_client.get(f'/api/materials/{test_test_material["test_id"]}?type=test').json
+    assert [a['title'] for a in response.json['assignments']] == ['C', 'B'], "Secībai jābūt pēc kārtas numura"
+    assert response.json['assignments'][1]['max_points'] == 7, "Punktiem jābūt saglabātajā tipā"
+    for key in ('id', 'title', 'created_at', 'version', 'assignments'):
+        assert response.json[key] == saved[key], f"Laukam '{key}' jāsakrīt ar GET atbildi"
@@ -1,6 +1,6 @@
 """
 MODUĻA 5: Eksporta testi
-3 testi PDF un DOCX eksportam
+4 testi PDF un DOCX eksportam
 """
 import pytest
 from io import BytesIO
@@ -73,3 +73,27 @@ def test_03_export_docx(auth_client, test_test_material):
 
     # Pārbauda ka response ir derīgs DOCX (ZIP arhīvs)
     assert response.data[:2] == b'PK', "DOCX failam jāsākas ar ZIP signatūru (PK)"
+
+
+def test_04_export_not_modified(auth_client, test_test_material):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Nosacījuma pieprasījums eksportam
+    Sagaidamais rezultāts: Nemainītam eksportam 304, katram variantam savs ETag
+    """
+    url = f'/api/export/pdf/{test_test_material["test_id"]}?type=test'
+
+    # SETUP - pirmā ielāde abiem variantiem
+    with_answers = auth_client.get(url + '&include_answers=true').headers['ETag']
+    without_answers = auth_client.get(url + '&include_answers=false').headers['ETag']
+
+    # ACTION - atkārtots pieprasījums
+    response = auth_client.get(url + '&include_answers=true', headers={'If-None-Match': with_answers})
+
+    # ASSERT - pārbauda rezultātu
+    assert with_answers != without_answers, "Variantiem jābūt dažādiem ETag"
+    assert response.status_code == 304, "Statuss būtu jābūt 304"
+    assert response.data == b'', "304 atbildei nav jābūt saturam"
+
+    response = auth_client.get(url + '&include_answers=false', headers={'If-None-Match': with_answers})
+    assert response.status_code == 200, "Citam variantam jāatgriež 200"
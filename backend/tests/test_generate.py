@@ -1,6 +1,6 @@
 """
 MODUĻA 2: Ģenerēšanas testi
-6 testi materiālu ģenerēšanai ar Claude API
+10 testi materiālu ģenerēšanai ar Claude API
 """
 import pytest
 from unittest.mock import Mock, patch, MagicMock
@@ -246,3 +246,177 @@ def test_06_parse_claude_response(auth_client, test_db, mocker):
     q2 = assignment.questions[1]
     assert q2.question_type.value == "short_answer", "Jautājuma tipam jābūt short_answer"
     assert q2.correct_answer == "5", "Pareizajai atbildei jāsakrīt"
+
+
+def test_07_generate_from_multiple_files(auth_client, test_db, mocker):
+    """
+    Nr: 7
+    Testējamā funkcionalitāte: Testa ģenerēšana no vairākiem augšupielādētiem failiem
+    Sagaidamais rezultāts: Visu failu saturs tiek nodots Claude API ar atsevišķām avotu sadaļām
+    """
+    # SETUP - mock Claude API
+    from io import BytesIO
+    mock_client = Mock()
+    mock_client.generate_test = Mock(return_value={
+        "assignments": [{
+            "title": "Uzdevums",
+            "description": "Apraksts",
+            "max_points": 5,
+            "questions": [{
+                "question_text": "Jautājums?",
+                "question_type": "short_answer",
+                "correct_answer": "Atbilde",
+                "points": 5,
+                "options": []
+            }]
+        }]
+    })
+    mocker.patch('routes.generate.get_claude_client', return_value=mock_client)
+
+    # ACTION - ģenerē testu no diviem failiem
+    response = auth_client.post('/api/generate', data={
+        'material_type': 'test',
+        'title': 'Vairāku failu tests',
+        'num_questions': 3,
+        'files': [
+            (BytesIO('Pirmā faila saturs.'.encode('utf-8')), 'lekcija1.txt'),
+            (BytesIO('Otrā faila saturs.'.encode('utf-8')), 'lekcija2.txt')
+        ]
+    }, content_type='multipart/form-data')
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 201, "Statuss būtu jābūt 201"
+
+    content = mock_client.generate_test.call_args.kwargs['content']
+    assert 'lekcija1.txt' in content and 'lekcija2.txt' in content, "Saturā jābūt abu failu nosaukumiem"
+    assert content.index('Pirmā faila saturs.') < content.index('Otrā faila saturs.'), \
+        "Failu secībai jāsaglabājas"
+
+
+def test_08_generate_files_total_size_limit(auth_client, test_db, mocker):
+    """
+    Nr: 8
+    Testējamā funkcionalitāte: Kopējā failu izmēra ierobežojums
+    Sagaidamais rezultāts: Ja failu kopējais izmērs pārsniedz limitu, tiek atgriezta kļūda 413
+    """
+    # SETUP - samazina limitu, lai divi mazi faili to pārsniegtu kopā
+    from io import BytesIO
+    mocker.patch('routes.generate.MAX_FILE_SIZE', 15)
+
+    # ACTION - augšupielādē divus failus, kas katrs ir zem limita
+    response = auth_client.post('/api/generate', data={
+        'material_type': 'test',
+        'title': 'Pārāk liels',
+        'files': [
+            (BytesIO(b'0123456789'), 'a.txt'),
+            (BytesIO(b'0123456789'), 'b.txt')
+        ]
+    }, content_type='multipart/form-data')
+
+    # ASSERT - pārbauda kļūdu
+    assert response.status_code == 413, "Statuss būtu jābūt 413"
+    assert 'error' in response.json, "Atbildē jābūt 'error'"
+
+
+def test_09_generate_salvages_partial_response(auth_client, test_db, mocker):
+    """
+    Nr: 9
+    Testējamā funkcionalitāte: Daļēji nederīgas Claude atbildes saglabāšana
+    Sagaidamais rezultāts: Derīgie jautājumi tiek saglabāti, nederīgie norādīti atskaitē
+    """
+    # SETUP - mock Claude API ar vienu nederīgu jautājumu
+    mock_client = Mock()
+    mock_client.generate_test = Mock(return_value={
+        "assignments": [{
+            "title": "Uzdevums",
+            "description": "Apraksts",
+            "max_points": 5,
+            "questions": [
+                {
+                    "question_text": "Derīgs jautājums?",
+                    "question_type": "short_answer",
+                    "correct_answer": "Atbilde",
+                    "points": 5
+                },
+                {
+                    "question_text": "Jautājums bez atbildes?",
+                    "question_type": "short_answer",
+                    "points": 5
+                }
+            ]
+        }]
+    })
+    mocker.patch('routes.generate.get_claude_client', return_value=mock_client)
+
+    # ACTION - ģenerē testu
+    response = auth_client.post('/api/generate', data={
+        'material_type': 'test',
+        'title': 'Daļējs tests',
+        'content': 'Saturs par tēmu. ' * 20
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 201, "Statuss būtu jābūt 201"
+    dropped = response.json['parse_report']['dropped']
+    assert [part['path'] for part in dropped] == ['$.assignments[0].questions[1]'], \
+        "Nederīgajam jautājumam jābūt atskaitē"
+
+    # DB CHECK - pārbauda datu bāzi
+    test = Test.query.get(response.json['id'])
+    assert len(test.assignments[0].questions) == 1, "Jāsaglabā tikai derīgais jautājums"
+
+
+def test_10_generate_saves_full_tree(auth_client, test_db, mocker):
+    """
+    Nr: 10
+    Testējamā funkcionalitāte: Ģenerēta testa koka saglabāšana ar vienu vaicājumu katram līmenim
+    Sagaidamais rezultāts: Visi uzdevumi, jautājumi un atbilžu varianti saglabāti pie pareizajiem vecākiem
+    """
+    # SETUP - mock Claude API ar diviem uzdevumiem
+    mock_client = Mock()
+    mock_client.generate_test = Mock(return_value={
+        "assignments": [
+            {
+                "title": f"{a}. uzdevums",
+                "description": "Apraksts",
+                "max_points": 6,
+                "questions": [
+                    {
+                        "question_text": f"Jautājums {a}.{q}?",
+                        "question_type": "multiple_choice",
+                        "correct_answer": "A",
+                        "points": 2,
+                        "options": [
+                            {"option_text": f"Variants {a}.{q}.{o}", "is_correct": o == 1}
+                            for o in range(1, 4)
+                        ]
+                    }
+                    for q in range(1, 4)
+                ]
+            }
+            for a in range(1, 3)
+        ]
+    })
+    mocker.patch('routes.generate.get_claude_client', return_value=mock_client)
+
+    # ACTION - ģenerē testu
+    response = auth_client.post('/api/generate', data={
+        'material_type': 'test',
+        'title': 'Koka tests',
+        'content': 'Saturs par tēmu. ' * 20
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 201, "Statuss būtu jābūt 201"
+
+    # DB CHECK - pārbauda datu bāzi
+    test = Test.query.get(response.json['id'])
+    assert [a.title for a in test.assignments] == ['1. uzdevums', '2. uzdevums'], "Uzdevumiem jābūt secībā"
+    for a, assignment in enumerate(test.assignments, start=1):
+        assert [q.question_text for q in assignment.questions] == \
+            [f"Jautājums {a}.{q}?" for q in range(1, 4)], "Jautājumiem jābūt pie sava uzdevuma"
+        for q, question in enumerate(assignment.questions, start=1):
+            options = sorted(question.options, key=lambda option: option.order_number)
+            assert [o.option_text for o in options] == \
+                [f"Variants {a}.{q}.{o}" for o in range(1, 4)], "Variantiem jābūt pie sava jautājuma"
+            assert [o.is_correct for o in options] == [True, False, False], "Pareizajam variantam jāsakrīt"
@@ -1,9 +1,11 @@
 """
 MODUĻA 4: Vēstures testi
-5 testi materiālu saraksta skatīšanai, ielādei un dzēšanai
+15 testi materiālu saraksta skatīšanai, ielādei un dzēšanai
 """
 import pytest
-from models import Test, StudyMaterial, User
+from datetime import datetime, timedelta
+from werkzeug.http import http_date
+from models import Test, StudyMaterial, User, Assignment, Question, QuestionOption
 from extensions import db, bcrypt
 
 
@@ -113,3 +115,362 @@ def test_05_access_other_user(app, test_db, client, test_test_material):
     assert 'error' in response.json, "Atbildē jābūt 'error'"
     assert 'not found' in response.json['error'].lower(), \
         "Kļūdas ziņojumā jābūt informācijai ka materiāls nav atrasts"
+
+
+def test_06_material_not_modified(app, auth_client, test_test_material, count_queries):
+    """
+    Nr: 6
+    Testējamā funkcionalitāte: Nosacījuma pieprasījums materiālam ar ETag un Last-Modified
+    Sagaidamais rezultāts: Nemainītam materiālam 304 bez koka ielādes, pēc izmaiņām jauns ETag,
+    Last-Modified tikai izmaiņām, kuru sekunde ir beigusies
+    """
+    url = f'/api/materials/{test_test_material["test_id"]}?type=test'
+
+    # SETUP - pirmā ielāde tūlīt pēc izveides
+    first = auth_client.get(url)
+    etag = first.headers['ETag']
+    assert 'Last-Modified' not in first.headers, "Tikko mainītam materiālam nedrīkst būt Last-Modified"
+
+    response = auth_client.get(url, headers={'If-Modified-Since': http_date(datetime.utcnow())})
+    assert response.status_code == 200, "Tikko mainītam materiālam If-Modified-Since jāignorē"
+
+    # SETUP - izmaiņas sekunde ir beigusies
+    with app.app_context():
+        test = db.session.get(Test, test_test_material['test_id'])
+        test.updated_at = datetime.utcnow() - timedelta(seconds=2)
+        db.session.commit()
+    first = auth_client.get(url)
+    assert first.headers['ETag'] == etag, "ETag nedrīkst mainīties"
+    assert first.headers['Last-Modified'], "Atbildē jābūt Last-Modified"
+
+    # ACTION - atkārtots pieprasījums ar ETag, skaitot SQL vaicājumus
+    with count_queries() as statements:
+        response = auth_client.get(url, headers={'If-None-Match': etag})
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 304, "Statuss būtu jābūt 304"
+    assert response.headers['ETag'] == etag, "ETag jāsakrīt"
+    assert not any('assignments' in statement for statement in statements), "Koku nedrīkst ielādēt"
+
+    response = auth_client.get(url, headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert response.status_code == 304, "Statuss būtu jābūt 304 pēc Last-Modified"
+
+    # ACTION - maina materiālu
+    auth_client.patch(f'/api/materials/{test_test_material["test_id"]}', json={'type': 'test', 'title': 'Jauns'})
+    response = auth_client.get(url, headers={'If-None-Match': etag})
+
+    # ASSERT - pārbauda ka atgriezta jaunā versija
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.headers['ETag'] != etag, "ETag jāmainās"
+    assert response.json['title'] == 'Jauns', "Jāatgriež jaunā versija"
+
+
+def test_07_materials_list_not_modified(auth_client, test_test_material, test_study_material):
+    """
+    Nr: 7
+    Testējamā funkcionalitāte: Nosacījuma pieprasījums materiālu sarakstam
+    Sagaidamais rezultāts: Nemainītam sarakstam 304, pēc dzēšanas 200 ar jaunu sarakstu
+    """
+    # SETUP - pirmā ielāde
+    etag = auth_client.get('/api/materials').headers['ETag']
+
+    # ACTION - atkārtots pieprasījums
+    response = auth_client.get('/api/materials', headers={'If-None-Match': etag})
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 304, "Statuss būtu jābūt 304"
+
+    # ACTION - dzēš materiālu
+    auth_client.delete(f'/api/materials/{test_study_material["material_id"]}?type=study_material')
+    response = auth_client.get('/api/materials', headers={'If-None-Match': etag})
+
+    # ASSERT - pārbauda ka saraksts mainījies
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert len(response.json['materials']) == 1, "Sarakstā jābūt 1 materiālam"
+
+
+def test_08_load_material_query_count(auth_client, test_test_material, count_queries):
+    """
+    Nr: 8
+    Testējamā funkcionalitāte: Testa koka ielāde ar nemainīgu vaicājumu skaitu
+    Sagaidamais rezultāts: Lielāka testa ielāde un eksports izpilda tikpat daudz vaicājumu kā mazam testam
+    """
+    test_id = test_test_material['test_id']
+    urls = [f'/api/materials/{test_id}?type=test', f'/api/export/pdf/{test_id}?type=test',
+            f'/api/export/docx/{test_id}?type=test']
+
+    # SETUP - pirmā atvēršana dienā ieraksta piekļuves laiku
+    auth_client.get(urls[0])
+
+    # SETUP - vaicājumu skaits mazam testam
+    small = []
+    for url in urls:
+        with count_queries() as statements:
+            assert auth_client.get(url).status_code == 200, "Statuss būtu jābūt 200"
+        small.append(len(statements))
+
+    # SETUP - pievieno uzdevumus ar jautājumiem un variantiem
+    for a in range(3):
+        assignment = Assignment(test_id=test_id, title=f'Uzdevums {a}', order_number=a + 2)
+        db.session.add(assignment)
+        db.session.flush()
+        for q in range(4):
+            question = Question(assignment_id=assignment.id, question_text=f'Jautājums {q}?',
+                                question_type='multiple_choice', correct_answer='A', order_number=q + 1)
+            db.session.add(question)
+            db.session.flush()
+            db.session.add_all([
+                QuestionOption(question_id=question.id, option_text=f'Variants {o}', order_number=o + 1)
+                for o in range(3)
+            ])
+    db.session.commit()
+
+    # ACTION - ielādē lielāko testu
+    large = []
+    for url in urls:
+        with count_queries() as statements:
+            auth_client.get(url)
+        large.append(len(statements))
+
+    # ASSERT - pārbauda rezultātu
+    assert large == small, f"Vaicājumu skaitam jābūt nemainīgam: {small} -> {large}"
+    assert small[0] <= 5, f"GET jāizpilda ne vairāk kā 5 vaicājumi: {small[0]}"
+    assert len(auth_client.get(urls[0]).json['assignments']) == 4, "Jābūt 4 uzdevumiem"
+
+
+def test_09_materials_list_query_count(auth_client, test_test_material, test_study_material, test_user,
+                                       count_queries):
+    """
+    Nr: 9
+    Testējamā funkcionalitāte: Materiālu saraksts ar apkopojošiem vaicājumiem
+    Sagaidamais rezultāts: Saraksts satur pareizus skaitus un vaicājumu skaits nav atkarīgs no testu skaita
+    """
+    # SETUP - vaicājumu skaits ar vienu testu
+    with count_queries() as statements:
+        assert auth_client.get('/api/materials').status_code == 200, "Statuss būtu jābūt 200"
+    small = len(statements)
+
+    # SETUP - pievieno testus ar uzdevumiem un jautājumiem
+    for t in range(5):
+        test = Test(title=f'Tests {t}', user_id=test_user['id'])
+        db.session.add(test)
+        db.session.flush()
+        for a in range(2):
+            assignment = Assignment(test_id=test.id, title=f'Uzdevums {a}', order_number=a + 1)
+            db.session.add(assignment)
+            db.session.flush()
+            db.session.add_all([
+                Question(assignment_id=assignment.id, question_text=f'Jautājums {q}?',
+                         question_type='short_answer', correct_answer='A', order_number=q + 1)
+                for q in range(3)
+            ])
+    db.session.commit()
+
+    # ACTION - iegūst materiālu sarakstu
+    with count_queries() as statements:
+        response = auth_client.get('/api/materials')
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert len(statements) == small, f"Vaicājumu skaitam jābūt nemainīgam: {small} -> {len(statements)}"
+
+    tests = {m['title']: m for m in response.json['materials'] if m['type'] == 'test'}
+    assert tests['Tests 0']['assignments_count'] == 2, "Testam jābūt 2 uzdevumiem"
+    assert tests['Tests 0']['total_questions'] == 6, "Testam jābūt 6 jautājumiem"
+    assert tests['Test materiāls']['assignments_count'] == 1, "Fikstūras testam jābūt 1 uzdevumam"
+    assert tests['Test materiāls']['total_questions'] == 1, "Fikstūras testam jābūt 1 jautājumam"
+
+
+def test_10_materials_list_pagination(auth_client, test_user):
+    """
+    Nr: 10
+    Testējamā funkcionalitāte: Materiālu saraksta lapošana ar kursoru
+    Sagaidamais rezultāts: Lapas satur katru materiālu tieši vienu reizi, jaunākos vispirms
+    """
+    # SETUP - testi un mācību materiāli, daļai vienāds izveides laiks
+    created = datetime(2025, 3, 1, 12, 0)
+    for i in range(4):
+        db.session.add(Test(title=f'Tests {i}', user_id=test_user['id'], created_at=created + timedelta(hours=i)))
+        db.session.add(StudyMaterial(title=f'Materiāls {i}', user_id=test_user['id'], content='{"terms": []}',
+                                     created_at=created + timedelta(hours=i // 2)))
+    db.session.commit()
+
+    # ACTION - iegūst visas lapas pa 3 materiāliem
+    pages = []
+    cursor = None
+    while True:
+        url = '/api/materials?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        response = auth_client.get(url)
+        assert response.status_code == 200, "Statuss būtu jābūt 200"
+        pages.append(response.json['materials'])
+        cursor = response.json['next_cursor']
+        if not response.json['has_more']:
+            break
+
+    # ASSERT - pārbauda rezultātu
+    listed = [(m['type'], m['id']) for page in pages for m in page]
+    assert [len(page) for page in pages] == [3, 3, 2], "Jābūt 3 lapām ar 3, 3 un 2 materiāliem"
+    assert len(set(listed)) == 8, "Katram materiālam jābūt sarakstā tieši vienu reizi"
+
+    dates = [m['created_at'] for page in pages for m in page]
+    assert dates == sorted(dates, reverse=True), "Materiāliem jābūt sakārtotiem no jaunākā"
+    assert cursor is None, "Pēdējai lapai nav nākamā kursora"
+
+
+def test_11_materials_list_filters(auth_client, test_user):
+    """
+    Nr: 11
+    Testējamā funkcionalitāte: Materiālu saraksta filtri pēc tipa, nosaukuma un datuma
+    Sagaidamais rezultāts: Tiek atgriezti tikai atbilstošie materiāli, nederīgi parametri atgriež 400
+    """
+    # SETUP - materiāli dažādos datumos
+    db.session.add_all([
+        Test(title='Fizika 1', user_id=test_user['id'], created_at=datetime(2025, 1, 10, 9, 0)),
+        Test(title='Ķīmija', user_id=test_user['id'], created_at=datetime(2025, 2, 10, 9, 0)),
+        StudyMaterial(title='Fizika 2', user_id=test_user['id'], content='{"terms": []}',
+                      created_at=datetime(2025, 2, 20, 18, 30)),
+        StudyMaterial(title='100% vēsture', user_id=test_user['id'], content='{"terms": []}',
+                      created_at=datetime(2025, 3, 1, 9, 0))
+    ])
+    db.session.commit()
+
+    def titles(query):
+        response = auth_client.get(f'/api/materials?{query}')
+        assert response.status_code == 200, f"Statuss būtu jābūt 200: {query}"
+        return [m['title'] for m in response.json['materials']]
+
+    # ACTION & ASSERT - filtri
+    assert titles('type=test') == ['Ķīmija', 'Fizika 1'], "Jābūt tikai testiem"
+    assert titles('title=fizika') == ['Fizika 2', 'Fizika 1'], "Jābūt materiāliem ar 'fizika' nosaukumā"
+    assert titles('title=%25') == ['100% vēsture'], "Procentu zīmei jābūt parastam simbolam"
+    assert titles('created_from=2025-02-01&created_to=2025-02-20') == ['Fizika 2', 'Ķīmija'], \
+        "Beigu datumam jāiekļauj visa diena"
+    assert titles('type=study_material&created_to=2025-02-28') == ['Fizika 2'], "Filtriem jādarbojas kopā"
+
+    # ACTION & ASSERT - nederīgi parametri
+    for query in ('type=quiz', 'cursor=abc', 'created_from=vakar', 'limit=0', 'limit=500'):
+        response = auth_client.get(f'/api/materials?{query}')
+        assert response.status_code == 400, f"Statuss būtu jābūt 400: {query}"
+
+
+def test_12_materials_list_without_content(auth_client, test_study_material, count_queries):
+    """
+    Nr: 12
+    Testējamā funkcionalitāte: Mācību materiāla terminu skaits un kopsavilkuma priekšskatījums sarakstā
+    Sagaidamais rezultāts: Saraksts nelasa saturu, saglabātās kolonnas atjaunojas pēc PUT un PATCH
+    """
+    material_id = test_study_material['material_id']
+    url = f'/api/materials/{material_id}?type=study_material'
+
+    # SETUP - atjauno saturu ar PUT un PATCH
+    auth_client.put(url, json={'type': 'study_material', 'content': {'summary': '<p>Kopsavilkums</p>', 'terms': []}})
+    response = auth_client.patch(url, json={'type': 'study_material', 'content': {
+        'summary': '<h2>Fotosintēze</h2><p>Augi ražo <b>glikozi</b>.</p>',
+        'terms': [{'name': 'Hlorofils', 'definition': '-'}, {'name': 'Glikoze', 'definition': '-'}]
+    }})
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+
+    # ACTION - iegūst materiālu sarakstu
+    with count_queries() as statements:
+        response = auth_client.get('/api/materials')
+
+    # ASSERT - pārbauda rezultātu
+    material = response.json['materials'][0]
+    assert material['terms_count'] == 2, "Terminu skaitam jābūt 2"
+    assert material['summary_preview'] == 'Fotosintēze Augi ražo glikozi.', "Priekšskatījumam jābūt tīram tekstam"
+    assert not any('study_materials.content' in statement for statement in statements), \
+        "Saraksts nedrīkst lasīt saturu"
+
+
+def test_13_delete_test_single_statement(auth_client, test_test_material, count_queries):
+    """
+    Nr: 13
+    Testējamā funkcionalitāte: Testa dzēšana ar datu bāzes kaskādi
+    Sagaidamais rezultāts: Viens DELETE vaicājums, uzdevumi, jautājumi un varianti izdzēsti bez ielādes
+    """
+    # ACTION - dzēš testu
+    with count_queries() as statements:
+        response = auth_client.delete(f'/api/materials/{test_test_material["test_id"]}?type=test')
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert [s.split()[0] for s in statements] == ['DELETE'], f"Jābūt tikai vienam DELETE vaicājumam: {statements}"
+
+    # DB CHECK - bērnu rindas izdzēstas kaskādē
+    assert Assignment.query.count() == 0, "Uzdevumiem jābūt dzēstiem"
+    assert Question.query.count() == 0, "Jautājumiem jābūt dzēstiem"
+    assert QuestionOption.query.count() == 0, "Variantiem jābūt dzēstiem"
+
+    # ACTION & ASSERT - atkārtota dzēšana
+    response = auth_client.delete(f'/api/materials/{test_test_material["test_id"]}?type=test')
+    assert response.status_code == 404, "Statuss būtu jābūt 404"
+
+
+def test_14_bulk_delete_materials(app, auth_client, test_test_material, test_study_material):
+    """
+    Nr: 14
+    Testējamā funkcionalitāte: Vairāku materiālu dzēšana vienā pieprasījumā
+    Sagaidamais rezultāts: Dzēsti tikai lietotāja materiāli, citu lietotāju materiāli paliek un tiek atzīmēti kā neatrasti
+    """
+    # SETUP - cita lietotāja tests
+    other = User(email='cits@test.lv', password_hash='-')
+    db.session.add(other)
+    db.session.flush()
+    other_test = Test(title='Cita tests', user_id=other.id)
+    db.session.add(other_test)
+    db.session.commit()
+    other_test_id = other_test.id
+
+    # ACTION - dzēš materiālus
+    response = auth_client.delete('/api/materials', json={'materials': [
+        {'id': test_test_material['test_id'], 'type': 'test'},
+        {'id': test_study_material['material_id'], 'type': 'study_material'},
+        {'id': other_test_id, 'type': 'test'}
+    ]})
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.json['deleted'] == {
+        'test': [test_test_material['test_id']],
+        'study_material': [test_study_material['material_id']]
+    }, "Jābūt dzēstiem abiem lietotāja materiāliem"
+    assert response.json['not_found'] == [{'id': other_test_id, 'type': 'test'}], "Cita lietotāja testam jābūt neatrastam"
+
+    # DB CHECK - pārbauda datu bāzi
+    assert db.session.get(Test, other_test_id) is not None, "Cita lietotāja testam jāpaliek"
+    assert Question.query.count() == 0, "Dzēstā testa jautājumiem jābūt dzēstiem"
+
+    # ACTION & ASSERT - nederīgi pieprasījumi
+    assert auth_client.delete('/api/materials', json={'materials': []}).status_code == 400, "Tukšs saraksts"
+    assert auth_client.delete('/api/materials', json={'materials': [{'id': 1, 'type': 'x'}]}).status_code == 400, \
+        "Nederīgs tips"
+
+
+def test_15_reused_id_not_cached(app, auth_client, test_user, test_study_material):
+    """
+    Nr: 15
+    Testējamā funkcionalitāte: Nosacījuma pieprasījums pēc materiāla dzēšanas, kad SQLite atkārtoti izmanto ID
+    Sagaidamais rezultāts: Jaunam materiālam ar to pašu ID un versiju netiek atgriezts 304, atbildē ir Vary: Cookie
+    """
+    material_id = test_study_material['material_id']
+    url = f'/api/materials/{material_id}?type=study_material'
+
+    # SETUP - ielādē materiālu un to dzēš
+    first = auth_client.get(url)
+    etag = first.headers['ETag']
+    assert 'Cookie' in first.headers['Vary'], "Atbildei jābūt atkarīgai no sesijas sīkdatnes"
+    auth_client.delete(url)
+
+    # ACTION - izveido jaunu materiālu, kas saņem to pašu ID
+    with app.app_context():
+        material = StudyMaterial(user_id=test_user['id'], title='Cits materiāls')
+        material.content_data = {'summary': '<p>Cits saturs</p>', 'terms': []}
+        db.session.add(material)
+        db.session.commit()
+        assert material.id == material_id, "SQLite jāpiešķir tas pats ID"
+
+    response = auth_client.get(url, headers={'If-None-Match': etag})
+
+    # ASSERT - pārbauda ka atgriezts jaunais materiāls
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+    assert response.json['title'] == 'Cits materiāls', "Jāatgriež jaunais materiāls"
@@ -0,0 +1,66 @@
+"""
+MODUĻA 9: JSON kodeka testi
+2 testi JSON kodēšanai ar dažādām bibliotēkām
+"""
+import pytest
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from json_codec import available_codecs
+from models import StudyMaterial
+
+
+class Points:
+    """Tips, ko neviens kodeks nepazīst"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+@pytest.mark.parametrize('codec', available_codecs(), ids=lambda codec: codec.name)
+def test_01_codecs_roundtrip(codec):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Visu pieejamo JSON bibliotēku saderība
+    Sagaidamais rezultāts: Dati ar latviešu burtiem tiek kodēti un atkodēti bez izmaiņām
+    """
+    # SETUP - dati ar latviešu burtiem
+    data = {'summary': 'Ūdens cikls ir ļoti svarīgs', 'terms': [{'name': 'Ģeogrāfija', 'points': 2.5}]}
+
+    # ACTION - kodē un atkodē
+    encoded = codec.dumps(data)
+
+    # ASSERT - pārbauda rezultātu
+    assert 'Ūdens' in encoded, "Latviešu burtiem jāsaglabājas bez aizvietošanas"
+    assert codec.loads(encoded) == data, "Datiem jāsakrīt pēc atkodēšanas"
+    assert codec.loads(codec.dumps_bytes(data)) == data, "Baitu versijai jāsakrīt"
+    assert codec.dumps({'points': Points(3)}, default=lambda value: value.value) == '{"points":3}', \
+        "Nezināmiem tipiem jāiet caur default funkciju"
+    dated = codec.loads(codec.dumps({'at': [datetime(2025, 1, 2)]}, default=DefaultJSONProvider.default))
+    if codec.name == 'msgspec':
+        assert dated == {'at': ['2025-01-02T00:00:00']}, "msgspec datumus kodē pats RFC 3339 formātā"
+    else:
+        assert dated == {'at': ['Thu, 02 Jan 2025 00:00:00 GMT']}, "Datumiem jāiet caur Flask default funkciju"
+
+
+def test_02_study_material_content_data(auth_client, test_study_material, app):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Mācību materiāla satura saglabāšana caur kodeku
+    Sagaidamais rezultāts: Saturs tiek saglabāts un atgriezts API atbildē bez izmaiņām
+    """
+    # ACTION - atjaunina saturu
+    content = {'summary': 'Jauns kopsavilkums ar garumzīmēm: ā, č, ē', 'terms': []}
+    response = auth_client.put(f'/api/materials/{test_study_material["material_id"]}', json={
+        'type': 'study_material',
+        'content': content
+    })
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Statuss būtu jābūt 200"
+
+    response = auth_client.get(f'/api/materials/{test_study_material["material_id"]}?type=study_material')
+    assert response.json['content'] == content, "Saturam jāsakrīt"
+
+    with app.app_context():
+        material = StudyMaterial.query.get(test_study_material['material_id'])
+        assert material.content_data == content, "content_data jāatgriež atkodēts saturs"
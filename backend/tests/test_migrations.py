@@ -0,0 +1,272 @@
+"""
+MODUĻA 10: Migrāciju testi
+8 testi shēmas migrācijām un indeksu izmantošanai
+"""
+import json
+import pytest
+from sqlalchemy import create_engine, select, text, inspect
+from extensions import db
+from models import Test, StudyMaterial, Assignment, Question, QuestionOption
+import migrations
+from services.search_index import drop_search_index
+from services.cold_storage import TRIGGERS
+
+
+LONG_ANSWER = 'Šūna ir dzīvības pamatvienība, kurā notiek vielmaiņa. ' * 10
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """SQLite fails ar shēmu pirms migrācijām (bez versijām un indeksiem)"""
+    engine = create_engine(f'sqlite:///{tmp_path / "legacy.db"}')
+    db.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        drop_search_index(connection)
+        for trigger in TRIGGERS:
+            connection.execute(text(f'DROP TRIGGER {trigger}'))
+        connection.execute(text('DROP TABLE archived_materials'))
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(text(f'DROP INDEX {index.name}'))
+        for table in ('tests', 'study_materials'):
+            connection.execute(text(f'ALTER TABLE {table} DROP COLUMN version'))
+            connection.execute(text(f'ALTER TABLE {table} DROP COLUMN updated_at'))
+            connection.execute(text(f'ALTER TABLE {table} DROP COLUMN accessed_at'))
+            connection.execute(text(f'ALTER TABLE {table} DROP COLUMN archived_at'))
+        for column in ('terms_count', 'summary_preview'):
+            connection.execute(text(f'ALTER TABLE study_materials DROP COLUMN {column}'))
+        connection.execute(text('ALTER TABLE users DROP COLUMN shard'))
+
+        connection.execute(text(
+            "INSERT INTO users (id, email, password_hash, created_at) VALUES (1, 'a@a.lv', '-', '2025-01-01 10:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO tests (id, user_id, title, created_at) VALUES (1, 1, 'Vecs tests', '2025-01-02 10:00:00')"
+        ))
+        connection.execute(text(
+            "INSERT INTO assignments (id, test_id, title, order_number) VALUES (7, 99, 'Bāreņa uzdevums', 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO assignments (id, test_id, title, order_number) VALUES (1, 1, '1. uzdevums', 1)"
+        ))
+        connection.execute(
+            text("INSERT INTO questions (id, assignment_id, question_text, question_type, correct_answer, order_number) "
+                 "VALUES (1, 1, 'Apraksti šūnu', 'long_answer', :answer, 1), "
+                 "(2, 1, 'Vai šūnai ir kodols?', 'true_false', 'Patiess', 2)"),
+            {'answer': LONG_ANSWER}
+        )
+        connection.execute(
+            text("INSERT INTO study_materials (id, user_id, title, content, created_at) "
+                 "VALUES (1, 1, 'Vecs materiāls', :content, '2025-01-03 10:00:00')"),
+            {'content': json.dumps({
+                'summary': '<h2>Ievads</h2><p>Šūna ir dzīvības<br>pamatvienība.</p>',
+                'terms': [{'name': 'Šūna', 'definition': '-'}, {'name': 'Kodols', 'definition': '-'}]
+            })}
+        )
+
+    yield engine
+    engine.dispose()
+
+
+def _query_plan(engine, statement):
+    """EXPLAIN QUERY PLAN for ORM statement as one string"""
+    sql = str(statement.compile(engine, compile_kwargs={'literal_binds': True}))
+    with engine.connect() as connection:
+        return '\n'.join(row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+
+
+def test_01_upgrade_existing_database(legacy_engine):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Migrāciju pielietošana esošai datu bāzei
+    Sagaidamais rezultāts: Pievienotas kolonnas un indeksi, dati saglabāti, atkārtota palaišana neko nemaina
+    """
+    # ACTION - pielieto migrācijas
+    applied = migrations.upgrade(legacy_engine)
+
+    # ASSERT - pārbauda rezultātu
+    assert [version for version, _ in applied] == [version for version, _, _ in migrations.load_migrations()], \
+        "Jāpielieto visas migrācijas"
+
+    inspector = inspect(legacy_engine)
+    assert {'version', 'updated_at'} <= {c['name'] for c in inspector.get_columns('tests')}, "Jābūt jaunajām kolonnām"
+    assert 'shard' in {c['name'] for c in inspector.get_columns('users')}, "Jābūt šarda kolonnai"
+    assert 'ix_tests_user_id_created_at' in {i['name'] for i in inspector.get_indexes('tests')}, "Jābūt indeksam"
+    assert 'ix_questions_assignment_id' in {i['name'] for i in inspector.get_indexes('questions')}, "Jābūt indeksam"
+
+    # DB CHECK - esošie dati saglabāti
+    with legacy_engine.connect() as connection:
+        row = connection.execute(text('SELECT title, version, updated_at, created_at FROM tests')).one()
+    assert row.title == 'Vecs tests', "Datiem jāsaglabājas"
+    assert row.version == 1, "Versijai jābūt 1"
+    assert row.updated_at == row.created_at, "updated_at jābūt aizpildītam"
+
+    assert migrations.upgrade(legacy_engine) == [], "Atkārtoti nekas nav jāpielieto"
+
+
+def test_02_stamp_new_database(tmp_path):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Jaunas datu bāzes atzīmēšana kā aktuālas
+    Sagaidamais rezultāts: Pēc create_all un stamp nav neviena nepielietota migrācija
+    """
+    # SETUP - jauna datu bāze
+    engine = create_engine(f'sqlite:///{tmp_path / "new.db"}')
+    db.metadata.create_all(engine)
+
+    # ACTION - atzīmē migrācijas
+    migrations.stamp(engine)
+
+    # ASSERT - pārbauda rezultātu
+    assert migrations.upgrade(engine) == [], "Nevienai migrācijai nav jābūt nepielietotai"
+    engine.dispose()
+
+
+def test_03_query_plans_use_indexes(legacy_engine):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Indeksu izmantošana saraksta un testa koka vaicājumos
+    Sagaidamais rezultāts: EXPLAIN QUERY PLAN rāda indeksu meklēšanu bez pilnas tabulas pārlases un kārtošanas
+    """
+    # SETUP - pielieto migrācijas
+    migrations.upgrade(legacy_engine)
+
+    # ACTION - iegūst vaicājumu plānus
+    plans = {
+        model.__tablename__: _query_plan(
+            legacy_engine,
+            select(model).where(model.user_id == 1).order_by(model.created_at.desc())
+        )
+        for model in (Test, StudyMaterial)
+    }
+    tree_plan = _query_plan(
+        legacy_engine,
+        select(Assignment.id, Question.id, QuestionOption.id)
+        .select_from(Assignment)
+        .outerjoin(Question, Question.assignment_id == Assignment.id)
+        .outerjoin(QuestionOption, QuestionOption.question_id == Question.id)
+        .where(Assignment.test_id == 1)
+    )
+
+    # ASSERT - pārbauda rezultātu
+    for table, plan in plans.items():
+        assert f'USING INDEX ix_{table}_user_id_created_at' in plan, f"Sarakstam jāizmanto indekss: {plan}"
+        assert 'TEMP B-TREE' not in plan, f"Kārtošanai jāizmanto indekss: {plan}"
+
+    for index in ('ix_assignments_test_id', 'ix_questions_assignment_id', 'ix_question_options_question_id'):
+        assert index in tree_plan, f"Koka vaicājumam jāizmanto {index}: {tree_plan}"
+    assert 'SCAN' not in tree_plan, f"Koka vaicājumā nedrīkst būt pilnas pārlases: {tree_plan}"
+
+
+def test_04_backfill_listing_columns(legacy_engine):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Saraksta kolonnu aizpildīšana esošiem mācību materiāliem
+    Sagaidamais rezultāts: terms_count un summary_preview aprēķināti no satura
+    """
+    # ACTION - pielieto migrācijas
+    migrations.upgrade(legacy_engine)
+
+    # ASSERT - pārbauda rezultātu
+    with legacy_engine.connect() as connection:
+        row = connection.execute(text('SELECT terms_count, summary_preview FROM study_materials')).one()
+    assert row.terms_count == 2, "Jābūt 2 terminiem"
+    assert row.summary_preview == 'Ievads Šūna ir dzīvības pamatvienība.', "Priekšskatījumam jābūt tīram tekstam"
+
+
+def test_05_remove_orphan_rows(legacy_engine):
+    """
+    Nr: 5
+    Testējamā funkcionalitāte: Bāreņu rindu dzēšana pirms ārējo atslēgu ieslēgšanas
+    Sagaidamais rezultāts: Uzdevums bez testa izdzēsts, ārējo atslēgu pārbaude neatrod kļūdas
+    """
+    # ACTION - pielieto migrācijas
+    migrations.upgrade(legacy_engine)
+
+    # ASSERT - pārbauda rezultātu
+    with legacy_engine.connect() as connection:
+        assert connection.execute(text('SELECT id FROM assignments')).scalars().all() == [1], \
+            "Bāreņa uzdevumam jābūt dzēstam"
+        assert connection.execute(text('PRAGMA foreign_key_check')).all() == [], "Nedrīkst būt ārējo atslēgu kļūdu"
+        assert connection.execute(text('SELECT count(*) FROM tests')).scalar() == 1, "Testam jāpaliek"
+
+
+def test_06_build_search_index(legacy_engine):
+    """
+    Nr: 6
+    Testējamā funkcionalitāte: Meklēšanas indeksa izveide un aizpildīšana esošai datu bāzei
+    Sagaidamais rezultāts: Indeksā ir esošie virsraksti un kopsavilkumi, jauni testi tiek indeksēti ar trigeriem
+    """
+    # ACTION - pielieto migrācijas un pievieno jaunu testu
+    migrations.upgrade(legacy_engine)
+    with legacy_engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO tests (id, user_id, title, created_at, version, updated_at) "
+            "VALUES (2, 1, 'Jauns tests', '2025-01-04 10:00:00', 1, '2025-01-04 10:00:00')"
+        ))
+
+    # ASSERT - pārbauda rezultātu
+    with legacy_engine.connect() as connection:
+        def matches(query):
+            return connection.execute(
+                text("SELECT material_type, material_id FROM search_index WHERE search_index MATCH :query "
+                     "ORDER BY material_type, material_id"),
+                {'query': query}
+            ).all()
+
+        assert matches('vecs') == [('study_material', 1), ('test', 1)], "Jāatrod esošie materiāli"
+        assert matches('pamatvieniba') == [('study_material', 1)], "Kopsavilkums jāindeksē bez HTML un diakritikas"
+        assert matches('kodols') == [('study_material', 1), ('test', 1)], "Jāindeksē termini un jautājumi"
+        assert matches('jauns') == [('test', 2)], "Jaunam testam jātiek indeksētam ar trigeri"
+
+
+def test_07_compress_long_texts(legacy_engine):
+    """
+    Nr: 7
+    Testējamā funkcionalitāte: Esošo garo tekstu saspiešana
+    Sagaidamais rezultāts: Gara atbilde saglabāta saspiesta, īsa paliek teksts, ORM nolasa sākotnējo tekstu
+    """
+    # ACTION - pielieto migrācijas
+    migrations.upgrade(legacy_engine)
+
+    # ASSERT - pārbauda rezultātu
+    with legacy_engine.connect() as connection:
+        stored = dict(connection.execute(
+            text('SELECT id, typeof(correct_answer) FROM questions ORDER BY id')
+        ).all())
+        assert stored == {1: 'blob', 2: 'text'}, f"Jāsaspiež tikai garā atbilde: {stored}"
+
+        answers = dict(connection.execute(select(Question.id, Question.correct_answer)).all())
+        assert answers == {1: LONG_ANSWER, 2: 'Patiess'}, "ORM jānolasa sākotnējais teksts"
+
+
+def test_08_add_cold_archive(legacy_engine):
+    """
+    Nr: 8
+    Testējamā funkcionalitāte: Arhīva tabulas un piekļuves kolonnu pievienošana esošai datu bāzei
+    Sagaidamais rezultāts: Pievienotas kolonnas un tabula, dzēšot arhivētu testu, trigeris dzēš arī arhīva ierakstu
+    """
+    # ACTION - pielieto migrācijas
+    migrations.upgrade(legacy_engine)
+
+    # ASSERT - pārbauda shēmu
+    inspector = inspect(legacy_engine)
+    for table in ('tests', 'study_materials'):
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        assert {'accessed_at', 'archived_at'} <= columns, f"{table} jābūt piekļuves kolonnām"
+    assert inspector.has_table('archived_materials'), "Jābūt arhīva tabulai"
+
+    # ACTION - arhivē un dzēš testu
+    with legacy_engine.begin() as connection:
+        connection.execute(text("UPDATE tests SET archived_at = '2026-01-01 00:00:00' WHERE id = 1"))
+        connection.execute(text(
+            "INSERT INTO archived_materials (user_id, material_type, material_id, assignments_count, "
+            "total_questions, payload, archived_at) VALUES (1, 'test', 1, 1, 2, '{}', '2026-01-01 00:00:00')"
+        ))
+        connection.execute(text('DELETE FROM tests WHERE id = 1'))
+
+    # DB CHECK - arhīva ieraksts dzēsts
+    with legacy_engine.connect() as connection:
+        count = connection.execute(text('SELECT count(*) FROM archived_materials')).scalar()
+        assert count == 0, "Dzēsta testa arhīva ierakstam jābūt dzēstam"
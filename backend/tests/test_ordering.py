@@ -0,0 +1,147 @@
+"""
+MODUĻA 17: Kārtošanas testi
+3 testi uzdevumu un jautājumu pārvietošanai ar atstarpju kārtas numuriem
+"""
+from extensions import db
+from models import Test, Question
+from services.ordering import next_order_number, ORDER_GAP
+from services.tree_writer import insert_assignments
+
+
+def make_test(user_id, num_assignments, num_questions, title='Kārtošana'):
+    """Izveido testu ar blīviem kārtas numuriem 1, 2, 3, ..."""
+    test = Test(title=title, user_id=user_id)
+    db.session.add(test)
+    db.session.flush()
+    insert_assignments(test.id, [{
+        'title': f'Uzdevums {a + 1}',
+        'order_number': a + 1,
+        'questions': [{
+            'question_text': f'Jautājums {a + 1}.{q + 1}',
+            'question_type': 'short_answer',
+            'order_number': q + 1
+        } for q in range(num_questions)]
+    } for a in range(num_assignments)])
+    db.session.commit()
+    return test.id
+
+
+def question_order(client, test_id):
+    """Jautājumu teksti katrā uzdevumā GET atbildes secībā"""
+    data = client.get(f'/api/materials/{test_id}?type=test').get_json()
+    return [[q['question_text'] for q in a['questions']] for a in data['assignments']], data
+
+
+def test_01_move_question_updates_one_row(auth_client, test_user, app, count_queries):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Jautājuma pārvietošana ar atstarpju kārtas numuriem
+    Sagaidamais rezultāts: Pēc pārnumurēšanas nākamās pārvietošanas maina tikai vienu jautājuma rindu
+    """
+    # SETUP - tests ar 20 jautājumiem un blīviem numuriem
+    with app.app_context():
+        test_id = make_test(test_user['id'], 1, 20)
+    order, data = question_order(auth_client, test_id)
+    ids = {q['question_text']: q['id'] for q in data['assignments'][0]['questions']}
+
+    # ACTION - pirmā pārvietošana pārnumurē blīvos numurus, nākamās maina vienu rindu
+    first = auth_client.post(f'/api/materials/{test_id}/move', json={
+        'entity': 'question', 'id': ids['Jautājums 1.20'], 'after_id': ids['Jautājums 1.1']
+    })
+    with count_queries() as statements:
+        second = auth_client.post(f'/api/materials/{test_id}/move', json={
+            'entity': 'question', 'id': ids['Jautājums 1.19'], 'after_id': None
+        })
+
+    # ASSERT - pārbauda rezultātu
+    assert first.status_code == 200 and second.status_code == 200, "Statuss būtu jābūt 200"
+    assert first.get_json()['renumbered'] is True, "Blīviem numuriem jātiek pārnumurētiem"
+    assert second.get_json()['renumbered'] is False, "Otrajai pārvietošanai pietiek ar atstarpi"
+    question_updates = [s for s in statements if s.lstrip().upper().startswith('UPDATE QUESTIONS')]
+    assert len(question_updates) == 1, f"Jāmaina tikai viena jautājuma rinda: {question_updates}"
+
+    order, data = question_order(auth_client, test_id)
+    expected = [f'Jautājums 1.{n}' for n in (19, 1, 20, *range(2, 19))]
+    assert order == [expected], "Secībai jāatbilst pārvietošanām"
+    assert data['version'] == 3, "Katrai pārvietošanai jāmaina testa versija"
+
+
+def test_02_repeated_moves_and_parent_change(auth_client, test_user, app):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Atkārtota ievietošana vienā vietā un pārvietošana uz citu uzdevumu
+    Sagaidamais rezultāts: Atstarpes izsīkšana izraisa pārnumurēšanu, secība paliek pareiza,
+    jautājums pāriet uz citu uzdevumu
+    """
+    # SETUP - tests ar diviem uzdevumiem
+    with app.app_context():
+        test_id = make_test(test_user['id'], 2, 15)
+    _, data = question_order(auth_client, test_id)
+    first, second = data['assignments']
+    anchor = first['questions'][0]['id']
+
+    # ACTION - ievieto 14 jautājumus pēc pirmā, katru tieši aiz tā (atstarpe sašaurinās)
+    results = [
+        auth_client.post(f'/api/materials/{test_id}/move', json={
+            'entity': 'question', 'id': question['id'], 'after_id': anchor
+        }).get_json()
+        for question in first['questions'][1:]
+    ]
+    moved = auth_client.post(f'/api/materials/{test_id}/move', json={
+        'entity': 'question', 'id': second['questions'][0]['id'], 'after_id': None, 'assignment_id': first['id']
+    }).get_json()
+    swapped = auth_client.post(f'/api/materials/{test_id}/move', json={
+        'entity': 'assignment', 'id': second['id'], 'after_id': None
+    }).get_json()
+
+    # ASSERT - pārbauda rezultātu
+    assert sum(result['renumbered'] for result in results) >= 2, "Izsīkušai atstarpei jāizraisa pārnumurēšana"
+    assert moved['parent_id'] == first['id'], "Jautājumam jāpāriet uz pirmo uzdevumu"
+    assert swapped['success'] is True, "Uzdevumam jātiek pārvietotam"
+
+    order, data = question_order(auth_client, test_id)
+    assert [a['title'] for a in data['assignments']] == ['Uzdevums 2', 'Uzdevums 1'], "Uzdevumu secībai jāmainās"
+    assert order[1] == ['Jautājums 2.1', 'Jautājums 1.1'] + [f'Jautājums 1.{n}' for n in range(15, 1, -1)], \
+        "Katram ievietotajam jautājumam jābūt tieši aiz pirmā"
+    assert order[0] == [f'Jautājums 2.{n}' for n in range(2, 16)], "Otrā uzdevuma secībai jāpaliek"
+
+    # DB CHECK - nākamais numurs tiek nolasīts SQL
+    with app.app_context():
+        keys = [q.order_number for q in Question.query.filter_by(assignment_id=first['id'])]
+        assert next_order_number('question', first['id']) == max(keys) + ORDER_GAP, \
+            "Nākamajam numuram jābūt aiz lielākā"
+
+
+def test_03_move_rejects_rows_of_other_tests(auth_client, test_user, app):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Pārvietošana ar cita testa rindām vai nederīgiem datiem
+    Sagaidamais rezultāts: 400 vai 404 kļūda, kārtas numuri nemainās
+    """
+    # SETUP - divi testi
+    with app.app_context():
+        own = make_test(test_user['id'], 1, 2)
+        other = make_test(test_user['id'], 1, 1, title='Cits')
+    _, own_data = question_order(auth_client, own)
+    _, other_data = question_order(auth_client, other)
+    question = own_data['assignments'][0]['questions'][0]['id']
+
+    # ACTION - nederīgi pārvietošanas pieprasījumi
+    foreign_after = auth_client.post(f'/api/materials/{own}/move', json={
+        'entity': 'question', 'id': question, 'after_id': other_data['assignments'][0]['questions'][0]['id']
+    })
+    foreign_parent = auth_client.post(f'/api/materials/{own}/move', json={
+        'entity': 'question', 'id': question, 'assignment_id': other_data['assignments'][0]['id']
+    })
+    bad_entity = auth_client.post(f'/api/materials/{own}/move', json={'entity': 'option', 'id': question})
+    missing_test = auth_client.post('/api/materials/9999/move', json={'entity': 'question', 'id': question})
+
+    # ASSERT - pārbauda rezultātu
+    assert foreign_after.status_code == 400, "Cita testa jautājums nav derīgs kaimiņš"
+    assert foreign_parent.status_code == 400, "Cita testa uzdevums nav derīgs mērķis"
+    assert bad_entity.status_code == 400, "Variantus nevar pārvietot"
+    assert missing_test.status_code == 404, "Neeksistējošam testam jāatgriež 404"
+
+    # DB CHECK - numuri nav mainīti
+    with app.app_context():
+        assert Question.query.get(question).order_number == 1, "Kārtas numuram jāpaliek"
@@ -0,0 +1,194 @@
+"""
+MODUĻA 8: Parsera testi
+7 testi Claude atbilžu parsēšanai, validācijai un tīrīšanai
+"""
+import pytest
+from services.parser import CompiledTestValidator, validate_and_clean_test, salvage_test_response, ParserError
+from services.json_repair import TolerantJSONParser, parse_tolerant
+
+
+def make_question(**overrides):
+    """Derīgs jautājums ar iespēju mainīt laukus"""
+    question = {
+        'question_text': 'Jautājums?',
+        'question_type': 'multiple_choice',
+        'options': ['A', 'B'],
+        'correct_answer': 'B',
+        'points': 2
+    }
+    question.update(overrides)
+    return question
+
+
+def test_01_single_pass_cleans_data():
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Validācija un tīrīšana vienā piegājienā
+    Sagaidamais rezultāts: Tiek piešķirti kārtas numuri un atbilžu varianti pārvērsti objektos
+    """
+    # SETUP - derīga atbilde
+    data = {'assignments': [{
+        'title': 'Uzdevums',
+        'description': 'Apraksts',
+        'max_points': 4,
+        'questions': [make_question(), make_question(question_type='short_answer', options=None)]
+    }]}
+    del data['assignments'][0]['questions'][1]['options']
+
+    # ACTION - validē un tīra
+    result = validate_and_clean_test(data)
+
+    # ASSERT - pārbauda rezultātu
+    assignment = result['assignments'][0]
+    assert assignment['order_number'] == 1, "Uzdevumam jābūt kārtas numuram"
+    assert assignment['max_points'] == 4.0, "Punktiem jābūt float"
+    assert [q['order_number'] for q in assignment['questions']] == [1, 2], "Jautājumu numuriem jāsakrīt"
+    assert assignment['questions'][0]['options'] == [
+        {'option_text': 'A', 'is_correct': False},
+        {'option_text': 'B', 'is_correct': True}
+    ], "Variantiem jābūt objektiem ar pareizo atbildi"
+    assert assignment['questions'][1]['options'] == [], "Trūkstošiem variantiem jābūt tukšam sarakstam"
+
+
+def test_02_collects_all_errors_with_paths():
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Visu kļūdu savākšana ar JSON ceļiem
+    Sagaidamais rezultāts: ParserError satur katru kļūdu, nevis tikai pirmo
+    """
+    # SETUP - atbilde ar vairākām kļūdām
+    question_without_points = make_question()
+    del question_without_points['points']
+    data = {'assignments': [
+        {'title': 'Uzdevums', 'description': 'Apraksts', 'max_points': 'daudz',
+         'questions': [make_question(question_type='essay'), question_without_points]},
+        {'title': 'Uzdevums 2', 'description': 'Apraksts', 'max_points': 1,
+         'questions': [make_question(options=[])]}
+    ]}
+
+    # ACTION - validē atbildi
+    with pytest.raises(ParserError) as error:
+        validate_and_clean_test(data)
+
+    # ASSERT - pārbauda kļūdu ceļus
+    paths = [e['path'] for e in error.value.errors]
+    assert paths == [
+        '$.assignments[0].max_points',
+        '$.assignments[0].questions[0].question_type',
+        '$.assignments[0].questions[1]',
+        '$.assignments[1].questions[0].options'
+    ], "Jābūt visām kļūdām ar JSON ceļiem"
+
+
+def test_03_invalid_root():
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Nederīga atbildes sakne
+    Sagaidamais rezultāts: Tiek izmesta ParserError kļūda
+    """
+    # ACTION & ASSERT - pārbauda kļūdas
+    with pytest.raises(ParserError):
+        validate_and_clean_test([])
+
+    with pytest.raises(ParserError):
+        validate_and_clean_test({'assignments': []})
+
+
+def test_04_tolerant_parser_repairs_defects():
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Bojāta JSON labošana
+    Sagaidamais rezultāts: Tiek izlabotas liekās komatas, gudrās pēdiņas un markdown bloki
+    """
+    # SETUP - atbilde ar tipiskām kļūdām
+    text = '```json\n{“title”: “Tēma „Fotosintēze“”, "points": [1, 2,],}\n```'
+
+    # ACTION - parsē atbildi
+    result = parse_tolerant(text)
+
+    # ASSERT - pārbauda rezultātu
+    assert result.data == {'title': 'Tēma „Fotosintēze“', 'points': [1, 2]}, "Datiem jābūt izlabotiem"
+    assert result.repairs['trailing_comma'] == 2, "Jāatskaitās par liekajām komatām"
+    assert result.repairs['smart_quotes'] > 0, "Jāatskaitās par gudrajām pēdiņām"
+    assert result.dropped == [], "Nekas nedrīkst būt izmests"
+
+
+def test_05_tolerant_parser_salvages_truncated_output():
+    """
+    Nr: 5
+    Testējamā funkcionalitāte: Nepabeigtas atbildes parsēšana pa daļām
+    Sagaidamais rezultāts: Pabeigtie jautājumi tiek saglabāti, nepabeigtais tiek atzīmēts kā izmests
+    """
+    # SETUP - atbilde, kas nogriezta pēdējā jautājuma vidū
+    text = (
+        '{"assignments": [{"title": "A", "description": "B", "max_points": 3, "questions": ['
+        '{"question_text": "Q1", "question_type": "short_answer", "correct_answer": "X", "points": 1},'
+        '{"question_text": "Q2", "question_type": "multiple_choice", "options": ["a", "b'
+    )
+
+    # ACTION - padod tekstu pa 7 simboliem
+    parser = TolerantJSONParser()
+    for i in range(0, len(text), 7):
+        parser.feed(text[i:i + 7])
+    result = parser.close()
+
+    # ASSERT - pārbauda rezultātu
+    questions = result.data['assignments'][0]['questions']
+    assert [q['question_text'] for q in questions] == ['Q1'], "Jāsaglabā tikai pabeigtais jautājums"
+    assert result.dropped == [{'path': '$.assignments[0].questions[1]', 'reason': 'truncated'}], \
+        "Nepabeigtajam jautājumam jābūt atzīmētam"
+
+
+def test_06_salvage_drops_invalid_questions(mocker):
+    """
+    Nr: 6
+    Testējamā funkcionalitāte: Derīgo jautājumu saglabāšana
+    Sagaidamais rezultāts: Nederīgi jautājumi un tukši uzdevumi tiek izmesti, pārējie saglabāti un notīrīti vienā piegājienā
+    """
+    # SETUP - viens derīgs un divi nederīgi jautājumi
+    data = {'assignments': [
+        {'title': 'Uzdevums', 'description': 'Apraksts', 'max_points': 4,
+         'questions': [make_question(points='divi'), make_question()]},
+        {'title': 'Uzdevums 2', 'description': 'Apraksts', 'max_points': 1,
+         'questions': [make_question(question_type='essay')]}
+    ]}
+
+    # ACTION - glābj atbildi
+    full_pass = mocker.spy(CompiledTestValidator, '_assignment')
+    result, dropped = salvage_test_response(data)
+
+    # ASSERT - pārbauda rezultātu
+    assert len(result['assignments']) == 1, "Jāpaliek vienam uzdevumam"
+    assert len(result['assignments'][0]['questions']) == 1, "Jāpaliek vienam jautājumam"
+    assert result['assignments'][0]['questions'][0]['order_number'] == 1, "Numerācijai jābūt atjaunotai"
+    assert result['assignments'][0]['max_points'] == 4.0, "Punktiem jābūt float"
+    assert result['assignments'][0]['questions'][0]['options'][1] == {'option_text': 'B', 'is_correct': True}, \
+        "Variantiem jābūt objektiem"
+    assert full_pass.call_count == 0, "Koks nedrīkst tikt apstaigāts otrreiz"
+    assert [part['path'] for part in dropped] == [
+        '$.assignments[0].questions[0]',
+        '$.assignments[1].questions[0]',
+        '$.assignments[1]'
+    ], "Izmestajām daļām jābūt atzīmētām"
+
+
+def test_07_tolerant_parser_missing_comma_after_string():
+    """
+    Nr: 7
+    Testējamā funkcionalitāte: Trūkstoša komata labošana pēc teksta vērtības
+    Sagaidamais rezultāts: Nākamais lauks netiek iekļauts tekstā, pēdiņas teksta vidū paliek tekstā
+    """
+    # SETUP - atbildes ar trūkstošu komatu un pēdiņām tekstā
+    missing = '{"a": "b" "c": 1, "items": ["x"\n "y"]}'
+    quoted = '{"question_text": "Kas ir "fotosintēze"?", "points": 2}'
+
+    # ACTION - parsē atbildes
+    missing_result = parse_tolerant(missing)
+    quoted_result = parse_tolerant(quoted)
+
+    # ASSERT - pārbauda rezultātu
+    assert missing_result.data == {'a': 'b', 'c': 1, 'items': ['x', 'y']}, "Laukam c jāsaglabājas"
+    assert missing_result.repairs['missing_comma'] == 2, "Jāatskaitās par trūkstošajiem komatiem"
+    assert 'unescaped_quote' not in missing_result.repairs, "Pēdiņas nedrīkst uzskatīt par tekstu"
+    assert quoted_result.data == {'question_text': 'Kas ir "fotosintēze"?', 'points': 2}, \
+        "Pēdiņām teksta vidū jāpaliek tekstā"
@@ -0,0 +1,133 @@
+"""
+MODUĻA 12: Meklēšanas testi
+4 testi pilna teksta meklēšanai, fragmentiem un automātiskajai pabeigšanai
+"""
+from extensions import db
+from models import User, StudyMaterial, Question
+
+
+def _add_study_material(user_id, title, summary, terms):
+    material = StudyMaterial(user_id=user_id, title=title)
+    material.content_data = {'summary': summary, 'terms': terms}
+    db.session.add(material)
+    db.session.commit()
+    return material.id
+
+
+def test_01_search_ranks_and_highlights(auth_client, test_test_material, test_user, app):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Meklēšana testu jautājumos, materiālu kopsavilkumos un terminos
+    Sagaidamais rezultāts: Virsraksta atbilstība ir augstāk, fragmentos atrastie vārdi iezīmēti, citu lietotāju materiāli netiek atrasti
+    """
+    # SETUP - materiāli diviem lietotājiem
+    with app.app_context():
+        in_title = _add_study_material(test_user['id'], 'Python pamati', '<p>Ievads</p>', [])
+        in_summary = _add_study_material(
+            test_user['id'], 'Valodas', '<p>Python ir <b>programmēšanas</b> valoda</p>',
+            [{'name': 'Interpretators', 'definition': 'Izpilda <Python> kodu'}]
+        )
+        other = User(email='cits@test.lv', password_hash='-')
+        db.session.add(other)
+        db.session.commit()
+        _add_study_material(other.id, 'Python citam', '', [])
+
+    # ACTION - meklē vārdu bez diakritikas
+    response = auth_client.get('/api/search?q=python&prefix=false')
+
+    # ASSERT - pārbauda rezultātu
+    assert response.status_code == 200, "Meklēšanai jāizdodas"
+    results = response.get_json()['results']
+    keys = [(result['type'], result['id']) for result in results]
+    assert keys[0] == ('study_material', in_title), "Virsraksta atbilstībai jābūt pirmajai"
+    assert set(keys) == {('study_material', in_title), ('study_material', in_summary),
+                         ('test', test_test_material['test_id'])}, "Jāatrod tikai savi materiāli"
+
+    summary_result = results[keys.index(('study_material', in_summary))]
+    assert summary_result['title'] == 'Valodas', "Rezultātam jābūt virsrakstam"
+    fields = {match['field']: match['snippet'] for match in summary_result['matches']}
+    assert fields['summary'] == '<mark>Python</mark> ir programmēšanas valoda', "Kopsavilkums bez HTML ar iezīmi"
+    assert fields['terms'] == 'Interpretators — Izpilda &lt;<mark>Python</mark>&gt; kodu', "Teksts jāeskeipo"
+
+    test_result = results[keys.index(('test', test_test_material['test_id']))]
+    assert test_result['matches'][0]['field'] == 'question', "Testam jāatrod jautājums"
+
+    # ACTION - meklē ar diakritiku un tipa filtru
+    response = auth_client.get('/api/search?q=programmēšanas&type=study_material')
+    assert [result['id'] for result in response.get_json()['results']] == [in_summary], \
+        "Jāatrod materiāls ar diakritiku"
+
+
+def test_02_prefix_autocomplete(auth_client, test_user, app):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Prefiksa meklēšana un virsrakstu automātiskā pabeigšana
+    Sagaidamais rezultāts: Nepabeigts pēdējais vārds atrod garākus vārdus, ieteikumos ir tikai virsraksti
+    """
+    # SETUP - materiāli
+    with app.app_context():
+        photo = _add_study_material(test_user['id'], 'Fotosintēze augos', '<p>Hlorofils</p>', [])
+        _add_study_material(test_user['id'], 'Šūnas uzbūve', '<p>Fotosintēze notiek hloroplastos</p>', [])
+
+    # ACTION - meklē pēc vārda sākuma
+    search = auth_client.get('/api/search?q=augos foto').get_json()
+    suggestions = auth_client.get('/api/search/suggest?q=fot').get_json()['suggestions']
+
+    # ASSERT - pārbauda rezultātu
+    assert [result['id'] for result in search['results']] == [photo], "Visiem vārdiem jāsakrīt"
+    assert suggestions == [{'id': photo, 'type': 'study_material', 'title': 'Fotosintēze augos'}], \
+        "Ieteikumos jābūt tikai virsrakstam ar prefiksu"
+
+
+def test_03_index_follows_writes(auth_client, test_test_material, test_study_material, app):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Indeksa sinhronizācija pēc labošanas un dzēšanas
+    Sagaidamais rezultāts: Labots jautājums un materiāls atrodams pēc jaunā teksta, dzēsti materiāli netiek atrasti
+    """
+    # ACTION - labo jautājumu un materiālu
+    with app.app_context():
+        question = db.session.get(Question, test_test_material['question_id'])
+        question.question_text = 'Kas ir Rust?'
+        material = db.session.get(StudyMaterial, test_study_material['material_id'])
+        material.content_data = {'summary': '<p>Jauns kopsavilkums par mitohondrijiem</p>', 'terms': []}
+        db.session.commit()
+
+    def found(query):
+        return {(result['type'], result['id'])
+                for result in auth_client.get(f'/api/search?q={query}').get_json()['results']}
+
+    # ASSERT - pārbauda rezultātu
+    assert found('rust') == {('test', test_test_material['test_id'])}, "Jāatrod labotais jautājums"
+    assert found('python') == set(), "Vecais jautājuma teksts nedrīkst tikt atrasts"
+    assert found('mitohondrijiem') == {('study_material', test_study_material['material_id'])}, \
+        "Jāatrod labotais kopsavilkums"
+
+    # ACTION - dzēš abus materiālus
+    auth_client.delete('/api/materials', json={'materials': [
+        {'id': test_test_material['test_id'], 'type': 'test'},
+        {'id': test_study_material['material_id'], 'type': 'study_material'}
+    ]})
+
+    # DB CHECK - indekss ir tukšs
+    with app.app_context():
+        assert db.session.execute(db.text('SELECT count(*) FROM search_index')).scalar() == 0, \
+            "Dzēstiem materiāliem jāpazūd no indeksa"
+
+
+def test_04_invalid_queries(auth_client):
+    """
+    Nr: 4
+    Testējamā funkcionalitāte: Nederīgi meklēšanas pieprasījumi
+    Sagaidamais rezultāts: Vaicājums bez vārdiem un nederīgi parametri atgriež 400, FTS operatori tiek meklēti kā teksts
+    """
+    # ACTION / ASSERT - nederīgi parametri
+    assert auth_client.get('/api/search?q=').status_code == 400, "Tukšs vaicājums jānoraida"
+    assert auth_client.get('/api/search?q=***').status_code == 400, "Vaicājums bez vārdiem jānoraida"
+    assert auth_client.get('/api/search?q=a&limit=0').status_code == 400, "Nederīgs limits jānoraida"
+    assert auth_client.get('/api/search?q=a&type=user').status_code == 400, "Nederīgs tips jānoraida"
+
+    # ACTION / ASSERT - FTS sintakse netiek interpretēta
+    response = auth_client.get('/api/search?q=NEAR(owner:u1 OR "x")')
+    assert response.status_code == 200, "Operatoriem jātiek meklētiem kā tekstam"
+    assert response.get_json()['results'] == [], "Nedrīkst atrast materiālus"
@@ -0,0 +1,175 @@
+"""
+MODUĻA 14: Šardēšanas testi
+3 testi materiālu sadalīšanai pa lietotāju šardiem un pārvietošanai starp tiem
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from sqlalchemy import text
+from extensions import db
+from models import User
+from services.cold_storage import archive_materials
+from services.write_coordinator import WriteCoordinator, EXTENSION_KEY, SHARD_EXTENSION_KEY
+from sharding import EXTENSION_KEY as SHARDS_KEY, rebalance, shard_engine
+
+TEST_DATA = {
+    'assignments': [{
+        'title': '1. uzdevums',
+        'description': 'Apraksts',
+        'max_points': 5,
+        'questions': [{
+            'question_text': 'Kas ir fotosintēze?',
+            'question_type': 'multiple_choice',
+            'correct_answer': 'A',
+            'points': 5,
+            'options': [{'option_text': 'Process augos', 'is_correct': True}]
+        }]
+    }]
+}
+
+
+@pytest.fixture
+def sharded_app(app, tmp_path, mocker):
+    """Aplikācija ar 2 šardiem pagaidu mapē un Claude API mock"""
+    app.config.update({'DB_SHARDS': 2, 'DB_SHARD_DIR': str(tmp_path)})
+    mock_client = Mock()
+    mock_client.generate_test = Mock(return_value=TEST_DATA)
+    mocker.patch('routes.generate.get_claude_client', return_value=mock_client)
+
+    yield app
+
+    app.config.update({'DB_SHARDS': 0, 'DB_SHARD_DIR': None})
+    for coordinator in app.extensions.pop(SHARD_EXTENSION_KEY, {}).values():
+        coordinator.stop()
+    app.extensions.pop(EXTENSION_KEY, None)
+    for engine in app.extensions.pop(SHARDS_KEY, {}).values():
+        engine.dispose()
+
+
+def _register(app, email):
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={'email': email, 'password': 'parole123'})
+    return client, response.get_json()['user']['id']
+
+
+def _generate_test(client, title):
+    response = client.post('/api/generate', data={
+        'material_type': 'test', 'title': title, 'content': 'Fotosintēze notiek augos. ' * 50
+    })
+    assert response.status_code == 201, "Ģenerēšanai jāizdodas"
+    return response.get_json()['id']
+
+
+def _count(engine, table):
+    with engine.connect() as connection:
+        return connection.execute(text(f'SELECT count(*) FROM {table}')).scalar()
+
+
+def test_01_users_write_to_own_shard(sharded_app, client):
+    """
+    Nr: 1
+    Testējamā funkcionalitāte: Jaunu lietotāju materiālu saglabāšana viņu šardā
+    Sagaidamais rezultāts: Lietotāji sadalīti pa šardiem, materiāli tikai šarda failā, katrs redz un atrod tikai savus
+    """
+    # SETUP - divi lietotāji
+    first, first_id = _register(sharded_app, 'pirmais@test.lv')
+    second, second_id = _register(sharded_app, 'otrais@test.lv')
+
+    # ACTION - abi ģenerē testu
+    first_test = _generate_test(first, 'Pirmā tests')
+    second_test = _generate_test(second, 'Otrā tests')
+
+    # ASSERT - pārbauda rezultātu
+    with sharded_app.app_context():
+        shards = dict(db.session.execute(db.select(User.id, User.shard)).all())
+        assert shards == {first_id: first_id % 2, second_id: second_id % 2}, "Lietotājiem jābūt savos šardos"
+        assert _count(db.engine, 'tests') == 0, "Galvenajā datu bāzē nedrīkst būt materiālu"
+        for user_id in (first_id, second_id):
+            engine = shard_engine(sharded_app, user_id % 2)
+            assert _count(engine, 'tests') == 1, "Katrā šardā jābūt vienam testam"
+            assert _count(engine, 'questions') == 1, "Šardā jābūt testa jautājumiem"
+
+    listing = first.get('/api/materials').get_json()['materials']
+    assert [material['id'] for material in listing] == [first_test], "Sarakstā jābūt tikai savam testam"
+    first_response = first.get(f'/api/materials/{first_test}?type=test')
+    assert first_response.status_code == 200, "Savs tests jāatver"
+    assert first_test == second_test, "Katrs šards piešķir ID atsevišķi"
+    response = second.get(f'/api/materials/{second_test}?type=test',
+                          headers={'If-None-Match': first_response.headers['ETag']})
+    assert response.status_code == 200, "Cita lietotāja ETag nedrīkst atbilst savam testam"
+    assert response.get_json()['title'] == 'Otrā tests', "Jāatgriež savs tests"
+    results = second.get('/api/search?q=fotosintēze').get_json()['results']
+    assert [result['id'] for result in results] == [second_test], "Meklēšanai jāatrod tests savā šardā"
+
+
+def test_02_rebalance_moves_trees(sharded_app, auth_client, test_user, test_test_material, test_study_material):
+    """
+    Nr: 2
+    Testējamā funkcionalitāte: Esoša lietotāja materiālu pārvietošana no galvenās datu bāzes uz šardu
+    Sagaidamais rezultāts: Koki pārvietoti, aizņemtie ID nobīdīti, arhīva atsauces un meklēšana turpina strādāt
+    """
+    # SETUP - materiāli galvenajā datu bāzē, mācību materiāls arhivēts
+    sharded_app.config['DB_SHARDS'] = 1
+    with sharded_app.app_context():
+        archive_materials(now=datetime.utcnow() + timedelta(days=365))
+    auth_client.get(f"/api/materials/{test_test_material['test_id']}?type=test")
+
+    # SETUP - cits lietotājs šardā aizņem tos pašus testa ID
+    other, _ = _register(sharded_app, 'cits@test.lv')
+    other_test = _generate_test(other, 'Cita tests')
+    assert other_test == test_test_material['test_id'], "Testa ID jāsakrīt, lai pārbaudītu nobīdi"
+
+    # ACTION - pārvieto lietotājus uz mājas šardu
+    with sharded_app.app_context():
+        moves = rebalance(sharded_app)
+
+    # ASSERT - pārbauda rezultātu
+    assert moves == [(test_user['id'], None, 0)], f"Jāpārvieto tikai galvenās datu bāzes lietotājs: {moves}"
+    with sharded_app.app_context():
+        assert _count(db.engine, 'tests') == 0, "Galvenajai datu bāzei jābūt tukšai"
+        assert _count(db.engine, 'archived_materials') == 0, "Arhīvam jābūt pārvietotam"
+        assert _count(shard_engine(sharded_app, 0), 'tests') == 2, "Šardā jābūt abiem testiem"
+
+    materials = {material['type']: material for material in auth_client.get('/api/materials').get_json()['materials']}
+    moved_test = materials['test']['id']
+    assert moved_test != other_test, "Aizņemtajam ID jābūt nobīdītam"
+    assert materials['study_material']['id'] == test_study_material['material_id'], "Brīvajam ID jāsaglabājas"
+    assert materials['study_material']['archived'] is True, "Arhivētajam materiālam jāpaliek arhivētam"
+
+    test = auth_client.get(f'/api/materials/{moved_test}?type=test').get_json()
+    question = test['assignments'][0]['questions'][0]
+    assert question['options'][0]['option_text'] == 'Programmēšanas valoda', "Kokam jābūt pārvietotam"
+    material = auth_client.get(f"/api/materials/{test_study_material['material_id']}?type=study_material")
+    assert material.get_json()['content']['terms'][0]['name'] == 'Termins 1', "Arhīvam jāatjaunojas šardā"
+
+    results = auth_client.get('/api/search?q=python').get_json()['results']
+    assert [(result['type'], result['id']) for result in results] == [('test', moved_test)], \
+        "Meklēšanai jāatrod pārvietotais tests"
+    other_listing = other.get('/api/materials').get_json()['materials']
+    assert [item['id'] for item in other_listing] == [other_test], "Cita lietotāja materiāli nemainās"
+
+
+def test_03_write_queue_per_shard(sharded_app, tmp_path):
+    """
+    Nr: 3
+    Testējamā funkcionalitāte: Rakstīšanas rinda katram šardam
+    Sagaidamais rezultāts: Katram šardam savs rakstītāja pavediens, materiāli saglabāti pareizajā šardā
+    """
+    # SETUP - ieslēgta rakstīšanas rinda
+    sharded_app.extensions[EXTENSION_KEY] = WriteCoordinator(sharded_app, lock_path=str(tmp_path / 'main.write-lock'))
+    first, first_id = _register(sharded_app, 'pirmais@test.lv')
+    second, second_id = _register(sharded_app, 'otrais@test.lv')
+
+    # ACTION - abi ģenerē testus
+    for i in range(2):
+        _generate_test(first, f'Pirmā tests {i}')
+        _generate_test(second, f'Otrā tests {i}')
+
+    # ASSERT - pārbauda rezultātu
+    coordinators = sharded_app.extensions[SHARD_EXTENSION_KEY]
+    assert sorted(coordinators) == [0, 1], "Katram šardam jābūt savam rakstītājam"
+    assert sharded_app.extensions[EXTENSION_KEY].jobs == 0, "Galvenās datu bāzes rakstītājs netiek izmantots"
+    with sharded_app.app_context():
+        for user_id in (first_id, second_id):
+            assert coordinators[user_id % 2].jobs == 2, "Šarda rakstītājam jāsaglabā lietotāja testi"
+            assert _count(shard_engine(sharded_app, user_id % 2), 'tests') == 2, "Testiem jābūt lietotāja šardā"
@@ -13,7 +13,7 @@ const Create: React.FC = () => {
   const [title, setTitle] = useState('');
   const [inputMethod, setInputMethod] = useState<'text' | 'file'>('text');
   const [content, setContent] = useState('');
-  const [file, setFile] = useState<File | null>(null);
+  const [files, setFiles] = useState<File[]>([]);
 
   // Test-specific options
   const [numQuestions, setNumQuestions] = useState(10);
@@ -24,15 +24,18 @@ const Create: React.FC = () => {
   const [error, setError] = useState('');
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
-    const selectedFile = e.target.files?.[0];
-    if (selectedFile) {
-      // Validate file type
+    const selectedFiles = Array.from(e.target.files ?? []);
+    if (selectedFiles.length > 0) {
+      // Validate file types
       const validTypes = ['application/pdf', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'text/plain'];
-      if (!validTypes.includes(selectedFile.type) && !selectedFile.name.match(/\.(pdf|docx|txt)$/i)) {
-        setError('Lūdzu augšupielādējiet PDF, DOCX vai TXT failu');
+      const invalidFile = selectedFiles.find(
+        (selectedFile) => !validTypes.includes(selectedFile.type) && !selectedFile.name.match(/\.(pdf|docx|txt)$/i)
+      );
+      if (invalidFile) {
+        setError('Lūdzu augšupielādējiet PDF, DOCX vai TXT failus');
         return;
       }
-      setFile(selectedFile);
+      setFiles(selectedFiles);
       setError('');
     }
   };
@@ -52,7 +55,7 @@ const Create: React.FC = () => {
       return;
     }
 
-    if (inputMethod === 'file' && !file) {
+    if (inputMethod === 'file' && files.length === 0) {
       setError('Lūdzu izvēlieties failu');
       return;
     }
@@ -68,7 +71,7 @@ const Create: React.FC = () => {
       if (inputMethod === 'text') {
         formData.append('content', content.trim());
       } else {
-        formData.append('file', file!);
+        files.forEach((selectedFile) => formData.append('files', selectedFile));
       }
 
       // Add test-specific options
@@ -256,6 +259,7 @@ const Create: React.FC = () => {
                 <div>
                   <input
                     type="file"
+                    multiple
                     onChange={handleFileChange}
                     disabled={loading}
                     accept=".pdf,.docx,.txt"
@@ -269,11 +273,11 @@ const Create: React.FC = () => {
                       cursor: 'pointer'
                     }}
                   />
-                  {file && (
-                    <p style={{ marginTop: '10px', color: '#666', fontSize: '14px' }}>
-                      Izvēlēts: {file.name} ({(file.size / 1024).toFixed(1)} KB)
+                  {files.map((selectedFile) => (
+                    <p key={selectedFile.name} style={{ marginTop: '10px', color: '#666', fontSize: '14px' }}>
+                      Izvēlēts: {selectedFile.name} ({(selectedFile.size / 1024).toFixed(1)} KB)
                     </p>
-                  )}
+                  ))}
                 </div>
               )}
             </div>
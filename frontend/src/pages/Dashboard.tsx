@@ -12,27 +12,120 @@ interface Material {
   title: string;
   type: 'test' | 'study_material';
   created_at: string;
+  assignments_count?: number;
+  total_questions?: number;
+  terms_count?: number;
+  summary_preview?: string;
+  archived?: boolean;
 }
 
+interface MaterialFilters {
+  type: '' | 'test' | 'study_material';
+  title: string;
+  createdFrom: string;
+  createdTo: string;
+}
+
+interface SearchResult {
+  id: number;
+  type: 'test' | 'study_material';
+  title: string;
+  created_at: string;
+  matches: { field: string; snippet: string }[];
+}
+
+interface Suggestion {
+  id: number;
+  type: 'test' | 'study_material';
+  title: string;
+}
+
+const PAGE_SIZE = 24;
+const SEARCH_MIN_LENGTH = 2;
+
+const searchFieldLabels: Record<string, string> = {
+  title: 'Nosaukums',
+  question: 'Jautājums',
+  summary: 'Kopsavilkums',
+  terms: 'Termini'
+};
+
+const materialKey = (material: Pick<Material, 'id' | 'type'>) => `${material.type}-${material.id}`;
+
+const emptyFilters: MaterialFilters = { type: '', title: '', createdFrom: '', createdTo: '' };
+
+const filterInputStyle: React.CSSProperties = {
+  padding: '8px 12px',
+  border: '1px solid #ccc',
+  borderRadius: '4px',
+  fontSize: '14px'
+};
+
 const Dashboard: React.FC = () => {
   const { user, logout } = useAuth();
   const navigate = useNavigate();
 
   const [materials, setMaterials] = useState<Material[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const [deletingId, setDeletingId] = useState<number | null>(null);
+  const [selected, setSelected] = useState<Set<string>>(new Set());
+  const [bulkDeleting, setBulkDeleting] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [filters, setFilters] = useState<MaterialFilters>(emptyFilters);
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState<SearchResult[] | null>(null);
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
 
   useEffect(() => {
-    fetchMaterials();
-  }, []);
+    const query = searchQuery.trim();
+    if (query.length < SEARCH_MIN_LENGTH) {
+      setSearchResults(null);
+      setSuggestions([]);
+      return;
+    }
+
+    // Search as the user types, once typing pauses
+    const timer = window.setTimeout(async () => {
+      try {
+        const [searchResponse, suggestResponse] = await Promise.all([
+          api.get('/api/search', { params: { q: query } }),
+          api.get('/api/search/suggest', { params: { q: query } })
+        ]);
+        setSearchResults(searchResponse.data.results);
+        setSuggestions(suggestResponse.data.suggestions);
+      } catch (err: any) {
+        setSearchResults([]);
+        setSuggestions([]);
+      }
+    }, 250);
+    return () => window.clearTimeout(timer);
+  }, [searchQuery]);
+
+  useEffect(() => {
+    // Wait until the user stops typing before querying by title
+    const timer = window.setTimeout(() => fetchMaterials(), filters.title ? 300 : 0);
+    return () => window.clearTimeout(timer);
+  }, [filters]);
+
+  const buildParams = (cursor: string | null) => {
+    const params: Record<string, string | number> = { limit: PAGE_SIZE };
+    if (cursor) params.cursor = cursor;
+    if (filters.type) params.type = filters.type;
+    if (filters.title.trim()) params.title = filters.title.trim();
+    if (filters.createdFrom) params.created_from = filters.createdFrom;
+    if (filters.createdTo) params.created_to = filters.createdTo;
+    return params;
+  };
 
   const fetchMaterials = async () => {
     try {
       setLoading(true);
       setError('');
-      const response = await api.get('/api/materials');
+      const response = await api.get('/api/materials', { params: buildParams(null) });
       setMaterials(response.data.materials);
+      setNextCursor(response.data.next_cursor);
     } catch {
       setError('Neizdevās ielādēt materiālus');
     } finally {
@@ -40,6 +133,28 @@ const Dashboard: React.FC = () => {
     }
   };
 
+  const fetchMoreMaterials = async () => {
+    if (!nextCursor) return;
+
+    try {
+      setLoadingMore(true);
+      setError('');
+      const response = await api.get('/api/materials', { params: buildParams(nextCursor) });
+      setMaterials(current => [...current, ...response.data.materials]);
+      setNextCursor(response.data.next_cursor);
+    } catch {
+      setError('Neizdevās ielādēt materiālus');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const updateFilter = (field: keyof MaterialFilters, value: string) => {
+    setFilters(current => ({ ...current, [field]: value }));
+  };
+
+  const hasFilters = filters.type !== '' || filters.title !== '' || filters.createdFrom !== '' || filters.createdTo !== '';
+
   const handleDelete = async (id: number, type: 'test' | 'study_material') => {
     if (!window.confirm('Vai tiešām vēlaties dzēst šo materiālu?')) {
       return;
@@ -48,7 +163,7 @@ const Dashboard: React.FC = () => {
     try {
       setDeletingId(id);
       await api.delete(`/api/materials/${id}?type=${type}`);
-      setMaterials(materials.filter(m => m.id !== id));
+      setMaterials(materials.filter(m => materialKey(m) !== materialKey({ id, type })));
     } catch {
       alert('Neizdevās dzēst materiālu');
     } finally {
@@ -56,6 +171,39 @@ const Dashboard: React.FC = () => {
     }
   };
 
+  const toggleSelected = (material: Material) => {
+    setSelected(current => {
+      const next = new Set(current);
+      const key = materialKey(material);
+      if (next.has(key)) {
+        next.delete(key);
+      } else {
+        next.add(key);
+      }
+      return next;
+    });
+  };
+
+  const handleBulkDelete = async () => {
+    if (!window.confirm(`Vai tiešām vēlaties dzēst ${selected.size} materiālus?`)) {
+      return;
+    }
+
+    try {
+      setBulkDeleting(true);
+      const items = materials
+        .filter(m => selected.has(materialKey(m)))
+        .map(m => ({ id: m.id, type: m.type }));
+      await api.delete('/api/materials', { data: { materials: items } });
+      setMaterials(materials.filter(m => !selected.has(materialKey(m))));
+      setSelected(new Set());
+    } catch {
+      alert('Neizdevās dzēst materiālus');
+    } finally {
+      setBulkDeleting(false);
+    }
+  };
+
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
     return date.toLocaleDateString('en-US', {
@@ -131,6 +279,142 @@ const Dashboard: React.FC = () => {
           </button>
         </div>
 
+        <div style={{ marginBottom: '20px' }}>
+          <input
+            type="search"
+            list="search-suggestions"
+            placeholder="Meklēt jautājumos, kopsavilkumos un terminos"
+            value={searchQuery}
+            onChange={(e) => setSearchQuery(e.target.value)}
+            style={{ ...filterInputStyle, width: '100%', maxWidth: '520px', boxSizing: 'border-box' }}
+          />
+          <datalist id="search-suggestions">
+            {suggestions.map((suggestion) => (
+              <option key={materialKey(suggestion)} value={suggestion.title} />
+            ))}
+          </datalist>
+        </div>
+
+        {searchResults !== null && (
+          <div style={{ marginBottom: '30px' }}>
+            {searchResults.length === 0 && (
+              <div style={{ padding: '20px 0', color: '#666' }}>Nekas netika atrasts</div>
+            )}
+            {searchResults.map((result) => (
+              <div
+                key={materialKey(result)}
+                onClick={() => navigate(`/materials/${result.id}?type=${result.type}`)}
+                style={{
+                  backgroundColor: 'white',
+                  borderRadius: '8px',
+                  padding: '15px 20px',
+                  marginBottom: '10px',
+                  boxShadow: '0 2px 4px rgba(0,0,0,0.1)',
+                  cursor: 'pointer'
+                }}
+              >
+                <div style={{ display: 'flex', alignItems: 'center', gap: '10px', marginBottom: '6px' }}>
+                  <span style={{
+                    padding: '2px 10px',
+                    backgroundColor: getMaterialTypeColor(result.type),
+                    color: 'white',
+                    borderRadius: '12px',
+                    fontSize: '12px',
+                    fontWeight: 'bold'
+                  }}>
+                    {getMaterialTypeLabel(result.type)}
+                  </span>
+                  <strong style={{ color: '#333' }}>{result.title}</strong>
+                </div>
+                {result.matches.filter((match) => match.field !== 'title').map((match, index) => (
+                  <p key={index} style={{ margin: '4px 0 0', fontSize: '14px', color: '#666' }}>
+                    <span style={{ color: '#999' }}>{searchFieldLabels[match.field]}: </span>
+                    {/* Snippets are HTML-escaped by the server, only <mark> tags are added */}
+                    <span dangerouslySetInnerHTML={{ __html: match.snippet }} />
+                  </p>
+                ))}
+              </div>
+            ))}
+          </div>
+        )}
+
+        <div style={{
+          display: 'flex',
+          flexWrap: 'wrap',
+          gap: '10px',
+          alignItems: 'center',
+          marginBottom: '20px'
+        }}>
+          <input
+            type="text"
+            placeholder="Meklēt pēc nosaukuma"
+            value={filters.title}
+            onChange={(e) => updateFilter('title', e.target.value)}
+            style={{ ...filterInputStyle, minWidth: '220px' }}
+          />
+          <select
+            value={filters.type}
+            onChange={(e) => updateFilter('type', e.target.value)}
+            style={filterInputStyle}
+          >
+            <option value="">Visi materiāli</option>
+            <option value="test">Testi</option>
+            <option value="study_material">Mācību materiāli</option>
+          </select>
+          <label style={{ fontSize: '14px', color: '#666' }}>
+            No{' '}
+            <input
+              type="date"
+              value={filters.createdFrom}
+              onChange={(e) => updateFilter('createdFrom', e.target.value)}
+              style={filterInputStyle}
+            />
+          </label>
+          <label style={{ fontSize: '14px', color: '#666' }}>
+            Līdz{' '}
+            <input
+              type="date"
+              value={filters.createdTo}
+              onChange={(e) => updateFilter('createdTo', e.target.value)}
+              style={filterInputStyle}
+            />
+          </label>
+          {hasFilters && (
+            <button
+              onClick={() => setFilters(emptyFilters)}
+              style={{
+                padding: '8px 16px',
+                backgroundColor: 'white',
+                color: '#333',
+                border: '1px solid #ccc',
+                borderRadius: '4px',
+                cursor: 'pointer',
+                fontSize: '14px'
+              }}
+            >
+              Notīrīt filtrus
+            </button>
+          )}
+          {selected.size > 0 && (
+            <button
+              onClick={handleBulkDelete}
+              disabled={bulkDeleting}
+              style={{
+                marginLeft: 'auto',
+                padding: '8px 16px',
+                backgroundColor: bulkDeleting ? '#ccc' : '#dc3545',
+                color: 'white',
+                border: 'none',
+                borderRadius: '4px',
+                cursor: bulkDeleting ? 'not-allowed' : 'pointer',
+                fontSize: '14px'
+              }}
+            >
+              {bulkDeleting ? 'Dzēš...' : `Dzēst atlasītos (${selected.size})`}
+            </button>
+          )}
+        </div>
+
         {error && (
           <div style={{
             backgroundColor: '#fee',
@@ -149,7 +433,13 @@ const Dashboard: React.FC = () => {
           </div>
         )}
 
-        {!loading && materials.length === 0 && (
+        {!loading && materials.length === 0 && hasFilters && (
+          <div style={{ textAlign: 'center', padding: '40px', color: '#666' }}>
+            Neviens materiāls neatbilst filtriem
+          </div>
+        )}
+
+        {!loading && materials.length === 0 && !hasFilters && (
           <div style={{
             backgroundColor: 'white',
             padding: '60px 40px',
@@ -188,7 +478,7 @@ const Dashboard: React.FC = () => {
           }}>
             {materials.map((material) => (
               <div
-                key={`${material.type}-${material.id}`}
+                key={materialKey(material)}
                 style={{
                   backgroundColor: 'white',
                   borderRadius: '8px',
@@ -208,6 +498,16 @@ const Dashboard: React.FC = () => {
                 }}
                 onClick={() => navigate(`/materials/${material.id}?type=${material.type}`)}
               >
+                {/* Selection */}
+                <input
+                  type="checkbox"
+                  checked={selected.has(materialKey(material))}
+                  onClick={(e) => e.stopPropagation()}
+                  onChange={() => toggleSelected(material)}
+                  aria-label="Atlasīt materiālu"
+                  style={{ position: 'absolute', top: '20px', right: '20px', cursor: 'pointer' }}
+                />
+
                 {/* Type Badge */}
                 <div style={{
                   display: 'inline-block',
@@ -222,6 +522,26 @@ const Dashboard: React.FC = () => {
                   {getMaterialTypeLabel(material.type)}
                 </div>
 
+                {/* Archive Badge */}
+                {material.archived && (
+                  <div
+                    title="Materiāls ilgi nav atvērts, tas tiks atjaunots atverot"
+                    style={{
+                      display: 'inline-block',
+                      padding: '4px 12px',
+                      marginLeft: '8px',
+                      backgroundColor: '#9e9e9e',
+                      color: 'white',
+                      borderRadius: '12px',
+                      fontSize: '12px',
+                      fontWeight: 'bold',
+                      marginBottom: '12px'
+                    }}
+                  >
+                    Arhivēts
+                  </div>
+                )}
+
                 {/* Title */}
                 <h3 style={{
                   margin: '0 0 10px',
@@ -232,6 +552,22 @@ const Dashboard: React.FC = () => {
                   {material.title}
                 </h3>
 
+                {/* Summary preview */}
+                {material.summary_preview && (
+                  <p style={{
+                    margin: '0 0 10px',
+                    fontSize: '14px',
+                    color: '#666',
+                    lineHeight: 1.4,
+                    overflow: 'hidden',
+                    display: '-webkit-box',
+                    WebkitLineClamp: 3,
+                    WebkitBoxOrient: 'vertical'
+                  }}>
+                    {material.summary_preview}
+                  </p>
+                )}
+
                 {/* Date */}
                 <p style={{
                   margin: '0 0 15px',
@@ -291,6 +627,26 @@ const Dashboard: React.FC = () => {
             ))}
           </div>
         )}
+
+        {!loading && nextCursor && (
+          <div style={{ textAlign: 'center', marginBottom: '40px' }}>
+            <button
+              onClick={fetchMoreMaterials}
+              disabled={loadingMore}
+              style={{
+                padding: '10px 24px',
+                backgroundColor: loadingMore ? '#ccc' : '#6c757d',
+                color: 'white',
+                border: 'none',
+                borderRadius: '4px',
+                cursor: loadingMore ? 'not-allowed' : 'pointer',
+                fontSize: '14px'
+              }}
+            >
+              {loadingMore ? 'Ielādē...' : 'Ielādēt vairāk'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -36,6 +36,7 @@ interface TestData {
   id: number;
   title: string;
   created_at: string;
+  version: number;
   assignments: Assignment[];
 }
 
@@ -47,6 +48,153 @@ interface StudyMaterialData {
   terms: Array<{ name: string; definition: string }>;
 }
 
+type EntityName = 'assignment' | 'question' | 'option';
+
+interface PatchOperation {
+  op: 'add' | 'update' | 'remove';
+  entity: EntityName;
+  id?: number;
+  parent_id?: number;
+  value?: Record<string, unknown>;
+}
+
+const ASSIGNMENT_FIELDS = ['title', 'description', 'max_points', 'order_number'] as const;
+const QUESTION_FIELDS = ['question_text', 'question_type', 'correct_answer', 'points', 'order_number'] as const;
+const OPTION_FIELDS = ['option_text', 'is_correct', 'order_number'] as const;
+
+// Distance between order numbers of appended rows, same as ORDER_GAP in backend/services/ordering.py
+const ORDER_GAP = 1024;
+
+const nextOrderNumber = (rows: { order_number: number }[]) =>
+  rows.reduce((largest, row) => Math.max(largest, row.order_number), 0) + ORDER_GAP;
+
+/**
+ * Swap a row with the next one. Only the two order numbers are exchanged,
+ * so saving updates two rows. Rows sharing a number (older tests) are
+ * spread ORDER_GAP apart first.
+ */
+const swapWithNext = <T extends { order_number: number }>(rows: T[], index: number): T[] => {
+  const swapped = [...rows];
+  const [first, second] = [swapped[index], swapped[index + 1]];
+  [swapped[index], swapped[index + 1]] = [second, first];
+
+  if (first.order_number === second.order_number) {
+    swapped.forEach((row, idx) => {
+      row.order_number = (idx + 1) * ORDER_GAP;
+    });
+  } else {
+    [first.order_number, second.order_number] = [second.order_number, first.order_number];
+  }
+  return swapped;
+};
+
+// Fields that differ between the saved and edited version of a row
+const changedFields = <T extends object>(saved: T, edited: T, fields: readonly (keyof T)[]) => {
+  const changes: Record<string, unknown> = {};
+  fields.forEach(field => {
+    if (saved[field] !== edited[field]) {
+      changes[field as string] = edited[field];
+    }
+  });
+  return changes;
+};
+
+const withoutIds = (question: Question) => ({
+  ...Object.fromEntries(QUESTION_FIELDS.map(field => [field, question[field]])),
+  options: (question.options || []).map(opt => Object.fromEntries(OPTION_FIELDS.map(field => [field, opt[field]])))
+});
+
+/**
+ * Build PATCH operations that turn the saved test into the edited one.
+ * Rows with IDs unknown to the server (temporary Date.now() IDs) are added.
+ */
+const buildTestOperations = (saved: TestData, edited: TestData): PatchOperation[] => {
+  const operations: PatchOperation[] = [];
+  const savedAssignments = new Map(saved.assignments.map(a => [a.id, a]));
+  const savedQuestions = new Map<number, Question>();
+  const savedOptions = new Map<number, QuestionOption>();
+  const questionParent = new Map<number, number>();
+  const optionParent = new Map<number, number>();
+
+  saved.assignments.forEach(a => a.questions.forEach(q => {
+    savedQuestions.set(q.id, q);
+    questionParent.set(q.id, a.id);
+    (q.options || []).forEach(opt => {
+      savedOptions.set(opt.id, opt);
+      optionParent.set(opt.id, q.id);
+    });
+  }));
+
+  const kept = new Set<number>();
+
+  edited.assignments.forEach(assignment => {
+    const savedAssignment = savedAssignments.get(assignment.id);
+    if (!savedAssignment) {
+      operations.push({
+        op: 'add',
+        entity: 'assignment',
+        value: {
+          ...Object.fromEntries(ASSIGNMENT_FIELDS.map(field => [field, assignment[field]])),
+          questions: assignment.questions.map(withoutIds)
+        }
+      });
+      return;
+    }
+
+    kept.add(assignment.id);
+    const assignmentChanges = changedFields(savedAssignment, assignment, ASSIGNMENT_FIELDS);
+    if (Object.keys(assignmentChanges).length > 0) {
+      operations.push({ op: 'update', entity: 'assignment', id: assignment.id, value: assignmentChanges });
+    }
+
+    assignment.questions.forEach(question => {
+      const savedQuestion = savedQuestions.get(question.id);
+      if (!savedQuestion || questionParent.get(question.id) !== assignment.id) {
+        operations.push({ op: 'add', entity: 'question', parent_id: assignment.id, value: withoutIds(question) });
+        return;
+      }
+
+      kept.add(question.id);
+      const questionChanges = changedFields(savedQuestion, question, QUESTION_FIELDS);
+      if (Object.keys(questionChanges).length > 0) {
+        operations.push({ op: 'update', entity: 'question', id: question.id, value: questionChanges });
+      }
+
+      (question.options || []).forEach(option => {
+        const savedOption = savedOptions.get(option.id);
+        if (!savedOption || optionParent.get(option.id) !== question.id) {
+          operations.push({
+            op: 'add',
+            entity: 'option',
+            parent_id: question.id,
+            value: Object.fromEntries(OPTION_FIELDS.map(field => [field, option[field]]))
+          });
+          return;
+        }
+
+        kept.add(option.id);
+        const optionChanges = changedFields(savedOption, option, OPTION_FIELDS);
+        if (Object.keys(optionChanges).length > 0) {
+          operations.push({ op: 'update', entity: 'option', id: option.id, value: optionChanges });
+        }
+      });
+    });
+  });
+
+  // Remove rows missing from the edited version (children of removed rows go with them)
+  savedAssignments.forEach((_, id) => {
+    if (!kept.has(id)) operations.push({ op: 'remove', entity: 'assignment', id });
+  });
+  savedQuestions.forEach((_, id) => {
+    if (!kept.has(id) && kept.has(questionParent.get(id)!)) operations.push({ op: 'remove', entity: 'question', id });
+  });
+  savedOptions.forEach((_, id) => {
+    if (!kept.has(id) && kept.has(optionParent.get(id)!)) operations.push({ op: 'remove', entity: 'option', id });
+  });
+
+  return operations;
+};
+
 const MaterialView: React.FC = () => {
   const navigate = useNavigate();
   const [searchParams] = useSearchParams();
@@ -54,6 +202,8 @@ const MaterialView: React.FC = () => {
   const materialType = searchParams.get('type') as 'test' | 'study_material';
 
   const [testData, setTestData] = useState<TestData | null>(null);
+  // Last saved version of the test, used to send only the changes
+  const [savedTestData, setSavedTestData] = useState<TestData | null>(null);
   const [studyMaterialData, setStudyMaterialData] = useState<StudyMaterialData | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -72,26 +222,31 @@ const MaterialView: React.FC = () => {
       fetchMaterial();
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, []);
+  }, [materialId, materialType]);
+
+  // Show material as returned by GET or by a save (PUT/PATCH return the same format)
+  const showMaterial = (material: TestData & { content?: { summary?: string; terms?: StudyMaterialData['terms'] } }) => {
+    if (materialType === 'test') {
+      setTestData(material);
+      setSavedTestData(structuredClone(material));
+    } else {
+      const { id, title, created_at, content } = material;
+      setStudyMaterialData({
+        id,
+        title,
+        created_at,
+        summary: content?.summary || '',
+        terms: content?.terms || []
+      });
+    }
+  };
 
   const fetchMaterial = async () => {
     try {
       setLoading(true);
       setError('');
       const response = await api.get(`/api/materials/${materialId}?type=${materialType}`);
-
-      if (materialType === 'test') {
-        setTestData(response.data);
-      } else {
-        const { id, title, created_at, content } = response.data;
-        setStudyMaterialData({
-          id,
-          title,
-          created_at,
-          summary: content?.summary || '',
-          terms: content?.terms || []
-        });
-      }
+      showMaterial(response.data);
     } catch (err) {
       const error = err as { response?: { data?: { error?: string } } };
       setError(error.response?.data?.error || 'Neizdevās ielādēt materiālu');
@@ -110,8 +265,12 @@ const MaterialView: React.FC = () => {
       setSaving(true);
 
       let data;
-      if (materialType === 'test') {
-        data = { type: 'test', ...testData };
+      if (materialType === 'test' && testData && savedTestData) {
+        data = {
+          type: 'test',
+          title: testData.title,
+          operations: buildTestOperations(savedTestData, testData)
+        };
       } else {
         data = {
           type: 'study_material',
@@ -123,10 +282,9 @@ const MaterialView: React.FC = () => {
         };
       }
 
-      await api.put(`/api/materials/${materialId}`, data);
-
-      // Reload data from server to get real database IDs
-      await fetchMaterial();
+      // Response contains the saved material with real database IDs
+      const response = await api.patch(`/api/materials/${materialId}`, data);
+      showMaterial(response.data);
 
       setEditMode(false);
       alert('Izmaiņas saglabātas veiksmīgi!');
@@ -138,6 +296,15 @@ const MaterialView: React.FC = () => {
     }
   };
 
+  const handleClone = async () => {
+    try {
+      const response = await api.post(`/api/materials/${materialId}/clone`);
+      navigate(`/materials/${response.data.id}?type=test`);
+    } catch {
+      alert('Neizdevās izveidot kopiju');
+    }
+  };
+
   const handleDelete = async () => {
     if (!window.confirm('Vai tiešām vēlaties dzēst šo materiālu?')) {
       return;
@@ -336,14 +503,7 @@ const MaterialView: React.FC = () => {
     const index = testData.assignments.findIndex(a => a.id === assignmentId);
     if (index <= 0) return;
 
-    const newAssignments = [...testData.assignments];
-    [newAssignments[index - 1], newAssignments[index]] = [newAssignments[index], newAssignments[index - 1]];
-
-    newAssignments.forEach((assignment, idx) => {
-      assignment.order_number = idx + 1;
-    });
-
-    setTestData({ ...testData, assignments: newAssignments });
+    setTestData({ ...testData, assignments: swapWithNext(testData.assignments, index - 1) });
   };
 
   const moveAssignmentDown = (assignmentId: number) => {
@@ -352,14 +512,7 @@ const MaterialView: React.FC = () => {
     const index = testData.assignments.findIndex(a => a.id === assignmentId);
     if (index < 0 || index >= testData.assignments.length - 1) return;
 
-    const newAssignments = [...testData.assignments];
-    [newAssignments[index], newAssignments[index + 1]] = [newAssignments[index + 1], newAssignments[index]];
-
-    newAssignments.forEach((assignment, idx) => {
-      assignment.order_number = idx + 1;
-    });
-
-    setTestData({ ...testData, assignments: newAssignments });
+    setTestData({ ...testData, assignments: swapWithNext(testData.assignments, index) });
   };
 
   const moveQuestionUp = (assignmentId: number, questionId: number) => {
@@ -370,14 +523,7 @@ const MaterialView: React.FC = () => {
         const index = assignment.questions.findIndex(q => q.id === questionId);
         if (index <= 0) return assignment;
 
-        const newQuestions = [...assignment.questions];
-        [newQuestions[index - 1], newQuestions[index]] = [newQuestions[index], newQuestions[index - 1]];
-
-        newQuestions.forEach((question, idx) => {
-          question.order_number = idx + 1;
-        });
-
-        return { ...assignment, questions: newQuestions };
+        return { ...assignment, questions: swapWithNext(assignment.questions, index - 1) };
       }
       return assignment;
     });
@@ -393,14 +539,7 @@ const MaterialView: React.FC = () => {
         const index = assignment.questions.findIndex(q => q.id === questionId);
         if (index < 0 || index >= assignment.questions.length - 1) return assignment;
 
-        const newQuestions = [...assignment.questions];
-        [newQuestions[index], newQuestions[index + 1]] = [newQuestions[index + 1], newQuestions[index]];
-
-        newQuestions.forEach((question, idx) => {
-          question.order_number = idx + 1;
-        });
-
-        return { ...assignment, questions: newQuestions };
+        return { ...assignment, questions: swapWithNext(assignment.questions, index) };
       }
       return assignment;
     });
@@ -416,7 +555,7 @@ const MaterialView: React.FC = () => {
       title: 'Jauns uzdevums',
       description: 'Uzdevuma apraksts',
       max_points: 0,
-      order_number: testData.assignments.length + 1,
+      order_number: nextOrderNumber(testData.assignments),
       questions: []
     };
 
@@ -437,7 +576,7 @@ const MaterialView: React.FC = () => {
           question_type: 'multiple_choice',
           correct_answer: '',
           points: 1,
-          order_number: assignment.questions.length + 1,
+          order_number: nextOrderNumber(assignment.questions),
           options: [
             { id: Date.now() + 1, option_text: 'Variants A', is_correct: false, order_number: 1 },
             { id: Date.now() + 2, option_text: 'Variants B', is_correct: false, order_number: 2 },
@@ -517,14 +656,15 @@ const MaterialView: React.FC = () => {
       let actualAssignmentId = selectedAssignmentId;
       let currentTestData = testData;
 
-      if (selectedAssignmentId > 100000) {
-        // Save the test first
-        const data = { type: 'test', ...testData };
-        await api.put(`/api/materials/${materialId}`, data);
-
-        // Reload to get real IDs
-        const reloadResponse = await api.get(`/api/materials/${materialId}?type=${materialType}`);
-        currentTestData = reloadResponse.data;
+      if (selectedAssignmentId > 100000 && savedTestData) {
+        // Save the test first, the response contains real IDs
+        const saveResponse = await api.patch(`/api/materials/${materialId}`, {
+          type: 'test',
+          title: testData.title,
+          operations: buildTestOperations(savedTestData, testData)
+        });
+        currentTestData = saveResponse.data;
+        setSavedTestData(structuredClone(currentTestData));
 
         // Find the assignment by title (since ID changed)
         const savedAssignment = currentTestData.assignments.find(
@@ -573,6 +713,14 @@ const MaterialView: React.FC = () => {
         assignments: updatedAssignments
       });
 
+      // Generated questions are already saved, so they are not part of the next diff
+      setSavedTestData(saved => saved && {
+        ...saved,
+        assignments: saved.assignments.map(a =>
+          a.id === actualAssignmentId ? { ...a, questions: [...a.questions, ...structuredClone(newQuestions)] } : a
+        )
+      });
+
       setShowAIDialog(false);
       setSelectedAssignmentId(null);
       alert(`Veiksmīgi pievienoti ${newQuestions.length} jauni jautājumi!`);
@@ -633,6 +781,21 @@ const MaterialView: React.FC = () => {
             </p>
           </div>
           <div style={{ display: 'flex', gap: '10px', flexWrap: 'wrap' }}>
+            {materialType === 'test' && (
+              <button
+                onClick={handleClone}
+                style={{
+                  padding: '10px 20px',
+                  backgroundColor: '#17a2b8',
+                  color: 'white',
+                  border: 'none',
+                  borderRadius: '4px',
+                  cursor: 'pointer'
+                }}
+              >
+                Kopēt
+              </button>
+            )}
             <button
               onClick={handleDelete}
               style={{